@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Ends notification streams when the browser tab goes away (see inventory.live_events)
+from inventory.live_events import DisconnectWatcher  # noqa: E402
+
+application = DisconnectWatcher(application)
@@ -2,6 +2,7 @@ import os
 import json
 from pathlib import Path
 from environ import Env
+from celery.schedules import crontab
 import firebase_admin
 from firebase_admin import auth, credentials
 
@@ -139,12 +140,18 @@ TEMPLATES = [
                 'core.context_processors.firebase_config',
                 'core.context_processors.home_url',
                 'core.context_processors.dashboard_url',
+                'core.context_processors.live_events_origin',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Origin of the ASGI service serving the live notification streams
+# (e.g. https://events.example.com). Empty = same host as the pages.
+LIVE_EVENTS_ORIGIN = env('LIVE_EVENTS_ORIGIN', default='')
 
 
 # Database
@@ -343,6 +350,115 @@ CRON_SECRET = env(
     default="local-dev-cron-secret"
 )
 
+# ── Celery & shared cache ────────────────────────────────────────────────────
+# Redis backs both the Celery broker and the Django cache (used for the
+# distributed locks around beat jobs). Without REDIS_URL the cache falls back
+# to per-process local memory, which is only suitable for development.
+REDIS_URL = env('REDIS_URL', default='')
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default=REDIS_URL or 'redis://localhost:6379/0')
+CELERY_TIMEZONE = TIME_ZONE
+
+# Redeliver a task if its worker dies mid-run. Tasks that send mail opt out
+# (acks_late=False), since repeating them would send duplicates.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Fail fast when the broker is down so enqueue() falls back to running inline
+# instead of holding the web request through the default publish retries.
+CELERY_BROKER_CONNECTION_TIMEOUT = 2
+CELERY_TASK_PUBLISH_RETRY_POLICY = {'max_retries': 1, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.2}
+# Fallback limits for tasks that don't set their own (seconds)
+CELERY_TASK_SOFT_TIME_LIMIT = 120
+CELERY_TASK_TIME_LIMIT = 180
+
+# Run every task inline in the calling process — no broker or worker needed.
+# Tests always do this; also usable for a single-box install with no Redis.
+CELERY_TASK_ALWAYS_EAGER = env.bool('CELERY_TASK_ALWAYS_EAGER', default=False)
+CELERY_TASK_EAGER_PROPAGATES = True
+
+# Small deployments run one worker consuming a single queue; larger ones
+# start a worker per queue (celery -A config worker -Q mail, ...).
+CELERY_SMALL_DEPLOYMENT = env.bool('CELERY_SMALL_DEPLOYMENT', default=False)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {} if CELERY_SMALL_DEPLOYMENT else {
+    'inventory.tasks.send_email_async':             {'queue': 'mail'},
+    'inventory.tasks.drain_outbox':                 {'queue': 'mail'},
+    'inventory.tasks.send_admin_digests':           {'queue': 'mail'},
+    'inventory.tasks.send_booking_decision_emails': {'queue': 'mail'},
+    'inventory.tasks.extract_booking_doc_text':     {'queue': 'documents'},
+    'inventory.tasks.escalate_expired_issues':      {'queue': 'periodic'},
+    'inventory.tasks.fire_due_deadlines':           {'queue': 'periodic'},
+    'inventory.tasks.refresh_room_utilization':     {'queue': 'periodic'},
+    'inventory.tasks.rebuild_room_utilization':     {'queue': 'periodic'},
+    'core.tasks.booking_reminder_sweep':            {'queue': 'periodic'},
+}
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+CELERY_BEAT_SCHEDULE = {
+    # Day-before booking reminders + series auto-expiry
+    'booking-reminder-sweep': {
+        'task': 'core.tasks.booking_reminder_sweep',
+        'schedule': 5 * 60,
+    },
+    # Safety net for the deadline scheduler (inventory.deadline_scheduler): issue
+    # escalations and booking TAT reminders / auto-expiry normally run from a
+    # task queued for the next deadline; this catches a lost wake-up and
+    # re-arms the next one
+    'deadline-scheduler': {
+        'task': 'inventory.tasks.fire_due_deadlines',
+        'schedule': 15 * 60,
+    },
+    # Picks up outbox retries whose backoff has elapsed (inventory.outbox)
+    'outbox-drain': {
+        'task': 'inventory.tasks.drain_outbox',
+        'schedule': 60,
+    },
+    # Folds held-back admin alerts into one digest email per admin (inventory.admin_digest)
+    'admin-digest-send': {
+        'task': 'inventory.tasks.send_admin_digests',
+        'schedule': 5 * 60,
+    },
+    # Heals the room utilization facts (inventory.utilization) once a night
+    'room-utilization-rebuild': {
+        'task': 'inventory.tasks.rebuild_room_utilization',
+        'schedule': crontab(hour=2, minute=30),
+    },
+}
+
+# ── Outbound mail transport (inventory.mail_transport) ───────────────────────
+# One pooled keep-alive session per process; the breaker opens after
+# MAIL_BREAKER_FAILURES consecutive provider failures and fast-fails sends for
+# MAIL_BREAKER_RESET_SECONDS before letting a single probe through.
+MAIL_POOL_SIZE = env.int('MAIL_POOL_SIZE', default=10)
+MAIL_MAX_CONCURRENCY = env.int('MAIL_MAX_CONCURRENCY', default=8)
+MAIL_CONNECT_TIMEOUT = env.float('MAIL_CONNECT_TIMEOUT', default=3.05)
+MAIL_READ_TIMEOUT = env.float('MAIL_READ_TIMEOUT', default=10)
+MAIL_BREAKER_FAILURES = env.int('MAIL_BREAKER_FAILURES', default=5)
+MAIL_BREAKER_RESET_SECONDS = env.int('MAIL_BREAKER_RESET_SECONDS', default=30)
+# Stored attachments up to this size are sent inline (fetched once by the
+# outbox drainer and cached); larger ones go out as signed download links.
+MAIL_ATTACHMENT_INLINE_MAX_BYTES = env.int('MAIL_ATTACHMENT_INLINE_MAX_BYTES', default=5 * 1024 * 1024)
+MAIL_ATTACHMENT_LINK_MAX_AGE = env.int('MAIL_ATTACHMENT_LINK_MAX_AGE', default=14 * 24 * 60 * 60)
+
+# ── Admin alert digests (inventory.admin_digest) ─────────────────────────────
+# Admins who pick digest delivery get one email per window instead of one per
+# booking request, reminder or auto-cancellation.
+ADMIN_DIGEST_WINDOW_MINUTES = env.int('ADMIN_DIGEST_WINDOW_MINUTES', default=60)
+
+# ── Room booking double-booking guard ────────────────────────────────────────
+# On PostgreSQL, migrate installs a GiST exclusion constraint over confirmed
+# booking slots (tstzrange per room) so concurrent approvals cannot overlap.
+# Set to False before migrating to keep the Python-only overlap check.
+# SQLite ignores this flag.
+ROOM_BOOKING_DB_EXCLUSION = env.bool('ROOM_BOOKING_DB_EXCLUSION', default=True)
+
 # ── Firebase Client Config (passed to templates via context processor) ────────
 # These values power the Firebase JS SDK in the browser. They are NOT secret —
 # Firebase scopes them with Security Rules + the hd domain restriction.
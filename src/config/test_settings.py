@@ -11,5 +11,9 @@ DATABASES = {
 # Static files configuration
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
+# Run Celery tasks inline; no broker in tests
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
 # Other test-specific settings (if needed)
 DEBUG = False
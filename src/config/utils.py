@@ -1,26 +1,171 @@
-import random
+"""
+Collision-free slugs and codes.
+
+Slugs, vendor / purchase codes and issue ticket ids are derived from one
+global id counter instead of random strings checked with .exists():
+
+    PostgreSQL   the counter is the core_id_block_seq sequence; each process
+                 takes blocks of ID_BLOCK_SIZE values with one nextval(), so
+                 most allocations need no query at all
+    other DBs    the counter is a core.IdSequence row, advanced with
+                 UPDATE ... RETURNING inside the caller's transaction
+
+Each value is spread over the output space with a fixed bijection, so the
+results look random but two allocations can never produce the same string.
+They also cannot equal a value from the old random generators: slug
+suffixes are SLUG_SUFFIX_LENGTH characters long (old ones had 4, or 8 for
+booking slugs) and codes start with an upper-case letter (old ones were
+lower-case).
+
+bulk_create paths allocate for many rows at once with generate_unique_slugs()
+and generate_unique_codes().
+"""
+import math
+import os
 import string
+import threading
+from functools import lru_cache
+
+from django.db import connection
+
+ID_SEQUENCE = 'core_id_block_seq'
+ID_COUNTER = 'ids'
+ID_BLOCK_SIZE = 64
+SLUG_SUFFIX_LENGTH = 9
+
+_DIGITS = string.digits + string.ascii_lowercase
+
+_block = {'pid': None, 'next': 0, 'end': 0}
+_block_lock = threading.Lock()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# COUNTER
+# ─────────────────────────────────────────────────────────────────────
+
+def _reserve_blocks(count):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(%s) FROM generate_series(1, %s)", [ID_SEQUENCE, count])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _advance_counter(n):
+    """Last value of a run of `n` fresh counter values (core.IdSequence)."""
+    from core.models import IdSequence
+
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {qn(IdSequence._meta.db_table)} SET {qn('value')} = {qn('value')} + %s "
+            f"WHERE {qn('name')} = %s RETURNING {qn('value')}",
+            [n, ID_COUNTER],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        raise RuntimeError(f"IdSequence '{ID_COUNTER}' is missing; run migrate")
+    return row[0]
+
+
+def allocate_ids(n=1):
+    """`n` integers that no other call, in any process, ever returns."""
+    if n <= 0:
+        return []
+    if connection.vendor != 'postgresql':
+        # Not cached: the counter rolls back with the caller's transaction
+        last = _advance_counter(n)
+        return list(range(last - n + 1, last + 1))
+
+    with _block_lock:
+        if _block['pid'] != os.getpid():
+            # A forked worker must not hand out its parent's block
+            _block.update(pid=os.getpid(), next=0, end=0)
+        ids = list(range(_block['next'], min(_block['end'], _block['next'] + n)))
+        missing = n - len(ids)
+        if missing:
+            blocks = _reserve_blocks(-(-missing // ID_BLOCK_SIZE))
+            for block in blocks:
+                start = block * ID_BLOCK_SIZE
+                take = min(ID_BLOCK_SIZE, n - len(ids))
+                ids.extend(range(start, start + take))
+                _block.update(next=start + take, end=start + ID_BLOCK_SIZE)
+        else:
+            _block['next'] = ids[-1] + 1
+        return ids
+
+
+# ─────────────────────────────────────────────────────────────────────
+# ENCODING
+# ─────────────────────────────────────────────────────────────────────
 
+def _base36(value, width, digits=_DIGITS):
+    out = []
+    for _ in range(width):
+        value, rem = divmod(value, 36)
+        out.append(digits[rem])
+    return ''.join(reversed(out))
+
+
+@lru_cache(maxsize=None)
+def _multiplier(space):
+    """Golden-ratio step through `space`, adjusted to be coprime with it (so the map is a bijection)."""
+    step = int(space * 0.6180339887) | 1
+    while math.gcd(step, space) != 1:
+        step += 2
+    return step
+
+
+def _spread(value, space):
+    if value >= space:
+        raise RuntimeError(f"Id space of {space} values exhausted")
+    return (value * _multiplier(space) + space // 2) % space
+
+
+def _slug_suffix(value):
+    return _base36(_spread(value, 36 ** SLUG_SUFFIX_LENGTH), SLUG_SUFFIX_LENGTH)
+
+
+def _code(value, no_of_char):
+    """Upper-case letter followed by no_of_char - 1 upper-case base36 characters."""
+    rest = 36 ** (no_of_char - 1)
+    spread = _spread(value, 26 * rest)
+    lead, tail = divmod(spread, rest)
+    return string.ascii_uppercase[lead] + _base36(tail, no_of_char - 1, _DIGITS.upper())
+
+
+def _slug_max_length(model):
+    try:
+        return model._meta.get_field('slug').max_length or 50
+    except Exception:
+        return 50
+
+
+def _join_slug(base_slug, suffix, max_length):
+    base = (base_slug or '')[:max_length - len(suffix) - 1].rstrip('-')
+    return f"{base}-{suffix}"
+
+
+# ─────────────────────────────────────────────────────────────────────
+# PUBLIC HELPERS
+# ─────────────────────────────────────────────────────────────────────
 
 def generate_unique_slug(instance, base_slug):
-    """Generates a unique slug with a 4-character alphanumeric code."""
-    def generate_code():
-        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=4))
-    
-    slug = f"{base_slug}-{generate_code()}"
-    model_class = instance.__class__
-    while model_class.objects.filter(slug=slug).exists():
-        slug = f"{base_slug}-{generate_code()}"
-    return slug
+    """Unique slug: base_slug (trimmed to the field length) plus an allocated suffix."""
+    return generate_unique_slugs(instance.__class__, [base_slug])[0]
+
+
+def generate_unique_slugs(model, base_slugs):
+    """generate_unique_slug() for many rows of `model` at once (bulk_create)."""
+    max_length = _slug_max_length(model)
+    return [
+        _join_slug(base_slug, _slug_suffix(value), max_length)
+        for base_slug, value in zip(base_slugs, allocate_ids(len(base_slugs)))
+    ]
 
 
 def generate_unique_code(model, no_of_char=6, unique_field='id'):
-    def generate_code():
-        return ''.join(random.choices(string.ascii_lowercase + string.digits, k=no_of_char))
-    
-    code = generate_code()
-    filter_kwargs = {unique_field: code}
-    model_class = model.__class__
-    while model_class.objects.filter(**filter_kwargs).exists():
-        code = generate_code()
-    return code
\ No newline at end of file
+    """Unique upper-case code of `no_of_char` characters (model / unique_field kept for callers)."""
+    return generate_unique_codes(1, no_of_char)[0]
+
+
+def generate_unique_codes(n, no_of_char=6):
+    return [_code(value, no_of_char) for value in allocate_ids(n)]
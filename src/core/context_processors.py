@@ -68,3 +68,12 @@ def dashboard_url(request):
                     url = reverse('room_incharge:room_dashboard', kwargs={'room_slug': first_room.slug})
 
     return {'dashboard_url': url}
+
+
+def live_events_origin(request):
+    """
+    Injects `live_events_origin`, prefixed to the SSE stream URLs.
+    Empty when the stream is served by the same host as the page; set
+    LIVE_EVENTS_ORIGIN when it runs on a separate ASGI service.
+    """
+    return {'live_events_origin': getattr(settings, 'LIVE_EVENTS_ORIGIN', '')}
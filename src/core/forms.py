@@ -7,7 +7,7 @@ from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
 from config.mixins import form_mixin
-from inventory.models import RoomBooking, RoomBookingRequest, Room, Department, RoomBookingCredentials
+from inventory.models import RoomBooking, RoomBookingRequest, RoomBookingSeries, Room, Department, RoomBookingCredentials
 from django.utils import timezone
 from inventory.booking_utils import sort_rooms_iterable
 
@@ -140,6 +140,24 @@ class RoomBookingForm(forms.ModelForm):
         widget=forms.HiddenInput(attrs={'id': 'id_room_ids'}),
         required=True,
     )
+    # ── Optional recurrence (creates a RoomBookingSeries) ──
+    repeat = forms.ChoiceField(
+        choices=[('', 'Does not repeat')] + RoomBookingSeries.FREQUENCY_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-control', 'id': 'id_repeat'}),
+        required=False,
+    )
+    repeat_until = forms.DateField(
+        widget=forms.DateInput(attrs={'type': 'date', 'class': 'form-control', 'id': 'id_repeat_until'}),
+        required=False,
+    )
+    repeat_skip_dates = forms.CharField(
+        widget=forms.TextInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Dates to skip, e.g. 2026-10-02, 2026-10-23',
+            'id': 'id_repeat_skip_dates',
+        }),
+        required=False,
+    )
 
     class Meta:
         model = RoomBookingRequest
@@ -245,6 +263,13 @@ class RoomBookingForm(forms.ModelForm):
             self.add_error('room_ids', 'One or more selected rooms could not be found.')
             return cleaned_data
 
+        # Recurring series: every occurrence is checked in one vectorized pass
+        if cleaned_data.get('repeat') and start and end:
+            if not self._clean_repeat(cleaned_data, selected_rooms):
+                return cleaned_data
+            cleaned_data['selected_rooms'] = selected_rooms
+            return cleaned_data
+
         # Double-check room availability / conflicts for all selected rooms
         if start and end and selected_rooms:
             alt_slots_json = cleaned_data.get('alternative_slots', '[]') or '[]'
@@ -287,16 +312,73 @@ class RoomBookingForm(forms.ModelForm):
         cleaned_data['selected_rooms'] = selected_rooms
         return cleaned_data
 
+    def _clean_repeat(self, cleaned_data, selected_rooms):
+        from datetime import date
+        from inventory.booking_series import (
+            expand_occurrences, find_occurrence_conflicts, MAX_SERIES_OCCURRENCES,
+        )
+
+        until = cleaned_data.get('repeat_until')
+        start = cleaned_data['start_datetime']
+        end   = cleaned_data['end_datetime']
+        if not until:
+            self.add_error('repeat_until', 'Please choose the date the booking repeats until.')
+            return False
+        if until < timezone.localtime(start).date():
+            self.add_error('repeat_until', 'The repeat-until date must be on or after the first booking date.')
+            return False
+        if end - start >= timezone.timedelta(days=1):
+            self.add_error('repeat', 'A repeating booking must start and end on the same day.')
+            return False
+        if cleaned_data.get('alternative_slots') not in (None, '', '[]'):
+            self.add_error('repeat', 'Alternative slots cannot be combined with a repeating booking.')
+            return False
+
+        skip_dates = []
+        for value in (cleaned_data.get('repeat_skip_dates') or '').replace(';', ',').split(','):
+            value = value.strip()
+            if not value:
+                continue
+            try:
+                skip_dates.append(date.fromisoformat(value))
+            except ValueError:
+                self.add_error('repeat_skip_dates', f'"{value}" is not a valid date (use YYYY-MM-DD).')
+                return False
+
+        occurrences = expand_occurrences(start, end, cleaned_data['repeat'], until, skip_dates)
+        if not occurrences:
+            self.add_error('repeat', 'The repeat settings do not produce any dates.')
+            return False
+        if len(occurrences) > MAX_SERIES_OCCURRENCES:
+            self.add_error('repeat_until', f'A series can have at most {MAX_SERIES_OCCURRENCES} occurrences.')
+            return False
+
+        clashes = find_occurrence_conflicts(selected_rooms, occurrences)
+        if clashes.any():
+            dates = ", ".join(
+                timezone.localtime(s).strftime('%d %b %Y')
+                for (s, _), clash in zip(occurrences, clashes) if clash
+            )
+            self.add_error('room_ids', f"Room is already booked or requested on: {dates}.")
+            return False
+
+        cleaned_data['occurrences'] = occurrences
+        cleaned_data['repeat_skip_dates'] = [d.isoformat() for d in skip_dates]
+        return True
+
 
 class AdminRoomBookingForm(RoomBookingForm):
     """
     Variant of RoomBookingForm for sub-admin / central-admin direct bookings.
     - Skips RoomBookingCredentials validation (admin uses Django login credentials).
     - Password field is not required (admin credentials are passed separately).
+    - No repeat fields: admin_room_booking_view books single slots only.
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.fields['password'].required = False
+        for name in ('repeat', 'repeat_until', 'repeat_skip_dates'):
+            self.fields.pop(name, None)
 
     def clean(self):
         cleaned_data = super(RoomBookingForm, self).clean()  # skip RoomBookingForm.clean entirely
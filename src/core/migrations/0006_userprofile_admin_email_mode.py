@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_setup_allauth_site_and_app'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='admin_email_mode',
+            field=models.CharField(choices=[('instant', 'Instant'), ('digest', 'Digest')], default='instant', max_length=10),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-17 05:22
+
+from django.db import migrations, models
+
+
+def create_id_counter(apps, schema_editor):
+    IdSequence = apps.get_model('core', 'IdSequence')
+    IdSequence.objects.get_or_create(name='ids')
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("CREATE SEQUENCE IF NOT EXISTS core_id_block_seq")
+
+
+def drop_id_counter(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP SEQUENCE IF EXISTS core_id_block_seq")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_userprofile_admin_email_mode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdSequence',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_id_counter, drop_id_counter),
+    ]
@@ -78,6 +78,13 @@ class UserProfile(models.Model):
     security_key = models.CharField(max_length=255, null=True, blank=True)
     booking_email = models.EmailField(null=True, blank=True)
     booking_password = models.CharField(max_length=255, default='', blank=True)
+
+    # Admin alert emails: one email per event, or batched into a periodic digest
+    EMAIL_MODE_CHOICES = [
+        ('instant', 'Instant'),
+        ('digest', 'Digest'),
+    ]
+    admin_email_mode = models.CharField(max_length=10, choices=EMAIL_MODE_CHOICES, default='instant')
     
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -89,6 +96,18 @@ class UserProfile(models.Model):
         return f"{str(self.first_name)} {str(self.last_name)}"
     
 
+class IdSequence(models.Model):
+    """
+    Id counter for config.utils on databases without sequences (SQLite in
+    development). PostgreSQL uses the core_id_block_seq sequence instead.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
 # Signals
 # Delete User that is associated with UserProfile on its delete
 @receiver(post_delete, sender=UserProfile)
@@ -0,0 +1,30 @@
+import logging
+
+from celery import shared_task
+
+from inventory.tasks import single_run
+
+logger = logging.getLogger(__name__)
+
+
+BOOKING_REMINDER_LOCK = 'lock:booking-reminder-sweep'
+BOOKING_REMINDER_LOCK_TTL = 10 * 60   # seconds; longer than any realistic sweep
+
+
+@shared_task(ignore_result=True, soft_time_limit=8 * 60, time_limit=BOOKING_REMINDER_LOCK_TTL)
+def booking_reminder_sweep():
+    """
+    Beat job: day-before reminders for confirmed bookings and series auto-expiry.
+    Reminders and auto-expiry of single booking requests are driven by the
+    deadline scheduler (inventory.deadline_scheduler) instead.
+
+    Guarded by a cache lock so that only one worker runs the sweep even when
+    beat fires while a previous run is still going.
+    """
+    from core.views import process_day_before_booking_reminders
+
+    with single_run(BOOKING_REMINDER_LOCK, BOOKING_REMINDER_LOCK_TTL) as acquired:
+        if not acquired:
+            logger.info("[booking_reminder_sweep] Another worker holds the lock, skipping")
+            return
+        process_day_before_booking_reminders()
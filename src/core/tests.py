@@ -1,3 +1,155 @@
-from django.test import TestCase
+import itertools
+import re
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from config import utils
+from inventory.models import Vendor
+
+
+class FakeSequence:
+    """Stands in for core_id_block_seq: nextval() hands out 1, 2, 3, ..."""
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        self.calls = []
+
+    def __call__(self, count):
+        self.calls.append(count)
+        return [next(self.counter) for _ in range(count)]
+
+
+class PostgresBlockAllocationTests(SimpleTestCase):
+    """allocate_ids() on PostgreSQL, with the sequence replaced by FakeSequence."""
+
+    def setUp(self):
+        utils._block.update(pid=None, next=0, end=0)
+        self.sequence = FakeSequence()
+        patches = [
+            mock.patch.object(utils, 'connection', SimpleNamespace(vendor='postgresql')),
+            mock.patch.object(utils, '_reserve_blocks', self.sequence),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.addCleanup(utils._block.update, pid=None, next=0, end=0)
+
+    def test_small_allocations_share_one_block(self):
+        ids = [utils.allocate_ids(1)[0] for _ in range(utils.ID_BLOCK_SIZE)]
+        self.assertEqual(ids, list(range(utils.ID_BLOCK_SIZE, 2 * utils.ID_BLOCK_SIZE)))
+        self.assertEqual(self.sequence.calls, [1])
+
+        utils.allocate_ids(1)
+        self.assertEqual(self.sequence.calls, [1, 1])
+
+    def test_large_request_reserves_every_block_it_needs_at_once(self):
+        size = utils.ID_BLOCK_SIZE
+        first = utils.allocate_ids(2 * size + 22)
+        self.assertEqual(self.sequence.calls, [3])
+        self.assertEqual(len(set(first)), 2 * size + 22)
+
+        # The rest of the third block serves the next call without a query
+        second = utils.allocate_ids(size - 22)
+        self.assertEqual(self.sequence.calls, [3])
+        self.assertEqual(second, list(range(3 * size + 22, 4 * size)))
+
+        # A request larger than what is left tops up with new blocks
+        utils.allocate_ids(5)
+        third = utils.allocate_ids(size + 60)
+        self.assertEqual(self.sequence.calls, [3, 1, 2])
+        self.assertFalse(set(first + second) & set(third))
+
+    def test_partially_used_block_is_topped_up(self):
+        size = utils.ID_BLOCK_SIZE
+        head = utils.allocate_ids(size - 4)
+        tail = utils.allocate_ids(10)
+        self.assertEqual(self.sequence.calls, [1, 1])
+        self.assertEqual(tail[:4], list(range(2 * size - 4, 2 * size)))
+        self.assertEqual(tail[4:], list(range(2 * size, 2 * size + 6)))
+        self.assertEqual(len(set(head + tail)), size + 6)
+
+    def test_forked_process_does_not_reuse_the_parent_block(self):
+        parent = utils.allocate_ids(3)
+        with mock.patch.object(utils.os, 'getpid', return_value=-1):
+            child = utils.allocate_ids(3)
+        self.assertEqual(self.sequence.calls, [1, 1])
+        # The parent continues in its own (now re-reserved) state; nothing is shared
+        later = utils.allocate_ids(3)
+        self.assertEqual(len(set(parent + child + later)), 9)
+
+    def test_zero_ids(self):
+        self.assertEqual(utils.allocate_ids(0), [])
+        self.assertEqual(self.sequence.calls, [])
+
+
+class SpreadTests(SimpleTestCase):
+
+    def test_spread_is_a_bijection(self):
+        for space in (36 ** 2, 26 * 36, 36 ** 3, 2 * 3 * 5 * 7 * 11):
+            values = {utils._spread(value, space) for value in range(space)}
+            self.assertEqual(values, set(range(space)), space)
+
+    def test_exhausted_space_raises(self):
+        with self.assertRaises(RuntimeError):
+            utils._spread(36 ** 2, 36 ** 2)
+
+    def test_code_and_slug_formats(self):
+        self.assertRegex(utils._code(0, 6), r'^[A-Z][0-9A-Z]{5}$')
+        self.assertRegex(utils._slug_suffix(0), rf'^[0-9a-z]{{{utils.SLUG_SUFFIX_LENGTH}}}$')
+
+
+class GenerateUniqueTests(TestCase):
+    """Slugs and codes allocated from the core.IdSequence counter (non-PostgreSQL path)."""
+
+    def test_slugs_are_unique_and_fit_the_field(self):
+        max_length = Vendor._meta.get_field('slug').max_length
+        slugs = utils.generate_unique_slugs(Vendor, ['a' * 300] * 500) + [
+            utils.generate_unique_slug(Vendor(), 'acme-supplies') for _ in range(100)
+        ]
+        self.assertEqual(len(set(slugs)), 600)
+        self.assertTrue(all(len(slug) <= max_length for slug in slugs))
+        self.assertTrue(all(re.fullmatch(r'[a-z0-9-]+-[0-9a-z]{%d}' % utils.SLUG_SUFFIX_LENGTH, s) for s in slugs))
+
+    def test_codes_are_unique(self):
+        codes = utils.generate_unique_codes(2000, 6) + [utils.generate_unique_code(Vendor) for _ in range(100)]
+        self.assertEqual(len(set(codes)), 2100)
+        self.assertTrue(all(re.fullmatch(r'[A-Z][0-9A-Z]{5}', code) for code in codes))
+
+    def test_codes_are_unique_across_the_postgres_path(self):
+        utils._block.update(pid=None, next=0, end=0)
+        self.addCleanup(utils._block.update, pid=None, next=0, end=0)
+        with mock.patch.object(utils, 'connection', SimpleNamespace(vendor='postgresql')), \
+                mock.patch.object(utils, '_reserve_blocks', FakeSequence()):
+            codes = utils.generate_unique_codes(1000, 6) + [utils.generate_unique_code(Vendor) for _ in range(200)]
+        self.assertEqual(len(set(codes)), 1200)
+
+
+class CalendarFeedAccessTests(TestCase):
+    """Room and category feeds name faculty and purposes, so they need a signed link."""
+
+    def setUp(self):
+        from inventory.models import Organisation, Room
+
+        org = Organisation.objects.create(name='Org')
+        self.room = Room.objects.create(organisation=org, label='A1', room_name='Hall A', room_category='halls')
+
+    def test_room_feed_needs_a_signed_token(self):
+        from inventory.calendar_feed import category_feed_token, room_feed_token
+
+        feed = lambda token: reverse('core:room_calendar_feed', args=[token])
+        self.assertEqual(self.client.get(feed(self.room.slug)).status_code, 404)
+        # A token for another feed kind is not accepted either
+        self.assertEqual(self.client.get(feed(category_feed_token(self.room.slug))).status_code, 404)
+        response = self.client.get(feed(room_feed_token(self.room)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+
+    def test_category_feed_needs_a_signed_token(self):
+        from inventory.calendar_feed import category_feed_token
+
+        feed = lambda token: reverse('core:category_calendar_feed', args=[token])
+        self.assertEqual(self.client.get(feed('halls')).status_code, 404)
+        self.assertEqual(self.client.get(feed(category_feed_token('halls'))).status_code, 200)
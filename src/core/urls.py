@@ -23,6 +23,12 @@ urlpatterns = [
      path("app/", views.app_home_view, name="app_home"),
      path("app-auth-callback/", views.app_auth_callback_view, name="app_auth_callback"),
      path('api/rooms-by-category/', views.rooms_by_category, name='rooms_by_category'),
+     path('api/room-availability/', views.room_availability_matrix, name='room_availability_matrix'),
+     path('api/booking-suggestions/', views.booking_suggestions, name='booking_suggestions'),
+     path('calendar/room/<str:token>.ics', views.room_calendar_feed, name='room_calendar_feed'),
+     path('calendar/category/<str:token>.ics', views.category_calendar_feed, name='category_calendar_feed'),
+     path('calendar/faculty/<str:token>.ics', views.faculty_calendar_feed, name='faculty_calendar_feed'),
+     path('mail-attachment/<str:token>/', views.mail_attachment_download, name='mail_attachment'),
      path("aura/import-creds/", views.import_booking_credentials, name="import_booking_credentials"),
      path("aura/create-cred/", views.create_booking_credentials, name="create_booking_credentials"),
      path("aura/delete-cred/<int:pk>/", views.delete_booking_credential, name="delete_cred"),
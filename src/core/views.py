@@ -1,22 +1,22 @@
 from django.shortcuts import redirect, render, get_object_or_404
 from django.views.generic import TemplateView, CreateView
-from django.db import transaction, connection
+from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.contrib.auth.views import (
     LoginView, LogoutView, PasswordChangeView, 
     PasswordResetCompleteView, PasswordResetConfirmView, 
     PasswordResetDoneView, PasswordResetView
     )
 from django.contrib.auth import login, get_user_model
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from . forms import CustomAuthenticationForm, UserRegisterForm, CustomPasswordResetForm
 from core.models import UserProfile, Organisation
 from config.mixins.access_mixins import RedirectLoggedInUsersMixin
 from django.contrib import messages
 from core.forms import RoomBookingForm, AdminRoomBookingForm
 from inventory.models import Room, RoomBooking, RoomBookingRequest, RoomCancellationRequest, RoomBookingCredentials
-from django.http import JsonResponse
+from django.http import JsonResponse, Http404
 from django.utils.dateparse import parse_datetime
-from django.db.models import Q
 from django.utils import timezone
 import firebase_admin
 from firebase_admin import auth, credentials
@@ -24,11 +24,14 @@ from django.conf import settings
 import os
 import json
 import logging
+from functools import partial
 from pathlib import Path
 import pandas as pd
 from datetime import date, timedelta
 from inventory.booking_utils import format_booking_details as build_booking_details, format_room_list, sort_rooms_iterable
-from inventory.email import build_email_shell
+from inventory.email import EmailSections, build_email_shell
+from inventory import recipient_directory
+from inventory.capabilities import has_capability, ROOMBOOKING_DATETIME_COLUMNS
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -87,11 +90,17 @@ def auth_status_view(request):
     return JsonResponse({'authenticated': request.user.is_authenticated})
 
 
-def _safe_mail(subject, message, recipient_list, fail_silently=True, html_message=None):
-    """Wrapper around safe_send_mail — imported lazily to avoid circular imports."""
+def _safe_mail(subject, message, recipient_list, fail_silently=True, html_message=None, category=None):
+    """
+    Wrapper around queue_mail — imported lazily to avoid circular imports.
+    Admin alerts pass a digest `category` so admins on digest delivery get
+    them batched (inventory.admin_digest).
+    """
     try:
-        from inventory.email import safe_send_mail
-        safe_send_mail(
+        from inventory.outbox import queue_mail
+        from inventory.admin_digest import queue_admin_mail
+        send = partial(queue_admin_mail, category) if category else queue_mail
+        send(
             subject=subject,
             message=message,
             recipient_list=recipient_list,
@@ -102,41 +111,6 @@ def _safe_mail(subject, message, recipient_list, fail_silently=True, html_messag
         logger.info(f"[_safe_mail] {_e}")
 
 
-def _admin_emails():
-    """Return email addresses for all central & sub admins."""
-    return list(
-        UserProfile.objects.filter(
-            Q(is_central_admin=True) | Q(is_sub_admin=True)
-        ).values_list('user__email', flat=True)
-    )
-
-
-def _sub_admin_emails():
-    """
-    Return email addresses for sub-admins only.
-    Falls back to central admins if no sub-admins exist.
-    """
-    emails = list(
-        UserProfile.objects.filter(is_sub_admin=True)
-        .values_list('user__email', flat=True)
-    )
-    if not emails:
-        # Fallback: if no sub-admins are configured, notify central admins
-        emails = list(
-            UserProfile.objects.filter(is_central_admin=True, is_sub_admin=False)
-            .values_list('user__email', flat=True)
-        )
-    return emails
-
-
-def _central_admin_only_emails():
-    """Return email addresses for central admins only (not sub-admins)."""
-    return list(
-        UserProfile.objects.filter(is_central_admin=True, is_sub_admin=False)
-        .values_list('user__email', flat=True)
-    )
-
-
 def _format_booking_details(rooms_or_instance, faculty_name, start_dt, end_dt, purpose, department=None):
     """Utility: format a readable booking-detail block for email bodies."""
     return build_booking_details(rooms_or_instance, faculty_name, start_dt, end_dt, purpose, department)
@@ -375,32 +349,15 @@ class CompletePasswordResetView(PasswordResetCompleteView):
     
 
 
-def _roombooking_has_datetime_columns():
-    """
-    Checks once per request whether the roombooking table
-    actually has start_datetime and end_datetime columns.
-    """
-    with connection.cursor() as cursor:
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = 'inventory_roombooking'
-        """)
-        columns = {row[0] for row in cursor.fetchall()}
-
-    return {'start_datetime', 'end_datetime'}.issubset(columns)
-
-
 def _is_booking_too_soon(dt):
     """
     Returns True if the booking date is today, tomorrow, or in the past.
     Minimum allowed booking date is today + 2 days (day after tomorrow).
     """
     from django.utils import timezone as _tz
+    from inventory.booking_utils import earliest_booking_date
     local_dt = _tz.localtime(dt) if _tz.is_aware(dt) else dt
-    booking_date = local_dt.date()
-    today = date.today()
-    return booking_date <= today + timedelta(days=1)
+    return local_dt.date() < earliest_booking_date()
 
 
 REFRESHMENT_OPTIONS = [
@@ -414,13 +371,62 @@ REFRESHMENT_OPTIONS = [
 ]
 
 
-def room_booking_view(request):
-    # Run TAT expiry check on every booking page load
+def _submit_booking_series(request, form, booking_req, selected_rooms):
+    """
+    Save a validated repeating booking as a RoomBookingSeries (one pending
+    request per occurrence) and send a single summary email instead of one
+    per date.
+    """
+    from inventory.booking_series import create_series, send_series_summary
+    from inventory.models import RoomBookingSeries
+
+    series = RoomBookingSeries(
+        room              = booking_req.room or selected_rooms[0],
+        department        = booking_req.department,
+        faculty_name      = booking_req.faculty_name,
+        faculty_email     = booking_req.faculty_email,
+        purpose           = booking_req.purpose,
+        requirements_doc  = booking_req.requirements_doc,
+        requirements_text = booking_req.requirements_text,
+        start_datetime    = booking_req.start_datetime,
+        end_datetime      = booking_req.end_datetime,
+        frequency         = form.cleaned_data['repeat'],
+        until             = form.cleaned_data['repeat_until'],
+        skip_dates        = json.dumps(form.cleaned_data.get('repeat_skip_dates') or []),
+    )
     try:
-        process_booking_tat_reminders_and_expiry()
-    except Exception as _e:
-        logger.error(f"[room_booking_view] TAT check failed: {_e}")
+        requests = create_series(series, selected_rooms or [series.room], booking_req.tat_deadline)
+    except ValidationError as exc:
+        messages.error(request, " ".join(exc.messages))
+        return render(request, "booking/room_booking.html", {"form": form, "refreshment_options": REFRESHMENT_OPTIONS})
+
+    occurrences = [(req.start_datetime, req.end_datetime) for req in requests]
+    send_series_summary(series, occurrences)
 
+    sub_admin_emails = recipient_directory.sub_admin_emails()
+    if sub_admin_emails:
+        _safe_mail(
+            subject=f"[Blixtro] New Recurring Booking Request — {format_room_list(series)}",
+            message=(
+                f"A recurring room booking request ({len(occurrences)} occurrences, "
+                f"{series.get_frequency_display().lower()} until {series.until:%d %b %Y}) requires your review.\n"
+                f"Faculty: {series.faculty_name} ({series.faculty_email})\n"
+                f"Rooms: {format_room_list(series)}\n\n"
+                "The series is approved or rejected as a whole from the Approval Hub.\n"
+                f"TAT deadline: {series.tat_deadline.strftime('%d %b %Y, %H:%M')}.\n\n"
+                "Blixtro — SFS College Inventory & Booking System"
+            ),
+            recipient_list=sub_admin_emails,
+            category='request',
+        )
+
+    return render(request, "booking/booking_success.html", {
+        "booking": series,
+        "pending": True,
+    })
+
+
+def room_booking_view(request):
     form = RoomBookingForm()
 
     if request.method == "POST":
@@ -508,6 +514,10 @@ def room_booking_view(request):
                 booking_req.tat_deadline = now + timezone.timedelta(hours=24)
             else:
                 booking_req.tat_deadline = now + timezone.timedelta(hours=48)
+
+            if form.cleaned_data.get('repeat'):
+                return _submit_booking_series(request, form, booking_req, selected_rooms)
+
             booking_req.save()
             if selected_rooms:
                 booking_req.rooms.set(selected_rooms)
@@ -554,7 +564,7 @@ def room_booking_view(request):
 
             # ── Notify ALL ADMINS: new booking request pending ───────────────
             # (Both central and sub-admins can approve directly)
-            sub_admin_emails = _sub_admin_emails()
+            sub_admin_emails = recipient_directory.sub_admin_emails()
             if sub_admin_emails:
                 _safe_mail(
                     subject=f"[Blixtro] New Room Booking Request — {format_room_list(booking_req)}",
@@ -568,6 +578,7 @@ def room_booking_view(request):
                         "Blixtro — SFS College Inventory & Booking System"
                     ),
                     recipient_list=sub_admin_emails,
+                    category='request',
                     html_message=build_email_shell(
                         title="Booking Review Required",
                         intro_html=(
@@ -650,15 +661,11 @@ def admin_room_booking_view(request):
     - Past bookings are rejected.
     - On success: emails faculty + 5 notification recipients + all admins.
     """
-    from inventory.email import safe_send_mail
+    from inventory.outbox import queue_mail
+    from inventory.admin_digest import queue_admin_mail
+    from inventory.mail_attachments import storage_attachment
     from inventory.views.central_admin import BOOKING_NOTIFICATION_EMAILS
 
-    # Run TAT expiry check
-    try:
-        process_booking_tat_reminders_and_expiry()
-    except Exception as _e:
-        logger.error(f"[admin_room_booking_view] TAT check failed: {_e}")
-
     form = AdminRoomBookingForm()
 
     if request.method == "POST":
@@ -771,9 +778,16 @@ def admin_room_booking_view(request):
                 approved_note     = f"Directly booked by {admin_name} (Admin)",
                 alternative_slots = alt_slots_json,
             )
-            booking.save()
-            if selected_rooms:
-                booking.rooms.set(selected_rooms)
+            try:
+                with transaction.atomic():
+                    booking.save()
+                    if selected_rooms:
+                        booking.rooms.set(selected_rooms)
+            except ValidationError as exc:
+                messages.error(request, " ".join(exc.messages))
+                return render(request, "booking/admin_room_booking.html", {
+                    "form": form, "refreshment_options": REFRESHMENT_OPTIONS
+                })
 
             room_name    = format_room_list(booking)
             faculty_name = booking.faculty_name
@@ -789,7 +803,7 @@ def admin_room_booking_view(request):
                 booking.purpose,
                 booking.department,
             )
-            booking_sections = _booking_email_sections(
+            booking_sections = EmailSections(_booking_email_sections(
                 booking,
                 faculty_name,
                 faculty_email,
@@ -803,24 +817,16 @@ def admin_room_booking_view(request):
                     {"label": "Booked By", "value": admin_name},
                     {"label": "Admin Email", "value": admin_email},
                 ],
-            }]
+            }])
 
-            # Read requirements file for attachment
+            # Requirements file goes as an attachment; the outbox drainer fetches it
             _req_attachment = None
             if booking.requirements_doc and booking.requirements_doc.name:
-                import mimetypes as _mt
-                _fname = booking.requirements_doc.name.split('/')[-1]
-                _mime, _ = _mt.guess_type(_fname)
-                _mime = _mime or 'application/octet-stream'
-                try:
-                    with booking.requirements_doc.storage.open(booking.requirements_doc.name, 'rb') as _f:
-                        _req_attachment = (_fname, _f.read(), _mime)
-                except Exception as _ae:
-                    logger.info(f"[admin_room_booking_view] Could not read requirements file: {_ae}")
+                _req_attachment = storage_attachment(booking.requirements_doc)
 
             # Email 1: Faculty — booking confirmed
             try:
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Your Room Booking is Confirmed — {room_name}",
                     message=(
                         f"Dear {faculty_name},\n\n"
@@ -845,12 +851,13 @@ def admin_room_booking_view(request):
                 logger.error(f"[admin_room_booking_view] Faculty email failed: {_e}")
 
             # Email 2: All admins (central + sub) — notification
-            all_admin_emails = _admin_emails()
+            all_admin_emails = recipient_directory.admin_emails()
             # Exclude the booking admin themselves to avoid duplicate
             notify_admins = [e for e in all_admin_emails if e.lower() != admin_email]
             if notify_admins:
                 try:
-                    safe_send_mail(
+                    queue_admin_mail(
+                        'activity',
                         subject=f"[Blixtro] Admin Booking — {room_name} | {sl.strftime('%d %b %Y')}",
                         message=(
                             f"{admin_name} has directly booked a room for {faculty_name}.\n\n"
@@ -876,7 +883,7 @@ def admin_room_booking_view(request):
             # Email 3: 5 notification recipients
             if BOOKING_NOTIFICATION_EMAILS:
                 try:
-                    safe_send_mail(
+                    queue_mail(
                         subject=(
                             f"[Blixtro] Room Booking Notification — "
                             f"{room_name} | {sl.strftime('%d %b %Y')}"
@@ -1108,7 +1115,13 @@ def get_booking_status(request):
             'submitted':   req.created_on.strftime('%d %b %Y'),
         })
 
-    return JsonResponse({'requests': results})
+    from inventory.calendar_feed import faculty_feed_token
+    return JsonResponse({
+        'requests': results,
+        'calendar_feed_url': request.build_absolute_uri(
+            reverse('core:faculty_calendar_feed', args=[faculty_feed_token(email)])
+        ),
+    })
 
 
 def submit_cancellation_request(request):
@@ -1180,7 +1193,7 @@ def submit_cancellation_request(request):
         )
 
         # Email to admins notifying them of the withdrawal
-        admin_emails = _admin_emails()
+        admin_emails = recipient_directory.admin_emails()
         if admin_emails:
             _safe_mail(
                 subject=f"[Blixtro] Booking Request Cancelled by Faculty — {format_room_list(booking_req)}",
@@ -1192,6 +1205,7 @@ def submit_cancellation_request(request):
                     "Blixtro — SFS College Inventory & Booking System"
                 ),
                 recipient_list=admin_emails,
+                category='activity',
             )
 
         return JsonResponse({
@@ -1251,7 +1265,7 @@ def submit_cancellation_request(request):
     )
 
     # Email to admins
-    admin_emails = _admin_emails()
+    admin_emails = recipient_directory.admin_emails()
     if admin_emails:
         _safe_mail(
             subject=f"[Blixtro] Cancellation Request — {format_room_list(booking)}",
@@ -1263,6 +1277,7 @@ def submit_cancellation_request(request):
                 "Blixtro — SFS College Inventory & Booking System"
             ),
             recipient_list=admin_emails,
+            category='request',
         )
 
     return JsonResponse({
@@ -1290,8 +1305,8 @@ def rooms_by_category(request):
     if end_dt and timezone.is_naive(end_dt):
         end_dt = timezone.make_aware(end_dt)
 
-    # Use the safe check to see if the table is ready for datetime queries
-    can_check_availability = _roombooking_has_datetime_columns()
+    # Cached schema flag — no catalog query on this hot endpoint
+    can_check_availability = has_capability(ROOMBOOKING_DATETIME_COLUMNS)
 
     # Pre-fetch overlapping confirmed bookings and pending requests in bulk
     confirmed_booked_ids = set()
@@ -1319,87 +1334,15 @@ def rooms_by_category(request):
 
         if slots:
             try:
-                # Fetch bookings & requests for these rooms
-                active_bookings = list(
-                    RoomBooking.objects.filter(
-                        Q(room__in=rooms) | Q(rooms__in=rooms)
-                    ).exclude(status='cancelled').prefetch_related('rooms').distinct()
-                )
-                active_requests = list(
-                    RoomBookingRequest.objects.filter(
-                        Q(room__in=rooms) | Q(rooms__in=rooms),
-                        status='pending'
-                    ).prefetch_related('rooms').distinct()
-                )
-
-                def overlaps(s1_start, s1_end, s2_start, s2_end):
-                    return s1_start < s2_end and s2_start < s1_end
-
-                for room in rooms:
-                    # Check confirmed bookings conflict
-                    for b in active_bookings:
-                        is_for_room = (b.room_id == room.id) or (room in b.rooms.all())
-                        if is_for_room:
-                            b_slots = [(b.start_datetime, b.end_datetime)]
-                            if b.alternative_slots:
-                                try:
-                                    extra_b = json.loads(b.alternative_slots)
-                                    for slot in extra_b:
-                                        s_dt = parse_datetime(slot['start'])
-                                        e_dt = parse_datetime(slot['end'])
-                                        if s_dt and e_dt:
-                                            if timezone.is_naive(s_dt):
-                                                s_dt = timezone.make_aware(s_dt)
-                                            if timezone.is_naive(e_dt):
-                                                e_dt = timezone.make_aware(e_dt)
-                                            b_slots.append((s_dt, e_dt))
-                                except Exception:
-                                    pass
-                            
-                            has_conflict = False
-                            for s_start, s_end in slots:
-                                for b_start, b_end in b_slots:
-                                    if overlaps(s_start, s_end, b_start, b_end):
-                                        has_conflict = True
-                                        break
-                                if has_conflict:
-                                    break
-                            if has_conflict:
-                                confirmed_booked_ids.add(room.id)
-                                break
-
-                    # Check pending requests conflict (only if not already confirmed booked)
-                    if room.id not in confirmed_booked_ids:
-                        for r in active_requests:
-                            is_for_room = (r.room_id == room.id) or (room in r.rooms.all())
-                            if is_for_room:
-                                r_slots = [(r.start_datetime, r.end_datetime)]
-                                if r.alternative_slots:
-                                    try:
-                                        extra_r = json.loads(r.alternative_slots)
-                                        for slot in extra_r:
-                                            s_dt = parse_datetime(slot['start'])
-                                            e_dt = parse_datetime(slot['end'])
-                                            if s_dt and e_dt:
-                                                if timezone.is_naive(s_dt):
-                                                    s_dt = timezone.make_aware(s_dt)
-                                                if timezone.is_naive(e_dt):
-                                                    e_dt = timezone.make_aware(e_dt)
-                                                r_slots.append((s_dt, e_dt))
-                                    except Exception:
-                                        pass
-
-                                has_conflict = False
-                                for s_start, s_end in slots:
-                                    for r_start, r_end in r_slots:
-                                        if overlaps(s_start, s_end, r_start, r_end):
-                                            has_conflict = True
-                                            break
-                                    if has_conflict:
-                                        break
-                                if has_conflict:
-                                    pending_ids.add(room.id)
-                                    break
+                from inventory.slot_index import find_conflicting_slots, SOURCE_BOOKING
+                taken = find_conflicting_slots(rooms, slots).values_list('room_id', 'source')
+                for room_id, source in taken:
+                    if source == SOURCE_BOOKING:
+                        confirmed_booked_ids.add(room_id)
+                    else:
+                        pending_ids.add(room_id)
+                # A confirmed booking outranks a pending request for the same room
+                pending_ids -= confirmed_booked_ids
             except Exception as e:
                 logger.exception("Error checking availability in rooms_by_category")
 
@@ -1421,6 +1364,232 @@ def rooms_by_category(request):
     return JsonResponse(data, safe=False)
 
 
+AVAILABILITY_BUCKET_MINUTES = (15, 30, 60)
+AVAILABILITY_MAX_DAYS = 14
+
+
+def room_availability_matrix(request):
+    """
+    Room × time-bucket availability for a whole category.
+
+    GET params:
+      category  room_category to render (required)
+      date      first day, YYYY-MM-DD (default: today)
+      days      number of days, 1–14 (default: 7)
+      bucket    bucket size in minutes: 15, 30 or 60 (default: 30)
+
+    Each room's `cells` string has one character per bucket starting at
+    local midnight of `date`: 0 = free, 1 = pending request, 2 = booked.
+    """
+    from datetime import datetime as _dt
+    from inventory.slot_index import build_availability_matrix
+
+    category = request.GET.get("category")
+    if not category:
+        return JsonResponse({'error': 'category is required'}, status=400)
+
+    try:
+        first_day = date.fromisoformat(request.GET["date"]) if request.GET.get("date") else timezone.localdate()
+        days      = int(request.GET.get("days", 7))
+        bucket    = int(request.GET.get("bucket", 30))
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date, days or bucket'}, status=400)
+
+    if not 1 <= days <= AVAILABILITY_MAX_DAYS:
+        return JsonResponse({'error': f'days must be between 1 and {AVAILABILITY_MAX_DAYS}'}, status=400)
+    if bucket not in AVAILABILITY_BUCKET_MINUTES:
+        return JsonResponse({'error': f'bucket must be one of {list(AVAILABILITY_BUCKET_MINUTES)}'}, status=400)
+
+    rooms = sort_rooms_iterable(list(
+        Room.objects.filter(room_category=category)
+        .exclude(room_category__in=['washrooms', 'officerooms', 'staffrooms'])
+    ))
+
+    window_start = timezone.make_aware(_dt.combine(first_day, _dt.min.time()))
+    window_end   = window_start + timedelta(days=days)
+    matrix = build_availability_matrix(rooms, window_start, window_end, timedelta(minutes=bucket))
+
+    return JsonResponse({
+        "category":       category,
+        "start":          window_start.isoformat(),
+        "end":            window_end.isoformat(),
+        "bucket_minutes": bucket,
+        "rooms": [
+            {
+                "id":       room.id,
+                "name":     room.room_name,
+                "label":    room.label,
+                "capacity": getattr(room, 'capacity', 40),
+                "cells":    "".join(str(cell) for cell in matrix[room.id]),
+            }
+            for room in rooms
+        ],
+    })
+
+
+SUGGESTION_MAX_DAYS = 14
+
+
+def booking_suggestions(request):
+    """
+    Free-window and alternative-room suggestions for a conflicting booking.
+
+    GET params:
+      rooms      comma-separated room ids that were requested (required)
+      duration   booking length in minutes (required)
+      start      preferred start datetime (default: date_from 08:00)
+      date_from  first day to search, YYYY-MM-DD (default: day of `start`)
+      date_to    last day to search (default: date_from + 6 days, max 14 days)
+      capacity   minimum capacity for alternative rooms
+      limit      number of suggestions of each kind (default 5, max 20)
+    """
+    from datetime import datetime as _dt
+    from inventory.slot_index import suggest_slots, SUGGESTION_DAY_START
+
+    try:
+        room_ids = [int(pk) for pk in request.GET.get("rooms", "").split(",") if pk.strip()]
+        duration = timedelta(minutes=int(request.GET.get("duration", 0)))
+        capacity = int(request.GET["capacity"]) if request.GET.get("capacity") else None
+        limit    = min(int(request.GET.get("limit", 5)), 20)
+
+        preferred = parse_datetime(request.GET["start"]) if request.GET.get("start") else None
+        if preferred and timezone.is_naive(preferred):
+            preferred = timezone.make_aware(preferred)
+
+        if request.GET.get("date_from"):
+            date_from = date.fromisoformat(request.GET["date_from"])
+        elif preferred:
+            date_from = timezone.localtime(preferred).date()
+        else:
+            date_from = timezone.localdate()
+        date_to = (
+            date.fromisoformat(request.GET["date_to"]) if request.GET.get("date_to")
+            else date_from + timedelta(days=6)
+        )
+    except (ValueError, TypeError):
+        return JsonResponse({'error': 'Invalid rooms, duration, capacity, limit or dates'}, status=400)
+
+    if not room_ids or duration <= timedelta(0):
+        return JsonResponse({'error': 'rooms and a positive duration are required'}, status=400)
+    if not 0 <= (date_to - date_from).days < SUGGESTION_MAX_DAYS:
+        return JsonResponse({'error': f'Date range must be 1 to {SUGGESTION_MAX_DAYS} days'}, status=400)
+
+    rooms = list(Room.objects.filter(pk__in=room_ids))
+    if not rooms:
+        return JsonResponse({'error': 'Room not found'}, status=404)
+
+    if preferred is None:
+        preferred = timezone.make_aware(_dt.combine(date_from, SUGGESTION_DAY_START))
+
+    result = suggest_slots(rooms, preferred, duration, date_from, date_to, capacity=capacity, limit=limit)
+
+    return JsonResponse({
+        "free_windows": [
+            {"start": timezone.localtime(start).isoformat(), "end": timezone.localtime(end).isoformat()}
+            for start, end in result['free_windows']
+        ],
+        "alternative_rooms": [
+            {
+                "id":       room.id,
+                "name":     room.room_name,
+                "label":    room.label,
+                "category": room.room_category,
+                "capacity": room.capacity,
+            }
+            for room in result['alternative_rooms']
+        ],
+    })
+
+
+def _calendar_feed_response(request, bookings, name, filename, private=False):
+    """
+    Stream an .ics feed, answering 304 when the client's copy is current.
+
+    The validators come from a single aggregate over `bookings`, so polling
+    calendar clients never cause the bookings themselves to be loaded.
+    """
+    from django.http import StreamingHttpResponse
+    from django.utils.cache import get_conditional_response
+    from django.utils.http import http_date
+    from inventory.calendar_feed import feed_validators, iter_calendar
+
+    etag, last_modified = feed_validators(bookings)
+    last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+    if response is None:
+        response = StreamingHttpResponse(iter_calendar(bookings, name), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = f'inline; filename="{filename}.ics"'
+    response['ETag'] = etag
+    if last_modified_ts:
+        response['Last-Modified'] = http_date(last_modified_ts)
+    response['Cache-Control'] = f"{'private' if private else 'public'}, max-age=300"
+    return response
+
+
+def room_calendar_feed(request, token):
+    """iCalendar feed of every booking that uses this room (signed link from the room edit page)."""
+    from inventory.calendar_feed import feed_bookings, room_slug_from_feed_token
+
+    slug = room_slug_from_feed_token(token)
+    if not slug:
+        raise Http404("Invalid calendar link")
+    room = get_object_or_404(Room, slug=slug)
+    return _calendar_feed_response(
+        request, feed_bookings(rooms=[room]), f"{room.label} - {room.room_name}", f"room-{room.slug}", private=True,
+    )
+
+
+def category_calendar_feed(request, token):
+    """iCalendar feed of every booking in a room category, e.g. halls (signed link from the room list)."""
+    from inventory.calendar_feed import category_from_feed_token, feed_bookings
+
+    category = category_from_feed_token(token)
+    categories = dict(Room.ROOM_CATEGORIES)
+    if category not in categories:
+        raise Http404("Invalid calendar link")
+    rooms = Room.objects.filter(room_category=category)
+    return _calendar_feed_response(
+        request, feed_bookings(rooms=rooms), f"{categories[category]} bookings", f"category-{category}", private=True,
+    )
+
+
+def faculty_calendar_feed(request, token):
+    """
+    iCalendar feed of one faculty member's bookings.
+
+    The URL carries a signed token (handed out by get_booking_status) instead
+    of the email, since calendar clients cannot log in.
+    """
+    from inventory.calendar_feed import email_from_feed_token, feed_bookings
+
+    email = email_from_feed_token(token)
+    if not email:
+        raise Http404("Invalid calendar link")
+    return _calendar_feed_response(
+        request, feed_bookings(faculty_email=email), f"My room bookings ({email})", "my-bookings", private=True,
+    )
+
+
+def mail_attachment_download(request, token):
+    """
+    Signed download link for an email attachment too large to send inline
+    (inventory.mail_attachments). Streamed from storage in chunks.
+    """
+    from django.core.files.storage import default_storage
+    from django.http import FileResponse
+    from inventory.mail_attachments import link_target
+
+    target = link_target(token)
+    if not target:
+        raise Http404("Invalid or expired link")
+    storage_name, filename = target
+    try:
+        handle = default_storage.open(storage_name, 'rb')
+    except (FileNotFoundError, OSError):
+        raise Http404("File no longer available")
+    return FileResponse(handle, as_attachment=True, filename=filename)
+
 from django.views.decorators.csrf import csrf_exempt
 
 @csrf_exempt
@@ -1660,28 +1829,43 @@ def check_document_name(request):
 # AUTOMATED BOOKING TAT TASK
 # ─────────────────────────────────────────────────────────────────────
 
-def process_booking_tat_reminders_and_expiry():
+def process_booking_tat_reminders_and_expiry(request_ids):
     """
-    For EACH pending booking request:
+    For EACH pending booking request in `request_ids`:
       - Detect TAT type (12h or 48h) from (tat_deadline - created_on).
       - 48h TAT → 24h reminder then 12h reminder.
       - 12h TAT → 6h reminder then 3h reminder.
       - Auto-cancel when TAT deadline passes.
 
-    Also sends a day-before reminder to faculty for confirmed bookings.
+    Runs from the deadline scheduler (inventory.deadline_scheduler) for the
+    requests whose next reminder or deadline is due, never from a page view.
+    Flags and statuses are written with one UPDATE per kind; emails are
+    queued for the worker once the transaction commits.
     """
     from django.utils import timezone as _tz
+    from inventory.notification_counts import invalidate_notification_counts
+    from inventory.deadline_scheduler import BOOKING_REQUEST, sync_deadlines
+    from inventory.notification_inbox import BOOKING_KINDS, close_items, fan_out_expiring
+    from inventory.slot_index import release_request_slots
+    from inventory.tasks import enqueue_mail
+    from inventory.admin_digest import queue_admin_mail
 
     now = _tz.now()
 
+    # Series occurrences have no deadline of their own — the series expires as a unit
     pending_reqs = RoomBookingRequest.objects.filter(
-        status='pending'
-    ).select_related('room')
+        pk__in=list(request_ids), status='pending', tat_deadline__isnull=False, series__isnull=True,
+    ).select_related('room', 'department').prefetch_related('rooms')
 
-    for req in pending_reqs:
-        if not req.tat_deadline:
-            continue
+    reminder_mails  = []
+    expiry_mails    = {}     # req.pk → [mail, ...]
+    sent_24h_ids    = []
+    sent_12h_ids    = []
+    expired_ids     = {'24': [], '48': []}
+    expiring_reqs   = []     # inside their last 24h; surfaced in the admin inbox
+    reminder_emails = None
 
+    for req in pending_reqs:
         details = _format_booking_details(
             req,
             req.faculty_name,
@@ -1696,13 +1880,14 @@ def process_booking_tat_reminders_and_expiry():
         is_24h_tat = tat_duration <= timezone.timedelta(hours=26)
 
         # All pending requests notify all admins (both sub-admin and central admin)
-        reminder_emails = _admin_emails()
+        if reminder_emails is None:
+            reminder_emails = recipient_directory.admin_emails()
 
         if is_24h_tat:
             if (not req.reminder_24h_sent and
                     timezone.timedelta(hours=6) < time_left <= timezone.timedelta(hours=12)):
                 if reminder_emails:
-                    _safe_mail(
+                    reminder_mails.append(dict(
                         subject=f"[Blixtro] ⏳ 12h Approval Reminder (Fast-Track) — {format_room_list(req)}",
                         message=(
                             "A fast-track room booking request has 12 hours or less remaining "
@@ -1713,14 +1898,14 @@ def process_booking_tat_reminders_and_expiry():
                             "Blixtro — SFS College Inventory & Booking System"
                         ),
                         recipient_list=reminder_emails,
-                    )
-                req.reminder_24h_sent = True
-                req.save(update_fields=['reminder_24h_sent'])
+                        category='reminder',
+                    ))
+                sent_24h_ids.append(req.pk)
 
             if (not req.reminder_12h_sent and
                     timezone.timedelta(hours=0) < time_left <= timezone.timedelta(hours=6)):
                 if reminder_emails:
-                    _safe_mail(
+                    reminder_mails.append(dict(
                         subject=f"[Blixtro] 🚨 6h Final Reminder (Fast-Track) — {format_room_list(req)}",
                         message=(
                             "URGENT: A fast-track room booking request has less than 6 hours "
@@ -1730,15 +1915,15 @@ def process_booking_tat_reminders_and_expiry():
                             "Blixtro — SFS College Inventory & Booking System"
                         ),
                         recipient_list=reminder_emails,
-                    )
-                req.reminder_12h_sent = True
-                req.save(update_fields=['reminder_12h_sent'])
+                        category='reminder',
+                    ))
+                sent_12h_ids.append(req.pk)
 
         else:
             if (not req.reminder_24h_sent and
                     timezone.timedelta(hours=12) < time_left <= timezone.timedelta(hours=24)):
                 if reminder_emails:
-                    _safe_mail(
+                    reminder_mails.append(dict(
                         subject=f"[Blixtro] ⚠ 24h Approval Reminder — {format_room_list(req)}",
                         message=(
                             "A room booking request has not been approved yet and the 48-hour "
@@ -1749,14 +1934,14 @@ def process_booking_tat_reminders_and_expiry():
                             "Blixtro — SFS College Inventory & Booking System"
                         ),
                         recipient_list=reminder_emails,
-                    )
-                req.reminder_24h_sent = True
-                req.save(update_fields=['reminder_24h_sent'])
+                        category='reminder',
+                    ))
+                sent_24h_ids.append(req.pk)
 
             if (not req.reminder_12h_sent and
                     timezone.timedelta(hours=0) < time_left <= timezone.timedelta(hours=12)):
                 if reminder_emails:
-                    _safe_mail(
+                    reminder_mails.append(dict(
                         subject=f"[Blixtro] 🚨 12h Final Reminder — {format_room_list(req)}",
                         message=(
                             "URGENT: A room booking request has less than 12 hours remaining "
@@ -1766,18 +1951,19 @@ def process_booking_tat_reminders_and_expiry():
                             "Blixtro — SFS College Inventory & Booking System"
                         ),
                         recipient_list=reminder_emails,
-                    )
-                req.reminder_12h_sent = True
-                req.save(update_fields=['reminder_12h_sent'])
+                        category='reminder',
+                    ))
+                sent_12h_ids.append(req.pk)
+
+        if timezone.timedelta(0) < time_left <= timezone.timedelta(hours=24):
+            expiring_reqs.append(req)
 
         # ── Auto-expiry ─────────────────────────────────────────────────────
         if time_left <= timezone.timedelta(0):
             tat_label = '24' if is_24h_tat else '48'
-            req.status = 'expired'
-            req.review_note = f'Auto-cancelled: Approval TAT of {tat_label} hours exceeded.'
-            req.save(update_fields=['status', 'review_note', 'updated_on'])
+            expired_ids[tat_label].append(req.pk)
 
-            _safe_mail(
+            mails = [dict(
                 subject=f"[Blixtro] Room Booking Request Auto-Cancelled — {format_room_list(req)}",
                 message=(
                     f"Dear {req.faculty_name},\n\n"
@@ -1788,12 +1974,9 @@ def process_booking_tat_reminders_and_expiry():
                     "Best regards,\nBlixtro — SFS College Inventory & Booking System"
                 ),
                 recipient_list=[req.faculty_email],
-                fail_silently=False,
-            )
-
-            all_admin_emails = _admin_emails()
-            if all_admin_emails:
-                _safe_mail(
+            )]
+            if reminder_emails:
+                mails.append(dict(
                     subject=f"[Blixtro] Booking Request Auto-Cancelled — {format_room_list(req)}",
                     message=(
                         "A room booking request was automatically cancelled because the "
@@ -1802,10 +1985,67 @@ def process_booking_tat_reminders_and_expiry():
                         "The request has been removed from the pending queue.\n\n"
                         "Blixtro — SFS College Inventory & Booking System"
                     ),
-                    recipient_list=all_admin_emails,
-                )
+                    recipient_list=reminder_emails,
+                    category='expiry',
+                ))
+            expiry_mails[req.pk] = mails
+
+    with transaction.atomic():
+        if sent_24h_ids:
+            RoomBookingRequest.objects.filter(pk__in=sent_24h_ids).update(reminder_24h_sent=True)
+        if sent_12h_ids:
+            RoomBookingRequest.objects.filter(pk__in=sent_12h_ids).update(reminder_12h_sent=True)
+
+        # Lock the rows so a request approved mid-sweep is never expired or emailed
+        really_expired = []
+        for tat_label, ids in expired_ids.items():
+            if not ids:
+                continue
+            ids = list(
+                RoomBookingRequest.objects.select_for_update()
+                .filter(pk__in=ids, status='pending')
+                .values_list('pk', flat=True)
+            )
+            RoomBookingRequest.objects.filter(pk__in=ids).update(
+                status='expired',
+                review_note=f'Auto-cancelled: Approval TAT of {tat_label} hours exceeded.',
+                updated_on=now,
+            )
+            really_expired.extend(ids)
+        # .update() skips post_save, so release the slot index rows explicitly
+        release_request_slots(really_expired)
+        invalidate_notification_counts()
+        close_items(BOOKING_KINDS, really_expired)
+        sync_deadlines(BOOKING_REQUEST, really_expired)
+        fan_out_expiring(expiring_reqs)
+
+        outgoing = reminder_mails + [m for pk in really_expired for m in expiry_mails[pk]]
+        # Outbox rows commit with the status changes they describe
+        for mail in outgoing:
+            category = mail.pop('category', None)
+            if category:
+                queue_admin_mail(category, **mail)
+            else:
+                enqueue_mail(**mail)
+
+    logger.info(
+        f"[process_booking_tat_reminders_and_expiry] {len(really_expired)} expired, "
+        f"{len(outgoing)} emails queued"
+    )
 
-    # ── Day-before confirmed booking reminder to faculty ──────────────────────
+
+def process_day_before_booking_reminders():
+    """
+    Send a day-before reminder to faculty for confirmed bookings and
+    auto-cancel pending series whose approval deadline has passed.
+
+    Runs from the `core.tasks.booking_reminder_sweep` beat job.
+    """
+    from django.utils import timezone as _tz
+    from inventory.booking_series import expire_series
+    from inventory.tasks import enqueue_mail
+
+    mails = []
     tomorrow_start = _tz.now().replace(hour=0, minute=0, second=0, microsecond=0) + timezone.timedelta(days=1)
     tomorrow_end   = tomorrow_start + timezone.timedelta(days=1)
 
@@ -1813,8 +2053,9 @@ def process_booking_tat_reminders_and_expiry():
         start_datetime__gte=tomorrow_start,
         start_datetime__lt=tomorrow_end,
         reminder_sent=False,
-    ).select_related('room')
+    ).select_related('room', 'department').prefetch_related('rooms')
 
+    day_before_ids = []
     for booking in tomorrow_bookings:
         details = _format_booking_details(
             booking,
@@ -1824,7 +2065,7 @@ def process_booking_tat_reminders_and_expiry():
             booking.purpose,
             booking.department,
         )
-        _safe_mail(
+        mails.append(dict(
             subject=f"[Blixtro] Reminder: Your Room Booking is Tomorrow — {format_room_list(booking)}",
             message=(
                 f"Dear {booking.faculty_name},\n\n"
@@ -1835,6 +2076,18 @@ def process_booking_tat_reminders_and_expiry():
                 "Best regards,\nBlixtro — SFS College Inventory & Booking System"
             ),
             recipient_list=[booking.faculty_email],
-        )
-        booking.reminder_sent = True
-        booking.save(update_fields=['reminder_sent'])
+        ))
+        day_before_ids.append(booking.pk)
+
+    with transaction.atomic():
+        if day_before_ids:
+            RoomBooking.objects.filter(pk__in=day_before_ids).update(reminder_sent=True)
+        for mail in mails:
+            enqueue_mail(**mail)
+
+    expired_series = expire_series(_tz.now())
+
+    logger.info(
+        f"[process_day_before_booking_reminders] {len(mails)} reminders queued, "
+        f"{expired_series} series expired"
+    )
@@ -5,4 +5,4 @@ admin.site.register(Room)
 admin.site.register(Activity)
 admin.site.register(Vendor)
 admin.site.register(Purchase)
-
+admin.site.register(IssueDuplicateReport)
@@ -0,0 +1,174 @@
+"""
+Digest delivery for admin alert emails.
+
+Admin alerts (new booking requests, approval reminders, auto-cancellations,
+bookings made by other admins) go through queue_admin_mail() instead of
+queue_mail(). Each admin's UserProfile.admin_email_mode (read from the cached
+inventory.recipient_directory) decides what happens:
+
+    instant   the email is queued in the outbox straight away, as before
+    digest    an AdminDigestItem row is stored instead
+
+The send_admin_digests beat task picks up every recipient whose oldest held
+item is at least ADMIN_DIGEST_WINDOW_MINUTES old and sends them one email
+listing everything that happened since their last digest. Attachments are
+only sent with instant emails; digests point admins to the dashboard.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from inventory.email import build_email_shell
+from inventory.outbox import queue_mail
+from inventory.recipient_directory import digest_emails
+
+logger = logging.getLogger(__name__)
+
+
+SUBJECT_PREFIX = '[Blixtro] '
+
+
+def _window():
+    return timedelta(minutes=getattr(settings, 'ADMIN_DIGEST_WINDOW_MINUTES', 60))
+
+
+def queue_admin_mail(
+    category,
+    *,
+    subject,
+    message,
+    recipient_list,
+    html_message=None,
+    attachments=None,
+    fail_silently=True,
+):
+    """
+    queue_mail() for admin alerts: instant recipients share one outbox email,
+    digest recipients get an AdminDigestItem each. `category` is one of
+    AdminDigestItem.CATEGORY_CHOICES.
+    """
+    from inventory.models import AdminDigestItem
+
+    recipients = [r for r in recipient_list or [] if r]
+    if not recipients:
+        return False
+
+    held = digest_emails(recipients)
+    instant = [r for r in recipients if r not in held]
+
+    if held:
+        try:
+            AdminDigestItem.objects.bulk_create([
+                AdminDigestItem(recipient=recipient, category=category, subject=subject, text_body=message or '')
+                for recipient in held
+            ])
+        except Exception:
+            logger.exception("[queue_admin_mail] Could not store digest items")
+            if not fail_silently:
+                raise
+            # Better an extra email than a lost alert
+            instant = recipients
+
+    if instant:
+        return queue_mail(
+            subject=subject,
+            message=message,
+            recipient_list=instant,
+            html_message=html_message,
+            attachments=attachments,
+            fail_silently=fail_silently,
+        )
+    return True
+
+
+# ─────────────────────────────────────────────────────────────────────
+# SENDING
+# ─────────────────────────────────────────────────────────────────────
+
+def _render(items):
+    """Subject, plain text and HTML of one digest email."""
+    from inventory.models import AdminDigestItem
+
+    by_category = defaultdict(list)
+    for item in items:
+        by_category[item.category].append(item)
+
+    count = len(items)
+    subject = f"{SUBJECT_PREFIX}Admin Digest — {count} update{'s' if count != 1 else ''}"
+
+    text_parts = [f"{count} admin notification{'s' if count != 1 else ''} since your last digest.\n"]
+    sections = []
+    for category, label in AdminDigestItem.CATEGORY_CHOICES:
+        entries = by_category.get(category)
+        if not entries:
+            continue
+        text_parts.append(f"── {label} ({len(entries)}) ──\n")
+        rows = []
+        for item in entries:
+            when = timezone.localtime(item.created_on).strftime('%d %b, %H:%M')
+            title = item.subject.removeprefix(SUBJECT_PREFIX)
+            rows.append({"label": when, "value": title})
+            text_parts.append(f"[{when}] {title}\n{item.text_body.strip()}\n")
+        sections.append({"title": f"{label} ({len(entries)})", "rows": rows})
+
+    text_parts.append("Blixtro — SFS College Inventory & Booking System")
+    html = build_email_shell(
+        title="Admin Digest",
+        intro_html=(
+            f"Here {'are' if count != 1 else 'is'} the <strong>{count}</strong> "
+            f"notification{'s' if count != 1 else ''} collected since your last digest."
+        ),
+        sections=sections,
+        outro_html=(
+            "Open Blixtro IMS to review pending requests in the Approval Hub. "
+            "You can switch back to instant emails from the Notifications page."
+        ),
+    )
+    return subject, "\n".join(text_parts), html
+
+
+def send_due_digests(now=None):
+    """Send one digest per recipient whose oldest held item is a window old. Returns the number sent."""
+    from inventory.models import AdminDigestItem
+
+    now = now or timezone.now()
+    due = list(
+        AdminDigestItem.objects.values('recipient')
+        .annotate(oldest=Min('created_on'))
+        .filter(oldest__lte=now - _window())
+        .values_list('recipient', flat=True)
+    )
+
+    sent = 0
+    for recipient in due:
+        try:
+            with transaction.atomic():
+                items = list(
+                    AdminDigestItem.objects.select_for_update(skip_locked=True)
+                    .filter(recipient=recipient, created_on__lte=now)
+                    .order_by('created_on', 'pk')
+                )
+                if not items:
+                    continue
+                subject, text, html = _render(items)
+                # The outbox row commits together with the delete, so nothing is sent twice or lost
+                queue_mail(
+                    subject=subject,
+                    message=text,
+                    recipient_list=[recipient],
+                    html_message=html,
+                    fail_silently=False,
+                )
+                AdminDigestItem.objects.filter(pk__in=[item.pk for item in items]).delete()
+            sent += 1
+        except Exception:
+            logger.exception(f"[send_due_digests] Digest for {recipient} failed; kept for the next run")
+
+    if sent:
+        logger.info(f"[send_due_digests] {sent} digest(s) queued")
+    return sent
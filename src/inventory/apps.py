@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 class InventoryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'inventory'
\ No newline at end of file
+    name = 'inventory'
+
+    def ready(self):
+        from inventory.capabilities import refresh_capabilities
+        post_migrate.connect(refresh_capabilities, dispatch_uid='inventory.refresh_capabilities')
@@ -0,0 +1,353 @@
+"""
+Recurring booking series.
+
+A RoomBookingSeries expands into one pending RoomBookingRequest per
+occurrence.  All occurrences are conflict-checked together against the slot
+index with sorted NumPy arrays, created with bulk inserts, and approved or
+rejected as one unit in a single transaction with one summary email.
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from config.utils import generate_unique_slugs
+from inventory.booking_utils import get_booking_rooms, format_room_list
+from inventory.notification_counts import invalidate_notification_counts
+from inventory.notification_inbox import BOOKING_KINDS, close_items
+from inventory.slot_index import (
+    SOURCE_BOOKING,
+    SOURCE_REQUEST,
+    bulk_sync_slots,
+    db_enforces_booking_exclusion,
+    find_conflicting_slots,
+    release_request_slots,
+)
+
+logger = logging.getLogger(__name__)
+
+
+MAX_SERIES_OCCURRENCES = 60
+
+
+def expand_occurrences(start, end, frequency, until, skip_dates=()):
+    """
+    Return [(start, end), ...] for every occurrence from `start` up to and
+    including the date `until`, stepping by the series frequency and leaving
+    out `skip_dates`.  Occurrences keep the local wall-clock time of `start`.
+    """
+    from inventory.models import RoomBookingSeries
+
+    step = timedelta(days=RoomBookingSeries.FREQUENCY_DAYS[frequency])
+    duration = end - start
+    local_start = timezone.localtime(start)
+    wall_time = local_start.time().replace(tzinfo=None)
+    skip_dates = set(skip_dates)
+
+    occurrences = []
+    day = local_start.date()
+    while day <= until:
+        if day not in skip_dates:
+            occ_start = timezone.make_aware(datetime.combine(day, wall_time))
+            occurrences.append((occ_start, occ_start + duration))
+        day += step
+    return occurrences
+
+
+def find_occurrence_conflicts(rooms, occurrences, exclude_series_pk=None,
+                              sources=(SOURCE_BOOKING, SOURCE_REQUEST)):
+    """
+    Boolean array: True where occurrence i overlaps a slot held in any of `rooms`.
+
+    One indexed query fetches every slot between the first and last
+    occurrence.  Per room the slots are sorted by start with a running max
+    of their ends, so for each occurrence `searchsorted` finds the slots that
+    start before it ends and the running max says whether any of them ends
+    after it starts — O((slots + occurrences) log slots) with no Python loop
+    over occurrences.
+    """
+    clashes = np.zeros(len(occurrences), dtype=bool)
+    if not occurrences:
+        return clashes
+
+    occ_start = np.array([int(s.timestamp()) for s, _ in occurrences], dtype=np.int64)
+    occ_end = np.array([int(e.timestamp()) for _, e in occurrences], dtype=np.int64)
+
+    window = [(min(s for s, _ in occurrences), max(e for _, e in occurrences))]
+    taken = find_conflicting_slots(rooms, window, sources=sources)
+    if exclude_series_pk:
+        taken = taken.exclude(booking_request__series_id=exclude_series_pk)
+
+    by_room = {}
+    for room_id, start, end in taken.values_list('room_id', 'start_datetime', 'end_datetime'):
+        by_room.setdefault(room_id, ([], []))
+        by_room[room_id][0].append(int(start.timestamp()))
+        by_room[room_id][1].append(int(end.timestamp()))
+
+    for starts, ends in by_room.values():
+        starts = np.array(starts, dtype=np.int64)
+        ends = np.array(ends, dtype=np.int64)
+        order = np.argsort(starts, kind='stable')
+        starts = starts[order]
+        max_end = np.maximum.accumulate(ends[order])
+
+        idx = np.searchsorted(starts, occ_end, side='left')
+        hit = idx > 0
+        hit[hit] = max_end[idx[hit] - 1] > occ_start[hit]
+        clashes |= hit
+
+    return clashes
+
+
+def _format_dates(occurrences):
+    return ", ".join(timezone.localtime(s).strftime('%d %b %Y') for s, _ in occurrences)
+
+
+def create_series(series, rooms, tat_deadline):
+    """
+    Save an unsaved RoomBookingSeries together with one pending
+    RoomBookingRequest per occurrence.  Occurrence requests carry no
+    tat_deadline of their own; the series deadline applies to all of them.
+    """
+    from inventory.models import RoomBookingRequest
+
+    occurrences = expand_occurrences(
+        series.start_datetime, series.end_datetime, series.frequency,
+        series.until, series.parsed_skip_dates,
+    )
+    if not occurrences:
+        raise ValidationError("The repeat settings do not produce any dates.")
+
+    with transaction.atomic():
+        series.status = 'pending'
+        series.tat_deadline = tat_deadline
+        series.save()
+        series.rooms.set(rooms)
+
+        requests = RoomBookingRequest.objects.bulk_create([
+            RoomBookingRequest(
+                room              = series.room,
+                department        = series.department,
+                faculty_name      = series.faculty_name,
+                faculty_email     = series.faculty_email,
+                start_datetime    = start,
+                end_datetime      = end,
+                purpose           = series.purpose,
+                requirements_doc  = series.requirements_doc.name or None,
+                requirements_text = series.requirements_text,
+                status            = 'pending',
+                workflow_stage    = 'sub_admin',
+                series            = series,
+            )
+            for start, end in occurrences
+        ])
+
+        Through = RoomBookingRequest.rooms.through
+        Through.objects.bulk_create([
+            Through(roombookingrequest_id=req.pk, room_id=room.pk)
+            for req in requests for room in rooms
+        ])
+        bulk_sync_slots(requests, rooms)
+
+    return requests
+
+
+def approve_series(series_pk, profile, note=''):
+    """
+    Turn every pending occurrence of a series into a confirmed RoomBooking.
+    All or nothing: any clash with a confirmed booking aborts the whole series.
+    """
+    from inventory.models import RoomBooking, RoomBookingRequest, RoomBookingSeries
+
+    approved_by_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
+
+    with transaction.atomic():
+        series = RoomBookingSeries.objects.select_for_update().get(pk=series_pk, status='pending')
+        rooms = get_booking_rooms(series)
+        requests = list(series.occurrences.filter(status='pending').order_by('start_datetime'))
+        occurrences = [(req.start_datetime, req.end_datetime) for req in requests]
+
+        # With the Postgres exclusion constraint the slot insert below is the check
+        if not db_enforces_booking_exclusion():
+            clashes = find_occurrence_conflicts(rooms, occurrences, sources=(SOURCE_BOOKING,))
+            if clashes.any():
+                clashing = [occ for occ, clash in zip(occurrences, clashes) if clash]
+                raise ValidationError(
+                    f"Cannot approve series: rooms are already booked on {_format_dates(clashing)}."
+                )
+
+        slugs = generate_unique_slugs(RoomBooking, [slugify(series.faculty_name)] * len(occurrences))
+        bookings = RoomBooking.objects.bulk_create([
+            RoomBooking(
+                room              = series.room,
+                department        = series.department,
+                faculty_name      = series.faculty_name,
+                faculty_email     = series.faculty_email,
+                start_datetime    = start,
+                end_datetime      = end,
+                purpose           = series.purpose,
+                requirements_doc  = series.requirements_doc.name or None,
+                requirements_text = series.requirements_text,
+                approved_by_name  = approved_by_name,
+                approved_note     = note,
+                series            = series,
+                slug              = slug,
+            )
+            for (start, end), slug in zip(occurrences, slugs)
+        ])
+
+        Through = RoomBooking.rooms.through
+        Through.objects.bulk_create([
+            Through(roombooking_id=booking.pk, room_id=room.pk)
+            for booking in bookings for room in rooms
+        ])
+        bulk_sync_slots(bookings, rooms)
+
+        review_note = f"Series approved by {approved_by_name}" + (f" — Remark: {note}" if note else "")
+        request_ids = [req.pk for req in requests]
+        RoomBookingRequest.objects.filter(pk__in=request_ids).update(
+            status='approved',
+            reviewed_by=profile,
+            approved_by=profile,
+            approved_note=note,
+            review_note=review_note,
+            updated_on=timezone.now(),
+        )
+        release_request_slots(request_ids)
+        invalidate_notification_counts()
+        close_items(BOOKING_KINDS, request_ids)
+
+        series.status = 'approved'
+        series.reviewed_by = profile
+        series.review_note = review_note
+        series.save(update_fields=['status', 'reviewed_by', 'review_note', 'updated_on'])
+
+        transaction.on_commit(lambda: send_series_summary(series, occurrences, approved_by_name, note))
+
+    return series, bookings
+
+
+def reject_series(series_pk, profile, note):
+    """Reject every pending occurrence of a series at once."""
+    from inventory.models import RoomBookingRequest, RoomBookingSeries
+
+    rejected_by_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
+
+    with transaction.atomic():
+        series = RoomBookingSeries.objects.select_for_update().get(pk=series_pk, status='pending')
+        requests = list(series.occurrences.filter(status='pending').order_by('start_datetime'))
+        occurrences = [(req.start_datetime, req.end_datetime) for req in requests]
+
+        request_ids = [req.pk for req in requests]
+        RoomBookingRequest.objects.filter(pk__in=request_ids).update(
+            status='rejected',
+            reviewed_by=profile,
+            review_note=note,
+            updated_on=timezone.now(),
+        )
+        release_request_slots(request_ids)
+        invalidate_notification_counts()
+        close_items(BOOKING_KINDS, request_ids)
+
+        series.status = 'rejected'
+        series.reviewed_by = profile
+        series.review_note = note
+        series.save(update_fields=['status', 'reviewed_by', 'review_note', 'updated_on'])
+
+        transaction.on_commit(lambda: send_series_summary(series, occurrences, rejected_by_name, note))
+
+    return series
+
+
+def expire_series(now=None):
+    """Auto-cancel pending series whose approval deadline has passed. Returns the count."""
+    from inventory.models import RoomBookingRequest, RoomBookingSeries
+
+    now = now or timezone.now()
+    expired = 0
+    with transaction.atomic():
+        overdue = list(
+            RoomBookingSeries.objects.select_for_update()
+            .filter(status='pending', tat_deadline__lte=now)
+        )
+        for series in overdue:
+            requests = list(series.occurrences.filter(status='pending').order_by('start_datetime'))
+            occurrences = [(req.start_datetime, req.end_datetime) for req in requests]
+            request_ids = [req.pk for req in requests]
+            RoomBookingRequest.objects.filter(pk__in=request_ids).update(
+                status='expired',
+                review_note='Auto-cancelled: series approval TAT exceeded.',
+                updated_on=now,
+            )
+            release_request_slots(request_ids)
+            invalidate_notification_counts()
+            close_items(BOOKING_KINDS, request_ids)
+            series.status = 'expired'
+            series.review_note = 'Auto-cancelled: approval TAT exceeded.'
+            series.save(update_fields=['status', 'review_note', 'updated_on'])
+            transaction.on_commit(
+                lambda series=series, occurrences=occurrences: send_series_summary(series, occurrences)
+            )
+            expired += 1
+    return expired
+
+
+def send_series_summary(series, occurrences, actor_name='', note=''):
+    """One email covering every occurrence of a series, sent after a status change or on creation."""
+    from inventory.email import build_email_shell
+    from inventory.tasks import enqueue_mail
+
+    rooms = format_room_list(series)
+    first = timezone.localtime(series.start_datetime)
+    last_end = timezone.localtime(series.end_datetime)
+    dates_rows = [
+        {"label": f"#{i}", "value": timezone.localtime(s).strftime('%a, %d %b %Y')}
+        for i, (s, _) in enumerate(occurrences, start=1)
+    ]
+    details_rows = [
+        {"label": "Rooms", "value": rooms},
+        {"label": "Repeats", "value": f"{series.get_frequency_display()} until {series.until:%d %b %Y}"},
+        {"label": "Time", "value": f"{first:%I:%M %p} – {last_end:%I:%M %p}"},
+        {"label": "Occurrences", "value": str(len(occurrences))},
+        {"label": "Purpose", "value": series.purpose or "—"},
+    ]
+
+    if series.status == 'pending':
+        title, verb = "Recurring Booking Request Received", "has been submitted and is awaiting admin review"
+    elif series.status == 'approved':
+        title, verb = "Recurring Booking Approved", f"has been approved by {actor_name}"
+    elif series.status == 'rejected':
+        title, verb = "Recurring Booking Rejected", f"has been rejected by {actor_name}"
+    else:
+        title, verb = "Recurring Booking Auto-Cancelled", "was not reviewed in time and has been automatically cancelled"
+
+    recipients = [series.faculty_email]
+    if series.status == 'approved':
+        from inventory.views.central_admin import BOOKING_NOTIFICATION_EMAILS
+        recipients += BOOKING_NOTIFICATION_EMAILS
+
+    dates_plain = "\n".join(f"  {row['label']}  {row['value']}" for row in dates_rows)
+    details_plain = "\n".join(f"{row['label']}: {row['value']}" for row in details_rows)
+    enqueue_mail(
+        subject=f"[Blixtro] {title} — {rooms}",
+        message=(
+            f"Dear {series.faculty_name},\n\n"
+            f"Your recurring room booking {verb}.\n\n"
+            f"{details_plain}\n\nDates:\n{dates_plain}\n\n"
+            + (f"Remark: {note}\n\n" if note else "")
+            + "Best regards,\nBlixtro — SFS College Inventory & Booking System"
+        ),
+        recipient_list=recipients,
+        html_message=build_email_shell(
+            title=title,
+            intro_html=f"Dear <strong>{series.faculty_name}</strong>, your recurring room booking {verb}.",
+            sections=[
+                {"title": "Series", "rows": details_rows},
+                {"title": "Dates", "rows": dates_rows},
+            ] + ([{"title": "Remark", "rows": [{"label": "Note", "value": note}]}] if note else []),
+        ),
+    )
@@ -1,6 +1,7 @@
 import io
 import os
 import re
+from datetime import date, timedelta
 
 import pdfplumber
 from django.utils import timezone
@@ -31,6 +32,15 @@ def sort_rooms_iterable(rooms):
     )
 
 
+# Bookings must be made at least this many days ahead (the day after tomorrow)
+MIN_BOOKING_LEAD_DAYS = 2
+
+
+def earliest_booking_date():
+    """First date a room can be booked for."""
+    return date.today() + timedelta(days=MIN_BOOKING_LEAD_DAYS)
+
+
 def get_booking_rooms(instance):
     rooms = []
 
@@ -247,11 +257,7 @@ def get_requirements_payload(obj):
 
 
 def check_slots_conflict(selected_rooms, slots, exclude_booking_pk=None, exclude_request_pk=None):
-    from django.db.models import Q
-    from inventory.models import RoomBooking, RoomBookingRequest
-    from django.utils import timezone
-    from django.utils.dateparse import parse_datetime
-    import json
+    from inventory.slot_index import find_conflicting_slots, SOURCE_BOOKING, SOURCE_REQUEST
 
     def overlaps(s1_start, s1_end, s2_start, s2_end):
         return s1_start < s2_end and s2_start < s1_end
@@ -262,63 +268,22 @@ def check_slots_conflict(selected_rooms, slots, exclude_booking_pk=None, exclude
             if overlaps(slots[i][0], slots[i][1], slots[j][0], slots[j][1]):
                 return f"Duplicate or overlapping slots detected in your request: {slots[i][0].strftime('%d %b %Y, %I:%M %p')} overlaps with {slots[j][0].strftime('%d %b %Y, %I:%M %p')}."
 
-    # Fetch active bookings for these rooms
-    bookings = RoomBooking.objects.filter(
-        Q(room__in=selected_rooms) | Q(rooms__in=selected_rooms)
-    ).exclude(status='cancelled')
-    if exclude_booking_pk:
-        bookings = bookings.exclude(pk=exclude_booking_pk)
-
-    # Fetch pending requests for these rooms
-    requests = RoomBookingRequest.objects.filter(
-        Q(room__in=selected_rooms) | Q(rooms__in=selected_rooms),
-        status='pending'
-    )
-    if exclude_request_pk:
-        requests = requests.exclude(pk=exclude_request_pk)
-
-    for b in bookings:
-        b_slots = [(b.start_datetime, b.end_datetime)]
-        if b.alternative_slots:
-            try:
-                extra = json.loads(b.alternative_slots)
-                for slot in extra:
-                    s_dt = parse_datetime(slot['start'])
-                    e_dt = parse_datetime(slot['end'])
-                    if s_dt and e_dt:
-                        if timezone.is_naive(s_dt):
-                            s_dt = timezone.make_aware(s_dt)
-                        if timezone.is_naive(e_dt):
-                            e_dt = timezone.make_aware(e_dt)
-                        b_slots.append((s_dt, e_dt))
-            except Exception:
-                pass
-        
-        for s_start, s_end in slots:
-            for b_start, b_end in b_slots:
-                if overlaps(s_start, s_end, b_start, b_end):
-                    return f"Room is already booked for slot {s_start.strftime('%d %b %Y, %I:%M %p')} to {s_end.strftime('%I:%M %p')}."
-
-    for r in requests:
-        r_slots = [(r.start_datetime, r.end_datetime)]
-        if r.alternative_slots:
-            try:
-                extra = json.loads(r.alternative_slots)
-                for slot in extra:
-                    s_dt = parse_datetime(slot['start'])
-                    e_dt = parse_datetime(slot['end'])
-                    if s_dt and e_dt:
-                        if timezone.is_naive(s_dt):
-                            s_dt = timezone.make_aware(s_dt)
-                        if timezone.is_naive(e_dt):
-                            e_dt = timezone.make_aware(e_dt)
-                        r_slots.append((s_dt, e_dt))
-            except Exception:
-                pass
-        
+    # Only slots intersecting the requested windows are fetched from the index
+    taken = list(find_conflicting_slots(
+        selected_rooms,
+        slots,
+        exclude_booking_pk=exclude_booking_pk,
+        exclude_request_pk=exclude_request_pk,
+    ))
+
+    # Confirmed bookings take precedence over pending requests in the message
+    for source, message in (
+        (SOURCE_BOOKING, "Room is already booked for slot"),
+        (SOURCE_REQUEST, "Room has a pending request for slot"),
+    ):
         for s_start, s_end in slots:
-            for r_start, r_end in r_slots:
-                if overlaps(s_start, s_end, r_start, r_end):
-                    return f"Room has a pending request for slot {s_start.strftime('%d %b %Y, %I:%M %p')} to {s_end.strftime('%I:%M %p')}."
+            for slot in taken:
+                if slot.source == source and overlaps(s_start, s_end, slot.start_datetime, slot.end_datetime):
+                    return f"{message} {s_start.strftime('%d %b %Y, %I:%M %p')} to {s_end.strftime('%I:%M %p')}."
 
     return None
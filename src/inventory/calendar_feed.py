@@ -0,0 +1,198 @@
+"""
+iCalendar (.ics) feeds of confirmed room bookings.
+
+Feeds are published per room, per room category and per faculty email so
+staff can subscribe from Google/Outlook/Apple calendars instead of polling
+the booking status pages. Calendar clients cannot log in, so every feed URL
+carries a signed token instead of the room slug, category or email it
+stands for; admins copy room and category links from the room pages. Every RoomBooking contributes one VEVENT for its
+primary slot and one per alternative slot; cancelled bookings stay in the
+feed as STATUS:CANCELLED so subscribed clients drop them.
+
+The body is produced lazily (see iter_calendar) and the validators from
+feed_validators() are cheap aggregates, so an unchanged feed is answered
+with a 304 without loading a single booking.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from inventory.booking_utils import format_room_list
+from inventory.slot_index import get_slot_windows
+
+
+PRODID = '-//SFS College//Blixtro Room Bookings//EN'
+
+# Bookings that ended longer ago than this are left out of every feed.
+FEED_HISTORY_DAYS = 90
+
+# Hint to calendar clients on how often to re-fetch.
+FEED_REFRESH_INTERVAL = 'PT15M'
+
+FACULTY_TOKEN_SALT = 'inventory.calendar_feed.faculty'
+ROOM_TOKEN_SALT = 'inventory.calendar_feed.room'
+CATEGORY_TOKEN_SALT = 'inventory.calendar_feed.category'
+
+_ITERATOR_CHUNK = 500
+
+
+def _loads(token, salt):
+    try:
+        return signing.loads(token, salt=salt)
+    except signing.BadSignature:
+        return None
+
+
+def faculty_feed_token(email):
+    """Signed, URL-safe token identifying a faculty member's feed."""
+    return signing.dumps(email.strip().lower(), salt=FACULTY_TOKEN_SALT)
+
+
+def email_from_feed_token(token):
+    """Return the email a token was issued for, or None if it was tampered with."""
+    return _loads(token, FACULTY_TOKEN_SALT)
+
+
+def room_feed_token(room):
+    """Signed token for a room's feed; the feeds name faculty and purposes, so slugs alone don't open them."""
+    return signing.dumps(room.slug, salt=ROOM_TOKEN_SALT)
+
+
+def room_slug_from_feed_token(token):
+    return _loads(token, ROOM_TOKEN_SALT)
+
+
+def category_feed_token(category):
+    """Signed token for a room category's feed."""
+    return signing.dumps(category, salt=CATEGORY_TOKEN_SALT)
+
+
+def category_from_feed_token(token):
+    return _loads(token, CATEGORY_TOKEN_SALT)
+
+
+def feed_bookings(rooms=None, faculty_email=None):
+    """
+    RoomBooking queryset for a feed: bookings touching any of `rooms` (primary
+    or multi-room selection) or made by `faculty_email`, still inside the
+    history window.
+    """
+    from inventory.models import RoomBooking
+
+    matching = RoomBooking.objects.filter(
+        end_datetime__gte=timezone.now() - timedelta(days=FEED_HISTORY_DAYS),
+    )
+    if rooms is not None:
+        matching = matching.filter(Q(room__in=rooms) | Q(rooms__in=rooms))
+    if faculty_email is not None:
+        matching = matching.filter(faculty_email__iexact=faculty_email)
+    # pk__in keeps the M2M join out of the outer query so aggregates don't double count
+    return RoomBooking.objects.filter(pk__in=matching.values('pk'))
+
+
+def feed_validators(bookings):
+    """
+    Return (etag, last_modified) for a feed queryset from one aggregate.
+
+    last_modified is the newest booking change; the ETag additionally folds
+    in the row count so deletions and bookings ageing out of the window
+    invalidate cached copies too.
+    """
+    state = bookings.aggregate(changed=Max('updated_on'), total=Count('pk'), newest=Max('pk'))
+    last_modified = state['changed']
+    fingerprint = f"{state['total']}:{state['newest']}:{last_modified.timestamp() if last_modified else 0}"
+    etag = '"' + hashlib.sha1(fingerprint.encode()).hexdigest()[:20] + '"'
+    return etag, last_modified
+
+
+def _escape(value):
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Fold a content line at 75 octets without splitting a UTF-8 sequence (RFC 5545 §3.1)."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current, size, limit = [], [], 0, 75
+    for char in line:
+        width = len(char.encode('utf-8'))
+        if size + width > limit:
+            parts.append(''.join(current))
+            current, size, limit = [], 0, 74  # continuation lines start with a space
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _booking_events(booking, uid_domain):
+    stamp = _utc(booking.updated_on or booking.created_on)
+    location = format_room_list(booking)
+    purpose_lines = (booking.purpose or '').strip().splitlines()
+    summary = purpose_lines[0][:120] if purpose_lines else 'Room booking'
+    description = f"Booked by {booking.faculty_name}"
+    if booking.department:
+        description += f" ({booking.department})"
+    if booking.purpose:
+        description += f"\n\n{booking.purpose}"
+    status = 'CANCELLED' if booking.status == 'cancelled' else 'CONFIRMED'
+
+    chunk = []
+    for index, (start, end) in enumerate(get_slot_windows(booking)):
+        uid = f"booking-{booking.pk}" + (f"-alt{index}" if index else '') + f"@{uid_domain}"
+        for line in (
+            'BEGIN:VEVENT',
+            f'UID:{uid}',
+            f'DTSTAMP:{stamp}',
+            f'LAST-MODIFIED:{stamp}',
+            f'DTSTART:{_utc(start)}',
+            f'DTEND:{_utc(end)}',
+            f'SUMMARY:{_escape(f"{summary} — {location}")}',
+            f'LOCATION:{_escape(location)}',
+            f'DESCRIPTION:{_escape(description)}',
+            f'STATUS:{status}',
+            'TRANSP:OPAQUE',
+            'END:VEVENT',
+        ):
+            chunk.append(_fold(line))
+    return ''.join(chunk)
+
+
+def iter_calendar(bookings, name, uid_domain=None):
+    """Yield the .ics document for `bookings` a few events at a time."""
+    uid_domain = uid_domain or getattr(settings, 'CALENDAR_UID_DOMAIN', 'blixtro.sfscollege.in')
+    yield ''.join(_fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+        f'X-PUBLISHED-TTL:{FEED_REFRESH_INTERVAL}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{FEED_REFRESH_INTERVAL}',
+    ))
+    queryset = (
+        bookings.select_related('room', 'department')
+        .prefetch_related('rooms')
+        .order_by('start_datetime', 'pk')
+    )
+    for booking in queryset.iterator(chunk_size=_ITERATOR_CHUNK):
+        yield _booking_events(booking, uid_domain)
+    yield _fold('END:VCALENDAR')
@@ -0,0 +1,88 @@
+"""
+Schema capability registry.
+
+Some code paths depend on what the connected database actually provides:
+columns added by later migrations, or Postgres-only constraints that are
+installed conditionally. Rather than probing the catalog on every request,
+the flags are introspected once per process (on first use) and refreshed
+after `migrate` through the post_migrate signal wired in InventoryConfig.
+
+    from inventory.capabilities import has_capability
+    if has_capability(ROOMBOOKING_DATETIME_COLUMNS): ...
+
+`python manage.py schema_capabilities` prints the detected flags.
+"""
+import logging
+import threading
+
+from django.db import DatabaseError, connection
+
+logger = logging.getLogger(__name__)
+
+
+ROOMBOOKING_DATETIME_COLUMNS = 'roombooking_datetime_columns'
+ROOM_SLOT_INDEX = 'room_slot_index'
+BOOKING_EXCLUSION_CONSTRAINT = 'booking_exclusion_constraint'
+TRIGRAM_SIMILARITY = 'trigram_similarity'
+
+_capabilities = None
+_lock = threading.Lock()
+
+
+def detect_capabilities():
+    """Introspect the default database and return {capability: bool}."""
+    from inventory.slot_index import BOOKING_EXCLUSION_CONSTRAINT as constraint_name
+
+    introspection = connection.introspection
+    with connection.cursor() as cursor:
+        tables = set(introspection.table_names(cursor))
+
+        booking_columns = set()
+        if 'inventory_roombooking' in tables:
+            booking_columns = {
+                col.name for col in introspection.get_table_description(cursor, 'inventory_roombooking')
+            }
+
+        slot_constraints = {}
+        if 'inventory_roomslot' in tables:
+            slot_constraints = introspection.get_constraints(cursor, 'inventory_roomslot')
+
+        trigram = False
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            trigram = cursor.fetchone() is not None
+
+    return {
+        ROOMBOOKING_DATETIME_COLUMNS: {'start_datetime', 'end_datetime'}.issubset(booking_columns),
+        ROOM_SLOT_INDEX: 'inventory_roomslot' in tables,
+        BOOKING_EXCLUSION_CONSTRAINT: (
+            connection.vendor == 'postgresql' and constraint_name in slot_constraints
+        ),
+        TRIGRAM_SIMILARITY: trigram,
+    }
+
+
+def get_capabilities():
+    """Return the cached capability flags, detecting them on first use."""
+    global _capabilities
+    if _capabilities is None:
+        with _lock:
+            if _capabilities is None:
+                try:
+                    _capabilities = detect_capabilities()
+                except DatabaseError as e:
+                    # Database not reachable yet: report nothing, retry next call
+                    logger.warning(f"[get_capabilities] Schema introspection failed: {e}")
+                    return {}
+    return _capabilities
+
+
+def has_capability(name):
+    return bool(get_capabilities().get(name))
+
+
+def refresh_capabilities(**kwargs):
+    """post_migrate receiver: drop the cache so the next lookup re-introspects."""
+    global _capabilities
+    with _lock:
+        _capabilities = None
@@ -0,0 +1,281 @@
+"""
+Deadline scheduler for issue and booking-request TATs.
+
+Instead of beat jobs rescanning Issue / RoomBookingRequest for expired
+deadlines, every actionable item keeps one ScheduledDeadline row:
+
+    issue             open / in-progress / escalated issues below the top
+                      escalation level, due at their tat_deadline
+    booking_request   pending (non-series) booking requests, due at their
+                      next TAT reminder or, after the last one, at their
+                      tat_deadline
+
+Signals in inventory.models keep the rows in step with saves and deletes;
+bulk .update() paths call sync_deadlines() themselves. The rows form a
+sorted index on due_at, so "what is due" and "when is the next deadline"
+are both index range reads.
+
+Whenever a deadline earlier than the armed wake-up is scheduled, a
+fire_due_deadlines task is queued with that ETA (capped at
+DEADLINE_MAX_SLEEP, below the broker's visibility timeout). The task
+escalates the due issues (inventory.issue_escalation), sends reminders for
+or expires the due booking requests, re-syncs the rows it handled and arms
+the next wake-up. A slow beat entry runs the same task as a safety net in
+case a scheduled message is lost.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+ISSUE = 'issue'
+BOOKING_REQUEST = 'booking_request'
+
+WAKE_KEY = 'deadline-scheduler:wake'
+# Redis redelivers unacked ETA messages after its visibility timeout (1h by default)
+DEADLINE_MAX_SLEEP = timedelta(minutes=55)
+_BULK_BATCH = 500
+
+
+def _issue_due(issue):
+    from inventory.issue_escalation import MAX_LEVEL, OPEN_STATUSES
+
+    if issue.resolved or issue.status not in OPEN_STATUSES or issue.escalation_level >= MAX_LEVEL:
+        return None
+    return issue.tat_deadline
+
+
+def _booking_request_due(req):
+    """
+    The next point where core.views.process_booking_tat_reminders_and_expiry
+    has work: the start of the last 24 hours (the admin inbox 'expiring'
+    row), each reminder not yet sent while its window is open, and finally
+    the TAT deadline itself.
+    """
+    # Series occurrences are reviewed and expired as a series, never on their own
+    if req.status != 'pending' or req.series_id is not None or req.tat_deadline is None:
+        return None
+    now = timezone.now()
+    deadline = req.tat_deadline
+    fast_track = deadline - req.created_on <= timedelta(hours=26)
+    first, final = (
+        (deadline - timedelta(hours=12), deadline - timedelta(hours=6)) if fast_track else
+        (deadline - timedelta(hours=24), deadline - timedelta(hours=12))
+    )
+    points = [deadline]
+    if deadline - timedelta(hours=24) > now:
+        points.append(deadline - timedelta(hours=24))
+    if not req.reminder_24h_sent and now < final:
+        points.append(first)
+    if not req.reminder_12h_sent and now < deadline:
+        points.append(final)
+    return min(points)
+
+
+def _fire_issues(ids):
+    from inventory.tasks import escalate_expired_issues
+    escalate_expired_issues(issue_ids=ids)
+
+
+def _fire_booking_requests(ids):
+    from core.views import process_booking_tat_reminders_and_expiry
+    process_booking_tat_reminders_and_expiry(ids)
+
+
+# kind → (model label, fields due_of reads, due_of, fire)
+_KINDS = {
+    ISSUE: (
+        'inventory.issue',
+        ('resolved', 'status', 'escalation_level', 'tat_deadline'),
+        _issue_due,
+        _fire_issues,
+    ),
+    BOOKING_REQUEST: (
+        'inventory.roombookingrequest',
+        ('status', 'series', 'tat_deadline', 'created_on', 'reminder_24h_sent', 'reminder_12h_sent'),
+        _booking_request_due,
+        _fire_booking_requests,
+    ),
+}
+_KIND_BY_LABEL = {label: kind for kind, (label, *_) in _KINDS.items()}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# WAKE-UPS
+# ─────────────────────────────────────────────────────────────────────
+
+def _eager():
+    from celery import current_app
+    return current_app.conf.task_always_eager
+
+
+def _arm(due_at):
+    """Make sure a fire_due_deadlines run is queued no later than `due_at`."""
+    if due_at is None or _eager():
+        # Eager mode would fire right away; the beat safety net covers dev setups
+        return
+
+    def _queue():
+        from inventory.tasks import enqueue_at, fire_due_deadlines
+
+        now = timezone.now()
+        wake_at = max(min(due_at, now + DEADLINE_MAX_SLEEP), now)
+        try:
+            armed = cache.get(WAKE_KEY)
+        except Exception:
+            armed = None
+        # An earlier wake-up that has not passed yet covers this deadline too
+        if armed is not None and now.timestamp() < armed <= wake_at.timestamp():
+            return
+        if enqueue_at(fire_due_deadlines, wake_at):
+            try:
+                cache.set(WAKE_KEY, wake_at.timestamp(), int((wake_at - now).total_seconds()) + 60)
+            except Exception:
+                logger.warning(f"[deadline_scheduler] Could not record the wake-up at {wake_at}")
+
+    transaction.on_commit(_queue)
+
+
+def arm_next(now=None):
+    """Arm the wake-up for the earliest deadline still in the future."""
+    from inventory.models import ScheduledDeadline
+
+    now = now or timezone.now()
+    upcoming = (
+        ScheduledDeadline.objects.filter(due_at__gt=now)
+        .order_by('due_at').values_list('due_at', flat=True).first()
+    )
+    _arm(upcoming)
+    return upcoming
+
+
+# ─────────────────────────────────────────────────────────────────────
+# KEEPING ROWS IN STEP
+# ─────────────────────────────────────────────────────────────────────
+
+def _upsert(kind, due_by_id, arm=True):
+    from inventory.models import ScheduledDeadline
+
+    if not due_by_id:
+        return
+    ScheduledDeadline.objects.bulk_create(
+        [ScheduledDeadline(kind=kind, object_id=object_id, due_at=due_at) for object_id, due_at in due_by_id.items()],
+        batch_size=_BULK_BATCH,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['due_at'],
+    )
+    if arm:
+        _arm(min(due_by_id.values()))
+
+
+def sync_instance(instance):
+    """Schedule or drop a saved issue / booking request (called from post_save)."""
+    from inventory.models import ScheduledDeadline
+
+    kind = _KIND_BY_LABEL.get(instance._meta.label_lower)
+    if kind is None:
+        return
+    due_at = _KINDS[kind][2](instance)
+    if due_at is None:
+        ScheduledDeadline.objects.filter(kind=kind, object_id=instance.pk).delete()
+    else:
+        _upsert(kind, {instance.pk: due_at})
+
+
+def drop_instance(instance):
+    from inventory.models import ScheduledDeadline
+
+    kind = _KIND_BY_LABEL.get(instance._meta.label_lower)
+    if kind is not None:
+        ScheduledDeadline.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def sync_deadlines(kind, object_ids, arm=True):
+    """
+    Re-read items changed with a bulk .update() and reschedule or drop their
+    rows. fire_due() passes arm=False: it arms the next future deadline
+    itself, so items that stay overdue cannot requeue it in a loop.
+    """
+    from django.apps import apps
+    from inventory.models import ScheduledDeadline
+
+    object_ids = list(object_ids)
+    if not object_ids:
+        return
+    label, fields, due_of, _ = _KINDS[kind]
+    model = apps.get_model(label)
+
+    due_by_id = {}
+    for start in range(0, len(object_ids), _BULK_BATCH):
+        for obj in model.objects.filter(pk__in=object_ids[start:start + _BULK_BATCH]).only(*fields):
+            due_at = due_of(obj)
+            if due_at is not None:
+                due_by_id[obj.pk] = due_at
+
+    gone = [object_id for object_id in object_ids if object_id not in due_by_id]
+    for start in range(0, len(gone), _BULK_BATCH):
+        ScheduledDeadline.objects.filter(kind=kind, object_id__in=gone[start:start + _BULK_BATCH]).delete()
+    _upsert(kind, due_by_id, arm=arm)
+
+
+def due_ids(kind, now=None):
+    """Ids of `kind` items whose deadline has passed."""
+    from inventory.models import ScheduledDeadline
+
+    return list(
+        ScheduledDeadline.objects.filter(kind=kind, due_at__lte=now or timezone.now())
+        .values_list('object_id', flat=True)
+    )
+
+
+# ─────────────────────────────────────────────────────────────────────
+# FIRING
+# ─────────────────────────────────────────────────────────────────────
+
+def fire_due(now=None):
+    """Act on every deadline that has passed, then arm the next wake-up. Returns {kind: count}."""
+    from inventory.models import ScheduledDeadline
+
+    now = now or timezone.now()
+    due = defaultdict(list)
+    for kind, object_id in ScheduledDeadline.objects.filter(due_at__lte=now).values_list('kind', 'object_id'):
+        due[kind].append(object_id)
+
+    for kind, object_ids in due.items():
+        try:
+            _KINDS[kind][3](object_ids)
+        except Exception:
+            logger.exception(f"[fire_due] Handling {len(object_ids)} due {kind} deadline(s) failed")
+        # Handled items drop out or move to their new deadline; anything still
+        # due (lock held elsewhere, no admin to escalate to) waits for the next run
+        sync_deadlines(kind, object_ids, arm=False)
+
+    arm_next(now)
+    if due:
+        logger.info("[fire_due] Fired " + ", ".join(f"{len(ids)} {kind}" for kind, ids in due.items()))
+    return {kind: len(ids) for kind, ids in due.items()}
+
+
+def backfill():
+    """Schedule every actionable item (new installs / after restoring a database)."""
+    from django.apps import apps
+
+    scheduled = 0
+    for kind, (label, fields, due_of, _) in _KINDS.items():
+        model = apps.get_model(label)
+        due_by_id = {}
+        for obj in model.objects.filter(tat_deadline__isnull=False).only(*fields).iterator(chunk_size=2000):
+            due_at = due_of(obj)
+            if due_at is not None:
+                due_by_id[obj.pk] = due_at
+        _upsert(kind, due_by_id, arm=False)
+        scheduled += len(due_by_id)
+    arm_next()
+    return scheduled
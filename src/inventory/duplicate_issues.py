@@ -0,0 +1,139 @@
+"""
+Near-duplicate detection for student issue reports.
+
+Students tend to report the same broken projector in the same room many
+times; every report used to become its own Issue, with its own incharge
+email and TAT clock. Before a report is filed, similar_open_issues() looks
+for an open ticket in the same room that reads like it:
+
+    score        trigram similarity (pg_trgm semantics) of the new subject
+                 with each ticket's subject, or of "subject description"
+                 with the ticket's "subject description", whichever is higher
+    PostgreSQL   scored in the database with pg_trgm when the extension is
+                 installed (TRIGRAM_SIMILARITY capability, migration 0038)
+    otherwise    the same score computed in Python over the newest
+                 CANDIDATE_LIMIT open tickets of the room
+
+The room's open tickets are a handful of rows, so no trigram index is
+needed. When a match is found the student is shown it and can attach the
+report to that ticket (attach_report(): an IssueDuplicateReport row, no new
+Issue, no incharge email, the ticket's TAT unchanged) or file a new ticket
+anyway.
+"""
+import re
+
+from django.conf import settings
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat, Greatest
+
+from inventory.issue_escalation import OPEN_STATUSES
+
+
+MAX_MATCHES = 3
+# Open tickets of one room scored by the Python fallback
+CANDIDATE_LIMIT = 200
+# pg_trgm's own default for the % operator
+DEFAULT_THRESHOLD = 0.3
+
+_WORD = re.compile(r'[^\W_]+')
+
+
+def _threshold():
+    return float(getattr(settings, 'ISSUE_DUPLICATE_THRESHOLD', DEFAULT_THRESHOLD))
+
+
+def open_issues_in(room):
+    from inventory.models import Issue
+
+    return Issue.objects.filter(room=room, resolved=False, status__in=OPEN_STATUSES)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# SCORING
+# ─────────────────────────────────────────────────────────────────────
+
+def trigrams(text):
+    """pg_trgm's trigram set: lower-cased words padded with two leading and one trailing space."""
+    grams = set()
+    for word in _WORD.findall((text or '').lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all trigrams of both strings."""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def _full_text(subject, description):
+    return f"{subject or ''} {description or ''}"
+
+
+def _score(subject, full_text, issue):
+    return max(
+        similarity(subject, issue.subject),
+        similarity(full_text, _full_text(issue.subject, issue.description)),
+    )
+
+
+def _similar_in_db(candidates, subject, full_text, threshold, limit):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    issue_text = Concat('subject', Value(' '), 'description', output_field=CharField())
+    return list(
+        candidates.annotate(similarity=Greatest(
+            TrigramSimilarity('subject', subject),
+            TrigramSimilarity(issue_text, full_text),
+        ))
+        .filter(similarity__gte=threshold)
+        .order_by('-similarity', '-created_on')[:limit]
+    )
+
+
+def _similar_in_python(candidates, subject, full_text, threshold, limit):
+    matches = []
+    for issue in candidates[:CANDIDATE_LIMIT]:
+        issue.similarity = _score(subject, full_text, issue)
+        if issue.similarity >= threshold:
+            matches.append(issue)
+    matches.sort(key=lambda issue: (issue.similarity, issue.created_on), reverse=True)
+    return matches[:limit]
+
+
+def similar_open_issues(room, subject, description, limit=MAX_MATCHES):
+    """Open issues of `room` that look like this report, best match first (each with .similarity)."""
+    from inventory.capabilities import TRIGRAM_SIMILARITY, has_capability
+
+    if room is None or not (subject or description):
+        return []
+    candidates = open_issues_in(room).select_related('room').order_by('-created_on')
+    full_text = _full_text(subject, description)
+    if has_capability(TRIGRAM_SIMILARITY):
+        return _similar_in_db(candidates, subject, full_text, _threshold(), limit)
+    return _similar_in_python(candidates, subject, full_text, _threshold(), limit)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# ATTACHING
+# ─────────────────────────────────────────────────────────────────────
+
+def attach_target(room, ticket_id):
+    """The open issue of `room` a student asked to attach to, or None if it is gone or closed."""
+    if not ticket_id:
+        return None
+    return open_issues_in(room).select_related('room').filter(ticket_id=ticket_id).first()
+
+
+def attach_report(issue, email, reported_by='', description=''):
+    """Record `email` as another reporter of `issue`; returns (report, created)."""
+    from inventory.models import IssueDuplicateReport
+
+    return IssueDuplicateReport.objects.update_or_create(
+        issue=issue,
+        reporter_email=email,
+        defaults={'reported_by': reported_by or '', 'description': description or ''},
+    )
@@ -1,6 +1,11 @@
 import requests
 from django.conf import settings
+import json
 import logging
+import re
+import threading
+from collections import OrderedDict
+from django.template.loader import get_template
 from django.utils.html import escape
 
 logger = logging.getLogger(__name__)
@@ -8,6 +13,111 @@ logger = logging.getLogger(__name__)
 MAILJET_SEND_URL = "https://api.mailjet.com/v3.1/send"
 
 
+# Mailjet v3.1 accepts at most this many entries in one Messages array
+MAILJET_MAX_MESSAGES_PER_CALL = 50
+
+
+class MailTransportError(Exception):
+    """The whole Mailjet call failed (network, auth, 5xx) — every message in it may be retried."""
+
+
+def _mailjet_credentials():
+    return getattr(settings, "EMAIL_HOST_USER", None), getattr(settings, "EMAIL_HOST_PASSWORD", None)
+
+
+def build_mailjet_message(*, subject, message, recipient_list, from_email=None, html_message=None, attachments=None):
+    """
+    One entry of a Mailjet `Messages` array.
+    attachments: list of (filename, file_bytes, mime_type) tuples, or dicts
+    of {filename, content_type, content} with content already base64-encoded.
+    """
+    import base64
+
+    message_obj = {
+        "From": {
+            "Email": from_email or getattr(settings, "DEFAULT_FROM_EMAIL", None),
+            "Name": "Blixtro IMS",
+        },
+        "To": [{"Email": r} for r in recipient_list],
+        "Subject": subject,
+        "TextPart": message,
+        **({"HTMLPart": html_message} if html_message else {}),
+    }
+
+    if attachments:
+        message_obj["Attachments"] = [
+            {
+                "Filename": att["filename"],
+                "ContentType": att["content_type"],
+                "Base64Content": att["content"],
+            }
+            if isinstance(att, dict) else
+            {
+                "Filename": att[0],
+                "ContentType": att[2],
+                "Base64Content": base64.b64encode(att[1]).decode('utf-8'),
+            }
+            for att in attachments
+        ]
+    return message_obj
+
+
+def send_mailjet_messages(messages):
+    """
+    POST up to MAILJET_MAX_MESSAGES_PER_CALL messages in one call.
+
+    Returns one dict per message, in order: {"ok": bool, "retry": bool,
+    "message_id": str, "error": str}; "retry" marks a message Mailjet
+    throttled or failed with a 5xx. Raises MailTransportError when the call
+    as a whole failed and no per-message outcome is available.
+    """
+    api_key, api_secret = _mailjet_credentials()
+    if not api_key or not api_secret:
+        raise MailTransportError("Missing Mailjet credentials")
+
+    from inventory.mail_transport import PROVIDER_MAILJET, TransportUnavailable, transport_for
+
+    try:
+        response = transport_for(PROVIDER_MAILJET).post(
+            MAILJET_SEND_URL,
+            auth=(api_key, api_secret),
+            json={"Messages": messages},
+        )
+    except (requests.RequestException, TransportUnavailable) as e:
+        raise MailTransportError(str(e)) from e
+
+    try:
+        outcomes = response.json().get("Messages") or []
+    except ValueError:
+        outcomes = []
+    if len(outcomes) != len(messages):
+        raise MailTransportError(f"Mailjet error {response.status_code} → {response.text[:500]}")
+
+    results = []
+    for outcome in outcomes:
+        if outcome.get("Status") == "success":
+            to = outcome.get("To") or [{}]
+            results.append({"ok": True, "message_id": str(to[0].get("MessageID", "")), "error": ""})
+        else:
+            errors = outcome.get("Errors") or []
+            results.append({
+                "ok": False,
+                # A throttled or server-side error for this message is worth another try
+                "retry": any(_is_retryable_status(e.get("StatusCode")) for e in errors),
+                "message_id": "",
+                "error": "; ".join(e.get("ErrorMessage", "") for e in errors) or "Rejected by Mailjet",
+            })
+    return results
+
+
+def _is_retryable_status(status):
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return status == 429 or status >= 500
+
+
 def safe_send_mail(
     *,
     subject,
@@ -24,11 +134,10 @@ def safe_send_mail(
     - Keyword-only arguments enforced
     - Never crashes app
     - attachments: optional list of (filename, bytes, mime_type) tuples
+    Sends immediately; notification emails should go through
+    inventory.outbox.queue_mail instead.
     """
-    import base64
-
-    api_key = getattr(settings, "EMAIL_HOST_USER", None)
-    api_secret = getattr(settings, "EMAIL_HOST_PASSWORD", None)
+    api_key, api_secret = _mailjet_credentials()
     sender_email = from_email or getattr(settings, "DEFAULT_FROM_EMAIL", None)
 
     if not api_key or not api_secret or not sender_email:
@@ -39,49 +148,28 @@ def safe_send_mail(
         logger.warning("[safe_send_mail] Empty recipient list")
         return False
 
-    message_obj = {
-        "From": {
-            "Email": sender_email,
-            "Name": "Blixtro IMS",
-        },
-        "To": [{"Email": r} for r in recipient_list],
-        "Subject": subject,
-        "TextPart": message,
-        **({"HTMLPart": html_message} if html_message else {}),
-    }
-
-    # Add attachments if provided
-    if attachments:
-        message_obj["Attachments"] = [
-            {
-                "Filename": fname,
-                "ContentType": mime_type,
-                "Base64Content": base64.b64encode(file_bytes).decode('utf-8'),
-            }
-            for fname, file_bytes, mime_type in attachments
-        ]
-
-    payload = {"Messages": [message_obj]}
+    message_obj = build_mailjet_message(
+        subject=subject,
+        message=message,
+        recipient_list=recipient_list,
+        from_email=sender_email,
+        html_message=html_message,
+        attachments=attachments,
+    )
 
     try:
-        response = requests.post(
-            MAILJET_SEND_URL,
-            auth=(api_key, api_secret),
-            json=payload,
-            timeout=10,
-        )
-
-        if response.status_code not in (200, 201):
-            logger.error(
-                "[safe_send_mail] Mailjet error %s → %s",
-                response.status_code,
-                response.text,
-            )
+        result = send_mailjet_messages([message_obj])[0]
+        if not result["ok"]:
+            logger.error("[safe_send_mail] Mailjet rejected message → %s", result["error"])
             return False
 
         logger.info("[safe_send_mail] Email sent successfully")
         return True
 
+    except MailTransportError as e:
+        logger.error("[safe_send_mail] %s", e)
+        return False
+
     except Exception as e:
         logger.exception("[safe_send_mail] Unexpected failure")
         if not fail_silently:
@@ -89,63 +177,100 @@ def safe_send_mail(
         return False
 
 
-def build_email_shell(*, title, intro_html, accent="#4f46e5", sections=None, outro_html=""):
-    rendered_sections = []
-    for section in sections or []:
-        section_title = section.get("title")
-        rows = section.get("rows") or []
-        body_html = section.get("body_html", "")
-
-        rows_html = ""
-        if rows:
-            rows_html = "".join(
-                (
-                    '<tr>'
-                    f'<td style="padding:10px 0;color:#64748b;font-size:13px;vertical-align:top;">{escape(row["label"])}</td>'
-                    f'<td style="padding:10px 0;color:#0f172a;font-size:13px;font-weight:600;vertical-align:top;">{escape(row["value"])}</td>'
-                    "</tr>"
-                )
-                for row in rows
-            )
-            rows_html = (
-                '<table role="presentation" width="100%" cellspacing="0" cellpadding="0" '
-                'style="border-collapse:collapse;">'
-                f"{rows_html}"
-                "</table>"
-            )
+# ─────────────────────────────────────────────────────────────────────
+# HTML LAYOUT
+# ─────────────────────────────────────────────────────────────────────
+# The layout lives in templates/emails/ and is compiled once per process by
+# Django's cached template loader. Sections are rendered separately so the
+# emails fanned out for one event (faculty, notification list, other admins)
+# share one rendering and only the title / intro / outro differ per email:
+# either explicitly through EmailSections, or, for call sites that pass a
+# plain list, through a small per-process cache keyed on the section content.
+
+EMAIL_SHELL_TEMPLATE = "emails/shell.html"
+EMAIL_SECTIONS_TEMPLATE = "emails/sections.html"
+DEFAULT_ACCENT = "#4f46e5"
+
+
+class EmailSections:
+    """
+    Detail sections shared by every email about one event:
+    [{"title", "rows": [{"label", "value"}], "body_html"}, ...].
+    Rendered once per accent colour and reused by build_email_shell().
+    """
+
+    def __init__(self, sections):
+        self.sections = list(sections or [])
+        self._html = {}
 
-        rendered_sections.append(
-            '<div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:16px;'
-            'padding:18px 20px;margin-top:16px;">'
-            + (
-                f'<div style="font-size:12px;font-weight:800;letter-spacing:0.08em;'
-                f'text-transform:uppercase;color:{accent};margin-bottom:12px;">{section_title}</div>'
-                if section_title else ""
+    def html(self, accent=DEFAULT_ACCENT):
+        if accent not in self._html:
+            self._html[accent] = get_template(EMAIL_SECTIONS_TEMPLATE).render(
+                {"sections": self.sections, "accent": accent}
             )
-            + rows_html
-            + body_html
-            + "</div>"
-        )
+        return self._html[accent]
+
+
+# Rendered plain-list sections kept per process, keyed on (accent, content)
+SECTIONS_CACHE_SIZE = 256
+_sections_cache = OrderedDict()
+_sections_cache_lock = threading.Lock()
+
 
-    return f"""
-<!DOCTYPE html>
-<html>
-<body style="margin:0;padding:24px;background:#eef2ff;font-family:Arial,sans-serif;color:#0f172a;">
-  <table role="presentation" width="100%" cellspacing="0" cellpadding="0" style="max-width:720px;margin:0 auto;background:#ffffff;border-radius:24px;overflow:hidden;border:1px solid #dbe4ff;">
-    <tr>
-      <td style="padding:28px 32px;background:linear-gradient(135deg,{accent},#0f172a);color:#ffffff;">
-        <div style="font-size:12px;font-weight:700;letter-spacing:0.16em;text-transform:uppercase;opacity:0.85;">Blixtro IMS</div>
-        <div style="font-size:28px;line-height:1.2;font-weight:800;margin-top:8px;">{title}</div>
-      </td>
-    </tr>
-    <tr>
-      <td style="padding:28px 32px;">
-        <div style="font-size:15px;line-height:1.7;color:#334155;">{intro_html}</div>
-        {''.join(rendered_sections)}
-        <div style="font-size:13px;line-height:1.7;color:#64748b;margin-top:20px;">{outro_html}</div>
-      </td>
-    </tr>
-  </table>
-</body>
-</html>
-""".strip()
+def _sections_html(sections, accent):
+    """HTML of a plain list of section dicts; equal content is rendered once."""
+    try:
+        key = (accent, json.dumps(sections, sort_keys=True, default=str))
+    except (TypeError, ValueError):
+        return EmailSections(sections).html(accent)
+    with _sections_cache_lock:
+        html = _sections_cache.get(key)
+        if html is not None:
+            _sections_cache.move_to_end(key)
+            return html
+    html = EmailSections(sections).html(accent)
+    with _sections_cache_lock:
+        _sections_cache[key] = html
+        if len(_sections_cache) > SECTIONS_CACHE_SIZE:
+            _sections_cache.popitem(last=False)
+    return html
+
+
+_SHELL_FIELDS = ("title", "accent", "intro_html", "sections_html", "outro_html")
+_shell_cache = {}
+
+
+def _shell_parts():
+    """
+    The shell template rendered once with a marker in every field, split into
+    [literal, field, literal, field, ..., literal]. Each email then only
+    substitutes its own fields. A recompiled template (autoreload during
+    development) rebuilds the parts.
+    """
+    template = get_template(EMAIL_SHELL_TEMPLATE)
+    if _shell_cache.get("template") is not template.template:
+        rendered = template.render({field: f"\x00{field}\x00" for field in _SHELL_FIELDS}).strip()
+        _shell_cache.update(template=template.template, parts=re.split(r"\x00(\w+)\x00", rendered))
+    return _shell_cache["parts"]
+
+
+def build_email_shell(*, title, intro_html, accent=DEFAULT_ACCENT, sections=None, outro_html=""):
+    """
+    Branded HTML email. `sections` is a list of section dicts, or an
+    EmailSections built once when several emails carry the same details.
+    The email title, section titles, labels and values are plain text and
+    are escaped (the pre-template builder inserted both titles raw; no
+    caller passes markup in them). intro/outro/body_html are HTML.
+    """
+    if isinstance(sections, EmailSections):
+        sections_html = sections.html(accent)
+    else:
+        sections_html = _sections_html(sections or [], accent)
+    values = {
+        "title": escape(title),
+        "accent": accent,
+        "intro_html": intro_html,
+        "sections_html": sections_html,
+        "outro_html": outro_html,
+    }
+    return "".join(values[part] if i % 2 else part for i, part in enumerate(_shell_parts()))
@@ -0,0 +1,219 @@
+"""
+Set-based escalation of issues whose TAT has expired.
+
+The sweep used to load every overdue issue, look up the next-level admin and
+save + email each one separately. escalate_overdue_issues() does the same
+work per escalation level instead:
+
+    candidates   the admin each organisation escalates to is resolved once
+                 per level from the cached inventory.recipient_directory:
+                 the first matching profile of the organisation, else the
+                 first one overall (the old per-issue loop ignored the
+                 organisation and always took the first one overall)
+    update       one conditional UPDATE ... RETURNING per level moves every
+                 overdue issue up, assigns it and restarts its TAT; the WHERE
+                 clause re-checks the overdue filter, so a concurrent run
+                 cannot escalate the same issue twice
+    notify       inbox rows, badge counts and one outbox email per assignee
+                 (listing all of their tickets) are written in the same
+                 transaction, so nothing is announced that did not commit
+
+Levels are processed from the top down and each escalation restarts the TAT,
+so an issue still moves at most one level per run.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from inventory.email import build_email_shell
+
+logger = logging.getLogger(__name__)
+
+
+MAX_LEVEL = 2
+OPEN_STATUSES = ('open', 'in_progress', 'escalated')
+# Tickets listed in one assignee email; the rest are summarised
+EMAIL_TICKET_LIMIT = 100
+_FETCH_BATCH = 1000
+
+
+def _is_candidate(entry, level):
+    return entry.is_sub_admin if level == 1 else entry.is_central_admin
+
+
+def escalation_candidates(level):
+    """({org_id: profile_id}, fallback profile_id) of the admins issues escalate to at `level`."""
+    from inventory.recipient_directory import directory
+
+    by_org, fallback = {}, None
+    for entry in directory():
+        if not _is_candidate(entry, level):
+            continue
+        if fallback is None:
+            fallback = entry.profile_id
+        if entry.org_id is not None:
+            by_org.setdefault(entry.org_id, entry.profile_id)
+    return by_org, fallback
+
+
+def escalation_candidate(level, org_id):
+    """Profile id an issue of `org_id` escalates to at `level`, or None."""
+    by_org, fallback = escalation_candidates(level)
+    return by_org.get(org_id, fallback)
+
+
+def _advance(from_level, now, deadline, issue_ids=None):
+    """Escalate every overdue issue at `from_level`; returns [(id, org_id, assigned_to_id), ...]."""
+    from inventory.models import Issue
+
+    by_org, fallback = escalation_candidates(from_level + 1)
+    if fallback is None:
+        return None
+
+    opts = Issue._meta
+    qn = connection.ops.quote_name
+    col = lambda name: qn(opts.get_field(name).column)
+
+    params = [from_level + 1]
+    if by_org:
+        assignee = f"CASE {col('organisation')} " + ' '.join('WHEN %s THEN %s' for _ in by_org) + ' ELSE %s END'
+        for org_id, profile_id in by_org.items():
+            params += [org_id, profile_id]
+    else:
+        assignee = '%s'
+    params.append(fallback)
+
+    adapt = connection.ops.adapt_datetimefield_value
+    params += ['escalated', adapt(deadline), adapt(now), from_level, False, *OPEN_STATUSES, adapt(now)]
+    if issue_ids is not None:
+        params += list(issue_ids)
+    sql = (
+        f"UPDATE {qn(opts.db_table)} SET "
+        f"{col('escalation_level')} = %s, {col('assigned_to')} = {assignee}, "
+        f"{col('status')} = %s, {col('tat_deadline')} = %s, {col('updated_on')} = %s "
+        f"WHERE {col('escalation_level')} = %s AND {col('resolved')} = %s "
+        f"AND {col('status')} IN ({', '.join(['%s'] * len(OPEN_STATUSES))}) "
+        f"AND {col('tat_deadline')} < %s "
+        + (f"AND {col('id')} IN ({', '.join(['%s'] * len(issue_ids))}) " if issue_ids is not None else '')
+        + f"RETURNING {col('id')}, {col('organisation')}, {col('assigned_to')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
+
+
+def _overdue(now, issue_ids=None):
+    from inventory.models import Issue
+
+    issues = Issue.objects.all() if issue_ids is None else Issue.objects.filter(pk__in=issue_ids)
+    return issues.filter(
+        tat_deadline__lt=now,
+        escalation_level__lt=MAX_LEVEL,
+        resolved=False,
+        status__in=OPEN_STATUSES,
+    )
+
+
+def _assignee_mail(email, level, issues):
+    count = len(issues)
+    target = "Sub Admin" if level == 1 else "Central Admin"
+    subject = (
+        f"Issue Escalated: {issues[0].ticket_id}" if count == 1
+        else f"{count} Issues Escalated to You"
+    )
+    shown = issues[:EMAIL_TICKET_LIMIT]
+    more = count - len(shown)
+
+    lines = [f"{'This ticket has' if count == 1 else f'These {count} tickets have'} been escalated to you ({target}):\n"]
+    lines += [f"  #{issue.ticket_id} — {issue.subject} ({issue.room.room_name})" for issue in shown]
+    if more:
+        lines.append(f"  … and {more} more")
+    lines.append("\nOpen Blixtro IMS to review them in the issue list.")
+
+    rows = [{"label": f"#{issue.ticket_id}", "value": f"{issue.subject} — {issue.room.room_name}"} for issue in shown]
+    if more:
+        rows.append({"label": "More", "value": f"{more} further ticket(s) in the issue list"})
+    html = build_email_shell(
+        title="Issues Escalated" if count > 1 else "Issue Escalated",
+        intro_html=(
+            f"<strong>{count}</strong> overdue ticket{'s have' if count != 1 else ' has'} "
+            f"been escalated to you as <strong>{target}</strong>."
+        ),
+        sections=[{"title": "Escalated Tickets", "rows": rows}],
+        outro_html="The TAT has been restarted for each ticket. Open Blixtro IMS to review them.",
+    )
+    return {"subject": subject, "message": "\n".join(lines), "recipient_list": [email], "html_message": html}
+
+
+def _notify(escalated):
+    """Inbox rows, badge counts and assignee emails for [(id, org_id, assigned_to_id, level), ...]."""
+    from inventory.models import Issue
+    from inventory.notification_counts import invalidate_notification_counts
+    from inventory.notification_inbox import fan_out_escalated
+    from inventory.outbox import queue_mails
+    from inventory.recipient_directory import directory
+
+    ids = [row[0] for row in escalated]
+    issues = {}
+    for start in range(0, len(ids), _FETCH_BATCH):
+        issues.update(
+            (issue.pk, issue)
+            for issue in Issue.objects.filter(pk__in=ids[start:start + _FETCH_BATCH]).select_related('room')
+        )
+
+    fan_out_escalated(issues.values())
+    for org_id in {row[1] for row in escalated}:
+        invalidate_notification_counts(org_id)
+
+    emails = {entry.profile_id: entry.email for entry in directory()}
+    by_assignee = defaultdict(list)
+    for issue_id, _, assignee_id, level in escalated:
+        by_assignee[(assignee_id, level)].append(issues[issue_id])
+
+    mails = [
+        _assignee_mail(emails[assignee_id], level, sorted(assigned, key=lambda i: i.ticket_id or ''))
+        for (assignee_id, level), assigned in by_assignee.items()
+        if emails.get(assignee_id)
+    ]
+    queue_mails(mails)
+
+
+def escalate_overdue_issues(now=None, issue_ids=None):
+    """
+    Escalate every issue whose TAT has expired by one level, or only those
+    in `issue_ids` (the due deadlines of inventory.deadline_scheduler).
+    Returns {'escalated': n, 'skipped': n, 'levels': {level: n}}; skipped
+    issues are overdue but have no admin at the next level.
+    """
+    from inventory.deadline_scheduler import ISSUE, sync_deadlines
+
+    now = now or timezone.now()
+    deadline = now + timedelta(hours=getattr(settings, 'DEFAULT_TAT_HOURS', 48))
+    if issue_ids is not None:
+        issue_ids = list(issue_ids)
+        if not issue_ids:
+            return {'escalated': 0, 'skipped': 0, 'levels': {}}
+
+    escalated, levels, skipped = [], {}, 0
+    with transaction.atomic():
+        for from_level in reversed(range(MAX_LEVEL)):
+            rows = _advance(from_level, now, deadline, issue_ids)
+            if rows is None:
+                skipped += _overdue(now, issue_ids).filter(escalation_level=from_level).count()
+                logger.warning(f"[escalate_overdue_issues] No admin to escalate level {from_level} issues to")
+                continue
+            levels[from_level + 1] = len(rows)
+            escalated += [(*row, from_level + 1) for row in rows]
+
+        if escalated:
+            _notify(escalated)
+            # The update skipped post_save: move the schedule to the restarted TATs
+            sync_deadlines(ISSUE, [row[0] for row in escalated])
+
+    if escalated or skipped:
+        logger.info(f"[escalate_overdue_issues] Escalated {len(escalated)} issue(s) {levels}, {skipped} without an admin")
+    return {'escalated': len(escalated), 'skipped': skipped, 'levels': levels}
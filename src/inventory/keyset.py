@@ -0,0 +1,35 @@
+"""
+Keyset pagination over (created_on, pk), newest first.
+
+The cursor is "<created_on timestamp>_<pk>" of the last row on a page; the
+next page is every row strictly before it in (-created_on, -pk) order, so
+pages stay stable while new rows arrive and each page is an index range
+read rather than an OFFSET scan. Used by the admin notification inbox
+(inventory.notification_inbox) and student ticket history
+(inventory.student_tickets).
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db.models import Q
+
+
+def encode_cursor(created_on, pk):
+    return f"{created_on.timestamp():.6f}_{pk}"
+
+
+def decode_cursor(cursor):
+    """(created_on, pk) of a cursor, or None when it is malformed."""
+    try:
+        stamp, pk = cursor.split('_', 1)
+        return datetime.fromtimestamp(float(stamp), tz=dt_timezone.utc), int(pk)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def after(qs, cursor):
+    """Rows of `qs` that come after `cursor` in newest-first order (all of them without a cursor)."""
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        created_on, pk = position
+        qs = qs.filter(Q(created_on__lt=created_on) | Q(created_on=created_on, pk__lt=pk))
+    return qs
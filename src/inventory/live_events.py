@@ -0,0 +1,346 @@
+"""
+Live notification push over Server-Sent Events.
+
+Model signals call publish() when booking requests, stock requests, issues
+or purchases change; after the transaction commits the event is fanned out
+to every open stream subscribed to its channel:
+
+    admin               every central admin / sub-admin
+    admin:org:<id>      admins of one organisation
+    room:<id>           the incharge of one room
+
+With REDIS_URL set, events travel over Redis pub/sub so they reach streams
+held by any web process (and are published from Celery workers too). Each
+process keeps a single pub/sub connection and hands messages to its local
+subscriber queues. Without Redis, or while it is unreachable, delivery
+falls back to the publishing process only.
+
+Badge counts are not pushed by value: a change publishes "invalidate" and
+each admin stream re-reads its own counts (inventory.notification_counts),
+so nothing is recomputed while no stream is open.
+
+Streams need an ASGI server (config.asgi). Django 4.2 does not notice a
+client going away while a response streams, so config.asgi wraps the
+application in DisconnectWatcher, which ends a stream as soon as its tab is
+closed. Under WSGI the endpoints answer 204, EventSource gives up, and the
+pages keep polling as before.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+CHANNEL_PREFIX = 'ims-events:'
+
+ADMIN_CHANNEL = 'admin'
+ORG_CHANNEL = 'admin:org:{org_id}'
+ROOM_CHANNEL = 'room:{room_id}'
+
+HEARTBEAT_SECONDS = 15
+# Streams are closed after this long so the browser reconnects and auth is
+# re-checked; also bounds a stream whose disconnect was not seen
+STREAM_MAX_SECONDS = 10 * 60
+# Client reconnect delay sent in the `retry:` field (milliseconds)
+CLIENT_RETRY_MS = 5000
+# Events buffered per stream; a stream that falls further behind is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_RECONNECT_SECONDS = 5
+
+INVALIDATE_EVENT = 'invalidate'
+DISCONNECT_SCOPE_KEY = 'ims.disconnected'
+
+
+def org_channel(org_id):
+    return ORG_CHANNEL.format(org_id=org_id)
+
+
+def room_channel(room_id):
+    return ROOM_CHANNEL.format(room_id=room_id)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# PUBLISHING
+# ─────────────────────────────────────────────────────────────────────
+
+_redis = None
+_redis_lock = threading.Lock()
+
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                import redis
+                _redis = redis.Redis.from_url(settings.REDIS_URL, socket_connect_timeout=1, socket_timeout=1)
+    return _redis
+
+
+def _publish_now(channels, payload):
+    if getattr(settings, 'REDIS_URL', ''):
+        try:
+            client = _redis_client()
+            for channel in channels:
+                client.publish(CHANNEL_PREFIX + channel, payload)
+            return
+        except Exception as e:
+            logger.warning(f"[live_events] Redis publish failed, delivering locally: {e}")
+    for channel in channels:
+        _hub.dispatch(channel, payload)
+
+
+def publish(channels, event, data=None):
+    """Send `event` to `channels` once the current transaction commits."""
+    channels = [channel for channel in channels if channel]
+    if not channels:
+        return
+    payload = json.dumps({'event': event, 'data': data or {}}, cls=DjangoJSONEncoder)
+    transaction.on_commit(lambda: _publish_now(channels, payload))
+
+
+# Model label → (event kind, does it belong to one organisation's admins?)
+_ITEM_KINDS = {
+    'inventory.roombookingrequest':       ('booking_request', False),
+    'inventory.roomcancellationrequest':  ('cancel_request', False),
+    'inventory.stockrequest':             ('stock_request', False),
+    'inventory.issuetimeextensionrequest': ('tat_request', False),
+    'inventory.issue':                    ('issue', True),
+    'inventory.purchase':                 ('purchase', True),
+}
+
+
+def publish_item(instance, created):
+    """Announce a new or changed request/issue/purchase to admins and the room's incharge."""
+    kind, per_org = _ITEM_KINDS[instance._meta.label_lower]
+    channels = [org_channel(instance.organisation_id) if per_org else ADMIN_CHANNEL]
+    room_id = getattr(instance, 'room_id', None)
+    if room_id:
+        channels.append(room_channel(room_id))
+    publish(channels, 'item', {
+        'kind':    kind,
+        'id':      instance.pk,
+        'status':  getattr(instance, 'status', ''),
+        'created': created,
+        'label':   str(instance)[:120],
+    })
+
+
+def publish_counts_invalidated(org_id=None):
+    """Tell streams watching the global (org_id=None) or one organisation's counts to re-read them."""
+    channel = ADMIN_CHANNEL if org_id is None else org_channel(org_id)
+    _publish_now([channel], json.dumps({'event': INVALIDATE_EVENT, 'data': {}}))
+
+
+# ─────────────────────────────────────────────────────────────────────
+# IN-PROCESS FAN-OUT
+# ─────────────────────────────────────────────────────────────────────
+
+class _Hub:
+    """Routes payloads to the asyncio queues of this process's open streams."""
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listeners = {}
+
+    def subscribe(self, channels):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel].add((loop, queue))
+        if getattr(settings, 'REDIS_URL', ''):
+            self._ensure_listener(loop)
+        return queue
+
+    def unsubscribe(self, queue, channels):
+        with self._lock:
+            for channel in channels:
+                self._subscribers[channel] = {entry for entry in self._subscribers[channel] if entry[1] is not queue}
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+    def dispatch(self, channel, payload):
+        """Thread-safe: may be called from sync code or from the Redis listener."""
+        with self._lock:
+            targets = list(self._subscribers.get(channel, ()))
+        for loop, queue in targets:
+            loop.call_soon_threadsafe(_offer, queue, payload)
+
+    def _ensure_listener(self, loop):
+        task = self._listeners.get(loop)
+        if task is None or task.done():
+            self._listeners[loop] = loop.create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(settings.REDIS_URL)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(CHANNEL_PREFIX + '*')
+                async for message in pubsub.listen():
+                    if message.get('type') != 'pmessage':
+                        continue
+                    channel = message['channel'].decode()[len(CHANNEL_PREFIX):]
+                    self.dispatch(channel, message['data'].decode())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[live_events] Redis subscription lost, retrying in {REDIS_RECONNECT_SECONDS}s: {e}")
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+            await asyncio.sleep(REDIS_RECONNECT_SECONDS)
+
+
+def _offer(queue, payload):
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        # A stalled client; it will resync from the counts snapshot on reconnect
+        pass
+
+
+_hub = _Hub()
+
+
+# ─────────────────────────────────────────────────────────────────────
+# STREAMING
+# ─────────────────────────────────────────────────────────────────────
+
+def _frame(message):
+    return f"event: {message['event']}\ndata: {json.dumps(message['data'], cls=DjangoJSONEncoder)}\n\n"
+
+
+def _pending(queue, first):
+    """`first` plus every payload already waiting, so a burst is handled in one go."""
+    payloads = [first]
+    while not queue.empty():
+        payloads.append(queue.get_nowait())
+    return payloads
+
+
+async def event_stream(channels, snapshot=None, refresh=None, disconnected=None):
+    """
+    Async generator of SSE frames for `channels`, starting with an optional
+    counts snapshot. `refresh` (sync, returns counts) is called when the
+    counts are invalidated; the stream ends when `disconnected` is set.
+    """
+    from asgiref.sync import sync_to_async
+
+    queue = _hub.subscribe(channels)
+    gone = asyncio.ensure_future(disconnected.wait()) if disconnected is not None else None
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    try:
+        yield f"retry: {CLIENT_RETRY_MS}\n\n"
+        if snapshot is not None:
+            yield _frame({'event': 'counts', 'data': snapshot})
+        while time.monotonic() < deadline:
+            getter = asyncio.ensure_future(queue.get())
+            waiting = {getter} if gone is None else {getter, gone}
+            done, _ = await asyncio.wait(waiting, timeout=HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+            if getter not in done:
+                getter.cancel()
+                if gone is not None and gone.done():
+                    break
+                yield ": ping\n\n"
+                continue
+
+            stale = False
+            for payload in _pending(queue, getter.result()):
+                message = json.loads(payload)
+                if message['event'] == INVALIDATE_EVENT:
+                    stale = True
+                else:
+                    yield _frame(message)
+            if stale and refresh is not None:
+                try:
+                    yield _frame({'event': 'counts', 'data': await sync_to_async(refresh)()})
+                except Exception as e:
+                    logger.warning(f"[event_stream] Could not refresh counts: {e}")
+    finally:
+        if gone is not None:
+            gone.cancel()
+        _hub.unsubscribe(queue, channels)
+
+
+def stream_response(request, channels, snapshot=None, refresh=None):
+    """StreamingHttpResponse for an SSE endpoint, or 204 when not served over ASGI."""
+    from django.core.handlers.asgi import ASGIRequest
+    from django.http import HttpResponse, StreamingHttpResponse
+
+    if not isinstance(request, ASGIRequest):
+        # 204 tells EventSource not to reconnect; the page keeps polling
+        response = HttpResponse(status=204)
+    else:
+        stream = event_stream(channels, snapshot, refresh, request.scope.get(DISCONNECT_SCOPE_KEY))
+        response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+
+    origin = request.headers.get('Origin')
+    if origin and origin in settings.CSRF_TRUSTED_ORIGINS:
+        # The stream may be served from a separate ASGI host (LIVE_EVENTS_ORIGIN)
+        response['Access-Control-Allow-Origin'] = origin
+        response['Access-Control-Allow-Credentials'] = 'true'
+        response['Vary'] = 'Origin'
+    return response
+
+
+
+# ─────────────────────────────────────────────────────────────────────
+# DISCONNECTS
+# ─────────────────────────────────────────────────────────────────────
+
+def _is_event_stream(start_message):
+    return any(
+        name.lower() == b'content-type' and value.startswith(b'text/event-stream')
+        for name, value in start_message.get('headers', ())
+    )
+
+
+class DisconnectWatcher:
+    """
+    ASGI wrapper that sets scope[DISCONNECT_SCOPE_KEY] when the client of an
+    event stream disconnects. Django has read the whole request body before
+    the response starts, so from then on the wrapper owns receive().
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        disconnected = asyncio.Event()
+        scope[DISCONNECT_SCOPE_KEY] = disconnected
+        watcher = None
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def send_and_watch(message):
+            nonlocal watcher
+            if message['type'] == 'http.response.start' and _is_event_stream(message):
+                watcher = asyncio.ensure_future(watch())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_watch)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
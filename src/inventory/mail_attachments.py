@@ -0,0 +1,175 @@
+"""
+Stored-file attachments for outbox email.
+
+Views attach a stored file by reference (storage_attachment(field_file))
+instead of reading it during the request; the OutboundEmail row keeps only
+{filename, content_type, storage_name}. When the drainer builds the Mailjet
+message it resolves each reference once per batch:
+
+    inline   files up to MAIL_ATTACHMENT_INLINE_MAX_BYTES are read from
+             storage in chunks, base64-encoded and cached under
+             mail-attachment:<sha1(storage name)>:<size>, so every email of
+             the same event and every retry reuses one payload
+    link     larger files are left out of the message and a signed download
+             link (core:mail_attachment) is added to the email body instead
+
+A file that no longer exists is dropped; the email itself still goes out.
+"""
+import base64
+import hashlib
+import logging
+import mimetypes
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils.html import escape
+
+logger = logging.getLogger(__name__)
+
+
+ATTACHMENT_CACHE_KEY = 'mail-attachment:{digest}:{size}'
+# Long enough to cover the outbox retry schedule (inventory.outbox)
+ATTACHMENT_CACHE_TTL = 2 * 60 * 60
+# Multiple of 3, so every full chunk base64-encodes without padding
+READ_CHUNK_SIZE = 3 * 64 * 1024
+LINK_SALT = 'inventory.mail_attachments.link'
+
+
+class AttachmentUnavailable(Exception):
+    """Storage could not be reached; the email should be retried later."""
+
+
+def storage_attachment(field_file):
+    """Outbox attachment entry that points at a stored file instead of carrying its bytes."""
+    filename = field_file.name.split('/')[-1]
+    content_type, _ = mimetypes.guess_type(filename)
+    return {
+        'filename': filename,
+        'content_type': content_type or 'application/octet-stream',
+        'storage_name': field_file.name,
+    }
+
+
+def is_reference(attachment):
+    return isinstance(attachment, dict) and 'storage_name' in attachment and 'content' not in attachment
+
+
+# ─────────────────────────────────────────────────────────────────────
+# SIGNED LINKS
+# ─────────────────────────────────────────────────────────────────────
+
+def signed_link(storage_name, filename):
+    token = signing.dumps({'n': storage_name, 'f': filename}, salt=LINK_SALT, compress=True)
+    return getattr(settings, 'SITE_URL', 'http://localhost:8000').rstrip('/') + reverse('core:mail_attachment', args=[token])
+
+
+def link_target(token):
+    """(storage_name, filename) for a link token, or None if it is forged or expired."""
+    try:
+        data = signing.loads(token, salt=LINK_SALT, max_age=settings.MAIL_ATTACHMENT_LINK_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return data['n'], data['f']
+
+
+# ─────────────────────────────────────────────────────────────────────
+# RESOLVING
+# ─────────────────────────────────────────────────────────────────────
+
+def _encode(name):
+    """Base64 of a stored file, read in chunks so only the encoded result is held."""
+    parts, rest = [], b''
+    with default_storage.open(name, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(READ_CHUNK_SIZE), b''):
+            chunk = rest + chunk
+            cut = len(chunk) - len(chunk) % 3
+            parts.append(base64.b64encode(chunk[:cut]).decode('ascii'))
+            rest = chunk[cut:]
+    parts.append(base64.b64encode(rest).decode('ascii'))
+    return ''.join(parts)
+
+
+def _exists(name):
+    try:
+        return default_storage.exists(name)
+    except Exception:
+        return True
+
+
+def _resolve(reference):
+    """('inline', base64) | ('link', url) | ('missing', None) for one reference."""
+    name = reference['storage_name']
+    try:
+        size = default_storage.size(name)
+    except Exception as e:
+        # Remote storages report a missing object as a generic client error
+        if isinstance(e, FileNotFoundError) or not _exists(name):
+            logger.warning(f"[mail_attachments] {name} no longer exists; sending without it")
+            return 'missing', None
+        raise AttachmentUnavailable(str(e)) from e
+
+    if size > settings.MAIL_ATTACHMENT_INLINE_MAX_BYTES:
+        return 'link', signed_link(name, reference['filename'])
+
+    key = ATTACHMENT_CACHE_KEY.format(digest=hashlib.sha1(name.encode()).hexdigest(), size=size)
+    content = cache.get(key)
+    if content is None:
+        try:
+            content = _encode(name)
+        except Exception as e:
+            raise AttachmentUnavailable(str(e)) from e
+        try:
+            cache.set(key, content, ATTACHMENT_CACHE_TTL)
+        except Exception:
+            logger.warning(f"[mail_attachments] Could not cache the encoded payload of {name}")
+    return 'inline', content
+
+
+def resolve_attachments(attachments, memo=None):
+    """
+    Split stored outbox attachments into Mailjet-ready inline entries and
+    download links [(filename, url), ...]. `memo` is shared across the rows
+    of one batch so each file is looked up once.
+    """
+    memo = {} if memo is None else memo
+    inline, links = [], []
+    for attachment in attachments or []:
+        if not is_reference(attachment):
+            inline.append(attachment)
+            continue
+        name = attachment['storage_name']
+        if name not in memo:
+            memo[name] = _resolve(attachment)
+        mode, value = memo[name]
+        if mode == 'inline':
+            inline.append({
+                'filename': attachment['filename'],
+                'content_type': attachment['content_type'],
+                'content': value,
+            })
+        elif mode == 'link':
+            links.append((attachment['filename'], value))
+    return inline, links
+
+
+def with_attachment_links(text_body, html_body, links):
+    """Add the download links of oversized attachments to both email bodies."""
+    if not links:
+        return text_body, html_body
+
+    days = settings.MAIL_ATTACHMENT_LINK_MAX_AGE // 86400
+    note = f"Attachments too large to include (links valid for {days} days):"
+    text_body = (text_body or '') + "\n\n" + note + "\n" + "\n".join(f"  {filename}: {url}" for filename, url in links)
+    if html_body:
+        block = (
+            '<div style="font-family:Arial,sans-serif;font-size:13px;color:#334155;margin:16px auto;max-width:720px;">'
+            f'{escape(note)}<ul>'
+            + ''.join(f'<li><a href="{escape(url)}">{escape(filename)}</a></li>' for filename, url in links)
+            + '</ul></div>'
+        )
+        head, sep, tail = html_body.rpartition('</body>')
+        html_body = head + block + sep + tail if sep else html_body + block
+    return text_body, html_body
@@ -0,0 +1,236 @@
+"""
+Shared outbound mail transport.
+
+All provider traffic goes through transport_for(provider):
+
+  * HTTP providers (Mailjet) share one pooled keep-alive requests.Session
+    per process, so consecutive sends reuse the TLS connection.
+  * SMTP sends reuse one connection for the lifetime of a call.
+  * A BoundedSemaphore caps in-flight calls per process; callers that cannot
+    get a slot quickly fail instead of queueing behind a slow provider.
+  * A per-provider circuit breaker opens after MAIL_BREAKER_FAILURES
+    consecutive failures and fast-fails for MAIL_BREAKER_RESET_SECONDS, then
+    lets a single probe through (half-open) to decide whether to close.
+  * Forked children (gunicorn / Celery prefork workers) start with fresh
+    transports instead of the parent's sockets and breaker.
+
+Request, failure, short-circuit and latency counters are kept in the Django
+cache so they add up across gunicorn and Celery processes; see
+transport_stats() and `python manage.py mail_transport_stats`.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+PROVIDER_MAILJET = 'mailjet'
+PROVIDER_SMTP = 'smtp'
+PROVIDERS = (PROVIDER_MAILJET, PROVIDER_SMTP)
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+# How long a caller waits for a free transport slot before giving up (seconds)
+SLOT_WAIT_SECONDS = 2
+
+STATS_KEY = 'mail_transport:{provider}:{counter}'
+STATS_COUNTERS = ('requests', 'failures', 'short_circuited', 'saturated', 'latency_ms_total')
+STATS_TTL = 7 * 24 * 60 * 60
+
+
+class TransportUnavailable(Exception):
+    """The provider was not called: the breaker is open or every slot is busy."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker; state is per process."""
+
+    def __init__(self, name, failure_threshold, reset_seconds):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """True while calls are being fast-failed (open and not yet due for a probe)."""
+        return self.state == BREAKER_OPEN and time.monotonic() - self.opened_at < self.reset_seconds
+
+    def allow(self):
+        with self._lock:
+            if self.state == BREAKER_OPEN:
+                if time.monotonic() - self.opened_at < self.reset_seconds:
+                    return False
+                # Let exactly one probe through
+                self.state = BREAKER_HALF_OPEN
+                return True
+            if self.state == BREAKER_HALF_OPEN:
+                return False
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != BREAKER_CLOSED:
+                logger.info(f"[mail_transport] {self.name} circuit closed")
+            self.state, self.failures = BREAKER_CLOSED, 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != BREAKER_OPEN:
+                    logger.warning(
+                        f"[mail_transport] {self.name} circuit opened after {self.failures} failure(s); "
+                        f"fast-failing for {self.reset_seconds}s"
+                    )
+                self.state, self.opened_at = BREAKER_OPEN, time.monotonic()
+
+
+def _incr(provider, counter, amount=1):
+    key = STATS_KEY.format(provider=provider, counter=counter)
+    try:
+        if not cache.add(key, amount, STATS_TTL):
+            cache.incr(key, amount)
+    except Exception:
+        # Counters are best-effort; never let them break a send
+        pass
+
+
+class MailTransport:
+    """Connection pool, concurrency cap and breaker for one provider."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.breaker = CircuitBreaker(
+            provider,
+            getattr(settings, 'MAIL_BREAKER_FAILURES', 5),
+            getattr(settings, 'MAIL_BREAKER_RESET_SECONDS', 30),
+        )
+        self.slots = threading.BoundedSemaphore(getattr(settings, 'MAIL_MAX_CONCURRENCY', 8))
+        self.timeout = (
+            getattr(settings, 'MAIL_CONNECT_TIMEOUT', 3.05),
+            getattr(settings, 'MAIL_READ_TIMEOUT', 10),
+        )
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    pool_size = getattr(settings, 'MAIL_POOL_SIZE', 10)
+                    session = requests.Session()
+                    # Retries belong to the outbox (with backoff), not the adapter
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    @contextmanager
+    def call(self):
+        """
+        Guard one provider call. Raises TransportUnavailable without calling
+        the provider when the breaker is open or no slot frees up in time.
+        The body reports the outcome by raising (failure) or returning
+        (success); set outcome['failed'] for bad responses that did not raise.
+        """
+        if self.breaker.is_open():
+            _incr(self.provider, 'short_circuited')
+            raise TransportUnavailable(f"{self.provider} circuit open")
+        if not self.slots.acquire(timeout=SLOT_WAIT_SECONDS):
+            _incr(self.provider, 'saturated')
+            raise TransportUnavailable(f"{self.provider} transport saturated")
+        # Only ask the breaker once a slot is held: a half-open probe that
+        # then timed out waiting would never report back and stay half-open
+        if not self.breaker.allow():
+            self.slots.release()
+            _incr(self.provider, 'short_circuited')
+            raise TransportUnavailable(f"{self.provider} circuit {self.breaker.state}")
+
+        started = time.monotonic()
+        state = {'failed': False}
+        try:
+            yield state
+        except Exception:
+            state['failed'] = True
+            raise
+        finally:
+            self.slots.release()
+            _incr(self.provider, 'requests')
+            _incr(self.provider, 'latency_ms_total', int((time.monotonic() - started) * 1000))
+            if state['failed']:
+                _incr(self.provider, 'failures')
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+    def post(self, url, **kwargs):
+        """POST through the pooled session. 5xx and 429 count as provider failures."""
+        with self.call() as outcome:
+            response = self.session.post(url, timeout=self.timeout, **kwargs)
+            if response.status_code >= 500 or response.status_code == 429:
+                outcome['failed'] = True
+            return response
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def transport_for(provider):
+    transport = _transports.get(provider)
+    if transport is None:
+        with _transports_lock:
+            transport = _transports.setdefault(provider, MailTransport(provider))
+    return transport
+
+
+def transport_stats():
+    """Counters per provider, summed across processes, plus this process's breaker state."""
+    stats = {}
+    for provider in PROVIDERS:
+        keys = {counter: STATS_KEY.format(provider=provider, counter=counter) for counter in STATS_COUNTERS}
+        values = cache.get_many(list(keys.values()))
+        row = {counter: values.get(key, 0) for counter, key in keys.items()}
+        row['latency_ms_avg'] = round(row['latency_ms_total'] / row['requests'], 1) if row['requests'] else None
+        transport = _transports.get(provider)
+        row['breaker'] = transport.breaker.state if transport else BREAKER_CLOSED
+        stats[provider] = row
+    return stats
+
+
+def reset_transports():
+    """Close pooled sessions and drop breakers (tests, settings changes)."""
+    with _transports_lock:
+        for transport in _transports.values():
+            if transport._session is not None:
+                transport._session.close()
+        _transports.clear()
+
+
+def _forget_transports_after_fork():
+    # A forked child (gunicorn / Celery prefork) must not reuse the parent's
+    # pooled sockets or breaker. The sockets are left for the parent to
+    # close, and the lock is replaced because a parent thread may hold it.
+    global _transports_lock
+    _transports_lock = threading.Lock()
+    _transports.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_transports_after_fork)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from inventory.notification_inbox import backfill
+
+
+class Command(BaseCommand):
+    help = "Fan every currently actionable request, escalation and purchase out to the admin notification inboxes"
+
+    def handle(self, *args, **options):
+        written = backfill()
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} notification event(s)"))
@@ -0,0 +1,141 @@
+import timeit
+
+from django.core.management.base import BaseCommand
+from django.utils.html import escape
+
+from inventory.email import EmailSections, build_email_shell
+
+
+def _string_built_email_shell(*, title, intro_html, accent="#4f46e5", sections=None, outro_html=""):
+    """The string-concatenation builder inventory.email used before the templates, kept as the baseline."""
+    rendered_sections = []
+    for section in sections or []:
+        section_title = section.get("title")
+        rows = section.get("rows") or []
+        body_html = section.get("body_html", "")
+
+        rows_html = ""
+        if rows:
+            rows_html = "".join(
+                (
+                    '<tr>'
+                    f'<td style="padding:10px 0;color:#64748b;font-size:13px;vertical-align:top;">{escape(row["label"])}</td>'
+                    f'<td style="padding:10px 0;color:#0f172a;font-size:13px;font-weight:600;vertical-align:top;">{escape(row["value"])}</td>'
+                    "</tr>"
+                )
+                for row in rows
+            )
+            rows_html = (
+                '<table role="presentation" width="100%" cellspacing="0" cellpadding="0" '
+                'style="border-collapse:collapse;">'
+                f"{rows_html}"
+                "</table>"
+            )
+
+        rendered_sections.append(
+            '<div style="background:#f8fafc;border:1px solid #e2e8f0;border-radius:16px;'
+            'padding:18px 20px;margin-top:16px;">'
+            + (
+                f'<div style="font-size:12px;font-weight:800;letter-spacing:0.08em;'
+                f'text-transform:uppercase;color:{accent};margin-bottom:12px;">{section_title}</div>'
+                if section_title else ""
+            )
+            + rows_html
+            + body_html
+            + "</div>"
+        )
+
+    return f"""
+<!DOCTYPE html>
+<html>
+<body style="margin:0;padding:24px;background:#eef2ff;font-family:Arial,sans-serif;color:#0f172a;">
+  <table role="presentation" width="100%" cellspacing="0" cellpadding="0" style="max-width:720px;margin:0 auto;background:#ffffff;border-radius:24px;overflow:hidden;border:1px solid #dbe4ff;">
+    <tr>
+      <td style="padding:28px 32px;background:linear-gradient(135deg,{accent},#0f172a);color:#ffffff;">
+        <div style="font-size:12px;font-weight:700;letter-spacing:0.16em;text-transform:uppercase;opacity:0.85;">Blixtro IMS</div>
+        <div style="font-size:28px;line-height:1.2;font-weight:800;margin-top:8px;">{title}</div>
+      </td>
+    </tr>
+    <tr>
+      <td style="padding:28px 32px;">
+        <div style="font-size:15px;line-height:1.7;color:#334155;">{intro_html}</div>
+        {''.join(rendered_sections)}
+        <div style="font-size:13px;line-height:1.7;color:#64748b;margin-top:20px;">{outro_html}</div>
+      </td>
+    </tr>
+  </table>
+</body>
+</html>
+""".strip()
+
+
+def _sample_sections():
+    """Roughly the approval email of a booking with alternative slots and a remark."""
+    return [
+        {
+            "title": "Booking Details",
+            "rows": [{"label": f"Slot {i}", "value": f"Mon, 0{i} Jan 2026, 10:00 AM to 11:00 AM"} for i in range(1, 5)]
+            + [
+                {"label": "Room(s)", "value": "Seminar Hall A, Seminar Hall B"},
+                {"label": "Faculty", "value": "Dr. A. Example"},
+                {"label": "Purpose", "value": "Guest lecture & workshop <Room setup>"},
+            ],
+        },
+        {
+            "title": "Approval Trail",
+            "rows": [
+                {"label": "Approved By", "value": "Central Admin"},
+                {"label": "Admin Remark", "value": "Please arrange the projector."},
+            ],
+        },
+        {"title": "Requirements", "body_html": "<p>Projector, 2 microphones, 80 chairs.</p>"},
+    ]
+
+
+class Command(BaseCommand):
+    help = "Time the HTML rendering of one event's emails fanned out to N recipients"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=20)
+        parser.add_argument('--events', type=int, default=200, help="Events per timing run")
+
+    def handle(self, *args, **options):
+        recipients = options['recipients']
+        events = options['events']
+        sections = _sample_sections()
+
+        def string_built():
+            # Before the templates: every email concatenated its whole HTML, sections included
+            for i in range(recipients):
+                _string_built_email_shell(title="Booking Approved", intro_html=f"Dear <strong>Recipient {i}</strong>,",
+                                          sections=sections, outro_html="No action required.")
+
+        def plain_list():
+            # Call sites passing a plain list: equal sections come from the content cache
+            for i in range(recipients):
+                build_email_shell(title="Booking Approved", intro_html=f"Dear <strong>Recipient {i}</strong>,",
+                                  sections=sections, outro_html="No action required.")
+
+        def shared():
+            # The event's sections are rendered once; each email only fills its own fields
+            event_sections = EmailSections(sections)
+            for i in range(recipients):
+                build_email_shell(title="Booking Approved", intro_html=f"Dear <strong>Recipient {i}</strong>,",
+                                  sections=event_sections, outro_html="No action required.")
+
+        shared()   # compile the templates outside the timed runs
+        results = {}
+        for label, func in (
+            ("string builder (before)", string_built),
+            ("plain-list sections", plain_list),
+            ("shared sections", shared),
+        ):
+            best = min(timeit.repeat(func, number=events, repeat=5))
+            results[label] = best / events * 1000
+            self.stdout.write(
+                f"{label:<24} {results[label]:.3f} ms/event  "
+                f"({results[label] / recipients * 1000:.1f} µs/email, {recipients} recipients)"
+            )
+        for label in ("plain-list sections", "shared sections"):
+            speedup = results["string builder (before)"] / results[label]
+            self.stdout.write(self.style.SUCCESS(f"{label}: {speedup:.2f}× the speed of the string builder per event"))
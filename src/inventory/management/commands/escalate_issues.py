@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from inventory.deadline_scheduler import ISSUE, backfill, due_ids
+from inventory.tasks import escalate_expired_issues
+
+
+class Command(BaseCommand):
+    help = "Escalate issues whose TAT has expired"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rescan', action='store_true',
+            help="Rebuild the deadline schedule from the issue and booking tables first",
+        )
+
+    def handle(self, *args, **options):
+        if options['rescan']:
+            self.stdout.write(f"Scheduled {backfill()} deadline(s)")
+
+        result = escalate_expired_issues(issue_ids=due_ids(ISSUE))
+        if result is None:
+            self.stdout.write(self.style.WARNING("Another escalation run is in progress, skipped"))
+            return
+
+        for level, count in sorted(result["levels"].items()):
+            self.stdout.write(f"  level {level}: {count}")
+        if result["skipped"]:
+            self.stdout.write(self.style.WARNING(f"{result['skipped']} issue(s) have no admin at the next level"))
+        self.stdout.write(
+            self.style.SUCCESS(f"Escalated {result['escalated']} issue(s)")
+        )
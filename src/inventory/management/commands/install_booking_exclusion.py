@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from inventory.capabilities import refresh_capabilities
+from inventory.slot_index import BOOKING_EXCLUSION_CONSTRAINT, install_booking_exclusion
+
+
+class Command(BaseCommand):
+    help = (
+        "Install the PostgreSQL exclusion constraint on confirmed room bookings "
+        "(skipped by migration 0029 when overlapping bookings existed)"
+    )
+
+    def handle(self, *args, **kwargs):
+        if connection.vendor != 'postgresql':
+            raise CommandError("The booking exclusion constraint needs PostgreSQL")
+        if not getattr(settings, 'ROOM_BOOKING_DB_EXCLUSION', True):
+            raise CommandError("ROOM_BOOKING_DB_EXCLUSION is off")
+
+        with transaction.atomic():
+            overlaps = install_booking_exclusion(connection)
+        if overlaps:
+            lines = [
+                f"  room {room_id}: bookings {booking_id} and {other_id} ({start:%Y-%m-%d %H:%M} - {end:%H:%M})"
+                for room_id, start, end, booking_id, other_id in overlaps
+            ]
+            raise CommandError(
+                "Confirmed bookings overlap; cancel or move them and run this again:\n" + "\n".join(lines)
+            )
+
+        refresh_capabilities()
+        self.stdout.write(self.style.SUCCESS(f"Installed {BOOKING_EXCLUSION_CONSTRAINT}"))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from inventory.mail_transport import transport_stats
+
+
+class Command(BaseCommand):
+    help = "Print per-provider mail transport counters (requests, failures, short-circuits, latency)"
+
+    def handle(self, *args, **kwargs):
+        for provider, row in transport_stats().items():
+            latency = f"{row['latency_ms_avg']} ms" if row['latency_ms_avg'] is not None else "—"
+            self.stdout.write(
+                f"{provider:<8} requests={row['requests']} failures={row['failures']} "
+                f"short_circuited={row['short_circuited']} saturated={row['saturated']} avg_latency={latency}"
+            )
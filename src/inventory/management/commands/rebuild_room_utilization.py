@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from inventory.models import RoomSlot
+from inventory.utilization import rebuild_range
+
+
+class Command(BaseCommand):
+    help = "Rebuild the room utilization facts from the slot index (defaults to the full booking history)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='first_day', help="First day, YYYY-MM-DD")
+        parser.add_argument('--to', dest='last_day', help="Last day, YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        bounds = RoomSlot.objects.aggregate(first=Min('start_datetime'), last=Max('end_datetime'))
+        try:
+            first_day = (
+                date.fromisoformat(options['first_day']) if options['first_day']
+                else timezone.localtime(bounds['first']).date() if bounds['first'] else timezone.localdate()
+            )
+            last_day = (
+                date.fromisoformat(options['last_day']) if options['last_day']
+                else timezone.localtime(bounds['last']).date() if bounds['last'] else timezone.localdate()
+            )
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        if last_day < first_day:
+            raise CommandError("--to must not be before --from")
+
+        total = 0
+        # Month-sized chunks keep each transaction and slot scan bounded
+        chunk_start = first_day
+        while chunk_start <= last_day:
+            chunk_end = min(last_day, chunk_start + timedelta(days=30))
+            total += rebuild_range(chunk_start, chunk_end)
+            chunk_start = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {first_day}..{last_day}: {total} hourly rows"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from inventory.capabilities import detect_capabilities
+
+
+class Command(BaseCommand):
+    help = "Print the schema capabilities detected on the default database"
+
+    def handle(self, *args, **kwargs):
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for name, enabled in sorted(detect_capabilities().items()):
+            status = self.style.SUCCESS("yes") if enabled else self.style.WARNING("no")
+            self.stdout.write(f"  {name:<32} {status}")
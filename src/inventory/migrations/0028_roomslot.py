@@ -0,0 +1,81 @@
+# Generated by Django 4.2 on 2026-10-17 04:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+
+
+def _windows(obj):
+    from django.utils import timezone
+    from django.utils.dateparse import parse_datetime
+
+    windows = [(obj.start_datetime, obj.end_datetime)]
+    if obj.alternative_slots:
+        try:
+            for slot in json.loads(obj.alternative_slots):
+                s_dt = parse_datetime(slot['start'])
+                e_dt = parse_datetime(slot['end'])
+                if s_dt and e_dt:
+                    if timezone.is_naive(s_dt):
+                        s_dt = timezone.make_aware(s_dt)
+                    if timezone.is_naive(e_dt):
+                        e_dt = timezone.make_aware(e_dt)
+                    windows.append((s_dt, e_dt))
+        except Exception:
+            pass
+    return windows
+
+
+def backfill_room_slots(apps, schema_editor):
+    RoomBooking = apps.get_model('inventory', 'RoomBooking')
+    RoomBookingRequest = apps.get_model('inventory', 'RoomBookingRequest')
+    RoomSlot = apps.get_model('inventory', 'RoomSlot')
+
+    rows = []
+    sources = (
+        ('booking', RoomBooking.objects.exclude(status='cancelled')),
+        ('request', RoomBookingRequest.objects.filter(status='pending')),
+    )
+    for source, qs in sources:
+        owner_field = 'booking' if source == 'booking' else 'booking_request'
+        for obj in qs.prefetch_related('rooms'):
+            room_ids = {r.pk for r in obj.rooms.all()}
+            if obj.room_id:
+                room_ids.add(obj.room_id)
+            for room_id in room_ids:
+                for start, end in _windows(obj):
+                    rows.append(RoomSlot(
+                        room_id=room_id,
+                        start_datetime=start,
+                        end_datetime=end,
+                        source=source,
+                        **{owner_field: obj},
+                    ))
+    RoomSlot.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0027_roombooking_alternative_slots_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField()),
+                ('source', models.CharField(choices=[('booking', 'Confirmed Booking'), ('request', 'Pending Request')], max_length=10)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='inventory.roombooking')),
+                ('booking_request', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='inventory.roombookingrequest')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='inventory.room')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='roomslot',
+            index=models.Index(fields=['room', 'end_datetime', 'start_datetime'], name='inventory_r_room_id_d0f80d_idx'),
+        ),
+        migrations.RunPython(backfill_room_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+import logging
+
+from django.conf import settings
+from django.db import migrations
+
+logger = logging.getLogger(__name__)
+
+CONSTRAINT = 'inventory_roomslot_booking_no_overlap'
+
+# Frozen copy of the DDL in inventory.slot_index.install_booking_exclusion
+OVERLAPS_SQL = """
+    SELECT a.room_id, a.start_datetime, a.end_datetime, a.booking_id, b.booking_id
+    FROM inventory_roomslot a
+    JOIN inventory_roomslot b
+      ON a.room_id = b.room_id AND a.id < b.id
+     AND a.source = 'booking' AND b.source = 'booking'
+     AND a.start_datetime < b.end_datetime
+     AND b.start_datetime < a.end_datetime
+    ORDER BY a.start_datetime
+    LIMIT 1
+"""
+
+ADD_CONSTRAINT_SQL = f"""
+    ALTER TABLE inventory_roomslot
+    DROP CONSTRAINT IF EXISTS {CONSTRAINT},
+    ADD CONSTRAINT {CONSTRAINT}
+    EXCLUDE USING gist (
+        room_id WITH =,
+        tstzrange(start_datetime, end_datetime, '[)') WITH &&
+    )
+    WHERE (source = 'booking')
+"""
+
+
+def add_booking_exclusion(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    if not getattr(settings, 'ROOM_BOOKING_DB_EXCLUSION', True):
+        return
+
+    # Existing double bookings would make ADD CONSTRAINT fail; leave the
+    # Python overlap check in charge until the data is cleaned up.
+    with connection.cursor() as cursor:
+        cursor.execute(OVERLAPS_SQL)
+        overlap = cursor.fetchone()
+        if overlap:
+            room_id, _, _, booking_id, other_id = overlap
+            logger.warning(
+                f"[0029_roomslot_booking_exclusion] {CONSTRAINT} NOT installed: confirmed bookings overlap "
+                f"(e.g. bookings {booking_id} and {other_id} in room {room_id}). Resolve them, then run "
+                "`python manage.py install_booking_exclusion`."
+            )
+            return
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        cursor.execute(ADD_CONSTRAINT_SQL)
+
+
+def drop_booking_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE inventory_roomslot DROP CONSTRAINT IF EXISTS {CONSTRAINT}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0028_roomslot'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_booking_exclusion, drop_booking_exclusion),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-17 04:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_setup_allauth_site_and_app'),
+        ('inventory', '0029_roomslot_booking_exclusion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomBookingSeries',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('faculty_name', models.CharField(max_length=255)),
+                ('faculty_email', models.EmailField(max_length=254)),
+                ('purpose', models.TextField(blank=True, null=True)),
+                ('requirements_doc', models.FileField(blank=True, max_length=255, null=True, upload_to='room_booking_requests/requirements/')),
+                ('requirements_text', models.TextField(blank=True, null=True)),
+                ('start_datetime', models.DateTimeField()),
+                ('end_datetime', models.DateTimeField()),
+                ('frequency', models.CharField(choices=[('weekly', 'Weekly'), ('biweekly', 'Every 2 Weeks')], default='weekly', max_length=10)),
+                ('until', models.DateField(help_text='Last date on which an occurrence may fall.')),
+                ('skip_dates', models.TextField(blank=True, default='[]', help_text='JSON list of YYYY-MM-DD dates to leave out (holidays, exams).')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected'), ('expired', 'Expired / Auto-Cancelled')], default='pending', max_length=20)),
+                ('review_note', models.TextField(blank=True)),
+                ('tat_deadline', models.DateTimeField(blank=True, null=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.department')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_booking_series', to='core.userprofile')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_series', to='inventory.room')),
+                ('rooms', models.ManyToManyField(blank=True, related_name='multi_room_booking_series', to='inventory.room')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='roombooking',
+            name='series',
+            field=models.ForeignKey(blank=True, help_text='Recurring series this booking was approved as part of, if any.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='inventory.roombookingseries'),
+        ),
+        migrations.AddField(
+            model_name='roombookingrequest',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='inventory.roombookingseries'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2 on 2026-10-17 04:44
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils import timezone
+
+HOUR = timedelta(hours=1)
+
+
+def backfill_room_utilization(apps, schema_editor):
+    """Fill the facts for the nightly rebuild window (7 days back, 120 ahead) from RoomSlot."""
+    RoomSlot = apps.get_model('inventory', 'RoomSlot')
+    RoomUtilization = apps.get_model('inventory', 'RoomUtilization')
+
+    today = timezone.localdate()
+    window_start = timezone.make_aware(datetime.combine(today - timedelta(days=7), time.min))
+    window_end = timezone.make_aware(datetime.combine(today + timedelta(days=121), time.min))
+
+    spans = defaultdict(list)
+    for room_id, source, start, end in RoomSlot.objects.filter(
+        start_datetime__lt=window_end, end_datetime__gt=window_start,
+    ).values_list('room_id', 'source', 'start_datetime', 'end_datetime'):
+        spans[room_id, source].append((max(start, window_start), min(end, window_end)))
+
+    # (room_id, date, hour) -> [booked minutes, pending minutes]
+    minutes = defaultdict(lambda: [0, 0])
+    for (room_id, source), intervals in spans.items():
+        column = 0 if source == 'booking' else 1
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        for start, end in merged:
+            cursor = start
+            while cursor < end:
+                day = timezone.localtime(cursor).date()
+                day_start = timezone.make_aware(datetime.combine(day, time.min))
+                hour = min(23, int((cursor - day_start) // HOUR))
+                piece_end = min(end, day_start + (hour + 1) * HOUR)
+                if piece_end <= cursor:
+                    piece_end = min(end, cursor + HOUR)
+                minutes[room_id, day, hour][column] += round((piece_end - cursor).total_seconds() / 60)
+                cursor = piece_end
+
+    RoomUtilization.objects.bulk_create(
+        [
+            RoomUtilization(
+                room_id=room_id, date=day, hour=hour,
+                booked_minutes=min(60, booked), pending_minutes=min(60, pending),
+            )
+            for (room_id, day, hour), (booked, pending) in minutes.items()
+            if booked or pending
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0031_roombooking_updated_on'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomUtilization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('booked_minutes', models.PositiveSmallIntegerField(default=0)),
+                ('pending_minutes', models.PositiveSmallIntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='utilization', to='inventory.room')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='roomutilization',
+            index=models.Index(fields=['date', 'room'], name='inventory_r_date_dfc4cb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='roomutilization',
+            constraint=models.UniqueConstraint(fields=('room', 'date', 'hour'), name='inventory_roomutilization_room_date_hour'),
+        ),
+        migrations.RunPython(backfill_room_utilization, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-17 05:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def fan_out_open_items(apps, schema_editor):
+    """Fill the inboxes with what is actionable now, as `manage.py backfill_notification_inbox` does."""
+    UserProfile = apps.get_model('core', 'UserProfile')
+    # A fresh database has no admins and nothing to fan out
+    if not UserProfile.objects.filter(models.Q(is_central_admin=True) | models.Q(is_sub_admin=True)).exists():
+        return
+    from inventory.notification_inbox import backfill
+    backfill(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_setup_allauth_site_and_app'),
+        ('inventory', '0033_outboundemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('booking', 'Room booking request'), ('booking_expiring', 'Booking request TAT expiring'), ('cancel', 'Cancellation request'), ('stock', 'Stock request'), ('tat', 'Time extension request'), ('esc', 'Escalated issue'), ('pur', 'Purchase request'), ('papp', 'Purchase approved')], max_length=20)),
+                ('object_id', models.PositiveIntegerField(help_text='Primary key of the request / issue / purchase')),
+                ('state', models.CharField(choices=[('unread', 'Unread'), ('read', 'Read'), ('dismissed', 'Dismissed')], default='unread', max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('link', models.CharField(blank=True, max_length=255)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='core.userprofile')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(fields=['recipient', 'state', '-created_on', '-id'], name='inventory_notif_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(fields=['kind', 'object_id'], name='inventory_notif_item_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationevent',
+            constraint=models.UniqueConstraint(fields=('recipient', 'kind', 'object_id'), name='inventory_notificationevent_item'),
+        ),
+        migrations.RunPython(fan_out_open_items, migrations.RunPython.noop),
+    ]
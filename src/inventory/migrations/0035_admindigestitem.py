@@ -0,0 +1,29 @@
+# Generated by Django 4.2 on 2026-10-17 05:08
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0034_notificationevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminDigestItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipient', models.EmailField(max_length=254)),
+                ('category', models.CharField(choices=[('request', 'New Requests'), ('reminder', 'Approval Reminders'), ('expiry', 'Auto-Cancellations'), ('activity', 'Admin Activity')], max_length=10)),
+                ('subject', models.TextField()),
+                ('text_body', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='admindigestitem',
+            index=models.Index(fields=['recipient', 'created_on'], name='inventory_digest_due_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-17 05:19
+
+from django.db import migrations, models
+
+
+def schedule_open_deadlines(apps, schema_editor):
+    Issue = apps.get_model('inventory', 'Issue')
+    RoomBookingRequest = apps.get_model('inventory', 'RoomBookingRequest')
+    ScheduledDeadline = apps.get_model('inventory', 'ScheduledDeadline')
+
+    rows = [
+        ScheduledDeadline(kind='issue', object_id=pk, due_at=due_at)
+        for pk, due_at in Issue.objects.filter(
+            resolved=False,
+            status__in=['open', 'in_progress', 'escalated'],
+            escalation_level__lt=2,
+            tat_deadline__isnull=False,
+        ).values_list('pk', 'tat_deadline')
+    ] + [
+        ScheduledDeadline(kind='booking_request', object_id=pk, due_at=due_at)
+        for pk, due_at in RoomBookingRequest.objects.filter(
+            status='pending', series__isnull=True, tat_deadline__isnull=False,
+        ).values_list('pk', 'tat_deadline')
+    ]
+    ScheduledDeadline.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0035_admindigestitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledDeadline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('issue', 'Issue TAT'), ('booking_request', 'Booking request TAT')], max_length=20)),
+                ('object_id', models.PositiveIntegerField(help_text='Primary key of the issue / booking request')),
+                ('due_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scheduleddeadline',
+            index=models.Index(fields=['due_at'], name='inventory_deadline_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduleddeadline',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='inventory_deadline_item'),
+        ),
+        migrations.RunPython(schedule_open_deadlines, migrations.RunPython.noop),
+    ]
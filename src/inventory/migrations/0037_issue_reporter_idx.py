@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 05:24
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0036_scheduleddeadline'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='issue',
+            index=models.Index(django.db.models.functions.text.Lower('reporter_email'), models.OrderBy(models.F('created_on'), descending=True), models.OrderBy(models.F('id'), descending=True), name='inventory_issue_reporter_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2 on 2026-10-17 05:26
+
+import logging
+
+from django.db import DatabaseError, migrations, models, transaction
+import django.db.models.deletion
+
+logger = logging.getLogger(__name__)
+
+
+def add_trigram_extension(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    # pg_trgm is a trusted extension (PG13+), but older servers need a
+    # superuser; without it duplicate detection falls back to Python until
+    # the extension is created by hand (picked up on the next start).
+    try:
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError as e:
+        logger.warning(
+            f"[0038_issueduplicatereport] pg_trgm not installed ({e}); duplicate issue detection "
+            "scores in Python. Run `CREATE EXTENSION pg_trgm` as a superuser to enable it."
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0037_issue_reporter_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueDuplicateReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reporter_email', models.EmailField(max_length=254)),
+                ('reported_by', models.CharField(blank=True, max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_reports', to='inventory.issue')),
+            ],
+            options={
+                'ordering': ['created_on'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='issueduplicatereport',
+            constraint=models.UniqueConstraint(fields=('issue', 'reporter_email'), name='inventory_issue_duplicate_reporter'),
+        ),
+        migrations.RunPython(add_trigram_extension, migrations.RunPython.noop),
+    ]
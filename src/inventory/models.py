@@ -1,14 +1,15 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Lower
 from django.forms import ValidationError
 from core.models import Organisation, UserProfile, Department, User
 from django.utils.text import slugify
 from django.utils import timezone
 from config.utils import generate_unique_slug, generate_unique_code
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.conf import settings
-from django.core.mail import send_mail
-import pytz, uuid
+import pytz
 from django.core.validators import FileExtensionValidator, RegexValidator
 from inventory.booking_utils import format_room_list
 
@@ -280,15 +281,22 @@ class Issue(models.Model):
 
     slug = models.SlugField(unique=True, max_length=255, blank=True)
 
+    class Meta:
+        indexes = [
+            # Student ticket history: lower(reporter_email), newest first (inventory.student_tickets)
+            models.Index(
+                Lower('reporter_email'), F('created_on').desc(), F('id').desc(),
+                name='inventory_issue_reporter_idx',
+            ),
+        ]
+
     # ----------------------------------------------------------------------
     # Utility: Ticket ID generator
     # ----------------------------------------------------------------------
     def generate_ticket_id(self):
-        import random, string
+        # The timestamp keeps tickets readable; the allocated code makes them unique
         ts = timezone.now().strftime("%y%m%d%H%M%S")
-        suffix = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-
-        return f"T{self.organisation_id or 0}{ts}{suffix}"
+        return f"T{self.organisation_id or 0}{ts}{generate_unique_code(self, 8)}"
 
     # ----------------------------------------------------------------------
     # Save override
@@ -341,21 +349,14 @@ class Issue(models.Model):
         candidate = None
 
         # ----------------------------------------------------
-        # VALIDATED FIX: Use actual fields in your UserProfile
+        # Level 1 → Sub Admin, level 2 → Central Admin; an admin of the
+        # issue's organisation is preferred (same rule as the bulk sweep)
         # ----------------------------------------------------
-        if next_level == 1:
-            # Escalate to Sub Admin
-            candidate = UserProfile.objects.filter(
-                # org=self.organisation,
-                is_sub_admin=True
-            ).first()
-
-        elif next_level == 2:
-            # Escalate to Central Admin
-            candidate = UserProfile.objects.filter(
-                # org=self.organisation,
-                is_central_admin=True
-            ).first()
+        from inventory.issue_escalation import escalation_candidate
+
+        candidate_id = escalation_candidate(next_level, self.organisation_id)
+        if candidate_id:
+            candidate = UserProfile.objects.select_related('user').filter(pk=candidate_id).first()
 
         # If no user exists at next level → do not escalate
         if not candidate:
@@ -384,10 +385,11 @@ class Issue(models.Model):
         # OPTIONAL EMAIL (never stops escalation)
         # ----------------------------------------------------
         if notify:
+            from inventory.outbox import queue_mail
             try:
                 user_email = getattr(candidate.user, "email", None)
                 if user_email:
-                    send_mail(
+                    queue_mail(
                         subject=f"Issue Escalated: {self.ticket_id}",
                         message=f"The ticket {self.ticket_id} has been escalated to you.",
                         from_email=None,
@@ -440,6 +442,32 @@ class IssueRemark(models.Model):
         return f"{self.get_admin_type_display()} remark on {self.issue.ticket_id} at {self.created_at:%Y-%m-%d %H:%M}"
 
 
+class IssueDuplicateReport(models.Model):
+    """A student's report attached to an existing open issue instead of
+    opening a new ticket (inventory.duplicate_issues).
+
+    One row per student and issue; reporting the same ticket again updates
+    the description and time. No incharge email is sent and the issue's TAT
+    is left alone.
+    """
+
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name='duplicate_reports')
+    reporter_email = models.EmailField()
+    reported_by = models.CharField(max_length=255, blank=True)
+    description = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_on']
+        constraints = [
+            models.UniqueConstraint(fields=['issue', 'reporter_email'], name='inventory_issue_duplicate_reporter'),
+        ]
+
+    def __str__(self):
+        return f"{self.reporter_email} also reported {self.issue.ticket_id}"
+
+
 class Category(models.Model):
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
     organisation = models.ForeignKey(Organisation, on_delete=models.CASCADE)
@@ -934,6 +962,8 @@ class RoomBooking(models.Model):
     start_datetime = models.DateTimeField()
     end_datetime = models.DateTimeField()
     created_on = models.DateTimeField(auto_now_add=True)
+    # Drives the calendar feed ETag / Last-Modified (inventory.calendar_feed)
+    updated_on = models.DateTimeField(auto_now=True)
     purpose = models.TextField(null=True, blank=True)
     reminder_sent = models.BooleanField(default=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
@@ -964,6 +994,11 @@ class RoomBooking(models.Model):
     approved_by_name = models.CharField(max_length=255, blank=True)
     approved_note = models.TextField(blank=True)
     is_edited = models.BooleanField(default=False, help_text="True if this booking was edited after initial creation.")
+    series = models.ForeignKey(
+        'RoomBookingSeries', null=True, blank=True, on_delete=models.SET_NULL,
+        related_name='bookings',
+        help_text="Recurring series this booking was approved as part of, if any."
+    )
     # Internal admin note for extra items added or returned (refreshments only, not emailed)
     add_return_note = models.TextField(
         null=True, blank=True,
@@ -1034,38 +1069,35 @@ class RoomBooking(models.Model):
                         e_dt = e_dt.astimezone(tz)
                     slots.append((s_dt, e_dt))
 
+            from inventory.slot_index import (
+                db_enforces_booking_exclusion, find_conflicting_slots, SOURCE_BOOKING,
+            )
+            # Postgres rejects overlaps atomically via the slot exclusion constraint
+            if db_enforces_booking_exclusion():
+                return
+
             rooms = [self.room]
             if self.pk:
                 rooms = list(self.rooms.all())
                 if self.room and self.room not in rooms:
                     rooms.append(self.room)
 
-            from django.db.models import Q
-            overlapping = RoomBooking.objects.filter(
-                Q(room__in=rooms) | Q(rooms__in=rooms)
-            ).exclude(status='cancelled')
+            taken = list(find_conflicting_slots(
+                rooms,
+                slots,
+                exclude_booking_pk=self.pk,
+                sources=(SOURCE_BOOKING,),
+            ))
 
-            if self.pk:
-                overlapping = overlapping.exclude(pk=self.pk)
-
-            def overlaps(s1_start, s1_end, s2_start, s2_end):
-                return s1_start < s2_end and s2_start < s1_end
-
-            for b in overlapping:
-                b_slots = [(b.start_datetime, b.end_datetime)]
-                for slot in b.parsed_alternative_slots:
-                    b_slots.append((slot['start'], slot['end']))
-                
-                for s_start, s_end in slots:
-                    for b_start, b_end in b_slots:
-                        if overlaps(s_start, s_end, b_start, b_end):
-                            raise ValidationError(f"Room is already booked for time slot {s_start.strftime('%d %b %Y, %H:%M')}.")
+            for s_start, s_end in slots:
+                for slot in taken:
+                    if s_start < slot.end_datetime and slot.start_datetime < s_end:
+                        raise ValidationError(f"Room is already booked for time slot {s_start.strftime('%d %b %Y, %H:%M')}.")
 
     def save(self, *args, **kwargs):
         # Generate slug based on faculty name and timestamp if it doesn't exist
         if not self.slug:
-            unique_id = str(uuid.uuid4())[:8]
-            self.slug = slugify(f"{self.faculty_name}-{unique_id}")
+            self.slug = generate_unique_slug(self, slugify(self.faculty_name))
 
         self.full_clean()
         super().save(*args, **kwargs)
@@ -1262,6 +1294,12 @@ class RoomBookingRequest(models.Model):
         related_name='approved_booking_requests',
     )
     approved_note = models.TextField(blank=True)
+
+    # Occurrence of a recurring series — reviewed only as part of the series
+    series = models.ForeignKey(
+        'RoomBookingSeries', null=True, blank=True, on_delete=models.CASCADE,
+        related_name='occurrences',
+    )
  
 
     def save(self, *args, **kwargs):
@@ -1278,6 +1316,80 @@ class RoomBookingRequest(models.Model):
         return format_room_list(self)
 
 
+class RoomBookingSeries(models.Model):
+    """
+    Recurring booking request (e.g. the same lab every week for a semester).
+
+    Expands into one RoomBookingRequest per occurrence (linked via
+    `occurrences`) so each date holds its room in the slot index, but the
+    series is approved, rejected or expired as a single unit with one
+    summary email.  See inventory.booking_series.
+    """
+    FREQUENCY_CHOICES = [
+        ('weekly',   'Weekly'),
+        ('biweekly', 'Every 2 Weeks'),
+    ]
+    FREQUENCY_DAYS = {'weekly': 7, 'biweekly': 14}
+
+    STATUS_CHOICES = [
+        ('pending',  'Pending'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('expired',  'Expired / Auto-Cancelled'),
+    ]
+
+    room            = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='booking_series')
+    rooms           = models.ManyToManyField(Room, blank=True, related_name='multi_room_booking_series')
+    department      = models.ForeignKey(
+                        'core.Department', null=True, blank=True, on_delete=models.SET_NULL
+                      )
+    faculty_name    = models.CharField(max_length=255)
+    faculty_email   = models.EmailField()
+    purpose         = models.TextField(null=True, blank=True)
+    requirements_doc = models.FileField(
+                        upload_to='room_booking_requests/requirements/',
+                        null=True, blank=True, max_length=255,
+                      )
+    requirements_text = models.TextField(null=True, blank=True)
+
+    # First occurrence; later ones repeat the same local wall-clock times
+    start_datetime  = models.DateTimeField()
+    end_datetime    = models.DateTimeField()
+    frequency       = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    until           = models.DateField(help_text="Last date on which an occurrence may fall.")
+    skip_dates      = models.TextField(
+                        blank=True, default="[]",
+                        help_text="JSON list of YYYY-MM-DD dates to leave out (holidays, exams)."
+                      )
+
+    status          = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    reviewed_by     = models.ForeignKey(
+                        UserProfile, on_delete=models.SET_NULL,
+                        null=True, blank=True,
+                        related_name='reviewed_booking_series'
+                      )
+    review_note     = models.TextField(blank=True)
+    tat_deadline    = models.DateTimeField(null=True, blank=True)
+    created_on      = models.DateTimeField(auto_now_add=True)
+    updated_on      = models.DateTimeField(auto_now=True)
+
+    @property
+    def parsed_skip_dates(self):
+        try:
+            import json
+            from datetime import date
+            return {date.fromisoformat(d) for d in json.loads(self.skip_dates or "[]")}
+        except (ValueError, TypeError):
+            return set()
+
+    def __str__(self):
+        return f"BookingSeries [{self.status}]: {self.room} | {self.get_frequency_display()} until {self.until}"
+
+    @property
+    def room_summary(self):
+        return format_room_list(self)
+
+
 class RoomCancellationRequest(models.Model):
     """
     Faculty-raised request to cancel an existing confirmed RoomBooking.
@@ -1309,6 +1421,251 @@ class RoomCancellationRequest(models.Model):
         return f"CancelReq [{self.status}]: {self.booking}"
 
 
+# ─────────────────────────────────────────────────────────────────────
+# ROOM SLOT INDEX — normalized occupancy used for conflict detection
+# ─────────────────────────────────────────────────────────────────────
+
+class RoomSlot(models.Model):
+    """
+    One row per (room, start, end) held by a confirmed RoomBooking or a
+    pending RoomBookingRequest — primary slot and every alternative slot.
+    Maintained by inventory.slot_index from the signals below; never edit
+    rows by hand.
+    """
+    SOURCE_CHOICES = [
+        ('booking', 'Confirmed Booking'),
+        ('request', 'Pending Request'),
+    ]
+
+    room            = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='slots')
+    start_datetime  = models.DateTimeField()
+    end_datetime    = models.DateTimeField()
+    source          = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    booking         = models.ForeignKey(
+                        RoomBooking, on_delete=models.CASCADE,
+                        null=True, blank=True, related_name='slots'
+                      )
+    booking_request = models.ForeignKey(
+                        RoomBookingRequest, on_delete=models.CASCADE,
+                        null=True, blank=True, related_name='slots'
+                      )
+
+    class Meta:
+        # Overlap test is start < :end AND end > :start — leading on end_datetime
+        # lets the planner skip every slot that finished before the window.
+        indexes = [models.Index(fields=['room', 'end_datetime', 'start_datetime'])]
+
+    def __str__(self):
+        return f"{self.room} | {self.start_datetime:%Y-%m-%d %H:%M} – {self.end_datetime:%H:%M} ({self.source})"
+
+
+# ─────────────────────────────────────────────────────────────────────
+# ROOM UTILIZATION — hourly occupancy facts for dashboards
+# ─────────────────────────────────────────────────────────────────────
+
+class RoomUtilization(models.Model):
+    """
+    Booked / pending minutes per room per local hour, derived from RoomSlot.
+    Rows exist only for hours with any occupancy. Refreshed by
+    inventory.utilization whenever slots change and rebuilt nightly.
+    """
+    room            = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='utilization')
+    date            = models.DateField()
+    hour            = models.PositiveSmallIntegerField()
+    booked_minutes  = models.PositiveSmallIntegerField(default=0)
+    pending_minutes = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date', 'hour'], name='inventory_roomutilization_room_date_hour'),
+        ]
+        # Heatmaps aggregate a date range across rooms
+        indexes = [models.Index(fields=['date', 'room'])]
+
+    def __str__(self):
+        return f"{self.room} | {self.date} {self.hour:02d}:00 — {self.booked_minutes}m booked, {self.pending_minutes}m pending"
+
+
+class NotificationEvent(models.Model):
+    """
+    One admin's copy of a notification, written on fan-out by
+    inventory.notification_inbox while the item it points at is actionable.
+    Read / dismissed state is per recipient.
+    """
+    KIND_CHOICES = [
+        ('booking',          'Room booking request'),
+        ('booking_expiring', 'Booking request TAT expiring'),
+        ('cancel',           'Cancellation request'),
+        ('stock',            'Stock request'),
+        ('tat',              'Time extension request'),
+        ('esc',              'Escalated issue'),
+        ('pur',              'Purchase request'),
+        ('papp',             'Purchase approved'),
+    ]
+    STATE_CHOICES = [
+        ('unread',    'Unread'),
+        ('read',      'Read'),
+        ('dismissed', 'Dismissed'),
+    ]
+
+    recipient  = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='notification_events')
+    kind       = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id  = models.PositiveIntegerField(help_text="Primary key of the request / issue / purchase")
+    state      = models.CharField(max_length=10, choices=STATE_CHOICES, default='unread')
+    title      = models.CharField(max_length=255)
+    body       = models.TextField(blank=True)
+    link       = models.CharField(max_length=255, blank=True)
+    created_on = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['recipient', 'kind', 'object_id'], name='inventory_notificationevent_item'),
+        ]
+        indexes = [
+            # The inbox page: one recipient's visible events, newest first, keyset paginated
+            models.Index(fields=['recipient', 'state', '-created_on', '-id'], name='inventory_notif_inbox_idx'),
+            # Retiring an item's events across all recipients
+            models.Index(fields=['kind', 'object_id'], name='inventory_notif_item_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} | {self.get_kind_display()} #{self.object_id} ({self.state})"
+
+
+@receiver(post_save, sender=RoomBooking)
+@receiver(post_save, sender=RoomBookingRequest)
+def sync_room_slots_on_save(sender, instance, raw=False, **kwargs):
+    """Keep the slot index in step with create / edit / cancel / status changes."""
+    if raw:
+        return
+    from inventory.slot_index import sync_slots
+    sync_slots(instance)
+
+
+@receiver(m2m_changed, sender=RoomBooking.rooms.through)
+@receiver(m2m_changed, sender=RoomBookingRequest.rooms.through)
+def sync_room_slots_on_rooms_change(sender, instance, action, reverse=False, **kwargs):
+    """Multi-room selection and room swaps go through rooms.set()."""
+    if reverse or action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    from inventory.slot_index import sync_slots
+    sync_slots(instance)
+    if isinstance(instance, RoomBooking):
+        # A room swap changes the booking's calendar entry without a save()
+        RoomBooking.objects.filter(pk=instance.pk).update(updated_on=timezone.now())
+
+
+@receiver(pre_delete, sender=RoomBooking)
+@receiver(pre_delete, sender=RoomBookingRequest)
+def refresh_utilization_on_delete(sender, instance, **kwargs):
+    """Slots vanish by cascade on delete; queue their hours for a utilization refresh."""
+    from inventory.utilization import mark_slots_changed
+    mark_slots_changed(instance.slots.values_list('room_id', 'start_datetime', 'end_datetime'))
+
+
+@receiver(post_save, sender=RoomBookingRequest)
+@receiver(post_delete, sender=RoomBookingRequest)
+@receiver(post_save, sender=RoomCancellationRequest)
+@receiver(post_delete, sender=RoomCancellationRequest)
+@receiver(post_save, sender=StockRequest)
+@receiver(post_delete, sender=StockRequest)
+@receiver(post_save, sender=IssueTimeExtensionRequest)
+@receiver(post_delete, sender=IssueTimeExtensionRequest)
+def invalidate_global_notification_counts(sender, instance, raw=False, **kwargs):
+    """Request queues changed; the bell badge counts are stale."""
+    if raw:
+        return
+    from inventory.notification_counts import invalidate_notification_counts
+    invalidate_notification_counts()
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_delete, sender=Issue)
+@receiver(post_save, sender=Purchase)
+@receiver(post_delete, sender=Purchase)
+def invalidate_org_notification_counts(sender, instance, raw=False, **kwargs):
+    """Escalations and purchases are counted per organisation."""
+    if raw:
+        return
+    from inventory.notification_counts import invalidate_notification_counts
+    invalidate_notification_counts(instance.organisation_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_recipient_directory_on_profile(sender, instance, raw=False, **kwargs):
+    """Role, organisation or email-mode changes alter who gets admin notifications."""
+    if raw:
+        return
+    from inventory.recipient_directory import invalidate_recipient_directory
+    invalidate_recipient_directory()
+
+
+@receiver(post_save, sender=User)
+def invalidate_recipient_directory_on_user(sender, instance, raw=False, update_fields=None, **kwargs):
+    """An admin's address lives on User; logins only touch last_login and are skipped."""
+    if raw or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    from inventory.recipient_directory import invalidate_recipient_directory
+    invalidate_recipient_directory()
+
+
+@receiver(post_save, sender=RoomBookingRequest)
+@receiver(post_save, sender=RoomCancellationRequest)
+@receiver(post_save, sender=StockRequest)
+@receiver(post_save, sender=IssueTimeExtensionRequest)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Purchase)
+def publish_live_item_event(sender, instance, created, raw=False, **kwargs):
+    """Push new / changed items to open admin and incharge event streams."""
+    if raw:
+        return
+    from inventory.live_events import publish_item
+    publish_item(instance, created)
+
+
+@receiver(post_save, sender=RoomBookingRequest)
+@receiver(post_save, sender=RoomCancellationRequest)
+@receiver(post_save, sender=StockRequest)
+@receiver(post_save, sender=IssueTimeExtensionRequest)
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=Purchase)
+def sync_notification_inbox(sender, instance, raw=False, **kwargs):
+    """Fan new actionable items out to admin inboxes; retire ones that were handled."""
+    if raw:
+        return
+    from inventory.notification_inbox import sync_item
+    sync_item(instance)
+
+
+@receiver(post_delete, sender=RoomBookingRequest)
+@receiver(post_delete, sender=RoomCancellationRequest)
+@receiver(post_delete, sender=StockRequest)
+@receiver(post_delete, sender=IssueTimeExtensionRequest)
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=Purchase)
+def retire_notification_inbox(sender, instance, **kwargs):
+    from inventory.notification_inbox import delete_item
+    delete_item(instance)
+
+
+@receiver(post_save, sender=Issue)
+@receiver(post_save, sender=RoomBookingRequest)
+def sync_scheduled_deadline(sender, instance, raw=False, **kwargs):
+    """Schedule the item's TAT deadline while it is actionable; drop it once handled."""
+    if raw:
+        return
+    from inventory.deadline_scheduler import sync_instance
+    sync_instance(instance)
+
+
+@receiver(post_delete, sender=Issue)
+@receiver(post_delete, sender=RoomBookingRequest)
+def drop_scheduled_deadline(sender, instance, **kwargs):
+    from inventory.deadline_scheduler import drop_instance
+    drop_instance(instance)
+
+
 class MasterInventoryAccess(models.Model):
     """
     Tracks which room incharges have been granted access to the Master Inventory.
@@ -1412,3 +1769,101 @@ class ItemConfiguration(models.Model):
 
     def __str__(self):
         return f"Config: {self.configuration_name or self.item.item_name} ({self.count})"
+
+
+# ─────────────────────────────────────────────────────────────────────
+# OUTBOUND EMAIL OUTBOX — drained in batches by inventory.outbox
+# ─────────────────────────────────────────────────────────────────────
+
+class OutboundEmail(models.Model):
+    """
+    One queued notification email. Rows are written by inventory.outbox.queue_mail
+    in the same transaction as the change that triggered them and delivered
+    by the drain_outbox worker task; failed sends are retried with backoff
+    until they are sent or moved to the dead-letter state.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead Letter'),
+    ]
+
+    subject         = models.TextField()
+    from_email      = models.EmailField(blank=True)
+    recipients      = models.TextField(help_text="JSON list of recipient email addresses")
+    text_body       = models.TextField(blank=True)
+    html_body       = models.TextField(blank=True)
+    attachments     = models.TextField(
+                        blank=True, default='[]',
+                        help_text="JSON list of {filename, content_type, content} with base64 content"
+                      )
+    status          = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts        = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at      = models.DateTimeField(null=True, blank=True)
+    last_error      = models.TextField(blank=True)
+    provider_message_id = models.CharField(max_length=64, blank=True)
+    created_on      = models.DateTimeField(auto_now_add=True)
+    sent_on         = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # The drainer polls "pending and due" oldest first
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+    def __str__(self):
+        return f"{self.subject[:60]} → {self.recipients} ({self.status})"
+
+
+class AdminDigestItem(models.Model):
+    """
+    One admin alert held back for a digest. Written by
+    inventory.admin_digest.queue_admin_mail for admins who chose digest
+    delivery; the send_admin_digests task folds each recipient's rows into
+    a single email once the oldest one is a digest window old.
+    """
+    CATEGORY_CHOICES = [
+        ('request', 'New Requests'),
+        ('reminder', 'Approval Reminders'),
+        ('expiry', 'Auto-Cancellations'),
+        ('activity', 'Admin Activity'),
+    ]
+
+    recipient   = models.EmailField()
+    category    = models.CharField(max_length=10, choices=CATEGORY_CHOICES)
+    subject     = models.TextField()
+    text_body   = models.TextField(blank=True)
+    created_on  = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        # The digest task groups by recipient, oldest first
+        indexes = [models.Index(fields=['recipient', 'created_on'], name='inventory_digest_due_idx')]
+
+    def __str__(self):
+        return f"{self.recipient} · {self.category} · {self.subject[:60]}"
+
+
+class ScheduledDeadline(models.Model):
+    """
+    The next TAT deadline of one actionable issue or booking request, kept
+    by inventory.deadline_scheduler so that due work is found with an index
+    range read and a worker can be woken when the earliest one falls due.
+    """
+    KIND_CHOICES = [
+        ('issue', 'Issue TAT'),
+        ('booking_request', 'Booking request TAT'),
+    ]
+
+    kind        = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id   = models.PositiveIntegerField(help_text="Primary key of the issue / booking request")
+    due_at      = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='inventory_deadline_item'),
+        ]
+        # "What is due" and "when is the next deadline"
+        indexes = [models.Index(fields=['due_at'], name='inventory_deadline_due_idx')]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.object_id} due {self.due_at}"
@@ -0,0 +1,157 @@
+"""
+Cached counters behind the admin bell badge.
+
+Every open admin tab polls admin_notification_counts, so the counts are
+kept in the cache (Redis in production) under two keys:
+
+    notif-counts:global          queues every admin sees (booking, cancel,
+                                 stock and TAT-extension requests)
+    notif-counts:org:<org_id>    per-organisation queues (escalated issues,
+                                 purchase requests / approvals)
+
+A poll is one get_many(). On a miss both entries are rebuilt from a single
+query of correlated COUNT subqueries. Signals on the underlying models (and
+explicit calls after bulk .update()s) delete the affected key once the
+transaction commits and send an "invalidate" event to live streams
+(inventory.live_events). Nothing is rebuilt until someone reads the counts:
+open streams pull them, the first read refills the cache and the rest share
+it, so writes cost nothing extra when no admin page is open. The global
+entry also expires when the next
+pending booking request passes its TAT deadline, since that changes the
+count without any write.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, Min, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+COUNTS_TTL = 300
+GLOBAL_KEY = 'notif-counts:global'
+ORG_KEY = 'notif-counts:org:{org_id}'
+
+GLOBAL_FIELDS = ('booking_requests', 'cancel_requests', 'stock_requests', 'tat_requests')
+ORG_FIELDS = ('escalated_issues', 'purchase_requests', 'purchase_approvals')
+
+
+def _org_key(org_id):
+    return ORG_KEY.format(org_id=org_id or 'none')
+
+
+def _count(queryset):
+    """COUNT(*) of `queryset` as a scalar subquery (0 when empty)."""
+    counted = (
+        queryset.order_by()
+        .annotate(_one=Value(1))
+        .values('_one')
+        .annotate(n=Count('*'))
+        .values('n')[:1]
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def _rebuild(org_id):
+    """Recompute both entries with one query and store them. Returns (global, org)."""
+    from core.models import Organisation
+    from inventory.models import (
+        Issue, IssueTimeExtensionRequest, Purchase,
+        RoomBookingRequest, RoomCancellationRequest, StockRequest,
+    )
+
+    now = timezone.now()
+    open_bookings = RoomBookingRequest.objects.filter(status='pending', tat_deadline__gt=now)
+    global_queues = {
+        'booking_requests': open_bookings,
+        'cancel_requests':  RoomCancellationRequest.objects.filter(status='pending'),
+        'stock_requests':   StockRequest.objects.filter(status='pending'),
+        'tat_requests':     IssueTimeExtensionRequest.objects.filter(status='pending'),
+    }
+    annotations = {field: _count(queryset) for field, queryset in global_queues.items()}
+    annotations['next_deadline'] = Subquery(
+        open_bookings.order_by().annotate(_one=Value(1)).values('_one')
+        .annotate(first=Min('tat_deadline')).values('first')[:1]
+    )
+    if org_id:
+        annotations.update({
+            'escalated_issues':   _count(Issue.objects.filter(status='escalated', organisation=OuterRef('pk'))),
+            'purchase_requests':  _count(Purchase.objects.filter(status='requested', room__organisation=OuterRef('pk'))),
+            'purchase_approvals': _count(Purchase.objects.filter(status='approved', room__organisation=OuterRef('pk'))),
+        })
+        anchor = Organisation.objects.filter(pk=org_id)
+    else:
+        anchor = Organisation.objects.order_by('pk')[:1]
+
+    # The subqueries ride on an organisation row; the global queues don't depend on it
+    row = anchor.annotate(**annotations).values(*annotations).first()
+    if row is None:
+        # No organisations yet, or a stale org_id: the org queues really are
+        # empty, but the global ones must still be counted
+        row = {field: queryset.count() for field, queryset in global_queues.items()}
+        row['next_deadline'] = open_bookings.aggregate(first=Min('tat_deadline'))['first']
+    global_counts = {field: row[field] for field in GLOBAL_FIELDS}
+    org_counts = {field: row.get(field, 0) for field in ORG_FIELDS}
+
+    global_ttl = COUNTS_TTL
+    if row.get('next_deadline'):
+        global_ttl = max(1, min(COUNTS_TTL, int((row['next_deadline'] - now).total_seconds()) + 1))
+    cache.set(GLOBAL_KEY, global_counts, global_ttl)
+    cache.set(_org_key(org_id), org_counts, COUNTS_TTL)
+    return global_counts, org_counts
+
+
+def notification_counts(org_id, is_central):
+    """Badge counts for one admin, shaped like the admin_notification_counts response."""
+    org_key = _org_key(org_id)
+    cached = cache.get_many([GLOBAL_KEY, org_key])
+    global_counts, org_counts = cached.get(GLOBAL_KEY), cached.get(org_key)
+    if global_counts is None or org_counts is None:
+        global_counts, org_counts = _rebuild(org_id)
+
+    counts = dict(global_counts)
+    counts['escalated_issues'] = org_counts['escalated_issues']
+    if is_central:
+        counts['purchase_requests'] = org_counts['purchase_requests']
+    else:
+        counts['purchase_approvals'] = org_counts['purchase_approvals']
+    counts['total'] = sum(counts.values())
+    return counts
+
+
+def _push(org_id):
+    """Tell open streams that watch these counts to pull them again."""
+    from inventory.live_events import publish_counts_invalidated
+
+    publish_counts_invalidated(org_id)
+
+
+def _already_queued(key):
+    """True if this transaction already has an invalidation of `key` waiting for commit."""
+    from django.db import connection
+    return any(getattr(entry[1], 'counts_key', None) == key for entry in connection.run_on_commit)
+
+
+def invalidate_notification_counts(org_id=None):
+    """
+    Drop the global entry (org_id=None) or one organisation's entry once the
+    current transaction commits and tell live streams to re-read it.
+    Repeated calls inside one transaction collapse into one.
+    """
+    key = GLOBAL_KEY if org_id is None else _org_key(org_id)
+    if _already_queued(key):
+        return
+
+    def _drop():
+        try:
+            cache.delete(key)
+        except Exception:
+            # A stale badge is harmless; the entry still expires on its own
+            logger.warning(f"[invalidate_notification_counts] Could not delete {key}")
+        _push(org_id)
+
+    _drop.counts_key = key
+    transaction.on_commit(_drop)
@@ -0,0 +1,399 @@
+"""
+Persistent admin notification inbox (NotificationEvent).
+
+Fan-out on write: when a request, escalation or purchase becomes actionable,
+sync_item() writes one row per admin who should see it, with the title and
+details rendered at that moment. When the item stops being actionable
+(approved, rejected, expired, de-escalated, deleted) its rows are removed.
+Read / dismissed state lives on each recipient's row, so the notifications
+page is a single keyset-paginated query over (recipient, state, created_on).
+
+Bulk .update() paths skip signals and call close_items() themselves; the TAT
+sweep adds 'booking_expiring' rows through fan_out_expiring() and the
+escalation sweep adds 'esc' rows through fan_out_escalated().
+"""
+import logging
+
+from django.apps import apps as django_apps
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from inventory import keyset
+
+logger = logging.getLogger(__name__)
+
+
+INBOX_PAGE_SIZE = 30
+VISIBLE_STATES = ('unread', 'read')
+_BULK_BATCH = 500
+
+# Audiences
+ALL_ADMINS = 'all_admins'           # every central admin and sub-admin
+ORG_ADMINS = 'org_admins'           # admins of the item's organisation
+ORG_CENTRAL = 'org_central'         # central admins (not sub-admins) of the organisation
+ORG_SUB_ADMINS = 'org_sub_admins'   # sub-admins of the organisation
+
+# Display metadata used by central_admin/admin_notifications.html
+KIND_DISPLAY = {
+    'booking':          {'icon': 'bi-calendar-plus-fill', 'icon_class': 'ni-booking',   'badge': 'Pending',   'badge_class': 'nb-yellow', 'action': 'Review Request'},
+    'booking_expiring': {'icon': 'bi-alarm-fill',         'icon_class': 'ni-cancel',    'badge': 'Urgent',    'badge_class': 'nb-red',    'action': 'Act Now'},
+    'cancel':           {'icon': 'bi-calendar-x-fill',    'icon_class': 'ni-cancel',    'badge': 'Pending',   'badge_class': 'nb-red',    'action': 'Review Request'},
+    'stock':            {'icon': 'bi-box-seam-fill',      'icon_class': 'ni-stock',     'badge': 'Pending',   'badge_class': 'nb-yellow', 'action': 'Review Request'},
+    'tat':              {'icon': 'bi-clock-history',      'icon_class': 'ni-tat',       'badge': 'Pending',   'badge_class': 'nb-yellow', 'action': 'Review Request'},
+    'esc':              {'icon': 'bi-arrow-up-circle-fill', 'icon_class': 'ni-escalated', 'badge': 'Escalated', 'badge_class': 'nb-pink', 'action': 'View Issue'},
+    'pur':              {'icon': 'bi-cart-plus-fill',     'icon_class': 'ni-purchase',  'badge': 'Pending',   'badge_class': 'nb-yellow', 'action': 'Review Purchase'},
+    'papp':             {'icon': 'bi-bag-check-fill',     'icon_class': 'ni-approved',  'badge': 'Approved',  'badge_class': 'nb-green',  'action': 'View Purchases'},
+}
+
+BOOKING_KINDS = ('booking', 'booking_expiring')
+
+
+def _fmt(value):
+    return timezone.localtime(value).strftime('%d %b %Y, %H:%M') if value else '—'
+
+
+def _room_name(room):
+    if room is None:
+        return 'No room'
+    return f"{room.label} — {room.room_name}" if room.label else room.room_name
+
+
+def _truncate(text, length):
+    text = (text or '').strip()
+    return text if len(text) <= length else text[:length - 1] + '…'
+
+
+def _join(*parts):
+    return ' · '.join(part for part in parts if part)
+
+
+def _person(profile):
+    # Spelled out rather than str(profile): historical models have no __str__
+    return f"{profile.first_name} {profile.last_name}" if profile else ''
+
+
+# ─────────────────────────────────────────────────────────────────────
+# RENDERERS  (instance → title, body, link)
+# ─────────────────────────────────────────────────────────────────────
+
+def _render_booking(req):
+    from inventory.booking_utils import format_room_list
+
+    body = [
+        _join(req.faculty_name, req.faculty_email),
+        _join(f"{_fmt(req.start_datetime)} → {_fmt(req.end_datetime)}", _truncate(req.purpose, 60)),
+    ]
+    if req.tat_deadline:
+        body.append(f"Approve by: {_fmt(req.tat_deadline)}")
+    return (
+        f"New Booking Request — {format_room_list(req)}",
+        '\n'.join(body),
+        reverse('central_admin:approval_requests') + '?type=booking_req',
+    )
+
+
+def _render_booking_expiring(req):
+    from inventory.booking_utils import format_room_list
+
+    body = [
+        _join(req.faculty_name, req.faculty_email),
+        f"{_fmt(req.start_datetime)} → {_fmt(req.end_datetime)}",
+        f"Deadline: {_fmt(req.tat_deadline)} — request will be auto-cancelled if not acted upon before then.",
+    ]
+    return (
+        f"⚠ TAT Expiring — {format_room_list(req)}",
+        '\n'.join(body),
+        reverse('central_admin:approval_requests') + '?type=booking_req',
+    )
+
+
+def _render_cancel(req):
+    booking = req.booking
+    title = 'Cancellation Request'
+    if booking:
+        title += f" — {_room_name(booking.room)}"
+    body = _join(
+        req.faculty_email,
+        f"Booked: {_fmt(booking.start_datetime)}" if booking else '',
+        _truncate(req.reason, 60),
+    )
+    return title, body, reverse('central_admin:approval_requests') + '?type=cancel_req'
+
+
+def _render_stock(req):
+    count = req.requested_count
+    body = _join(
+        f"Room: {_room_name(req.room)}",
+        f"By {_person(req.requested_by)}" if req.requested_by else '',
+        f"+{count} unit{'s' if count != 1 else ''}",
+        _truncate(req.reason, 55),
+    )
+    return f"Stock Request — {req.item.item_name}", body, reverse('central_admin:approval_requests') + '?type=item_edit'
+
+
+def _render_tat(req):
+    hours = req.requested_extra_hours
+    body = _join(
+        f"Issue: {_truncate(req.issue.subject, 60)}",
+        f"By {_person(req.requested_by)}" if req.requested_by else '',
+        f"+{hours} hour{'s' if hours != 1 else ''}",
+        _truncate(req.reason, 50),
+    )
+    return (
+        f"Time Extension Request — Ticket #{req.issue.ticket_id}",
+        body,
+        reverse('central_admin:approval_requests') + '?type=issue_tat',
+    )
+
+
+def _render_esc(issue):
+    body = _join(
+        f"Ticket #{issue.ticket_id}",
+        f"Room: {_room_name(issue.room)}",
+        f"Raised by {issue.created_by}" if issue.created_by else '',
+        f"TAT: {_fmt(issue.tat_deadline)}" if issue.tat_deadline else '',
+    )
+    return f"Issue Escalated — {issue.subject}", body, reverse('central_admin:issue_list') + '?filter=escalated'
+
+
+def _purchase_body(purchase, with_reason):
+    return _join(
+        f"Item: {purchase.item.item_name}" if purchase.item_id else '',
+        f"Vendor: {purchase.vendor.vendor_name}" if purchase.vendor_id else '',
+        f"Qty: {purchase.quantity if purchase.quantity is not None else '—'}",
+        _truncate(purchase.reason, 50) if with_reason else '',
+    )
+
+
+def _render_pur(purchase):
+    return (
+        f"Purchase Request — {_room_name(purchase.room)}",
+        _purchase_body(purchase, with_reason=True),
+        reverse('central_admin:purchase_list'),
+    )
+
+
+def _render_papp(purchase):
+    return (
+        f"Purchase Approved — {_room_name(purchase.room)}",
+        _purchase_body(purchase, with_reason=False),
+        reverse('central_admin:purchase_list'),
+    )
+
+
+def _purchase_org(purchase):
+    # Purchases are shown to the organisation that owns the room
+    return purchase.room.organisation_id if purchase.room_id else None
+
+
+def _in_last_day(req):
+    if req.status != 'pending' or req.tat_deadline is None:
+        return False
+    now = timezone.now()
+    return now < req.tat_deadline <= now + timezone.timedelta(hours=24)
+
+
+# model label → [(kind, is actionable, audience, organisation of the item, renderer)]
+_ITEM_KINDS = {
+    'inventory.roombookingrequest': [
+        # Series occurrences carry no deadline of their own and are reviewed as a series
+        ('booking', lambda r: r.status == 'pending' and r.tat_deadline is not None, ALL_ADMINS, None, _render_booking),
+        # Fast-track requests start inside their last day; the rest get here from the TAT sweep
+        ('booking_expiring', _in_last_day, ALL_ADMINS, None, _render_booking_expiring),
+    ],
+    'inventory.roomcancellationrequest': [
+        ('cancel', lambda r: r.status == 'pending', ALL_ADMINS, None, _render_cancel),
+    ],
+    'inventory.stockrequest': [
+        ('stock', lambda r: r.status == 'pending', ALL_ADMINS, None, _render_stock),
+    ],
+    'inventory.issuetimeextensionrequest': [
+        ('tat', lambda r: r.status == 'pending', ALL_ADMINS, None, _render_tat),
+    ],
+    'inventory.issue': [
+        ('esc', lambda i: i.status == 'escalated', ORG_ADMINS, lambda i: i.organisation_id, _render_esc),
+    ],
+    'inventory.purchase': [
+        ('pur', lambda p: p.status == 'requested', ORG_CENTRAL, _purchase_org, _render_pur),
+        ('papp', lambda p: p.status == 'approved', ORG_SUB_ADMINS, _purchase_org, _render_papp),
+    ],
+}
+
+
+# ─────────────────────────────────────────────────────────────────────
+# FAN-OUT
+# ─────────────────────────────────────────────────────────────────────
+
+def _recipient_ids(audience, org_id=None, entries=None):
+    from inventory import recipient_directory as rd
+
+    if audience == ALL_ADMINS:
+        return rd.profile_ids(rd.ADMINS, entries=entries)
+    if org_id is None:
+        return []
+    role = {ORG_ADMINS: rd.ADMINS, ORG_CENTRAL: rd.CENTRAL_ADMINS}.get(audience, rd.SUB_ADMINS)
+    return rd.profile_ids(role, org_id, entries)
+
+
+def _fan_out(kind, items, audience, org_of, render, models=None, entries=None):
+    """
+    Write one row per recipient for each item in `items` that has none yet.
+    `models` and `entries` are the app registry and admin directory to use
+    instead of the live ones (see backfill()).
+    """
+    NotificationEvent = (models or django_apps).get_model('inventory', 'NotificationEvent')
+
+    items = list(items)
+    if not items:
+        return 0
+    existing = set(
+        NotificationEvent.objects.filter(kind=kind, object_id__in=[item.pk for item in items])
+        .values_list('object_id', flat=True).distinct()
+    )
+    recipients_by_org = {}
+    now = timezone.now()
+    rows = []
+    for item in items:
+        if item.pk in existing:
+            continue
+        org_id = org_of(item) if org_of else None
+        if org_id not in recipients_by_org:
+            recipients_by_org[org_id] = _recipient_ids(audience, org_id, entries)
+        if not recipients_by_org[org_id]:
+            continue
+        title, body, link = render(item)
+        rows.extend(
+            NotificationEvent(
+                recipient_id=recipient_id, kind=kind, object_id=item.pk,
+                title=title[:255], body=body, link=link, created_on=now,
+            )
+            for recipient_id in recipients_by_org[org_id]
+        )
+    # A concurrent fan-out of the same item loses quietly on the unique constraint
+    NotificationEvent.objects.bulk_create(rows, batch_size=_BULK_BATCH, ignore_conflicts=True)
+    return len(rows)
+
+
+def sync_item(instance):
+    """Bring an item's inbox rows in line with its current status (called from post_save)."""
+    from inventory.models import NotificationEvent
+
+    for kind, actionable, audience, org_of, render in _ITEM_KINDS.get(instance._meta.label_lower, ()):
+        if actionable(instance):
+            _fan_out(kind, [instance], audience, org_of, render)
+        else:
+            kinds = BOOKING_KINDS if kind == 'booking' else (kind,)
+            NotificationEvent.objects.filter(kind__in=kinds, object_id=instance.pk).delete()
+
+
+def delete_item(instance):
+    """Remove every inbox row for a deleted item."""
+    from inventory.models import NotificationEvent
+
+    kinds = [kind for kind, *_ in _ITEM_KINDS.get(instance._meta.label_lower, ())]
+    if 'booking' in kinds:
+        kinds = list(BOOKING_KINDS)
+    NotificationEvent.objects.filter(kind__in=kinds, object_id=instance.pk).delete()
+
+
+def close_items(kinds, object_ids):
+    """Remove rows for items whose status was changed with a bulk .update()."""
+    from inventory.models import NotificationEvent
+
+    if object_ids:
+        NotificationEvent.objects.filter(kind__in=kinds, object_id__in=object_ids).delete()
+
+
+def fan_out_expiring(requests):
+    """Add a 'booking_expiring' row for pending booking requests inside their last day."""
+    return _fan_out('booking_expiring', requests, ALL_ADMINS, None, _render_booking_expiring)
+
+
+def fan_out_escalated(issues):
+    """Add 'esc' rows for issues escalated with a bulk update (inventory.issue_escalation)."""
+    return _fan_out('esc', issues, ORG_ADMINS, lambda i: i.organisation_id, _render_esc)
+
+
+def _schema_directory(models):
+    """Admin directory entries read straight from `models`' UserProfile, bypassing the cache."""
+    from inventory.recipient_directory import Recipient
+
+    UserProfile = models.get_model('core', 'UserProfile')
+    return [
+        Recipient(pk, org_id, None, is_central_admin, is_sub_admin, None)
+        for pk, org_id, is_central_admin, is_sub_admin in UserProfile.objects
+        .filter(Q(is_central_admin=True) | Q(is_sub_admin=True))
+        .order_by('pk').values_list('pk', 'org_id', 'is_central_admin', 'is_sub_admin')
+    ]
+
+
+def backfill(models=None):
+    """
+    Fan out every item that is actionable right now (new installs / after a
+    wipe). Migration 0034 passes its historical app registry as `models`, so
+    the backfill only touches columns that exist at that point.
+    """
+    entries = _schema_directory(models) if models is not None else None
+    models = models or django_apps
+    Issue, IssueTimeExtensionRequest, Purchase, RoomBookingRequest, RoomCancellationRequest, StockRequest = (
+        models.get_model('inventory', name) for name in (
+            'Issue', 'IssueTimeExtensionRequest', 'Purchase',
+            'RoomBookingRequest', 'RoomCancellationRequest', 'StockRequest',
+        )
+    )
+
+    sources = {
+        'inventory.roombookingrequest':       RoomBookingRequest.objects.filter(status='pending', tat_deadline__isnull=False).select_related('room').prefetch_related('rooms'),
+        'inventory.roomcancellationrequest':  RoomCancellationRequest.objects.filter(status='pending').select_related('booking__room'),
+        'inventory.stockrequest':             StockRequest.objects.filter(status='pending').select_related('item', 'room', 'requested_by'),
+        'inventory.issuetimeextensionrequest': IssueTimeExtensionRequest.objects.filter(status='pending').select_related('issue', 'requested_by'),
+        'inventory.issue':                    Issue.objects.filter(status='escalated').select_related('room'),
+        'inventory.purchase':                 Purchase.objects.filter(status__in=['requested', 'approved']).select_related('room', 'item', 'vendor'),
+    }
+    written = 0
+    for label, queryset in sources.items():
+        items = list(queryset)
+        for kind, actionable, audience, org_of, render in _ITEM_KINDS[label]:
+            written += _fan_out(
+                kind, [item for item in items if actionable(item)], audience, org_of, render, models, entries,
+            )
+
+    return written
+
+
+# ─────────────────────────────────────────────────────────────────────
+# READING
+# ─────────────────────────────────────────────────────────────────────
+
+def inbox_page(profile, cursor=None, page_size=INBOX_PAGE_SIZE):
+    """
+    One page of a recipient's visible events, newest first, and the cursor
+    for the next page (None on the last page).
+    """
+    from inventory.models import NotificationEvent
+
+    qs = NotificationEvent.objects.filter(recipient=profile, state__in=VISIBLE_STATES)
+    events = list(keyset.after(qs, cursor).order_by('-created_on', '-pk')[:page_size + 1])
+    next_cursor = None
+    if len(events) > page_size:
+        last = events[page_size - 1]
+        next_cursor = keyset.encode_cursor(last.created_on, last.pk)
+    return events[:page_size], next_cursor
+
+
+def mark_read(profile, event_ids):
+    from inventory.models import NotificationEvent
+
+    if event_ids:
+        NotificationEvent.objects.filter(recipient=profile, pk__in=event_ids, state='unread').update(state='read')
+
+
+def dismiss(profile, event_ids=None):
+    """Dismiss the given events, or every visible one when event_ids is None."""
+    from inventory.models import NotificationEvent
+
+    qs = NotificationEvent.objects.filter(recipient=profile, state__in=VISIBLE_STATES)
+    if event_ids is not None:
+        qs = qs.filter(pk__in=event_ids)
+    return qs.update(state='dismissed')
@@ -0,0 +1,247 @@
+"""
+Transactional outbox for notification email.
+
+Views call queue_mail() instead of talking to Mailjet: it writes an
+OutboundEmail row (inside the caller's transaction, so an approval that
+rolls back never emails anyone) and asks a worker to drain the outbox once
+the transaction commits. The drainer claims due rows, packs up to
+MAILJET_MAX_MESSAGES_PER_CALL of them into one `Messages` array and records
+each message's outcome:
+
+    sent     Mailjet accepted the message
+    pending  the call failed as a whole, or Mailjet throttled / failed this
+             message with a 5xx; retried with exponential backoff
+    dead     Mailjet rejected the message itself, or retries ran out
+
+Rows left in 'sending' by a crashed worker are reclaimed after
+OUTBOX_CLAIM_TIMEOUT. Stored-file attachments are fetched here, not in the
+view that queued the email (see inventory.mail_attachments).
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from inventory.email import (
+    MAILJET_MAX_MESSAGES_PER_CALL,
+    MailTransportError,
+    build_mailjet_message,
+    send_mailjet_messages,
+)
+from inventory.mail_attachments import AttachmentUnavailable, resolve_attachments, with_attachment_links
+
+logger = logging.getLogger(__name__)
+
+
+OUTBOX_BATCH_SIZE = MAILJET_MAX_MESSAGES_PER_CALL
+OUTBOX_MAX_ATTEMPTS = 6
+OUTBOX_RETRY_BASE = timedelta(seconds=30)
+OUTBOX_RETRY_MAX = timedelta(hours=1)
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=10)
+# Upper bound on Mailjet calls per drain run, so one run cannot hog a worker
+OUTBOX_MAX_BATCHES_PER_RUN = 20
+
+
+def _encode_attachments(attachments):
+    import base64
+
+    return [
+        # Stored-file references (inventory.mail_attachments) are resolved by the drainer
+        attachment if isinstance(attachment, dict) else {
+            "filename": attachment[0],
+            "content_type": attachment[2],
+            "content": base64.b64encode(attachment[1]).decode('utf-8'),
+        }
+        for attachment in attachments or []
+    ]
+
+
+def queue_mail(
+    *,
+    subject,
+    message,
+    recipient_list,
+    from_email=None,
+    html_message=None,
+    fail_silently=True,
+    attachments=None,   # (filename, file_bytes, mime_type) tuples or storage_attachment() entries
+):
+    """
+    Drop-in replacement for safe_send_mail that queues instead of sending.
+    Returns True once the email is stored in the outbox.
+    """
+    from inventory.models import OutboundEmail
+
+    recipients = [r for r in recipient_list or [] if r]
+    if not recipients:
+        logger.warning("[queue_mail] Empty recipient list")
+        return False
+
+    try:
+        OutboundEmail.objects.create(
+            subject=subject,
+            from_email=from_email or '',
+            recipients=json.dumps(recipients),
+            text_body=message or '',
+            html_body=html_message or '',
+            attachments=json.dumps(_encode_attachments(attachments)),
+        )
+    except Exception:
+        logger.exception("[queue_mail] Could not store outbound email")
+        if not fail_silently:
+            raise
+        return False
+
+    transaction.on_commit(_schedule_drain)
+    return True
+
+
+def queue_mails(mails):
+    """
+    Queue many emails at once: one INSERT and one drain request. `mails` are
+    dicts of queue_mail() keyword arguments (without fail_silently; errors
+    propagate). Returns the number of emails stored.
+    """
+    from inventory.models import OutboundEmail
+
+    rows = []
+    for mail in mails:
+        recipients = [r for r in mail.get('recipient_list') or [] if r]
+        if not recipients:
+            continue
+        rows.append(OutboundEmail(
+            subject=mail['subject'],
+            from_email=mail.get('from_email') or '',
+            recipients=json.dumps(recipients),
+            text_body=mail.get('message') or '',
+            html_body=mail.get('html_message') or '',
+            attachments=json.dumps(_encode_attachments(mail.get('attachments'))),
+        ))
+    if not rows:
+        return 0
+
+    OutboundEmail.objects.bulk_create(rows, batch_size=500)
+    transaction.on_commit(_schedule_drain)
+    return len(rows)
+
+
+def _schedule_drain():
+    from inventory.tasks import drain_outbox, enqueue
+    enqueue(drain_outbox)
+
+
+def _retry_delay(attempts):
+    # The exponent is capped so a raised OUTBOX_MAX_ATTEMPTS cannot overflow timedelta
+    return min(OUTBOX_RETRY_BASE * (2 ** min(max(0, attempts - 1), 16)), OUTBOX_RETRY_MAX)
+
+
+def _claim_batch(now):
+    """Mark up to OUTBOX_BATCH_SIZE due rows as 'sending' and return them."""
+    from inventory.models import OutboundEmail
+
+    with transaction.atomic():
+        rows = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', claimed_at__lt=now - OUTBOX_CLAIM_TIMEOUT)
+            )
+            .order_by('next_attempt_at', 'pk')[:OUTBOX_BATCH_SIZE]
+        )
+        OutboundEmail.objects.filter(pk__in=[row.pk for row in rows]).update(
+            status='sending', claimed_at=now, attempts=F('attempts') + 1,
+        )
+    for row in rows:
+        row.attempts += 1
+    return rows
+
+
+def _deliver(rows, now):
+    """Send one claimed batch and record each row's outcome with a single bulk_update."""
+    from inventory.models import OutboundEmail
+
+    deliverable, messages = [], []
+    stored_files = {}   # one storage lookup per attachment for the whole batch
+    for row in rows:
+        try:
+            attachments, links = resolve_attachments(json.loads(row.attachments or '[]'), stored_files)
+            text_body, html_body = with_attachment_links(row.text_body, row.html_body, links)
+            messages.append(build_mailjet_message(
+                subject=row.subject,
+                message=text_body,
+                recipient_list=json.loads(row.recipients),
+                from_email=row.from_email or None,
+                html_message=html_body or None,
+                attachments=attachments,
+            ))
+            deliverable.append(row)
+        except AttachmentUnavailable as e:
+            row.last_error = f"Attachment unavailable: {e}"
+            if row.attempts < OUTBOX_MAX_ATTEMPTS:
+                row.status, row.next_attempt_at = 'pending', now + _retry_delay(row.attempts)
+            else:
+                row.status = 'dead'
+        except (ValueError, KeyError, TypeError) as e:
+            row.status, row.last_error = 'dead', f"Malformed outbox row: {e}"
+
+    if messages:
+        try:
+            results = send_mailjet_messages(messages)
+        except MailTransportError as e:
+            results = [{"ok": False, "retry": True, "error": str(e), "message_id": ""}] * len(messages)
+
+        for row, result in zip(deliverable, results):
+            if result["ok"]:
+                row.status, row.sent_on, row.last_error = 'sent', now, ''
+                row.provider_message_id = result["message_id"][:64]
+            elif result.get("retry") and row.attempts < OUTBOX_MAX_ATTEMPTS:
+                row.status, row.last_error = 'pending', result["error"]
+                row.next_attempt_at = now + _retry_delay(row.attempts)
+            else:
+                row.status, row.last_error = 'dead', result["error"]
+
+    OutboundEmail.objects.bulk_update(
+        rows, ['status', 'sent_on', 'last_error', 'provider_message_id', 'next_attempt_at'],
+    )
+
+    dead = [row.pk for row in rows if row.status == 'dead']
+    if dead:
+        logger.error(f"[drain_outbox] Moved {len(dead)} email(s) to dead letter: {dead}")
+    return sum(1 for row in rows if row.status == 'sent')
+
+
+def drain(max_batches=OUTBOX_MAX_BATCHES_PER_RUN):
+    """Deliver due outbox rows in Mailjet-sized batches. Returns the number sent."""
+    from inventory.mail_transport import PROVIDER_MAILJET, transport_for
+
+    if transport_for(PROVIDER_MAILJET).breaker.is_open():
+        # Don't burn retry attempts while the provider is known to be down
+        logger.info("[drain_outbox] Mailjet circuit open, leaving the outbox for the next run")
+        return 0
+
+    sent = 0
+    for _ in range(max_batches):
+        now = timezone.now()
+        rows = _claim_batch(now)
+        if not rows:
+            break
+        sent += _deliver(rows, now)
+    if sent:
+        logger.info(f"[drain_outbox] Sent {sent} email(s)")
+    return sent
+
+
+def retry_dead_letters(ids=None):
+    """Put dead-lettered rows (all, or the given ids) back in the queue."""
+    from inventory.models import OutboundEmail
+
+    dead = OutboundEmail.objects.filter(status='dead')
+    if ids is not None:
+        dead = dead.filter(pk__in=ids)
+    count = dead.update(status='pending', attempts=0, next_attempt_at=timezone.now(), last_error='')
+    if count:
+        transaction.on_commit(_schedule_drain)
+    return count
@@ -0,0 +1,120 @@
+"""
+Cached directory of admin notification recipients.
+
+Every notification path (booking emails, TAT reminders, admin activity
+notices, digest routing, the notification inbox) resolves "who are the
+admins" from here instead of querying UserProfile ⋈ User per send. The
+directory is one cached list of every central / sub-admin profile:
+
+    recipient-directory    [Recipient(profile_id, org_id, email,
+                            is_central_admin, is_sub_admin, email_mode), ...]
+
+Roles are resolved from that list in memory, optionally narrowed to one
+organisation. Signals on UserProfile and User (see inventory.models) drop
+the entry once the transaction commits; the next lookup rebuilds it with a
+single query.
+"""
+import logging
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+DIRECTORY_KEY = 'recipient-directory'
+DIRECTORY_TTL = 60 * 60
+
+# Roles
+ADMINS = 'admins'                   # central admins and sub-admins
+SUB_ADMINS = 'sub_admins'           # sub-admins
+CENTRAL_ADMINS = 'central_admins'   # central admins who are not also sub-admins
+
+Recipient = namedtuple(
+    'Recipient',
+    ['profile_id', 'org_id', 'email', 'is_central_admin', 'is_sub_admin', 'email_mode'],
+)
+
+
+def _load():
+    from core.models import UserProfile
+
+    return [
+        Recipient(*row)
+        for row in UserProfile.objects.filter(Q(is_central_admin=True) | Q(is_sub_admin=True))
+        .order_by('pk')
+        .values_list('pk', 'org_id', 'user__email', 'is_central_admin', 'is_sub_admin', 'admin_email_mode')
+    ]
+
+
+def directory():
+    """Every admin recipient, from the cache or rebuilt on a miss."""
+    entries = cache.get(DIRECTORY_KEY)
+    if entries is None:
+        entries = _load()
+        cache.set(DIRECTORY_KEY, entries, DIRECTORY_TTL)
+    return entries
+
+
+def _has_role(entry, role):
+    if role == ADMINS:
+        return True
+    if role == SUB_ADMINS:
+        return entry.is_sub_admin
+    if role == CENTRAL_ADMINS:
+        return entry.is_central_admin and not entry.is_sub_admin
+    raise ValueError(f"Unknown recipient role: {role}")
+
+
+def recipients(role, org_id=None, entries=None):
+    """
+    Directory entries holding `role`, limited to one organisation when
+    `org_id` is given. `entries` replaces the cached directory (migrations
+    pass the profiles of their historical schema).
+    """
+    return [
+        entry for entry in (directory() if entries is None else entries)
+        if _has_role(entry, role) and (org_id is None or entry.org_id == org_id)
+    ]
+
+
+def emails(role, org_id=None):
+    return [entry.email for entry in recipients(role, org_id) if entry.email]
+
+
+def profile_ids(role, org_id=None, entries=None):
+    return [entry.profile_id for entry in recipients(role, org_id, entries)]
+
+
+def admin_emails(org_id=None):
+    """Email addresses of all central & sub admins."""
+    return emails(ADMINS, org_id)
+
+
+def sub_admin_emails(org_id=None):
+    """Sub-admin addresses; falls back to central admins if no sub-admins exist."""
+    return emails(SUB_ADMINS, org_id) or emails(CENTRAL_ADMINS, org_id)
+
+
+def central_admin_emails(org_id=None):
+    """Email addresses of central admins only (not sub-admins)."""
+    return emails(CENTRAL_ADMINS, org_id)
+
+
+def digest_emails(recipient_list):
+    """The addresses in `recipient_list` whose admins chose digest delivery."""
+    wanted = set(recipient_list)
+    return {entry.email for entry in directory() if entry.email_mode == 'digest' and entry.email in wanted}
+
+
+def invalidate_recipient_directory():
+    """Drop the cached directory once the current transaction commits."""
+    def _drop():
+        try:
+            cache.delete(DIRECTORY_KEY)
+        except Exception:
+            logger.warning(f"[invalidate_recipient_directory] Could not delete {DIRECTORY_KEY}")
+
+    transaction.on_commit(_drop)
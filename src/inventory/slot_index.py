@@ -0,0 +1,455 @@
+"""
+Per-room slot index used for booking conflict detection.
+
+Every confirmed RoomBooking (anything not cancelled) and every pending
+RoomBookingRequest is flattened into RoomSlot rows — one row per
+(room, start, end) covering the primary slot and each alternative slot.
+The rows are rebuilt from the model signals in inventory.models whenever a
+booking/request is saved or its rooms change, so conflict checks only ever
+touch the slots that intersect the requested window.
+"""
+from bisect import bisect_right
+from datetime import datetime, time, timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from inventory.booking_utils import earliest_booking_date, get_booking_rooms
+
+
+SOURCE_BOOKING = 'booking'
+SOURCE_REQUEST = 'request'
+
+# Installed by migration 0029 on PostgreSQL when ROOM_BOOKING_DB_EXCLUSION is on,
+# or later with `manage.py install_booking_exclusion`.
+BOOKING_EXCLUSION_CONSTRAINT = 'inventory_roomslot_booking_no_overlap'
+
+
+def _source_for(instance):
+    from inventory.models import RoomBooking
+    return SOURCE_BOOKING if isinstance(instance, RoomBooking) else SOURCE_REQUEST
+
+
+def get_slot_windows(instance):
+    """Return [(start, end), ...] for the primary slot plus all alternative slots."""
+    windows = []
+    if instance.start_datetime and instance.end_datetime:
+        windows.append((instance.start_datetime, instance.end_datetime))
+    for slot in instance.parsed_alternative_slots:
+        if slot['start'] and slot['end']:
+            windows.append((slot['start'], slot['end']))
+    return windows
+
+
+def is_slot_holder(instance):
+    """Cancelled bookings and reviewed/expired requests no longer hold their rooms."""
+    if _source_for(instance) == SOURCE_BOOKING:
+        return instance.status != 'cancelled'
+    return instance.status == 'pending'
+
+
+def _slot_rows(instance, rooms):
+    from inventory.models import RoomSlot
+
+    if not is_slot_holder(instance):
+        return []
+    source = _source_for(instance)
+    owner = {'booking': instance} if source == SOURCE_BOOKING else {'booking_request': instance}
+    return [
+        RoomSlot(room=room, start_datetime=start, end_datetime=end, source=source, **owner)
+        for room in rooms
+        for start, end in get_slot_windows(instance)
+    ]
+
+
+def _write_slots(owner_filter, rows):
+    from inventory.models import RoomSlot
+
+    from inventory.utilization import mark_slots_changed
+
+    try:
+        with transaction.atomic():
+            owned = RoomSlot.objects.filter(**owner_filter)
+            before = set(owned.values_list('room_id', 'start_datetime', 'end_datetime'))
+            owned.delete()
+            if rows:
+                RoomSlot.objects.bulk_create(rows)
+            after = {(row.room_id, row.start_datetime, row.end_datetime) for row in rows}
+            # Only occupancy changes reach the utilization facts
+            mark_slots_changed(before ^ after)
+    except IntegrityError as exc:
+        if BOOKING_EXCLUSION_CONSTRAINT in str(exc):
+            raise ValidationError("Room is already booked for this time slot.")
+        raise
+
+
+def sync_slots(instance):
+    """Rebuild the RoomSlot rows owned by a RoomBooking or RoomBookingRequest."""
+    if not instance.pk:
+        return
+
+    owner_field = 'booking' if _source_for(instance) == SOURCE_BOOKING else 'booking_request'
+    rows = _slot_rows(instance, get_booking_rooms(instance))
+    _write_slots({owner_field: instance}, rows)
+
+
+def bulk_sync_slots(instances, rooms):
+    """
+    Rebuild slots for many bookings/requests of one kind after bulk_create()
+    (which skips post_save).  `rooms` is either one list shared by every
+    instance (a recurring series) or a dict of {instance.pk: [Room, ...]}.
+    """
+    instances = [instance for instance in instances if instance.pk]
+    if not instances:
+        return
+
+    owner_field = 'booking' if _source_for(instances[0]) == SOURCE_BOOKING else 'booking_request'
+    rows = [
+        row
+        for instance in instances
+        for row in _slot_rows(instance, rooms[instance.pk] if isinstance(rooms, dict) else rooms)
+    ]
+    _write_slots({f'{owner_field}__in': instances}, rows)
+
+
+def release_request_slots(request_ids):
+    """Drop slots held by requests whose status was changed with a bulk .update()."""
+    from inventory.models import RoomSlot
+    from inventory.utilization import mark_slots_changed
+
+    if request_ids:
+        held = RoomSlot.objects.filter(booking_request_id__in=request_ids)
+        mark_slots_changed(held.values_list('room_id', 'start_datetime', 'end_datetime'))
+        held.delete()
+
+
+def partition_batch_conflicts(candidates):
+    """
+    Split a batch of prospective bookings into (accepted, rejected) keys.
+
+    `candidates` is an ordered list of (key, room_ids, start, end); earlier
+    entries win.  Every confirmed slot in the batch's rooms and time span is
+    read in one query and merged per room; each candidate is then checked by
+    binary search against those intervals plus the candidates accepted so
+    far, so clashes inside the batch and with the database come out of the
+    same pass.
+    """
+    if not candidates:
+        return [], []
+
+    all_rooms = {room_id for _, room_ids, _, _ in candidates for room_id in room_ids}
+    span = [(min(c[2] for c in candidates), max(c[3] for c in candidates))]
+
+    busy = {}
+    taken = find_conflicting_slots(all_rooms, span, sources=(SOURCE_BOOKING,))
+    for room_id, start, end in taken.values_list('room_id', 'start_datetime', 'end_datetime'):
+        busy.setdefault(room_id, []).append((start, end))
+    starts, ends = {}, {}
+    for room_id in all_rooms:
+        merged = _merge(sorted(busy.get(room_id, [])))
+        starts[room_id] = [start for start, _ in merged]
+        ends[room_id] = [end for _, end in merged]
+
+    def clashes(room_id, start, end):
+        i = bisect_right(starts[room_id], start)
+        return (i > 0 and ends[room_id][i - 1] > start) or (
+            i < len(starts[room_id]) and starts[room_id][i] < end
+        )
+
+    accepted, rejected = [], []
+    for key, room_ids, start, end in candidates:
+        if any(clashes(room_id, start, end) for room_id in room_ids):
+            rejected.append(key)
+            continue
+        accepted.append(key)
+        # Accepted intervals never overlap what is already there, so the
+        # per-room lists stay sorted and disjoint
+        for room_id in room_ids:
+            i = bisect_right(starts[room_id], start)
+            starts[room_id].insert(i, start)
+            ends[room_id].insert(i, end)
+    return accepted, rejected
+
+
+def db_enforces_booking_exclusion():
+    """
+    True when the database itself rejects overlapping confirmed bookings, in
+    which case callers may skip the Python overlap scan on the write path.
+    """
+    from inventory.capabilities import has_capability, BOOKING_EXCLUSION_CONSTRAINT as capability
+    return has_capability(capability)
+
+
+_OVERLAPS_SQL = """
+    SELECT a.room_id, a.start_datetime, a.end_datetime, a.booking_id, b.booking_id
+    FROM inventory_roomslot a
+    JOIN inventory_roomslot b
+      ON a.room_id = b.room_id AND a.id < b.id
+     AND a.source = 'booking' AND b.source = 'booking'
+     AND a.start_datetime < b.end_datetime
+     AND b.start_datetime < a.end_datetime
+    ORDER BY a.start_datetime
+"""
+
+
+def booking_overlaps(connection, limit=20):
+    """[(room_id, start, end, booking_id, other_booking_id), ...] of confirmed bookings that double-book a room."""
+    with connection.cursor() as cursor:
+        cursor.execute(_OVERLAPS_SQL + " LIMIT %s", [limit])
+        return cursor.fetchall()
+
+
+def install_booking_exclusion(connection):
+    """
+    Add the PostgreSQL exclusion constraint on confirmed booking slots.
+    Returns the overlapping bookings that prevent it (nothing is changed
+    then), or [] once the constraint is in place.
+    """
+    overlaps = booking_overlaps(connection)
+    if overlaps:
+        return overlaps
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        cursor.execute(
+            f"""
+            ALTER TABLE inventory_roomslot
+            DROP CONSTRAINT IF EXISTS {BOOKING_EXCLUSION_CONSTRAINT},
+            ADD CONSTRAINT {BOOKING_EXCLUSION_CONSTRAINT}
+            EXCLUDE USING gist (
+                room_id WITH =,
+                tstzrange(start_datetime, end_datetime, '[)') WITH &&
+            )
+            WHERE (source = 'booking')
+            """
+        )
+    return []
+
+
+def find_conflicting_slots(rooms, slots, exclude_booking_pk=None, exclude_request_pk=None,
+                           sources=(SOURCE_BOOKING, SOURCE_REQUEST)):
+    """
+    Return the RoomSlot rows in `rooms` that overlap any (start, end) in `slots`.
+
+    `rooms` may contain Room instances or primary keys.  The result is a single
+    range query against the (room, end, start) index.
+    """
+    from inventory.models import RoomSlot
+
+    room_ids = [getattr(room, 'pk', room) for room in rooms if room is not None]
+    if not room_ids or not slots:
+        return RoomSlot.objects.none()
+
+    window = Q()
+    for start, end in slots:
+        window |= Q(start_datetime__lt=end, end_datetime__gt=start)
+
+    qs = RoomSlot.objects.filter(window, room_id__in=room_ids, source__in=sources)
+    if exclude_booking_pk:
+        qs = qs.exclude(booking_id=exclude_booking_pk)
+    if exclude_request_pk:
+        qs = qs.exclude(booking_request_id=exclude_request_pk)
+    return qs.order_by('start_datetime')
+
+
+# ─────────────────────────────────────────────────────────────────────
+# AVAILABILITY MATRIX
+# ─────────────────────────────────────────────────────────────────────
+
+CELL_FREE = 0
+CELL_PENDING = 1
+CELL_BOOKED = 2
+
+
+def build_availability_matrix(rooms, window_start, window_end, bucket):
+    """
+    Room × time-bucket occupancy for [window_start, window_end).
+
+    Returns {room_id: [cell, ...]} with one CELL_* value per `bucket`
+    (a timedelta).  All slots in the window are fetched in one query, then
+    each room is swept once over a difference array of bucket boundaries,
+    so the cost is O(slots + rooms × buckets).
+    """
+    room_ids = [getattr(room, 'pk', room) for room in rooms if room is not None]
+    n_buckets = -((window_start - window_end) // bucket)
+    booked = {room_id: [0] * (n_buckets + 1) for room_id in room_ids}
+    pending = {room_id: [0] * (n_buckets + 1) for room_id in room_ids}
+
+    taken = find_conflicting_slots(room_ids, [(window_start, window_end)]).values_list(
+        'room_id', 'source', 'start_datetime', 'end_datetime'
+    )
+    for room_id, source, start, end in taken:
+        first = max(0, (start - window_start) // bucket)
+        last = min(n_buckets, -((window_start - end) // bucket))
+        if first >= last:
+            continue
+        diff = booked[room_id] if source == SOURCE_BOOKING else pending[room_id]
+        diff[first] += 1
+        diff[last] -= 1
+
+    matrix = {}
+    for room_id in room_ids:
+        cells = []
+        n_booked = n_pending = 0
+        for i in range(n_buckets):
+            n_booked += booked[room_id][i]
+            n_pending += pending[room_id][i]
+            if n_booked:
+                cells.append(CELL_BOOKED)
+            elif n_pending:
+                cells.append(CELL_PENDING)
+            else:
+                cells.append(CELL_FREE)
+        matrix[room_id] = cells
+    return matrix
+
+
+# ─────────────────────────────────────────────────────────────────────
+# FREE-SLOT & ALTERNATIVE-ROOM SUGGESTIONS
+# ─────────────────────────────────────────────────────────────────────
+
+# Suggestions are limited to the bookable part of the day (the booking form's
+# "Whole Day" preset is 08:00–16:00; evening events run a little later).
+SUGGESTION_DAY_START = time(8, 0)
+SUGGESTION_DAY_END = time(18, 0)
+SUGGESTION_STEP = timedelta(minutes=15)
+
+
+def _merge(intervals):
+    """Merge sorted (start, end) pairs into disjoint busy intervals."""
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _is_free(busy, start, end):
+    """`busy` is merged and sorted; binary search for the first interval ending after `start`."""
+    i = bisect_right([b_end for _, b_end in busy], start)
+    return i == len(busy) or busy[i][0] >= end
+
+
+def _align_up(dt, step):
+    midnight = dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    offset = dt - midnight
+    return midnight + -(-offset // step) * step
+
+
+def _nearest_start(gap_start, latest, preferred, step):
+    """Aligned start in [gap_start, latest] closest to `preferred`."""
+    if preferred <= gap_start:
+        return gap_start
+    k = (preferred - gap_start) // step
+    options = [gap_start + n * step for n in (k, k + 1) if gap_start + n * step <= latest]
+    if not options:
+        return gap_start + ((latest - gap_start) // step) * step
+    return min(options, key=lambda start: abs(start - preferred))
+
+
+def _free_windows(busy, preferred, duration, first_day, last_day, limit, step, not_before):
+    """Nearest `limit` windows of `duration` inside working hours that avoid `busy`."""
+    tz = timezone.get_current_timezone()
+    candidates = []
+    j = 0
+    day = first_day
+    while day <= last_day:
+        day_open = timezone.make_aware(datetime.combine(day, SUGGESTION_DAY_START), tz)
+        day_close = timezone.make_aware(datetime.combine(day, SUGGESTION_DAY_END), tz)
+        day += timedelta(days=1)
+        cursor = _align_up(max(day_open, not_before), step)
+        if cursor + duration > day_close:
+            continue
+
+        # Busy intervals are sorted, so the pointer only ever moves forward
+        while j < len(busy) and busy[j][1] <= cursor:
+            j += 1
+
+        gaps = []
+        i = j
+        while i < len(busy) and busy[i][0] < day_close:
+            if busy[i][0] > cursor:
+                gaps.append((cursor, busy[i][0]))
+            cursor = max(cursor, _align_up(busy[i][1], step))
+            i += 1
+        gaps.append((cursor, day_close))
+
+        for gap_start, gap_end in gaps:
+            latest = gap_end - duration
+            if gap_start <= latest:
+                best = _nearest_start(gap_start, latest, preferred, step)
+                candidates.append((abs(best - preferred), best))
+
+    candidates.sort()
+    return [(start, start + duration) for _, start in candidates[:limit]]
+
+
+def suggest_slots(rooms, preferred, duration, first_day, last_day, capacity=None, limit=5,
+                  step=SUGGESTION_STEP):
+    """
+    Suggestions for a booking that may conflict.
+
+    Returns a dict with:
+      free_windows       [(start, end), ...] — the `limit` windows nearest to
+                         `preferred` in which every requested room is free
+      alternative_rooms  [Room, ...] — other rooms of the same room_category
+                         with capacity ≥ `capacity` that are free for
+                         (preferred, preferred + duration)
+
+    Confirmed bookings and pending requests both count as busy, matching
+    check_slots_conflict. All slots of every candidate room over the date
+    range are read in one indexed query; the rest is a single pass.
+    """
+    from inventory.models import Room
+    from inventory.booking_utils import sort_rooms_iterable
+
+    tz = timezone.get_current_timezone()
+    rooms = [room for room in rooms if room is not None]
+    room_ids = {room.pk for room in rooms}
+    categories = {room.room_category for room in rooms}
+
+    alternatives = Room.objects.filter(room_category__in=categories).exclude(pk__in=room_ids)
+    if capacity:
+        alternatives = alternatives.filter(capacity__gte=capacity)
+    alternatives = list(alternatives)
+
+    range_start = timezone.make_aware(datetime.combine(first_day, time.min), tz)
+    range_end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min), tz)
+
+    busy_by_room = {}
+    taken = find_conflicting_slots(
+        list(room_ids) + [room.pk for room in alternatives],
+        [(range_start, range_end)],
+    ).values_list('room_id', 'start_datetime', 'end_datetime')
+    for room_id, start, end in taken:
+        busy_by_room.setdefault(room_id, []).append((start, end))
+
+    # Requested rooms are booked together, so they are busy whenever any one is
+    requested_busy = _merge(sorted(
+        interval for room_id in room_ids for interval in busy_by_room.get(room_id, [])
+    ))
+    # Never offer a window the booking form would reject as too soon
+    bookable_from = timezone.make_aware(datetime.combine(earliest_booking_date(), time.min), tz)
+    free_windows = _free_windows(
+        requested_busy, preferred, duration, first_day, last_day, limit, step,
+        not_before=max(range_start, timezone.now(), bookable_from),
+    )
+
+    preferred_end = preferred + duration
+    free_alternatives = [
+        room for room in alternatives
+        if _is_free(_merge(sorted(busy_by_room.get(room.pk, []))), preferred, preferred_end)
+    ]
+    free_alternatives = sorted(
+        sort_rooms_iterable(free_alternatives),
+        key=lambda room: room.capacity or 0,
+    )[:limit]
+
+    return {
+        'free_windows': free_windows,
+        'alternative_rooms': free_alternatives,
+    }
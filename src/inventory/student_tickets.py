@@ -0,0 +1,110 @@
+"""
+Student ticket lookups: history by reporter email and compact status.
+
+Reporter emails are matched on lower(reporter_email), which is what the
+inventory_issue_reporter_idx expression index covers (with created_on, id
+for ordering), so a student's history is an index range read instead of a
+scan over every issue. History is keyset paginated newest first
+(inventory.keyset).
+
+Status and history responses for the mobile app carry an ETag derived from
+the tickets' updated_on, so an unchanged poll is answered with 304.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from inventory import keyset
+
+
+HISTORY_PAGE_SIZE = 20
+STATUS_FIELDS = (
+    'pk', 'ticket_id', 'subject', 'status', 'resolved', 'escalation_level',
+    'room__room_name', 'created_on', 'updated_on', 'tat_deadline',
+    'incharge_remark', 'closure_reason',
+)
+
+
+def tickets_for(email):
+    """Issues reported from `email`, matched case-insensitively through the expression index."""
+    from inventory.models import Issue
+
+    return Issue.objects.alias(reporter=Lower('reporter_email')).filter(reporter=(email or '').strip().lower())
+
+
+def history_page(email, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """One page of a student's tickets, newest first, and the cursor for the next page (or None)."""
+    tickets = list(
+        keyset.after(tickets_for(email), cursor)
+        .select_related('room').order_by('-created_on', '-pk')[:page_size + 1]
+    )
+    next_cursor = None
+    if len(tickets) > page_size:
+        last = tickets[page_size - 1]
+        next_cursor = keyset.encode_cursor(last.created_on, last.pk)
+    return tickets[:page_size], next_cursor
+
+
+# ─────────────────────────────────────────────────────────────────────
+# JSON (mobile app)
+# ─────────────────────────────────────────────────────────────────────
+
+def _iso(value):
+    return timezone.localtime(value).isoformat() if value else None
+
+
+def summary(row):
+    """Compact JSON form of one STATUS_FIELDS row."""
+    from inventory.models import Issue
+
+    status_display = dict(Issue.STATUS_CHOICES).get(row['status'], row['status'])
+    return {
+        'ticket_id':        row['ticket_id'],
+        'subject':          row['subject'],
+        'status':           row['status'],
+        'status_display':   status_display,
+        'resolved':         row['resolved'],
+        'escalation_level': row['escalation_level'],
+        'room':             row['room__room_name'],
+        'created_on':       _iso(row['created_on']),
+        'updated_on':       _iso(row['updated_on']),
+        'tat_deadline':     _iso(row['tat_deadline']),
+        'incharge_remark':  row['incharge_remark'] or '',
+        'closure_reason':   row['closure_reason'] or '',
+    }
+
+
+def _etag(*parts):
+    return '"' + hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20] + '"'
+
+
+def ticket_status(ticket_id):
+    """(compact row, etag) for one ticket, or (None, None)."""
+    from inventory.models import Issue
+
+    row = Issue.objects.filter(ticket_id=ticket_id).values(*STATUS_FIELDS).first()
+    if row is None:
+        return None, None
+    return row, _etag(row['pk'], row['updated_on'].timestamp())
+
+
+def history_validator(email, cursor=None):
+    """ETag for one history page: changes when any of the student's tickets is added or updated."""
+    stats = tickets_for(email).aggregate(count=Count('pk'), latest=Max('updated_on'))
+    latest = stats['latest'].timestamp() if stats['latest'] else 0
+    return _etag((email or '').strip().lower(), cursor or '', stats['count'], latest)
+
+
+def history_rows(email, cursor=None, page_size=HISTORY_PAGE_SIZE):
+    """history_page() as compact rows for the JSON API."""
+    rows = list(
+        keyset.after(tickets_for(email), cursor)
+        .order_by('-created_on', '-pk').values(*STATUS_FIELDS)[:page_size + 1]
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = keyset.encode_cursor(last['created_on'], last['pk'])
+    return [summary(row) for row in rows[:page_size]], next_cursor
@@ -1,26 +1,69 @@
+"""
+Celery tasks for the inventory app.
+
+Queues (see CELERY_TASK_ROUTES in settings; a small deployment runs all of
+them on one worker):
+
+    mail       email delivery, the outbox drainer and admin digests
+    documents  requirement-document text extraction
+    periodic   beat sweeps and scheduled deadlines (escalation, utilization)
+
+Tasks run with acks_late (CELERY_TASK_ACKS_LATE), so a task interrupted by
+a worker crash is redelivered; those tasks are safe to run twice. The two
+tasks that send mail directly (send_email_async, send_booking_decision_emails)
+opt out with acks_late=False: a redelivery would mail everyone again, so they
+are delivered at most once. Beat sweeps take a cache lock (single_run) so
+overlapping schedules never process the same rows twice.
+"""
+from contextlib import contextmanager
+
+from celery import shared_task
 from django.utils import timezone
-from inventory.models import Issue
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.conf import settings
 import logging
 import smtplib
 import socket
+import uuid
 
 logger = logging.getLogger(__name__)
 
 
-def send_email_async(subject, plain_body, html_body, from_email, to_emails, max_retries=3):
+@contextmanager
+def single_run(lock_key, ttl):
     """
-    Celery task to send email asynchronously with retry logic.
-    Falls back to file-based backend if SMTP fails.
+    Cache lock around a periodic task body. Yields False when another worker
+    already holds the lock; the lock expires after `ttl` seconds so a crashed
+    worker cannot block the sweep forever.
+    """
+    from django.core.cache import cache
+
+    token = uuid.uuid4().hex
+    acquired = cache.add(lock_key, token, ttl)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+@shared_task(ignore_result=True, acks_late=False, soft_time_limit=60, time_limit=90)
+def send_email_async(subject, plain_body, html_body, from_email, to_emails):
     """
-    for attempt in range(max_retries):
-        try:
+    Send one email over SMTP through the shared mail transport (one
+    connection per call, concurrency cap and circuit breaker).
+    A failed or short-circuited send is handed to the outbox, which retries
+    over the Mailjet API with backoff instead of sleeping here.
+    """
+    from inventory.mail_transport import PROVIDER_SMTP, TransportUnavailable, transport_for
+    from inventory.outbox import queue_mail
+
+    try:
+        with transport_for(PROVIDER_SMTP).call():
             connection = get_connection(
-                timeout=30,
+                timeout=getattr(settings, 'MAIL_READ_TIMEOUT', 10),
                 fail_silently=False
             )
-            
             msg = EmailMultiAlternatives(
                 subject=subject,
                 body=plain_body,
@@ -30,62 +73,189 @@ def send_email_async(subject, plain_body, html_body, from_email, to_emails, max_
             )
             msg.attach_alternative(html_body, 'text/html')
             msg.send()
-            connection.close()
-            
-            logger.info(f"Email sent successfully to {to_emails}")
-            return {'success': True, 'message': 'Email sent'}
-            
-        except (smtplib.SMTPException, socket.timeout, TimeoutError, OSError) as e:
-            logger.warning(f"Email attempt {attempt + 1}/{max_retries} failed: {e}")
-            if attempt < max_retries - 1:
-                import time
-                time.sleep(2 ** attempt)
-            else:
-                # All retries failed - try file-based backend as last resort
-                try:
-                    from django.core.mail import get_connection
-                    file_connection = get_connection(
-                        backend='django.core.mail.backends.filebased.EmailBackend',
-                        file_path=settings.EMAIL_FILE_PATH
-                    )
-                    msg = EmailMultiAlternatives(
-                        subject=subject,
-                        body=plain_body,
-                        from_email=from_email,
-                        to=to_emails,
-                        connection=file_connection,
-                    )
-                    msg.attach_alternative(html_body, 'text/html')
-                    msg.send()
-                    logger.info(f"Email saved to file for {to_emails}")
-                    return {'success': True, 'message': 'Email queued to file'}
-                except Exception as file_err:
-                    logger.error(f"Failed to save email to file: {file_err}")
-                    return {'success': False, 'error': str(e)}
-        except Exception as e:
-            logger.error(f"Unexpected email error: {e}")
-            return {'success': False, 'error': str(e)}
-
-
-def escalate_expired_issues():
+
+        logger.info(f"Email sent successfully to {to_emails}")
+        return {'success': True, 'message': 'Email sent'}
+
+    except (TransportUnavailable, smtplib.SMTPException, socket.timeout, TimeoutError, OSError) as e:
+        logger.warning(f"[send_email_async] SMTP send failed, handing over to the outbox: {e}")
+        queued = queue_mail(
+            subject=subject,
+            message=plain_body,
+            recipient_list=to_emails,
+            from_email=from_email,
+            html_message=html_body,
+        )
+        if queued:
+            return {'success': True, 'message': 'Email queued for retry'}
+        return {'success': False, 'error': str(e)}
+    except Exception as e:
+        logger.error(f"Unexpected email error: {e}")
+        return {'success': False, 'error': str(e)}
+
+
+def enqueue(task, *args, **kwargs):
+    """
+    Queue `task` for a worker. If the broker cannot be reached the task runs
+    inline so notifications and follow-up work are never silently dropped.
     """
-    Escalates issues whose TAT has expired.
-    Runs via cron or management command.
+    from kombu.exceptions import OperationalError
+
+    try:
+        task.delay(*args, **kwargs)
+    except (OperationalError, OSError) as e:
+        logger.warning(f"[enqueue] Broker unavailable, running {task.name} inline: {e}")
+        task(*args, **kwargs)
+
+
+def enqueue_at(task, eta, *args, **kwargs):
+    """
+    Queue `task` to run at `eta`. Unlike enqueue() a task is never run inline
+    ahead of time; returns False if the broker cannot be reached.
     """
-    now = timezone.now()
+    from kombu.exceptions import OperationalError
+
+    try:
+        task.apply_async(args=args, kwargs=kwargs, eta=eta)
+    except (OperationalError, OSError) as e:
+        logger.warning(f"[enqueue_at] Broker unavailable, {task.name} not scheduled for {eta}: {e}")
+        return False
+    return True
+
+
+def enqueue_mail(subject, message, recipient_list, html_message=None):
+    """Queue one email in the outbox (see inventory.outbox)."""
+    from inventory.outbox import queue_mail
+    queue_mail(subject=subject, message=message, recipient_list=recipient_list, html_message=html_message)
+
+
+OUTBOX_DRAIN_LOCK = 'lock:outbox-drain'
+OUTBOX_DRAIN_LOCK_TTL = 5 * 60   # seconds
+
+
+@shared_task(ignore_result=True, soft_time_limit=4 * 60, time_limit=OUTBOX_DRAIN_LOCK_TTL)
+def drain_outbox():
+    """
+    Deliver queued OutboundEmail rows in batches. Triggered after every commit
+    that queued mail and by beat every minute (to pick up retries). A cache
+    lock keeps concurrent triggers from contending for the same rows.
+    """
+    from inventory.outbox import drain
+
+    with single_run(OUTBOX_DRAIN_LOCK, OUTBOX_DRAIN_LOCK_TTL) as acquired:
+        if acquired:
+            drain()
+
 
-    issues = Issue.objects.filter(
-        tat_deadline__lt=now,
-        escalation_level__lt=2,
-        status__in=["open", "in_progress"]
+ADMIN_DIGEST_LOCK = 'lock:admin-digest'
+ADMIN_DIGEST_LOCK_TTL = 5 * 60   # seconds
+
+
+@shared_task(ignore_result=True, soft_time_limit=4 * 60, time_limit=ADMIN_DIGEST_LOCK_TTL)
+def send_admin_digests():
+    """Queue the digest email of every admin whose held alerts are due (inventory.admin_digest)."""
+    from inventory.admin_digest import send_due_digests
+
+    with single_run(ADMIN_DIGEST_LOCK, ADMIN_DIGEST_LOCK_TTL) as acquired:
+        if acquired:
+            send_due_digests()
+
+
+@shared_task(ignore_result=True, soft_time_limit=120, time_limit=150)
+def extract_booking_doc_text(booking_pk):
+    """Cache the plain text of a confirmed booking's requirements document."""
+    from inventory.models import RoomBooking
+    from inventory.booking_utils import extract_requirement_blocks_from_field, requirement_blocks_to_plain_text
+
+    booking = RoomBooking.objects.filter(pk=booking_pk).first()
+    if not booking or not booking.requirements_doc:
+        return
+    try:
+        blocks = extract_requirement_blocks_from_field(booking.requirements_doc)
+        RoomBooking.objects.filter(pk=booking_pk).update(
+            requirements_doc_text=requirement_blocks_to_plain_text(blocks)
+        )
+    except Exception as e:
+        logger.info(f"[extract_booking_doc_text] Booking {booking_pk}: {e}")
+
+
+@shared_task(ignore_result=True, acks_late=False, soft_time_limit=60, time_limit=90)
+def send_booking_decision_emails(request_pk, decision, actor_name, note, acting_email=''):
+    """Approval / rejection emails for one booking request, sent off the request path."""
+    from inventory.models import RoomBookingRequest
+    from inventory.views.central_admin import send_booking_approved_emails, send_booking_rejected_email
+
+    req = (
+        RoomBookingRequest.objects
+        .select_related('room', 'department')
+        .prefetch_related('rooms')
+        .filter(pk=request_pk)
+        .first()
+    )
+    if not req:
+        return
+    if decision == 'approved':
+        send_booking_approved_emails(req, actor_name, note, acting_email)
+    else:
+        send_booking_rejected_email(req, actor_name, note)
+
+
+@shared_task(ignore_result=True, soft_time_limit=60, time_limit=90)
+def refresh_room_utilization(keys):
+    """Recompute utilization facts for [(room_id, 'YYYY-MM-DD'), ...] after slot changes."""
+    from inventory.utilization import refresh_room_days
+    refresh_room_days(keys)
+
+
+@shared_task(ignore_result=True, soft_time_limit=15 * 60, time_limit=16 * 60)
+def rebuild_room_utilization(days_back=None, days_ahead=None):
+    """Nightly beat job: rebuild the utilization facts for a rolling window."""
+    from datetime import timedelta
+    from inventory.utilization import rebuild_range, REBUILD_DAYS_BACK, REBUILD_DAYS_AHEAD
+
+    today = timezone.localdate()
+    rebuild_range(
+        today - timedelta(days=REBUILD_DAYS_BACK if days_back is None else days_back),
+        today + timedelta(days=REBUILD_DAYS_AHEAD if days_ahead is None else days_ahead),
     )
 
-    for issue in issues:
-        try:
-            res = issue.escalate(notify=True)
-            if res.get("escalated"):
-                logger.info("Escalated issue %s to level %s", issue.ticket_id, issue.escalation_level)
-            else:
-                logger.warning("Issue %s could not be escalated: %s", issue.ticket_id, res.get("reason"))
-        except Exception:
-            logger.exception("Failed escalation for %s", issue.ticket_id)
+
+ESCALATION_LOCK = 'lock:issue-escalation-sweep'
+ESCALATION_LOCK_TTL = 10 * 60   # seconds
+
+
+@shared_task(ignore_result=True, soft_time_limit=8 * 60, time_limit=ESCALATION_LOCK_TTL)
+def escalate_expired_issues(issue_ids=None):
+    """
+    Escalate issues whose TAT has expired, one level per run; `issue_ids`
+    limits the run to the due deadlines handed over by the scheduler. Also
+    callable directly (cron endpoint / management command); returns the
+    escalate_overdue_issues() summary, or None when another run holds the lock.
+    """
+    with single_run(ESCALATION_LOCK, ESCALATION_LOCK_TTL) as acquired:
+        if not acquired:
+            logger.info("[escalate_expired_issues] Another worker holds the lock, skipping")
+            return
+
+        from inventory.issue_escalation import escalate_overdue_issues
+
+        return escalate_overdue_issues(issue_ids=issue_ids)
+
+
+DEADLINE_LOCK = 'lock:deadline-scheduler'
+DEADLINE_LOCK_TTL = 10 * 60   # seconds
+
+
+@shared_task(ignore_result=True, soft_time_limit=8 * 60, time_limit=DEADLINE_LOCK_TTL)
+def fire_due_deadlines():
+    """
+    Act on the TAT deadlines that have passed (inventory.deadline_scheduler).
+    Queued with an ETA for the next deadline; beat runs it as a safety net.
+    """
+    from inventory.deadline_scheduler import fire_due
+
+    with single_run(DEADLINE_LOCK, DEADLINE_LOCK_TTL) as acquired:
+        if not acquired:
+            logger.info("[fire_due_deadlines] Another worker holds the lock, skipping")
+            return
+        return fire_due()
@@ -1,3 +1,785 @@
-from django.test import TestCase
+import json
+import random
+from datetime import date, datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import UserProfile
+from inventory import duplicate_issues, keyset, notification_counts, notification_inbox, outbox
+from inventory.email import MailTransportError
+from inventory import mail_transport
+from inventory.mail_transport import PROVIDER_MAILJET, reset_transports, transport_for
+from inventory.deadline_scheduler import BOOKING_REQUEST, ISSUE, fire_due, sync_deadlines
+from inventory.issue_escalation import escalate_overdue_issues
+from inventory.booking_series import expand_occurrences, find_occurrence_conflicts
+from inventory.models import (
+    Issue, IssueDuplicateReport, NotificationEvent, Organisation, OutboundEmail, Room, RoomBooking,
+    RoomBookingRequest, RoomSlot, ScheduledDeadline,
+)
+from inventory.slot_index import SOURCE_BOOKING, SOURCE_REQUEST
+
+
+def _at(day, hour, minute=0):
+    return timezone.make_aware(datetime.combine(day, time(hour, minute)))
+
+
+class ExpandOccurrencesTests(TestCase):
+    first_day = date(2026, 1, 5)
+
+    def test_weekly_until_is_inclusive(self):
+        occurrences = expand_occurrences(_at(self.first_day, 10), _at(self.first_day, 11), 'weekly', date(2026, 1, 26))
+        self.assertEqual(
+            [timezone.localtime(s).date() for s, _ in occurrences],
+            [date(2026, 1, 5), date(2026, 1, 12), date(2026, 1, 19), date(2026, 1, 26)],
+        )
+
+    def test_biweekly_skips_dates_and_keeps_wall_clock_time(self):
+        occurrences = expand_occurrences(
+            _at(self.first_day, 9, 30), _at(self.first_day, 11), 'biweekly', date(2026, 3, 1),
+            skip_dates=[date(2026, 1, 19)],
+        )
+        self.assertEqual(
+            [timezone.localtime(s).date() for s, _ in occurrences],
+            [date(2026, 1, 5), date(2026, 2, 2), date(2026, 2, 16)],
+        )
+        for start, end in occurrences:
+            self.assertEqual(timezone.localtime(start).time(), time(9, 30))
+            self.assertEqual(end - start, timedelta(minutes=90))
+
+    def test_until_before_start_gives_nothing(self):
+        self.assertEqual(
+            expand_occurrences(_at(self.first_day, 10), _at(self.first_day, 11), 'weekly', date(2026, 1, 4)),
+            [],
+        )
+
+
+class FindOccurrenceConflictsTests(TestCase):
+    first_day = date(2026, 1, 5)
+
+    def setUp(self):
+        org = Organisation.objects.create(name='Org')
+        self.room = Room.objects.create(organisation=org, label='A1', room_name='Hall A')
+        self.other = Room.objects.create(organisation=org, label='B1', room_name='Hall B')
+        self.occurrences = expand_occurrences(
+            _at(self.first_day, 10), _at(self.first_day, 12), 'weekly', self.first_day + timedelta(weeks=3),
+        )
+
+    def _slot(self, room, start, end, source=SOURCE_BOOKING):
+        return RoomSlot.objects.create(room=room, start_datetime=start, end_datetime=end, source=source)
+
+    def _week(self, n):
+        return self.first_day + timedelta(weeks=n)
+
+    def test_no_slots_no_clashes(self):
+        self.assertEqual(find_occurrence_conflicts([self.room], self.occurrences).tolist(), [False] * 4)
+        self.assertEqual(len(find_occurrence_conflicts([self.room], [])), 0)
+
+    def test_overlap_flags_only_that_occurrence(self):
+        self._slot(self.room, _at(self._week(1), 11), _at(self._week(1), 13))
+        self.assertEqual(
+            find_occurrence_conflicts([self.room], self.occurrences).tolist(),
+            [False, True, False, False],
+        )
+
+    def test_touching_slots_do_not_clash(self):
+        self._slot(self.room, _at(self._week(0), 8), _at(self._week(0), 10))
+        self._slot(self.room, _at(self._week(2), 12), _at(self._week(2), 14))
+        self.assertFalse(find_occurrence_conflicts([self.room], self.occurrences).any())
+
+    def test_long_slot_is_found_behind_later_short_slots(self):
+        # The running max of ends must carry the long slot past the short ones
+        self._slot(self.room, _at(self._week(0), 9), _at(self._week(2), 11))
+        self._slot(self.room, _at(self._week(1), 7), _at(self._week(1), 8))
+        self.assertEqual(
+            find_occurrence_conflicts([self.room], self.occurrences).tolist(),
+            [True, True, True, False],
+        )
+
+    def test_rooms_are_combined_and_other_rooms_ignored(self):
+        self._slot(self.other, _at(self._week(3), 10), _at(self._week(3), 11))
+        self.assertFalse(find_occurrence_conflicts([self.room], self.occurrences).any())
+        self._slot(self.room, _at(self._week(0), 10), _at(self._week(0), 11))
+        self.assertEqual(
+            find_occurrence_conflicts([self.room, self.other], self.occurrences).tolist(),
+            [True, False, False, True],
+        )
+
+    def test_sources_filter(self):
+        self._slot(self.room, _at(self._week(1), 10), _at(self._week(1), 11), source=SOURCE_REQUEST)
+        self.assertTrue(find_occurrence_conflicts([self.room], self.occurrences)[1])
+        self.assertFalse(find_occurrence_conflicts([self.room], self.occurrences, sources=(SOURCE_BOOKING,)).any())
+
+    def test_matches_pairwise_overlap_check(self):
+        rng = random.Random(7)
+        occurrences = expand_occurrences(
+            _at(self.first_day, 10), _at(self.first_day, 11), 'weekly', self.first_day + timedelta(weeks=20),
+        )
+        window_start = occurrences[0][0] - timedelta(days=1)
+        slots = []
+        for _ in range(150):
+            start = window_start + timedelta(minutes=15 * rng.randrange(0, 4 * 24 * 150))
+            end = start + timedelta(minutes=15 * rng.randrange(1, 4 * 24 * 3))
+            slots.append((rng.choice([self.room, self.other]), start, end))
+        for room, start, end in slots:
+            self._slot(room, start, end)
+
+        expected = [
+            any(room == self.room and start < occ_end and occ_start < end for room, start, end in slots)
+            for occ_start, occ_end in occurrences
+        ]
+        self.assertEqual(find_occurrence_conflicts([self.room], occurrences).tolist(), expected)
+
+
+class TrigramSimilarityTests(SimpleTestCase):
+    """Values checked against pg_trgm's show_trgm() and similarity()."""
+
+    def test_trigrams_match_show_trgm(self):
+        self.assertEqual(duplicate_issues.trigrams('cat'), {'  c', ' ca', 'cat', 'at '})
+        # Words are lower-cased and split on anything that is not a letter or digit
+        self.assertEqual(duplicate_issues.trigrams('Foo|bar'), duplicate_issues.trigrams('foo bar'))
+        self.assertEqual(duplicate_issues.trigrams('a'), {'  a', ' a '})
+        self.assertEqual(duplicate_issues.trigrams('--'), set())
+
+    def test_similarity_matches_pg_trgm(self):
+        # SELECT similarity('word', 'two words')  ->  0.36363637
+        self.assertAlmostEqual(duplicate_issues.similarity('word', 'two words'), 4 / 11)
+        self.assertEqual(duplicate_issues.similarity('Projector', 'projector!'), 1.0)
+        self.assertEqual(duplicate_issues.similarity('', 'projector'), 0.0)
+        self.assertEqual(duplicate_issues.similarity('abc', 'xyz'), 0.0)
+
+    def test_similarity_is_symmetric(self):
+        a, b = 'projector not working', 'the projector is broken'
+        self.assertEqual(duplicate_issues.similarity(a, b), duplicate_issues.similarity(b, a))
+
+
+class IssueReportDuplicateTests(TestCase):
+    email = 'student@sfscollege.in'
+
+    def setUp(self):
+        org = Organisation.objects.create(name='Org')
+        self.room = Room.objects.create(organisation=org, label='A1', room_name='Hall A')
+        self.issue = Issue.objects.create(
+            organisation=org, room=self.room, subject='Projector not working',
+            description='The projector does not turn on', reporter_email='first@sfscollege.in',
+        )
+        self.client.force_login(get_user_model().objects.create_user(email=self.email))
+        self.url = reverse('student:report_issue')
+
+    def _post(self, **extra):
+        data = {
+            'subject': 'Projector not working',
+            'description': 'Projector will not switch on',
+            'room': self.room.pk,
+        }
+        data.update(extra)
+        return self.client.post(self.url, data)
+
+    def test_similar_report_is_shown_the_open_ticket(self):
+        response = self._post()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['duplicates']), [self.issue])
+        self.assertEqual(Issue.objects.count(), 1)
+
+    def test_unrelated_report_files_a_new_ticket(self):
+        response = self._post(subject='Broken chair', description='The chair in row 3 is broken')
+        self.assertRedirects(response, reverse('student:issue_report_success'), fetch_redirect_response=False)
+        self.assertEqual(Issue.objects.count(), 2)
+
+    def test_confirm_new_files_a_new_ticket_anyway(self):
+        response = self._post(confirm_new='1')
+        self.assertRedirects(response, reverse('student:issue_report_success'), fetch_redirect_response=False)
+        self.assertEqual(Issue.objects.count(), 2)
+        self.assertFalse(IssueDuplicateReport.objects.exists())
+
+    def test_attach_records_a_duplicate_report(self):
+        response = self._post(attach_to=self.issue.ticket_id)
+        self.assertRedirects(
+            response, f"{self.url}?ticket_id={self.issue.ticket_id}", fetch_redirect_response=False,
+        )
+        self.assertEqual(Issue.objects.count(), 1)
+        report = IssueDuplicateReport.objects.get()
+        self.assertEqual((report.issue, report.reporter_email), (self.issue, self.email))
+        self.assertEqual(report.description, 'Projector will not switch on')
+
+    def test_attaching_twice_updates_the_same_row(self):
+        self._post(attach_to=self.issue.ticket_id)
+        self._post(attach_to=self.issue.ticket_id, description='Still dark after the reboot')
+        report = IssueDuplicateReport.objects.get()
+        self.assertEqual(report.description, 'Still dark after the reboot')
+
+        _, created = duplicate_issues.attach_report(self.issue, self.email, description='Again')
+        self.assertFalse(created)
+        self.assertEqual(IssueDuplicateReport.objects.count(), 1)
+
+    def test_stale_ticket_goes_back_to_the_form(self):
+        Issue.objects.filter(pk=self.issue.pk).update(status='closed', resolved=True)
+        response = self._post(attach_to=self.issue.ticket_id, confirm_new='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['duplicates']), [])
+        self.assertEqual(Issue.objects.count(), 1)
+        self.assertFalse(IssueDuplicateReport.objects.exists())
+
+
+class EscalateOverdueIssuesTests(TestCase):
+    now = timezone.make_aware(datetime(2026, 3, 2, 9, 0))
+
+    def setUp(self):
+        # The recipient directory is dropped on commit, which TestCase never reaches
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organisation.objects.create(name='Org')
+        self.other_org = Organisation.objects.create(name='Other')
+        self.lone_org = Organisation.objects.create(name='Lone')
+        # Created first, so it is the fallback for organisations without a sub-admin
+        self.other_sub = self._admin('other-sub@sfscollege.in', self.other_org, is_sub_admin=True)
+        self.sub = self._admin('sub@sfscollege.in', self.org, is_sub_admin=True)
+        self.central = self._admin('central@sfscollege.in', self.org, is_central_admin=True)
+        self.room = Room.objects.create(organisation=self.org, label='A1', room_name='Hall A')
+
+    def _admin(self, email, org, **roles):
+        user = get_user_model().objects.create_user(email=email)
+        return UserProfile.objects.create(user=user, org=org, first_name=email, last_name='', **roles)
+
+    def _issue(self, org=None, overdue_by=timedelta(hours=1), **fields):
+        org = org or self.org
+        room = self.room if org == self.org else Room.objects.create(organisation=org, label='X', room_name='X')
+        return Issue.objects.create(
+            organisation=org, room=room, subject='Projector', description='Broken',
+            tat_deadline=self.now - overdue_by, **fields,
+        )
+
+    def _escalation_mails(self):
+        return OutboundEmail.objects.filter(subject__contains='Escalated')
+
+    def test_issue_moves_one_level_per_run(self):
+        issue = self._issue()
+        result = escalate_overdue_issues(now=self.now)
+        self.assertEqual(result, {'escalated': 1, 'skipped': 0, 'levels': {2: 0, 1: 1}})
+
+        issue.refresh_from_db()
+        self.assertEqual((issue.escalation_level, issue.status, issue.assigned_to_id), (1, 'escalated', self.sub.pk))
+        self.assertEqual(issue.tat_deadline, self.now + timedelta(hours=48))
+
+        later = self.now + timedelta(hours=49)
+        escalate_overdue_issues(now=later)
+        issue.refresh_from_db()
+        self.assertEqual((issue.escalation_level, issue.assigned_to_id), (2, self.central.pk))
+
+    def test_second_run_at_the_same_time_does_nothing(self):
+        self._issue()
+        escalate_overdue_issues(now=self.now)
+        mails = self._escalation_mails().count()
+        self.assertEqual(escalate_overdue_issues(now=self.now), {'escalated': 0, 'skipped': 0, 'levels': {2: 0, 1: 0}})
+        self.assertEqual(self._escalation_mails().count(), mails)
+
+    def test_organisation_admin_is_preferred_over_the_fallback(self):
+        own = self._issue()
+        other = self._issue(org=self.other_org)
+        lone = self._issue(org=self.lone_org)
+        escalate_overdue_issues(now=self.now)
+        assigned = dict(Issue.objects.values_list('pk', 'assigned_to'))
+        self.assertEqual(assigned[own.pk], self.sub.pk)
+        self.assertEqual(assigned[other.pk], self.other_sub.pk)
+        # No sub-admin in this organisation: the first sub-admin overall
+        self.assertEqual(assigned[lone.pk], self.other_sub.pk)
+
+    def test_issue_ids_restrict_the_run(self):
+        chosen = self._issue()
+        left = self._issue()
+        not_due = self._issue(overdue_by=-timedelta(hours=1))
+        result = escalate_overdue_issues(now=self.now, issue_ids=[chosen.pk, not_due.pk])
+        self.assertEqual(result['escalated'], 1)
+        levels = dict(Issue.objects.values_list('pk', 'escalation_level'))
+        self.assertEqual((levels[chosen.pk], levels[left.pk], levels[not_due.pk]), (1, 0, 0))
+        self.assertEqual(escalate_overdue_issues(now=self.now, issue_ids=[]), {'escalated': 0, 'skipped': 0, 'levels': {}})
+
+    def test_issues_without_a_next_level_admin_are_skipped(self):
+        UserProfile.objects.filter(pk=self.central.pk).update(is_central_admin=False)
+        cache.clear()
+        top = self._issue(escalation_level=1, status='escalated')
+        self._issue()
+        with self.assertLogs('inventory.issue_escalation', 'WARNING'):
+            result = escalate_overdue_issues(now=self.now)
+        self.assertEqual(result, {'escalated': 1, 'skipped': 1, 'levels': {1: 1}})
+        top.refresh_from_db()
+        self.assertEqual(top.escalation_level, 1)
+
+    def test_each_assignee_gets_one_email_for_all_their_tickets(self):
+        first, second = self._issue(), self._issue()
+        self._issue(org=self.other_org)
+        escalate_overdue_issues(now=self.now)
+
+        mails = {json.loads(mail.recipients)[0]: mail for mail in self._escalation_mails()}
+        self.assertEqual(set(mails), {'sub@sfscollege.in', 'other-sub@sfscollege.in'})
+        self.assertEqual(mails['sub@sfscollege.in'].subject, '2 Issues Escalated to You')
+        for issue in (first, second):
+            self.assertIn(issue.ticket_id, mails['sub@sfscollege.in'].text_body)
+
+    def test_deadlines_follow_the_restarted_tat(self):
+        issue = self._issue()
+        escalate_overdue_issues(now=self.now)
+        self.assertEqual(
+            ScheduledDeadline.objects.get(kind=ISSUE, object_id=issue.pk).due_at,
+            self.now + timedelta(hours=48),
+        )
+        # The top level has nothing left to escalate to, so its deadline is dropped
+        escalate_overdue_issues(now=self.now + timedelta(hours=49))
+        self.assertFalse(ScheduledDeadline.objects.filter(kind=ISSUE, object_id=issue.pk).exists())
+
+
+class BookingRequestDeadlineTests(TestCase):
+    """Booking TAT reminders and auto-expiry run for the due requests only."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        org = Organisation.objects.create(name='Org')
+        self.room = Room.objects.create(organisation=org, label='A1', room_name='Hall A')
+        user = get_user_model().objects.create_user(email='central@sfscollege.in')
+        UserProfile.objects.create(user=user, org=org, first_name='Central', last_name='', is_central_admin=True)
+
+    def _booking_request(self, tat_hours, age=timedelta(0)):
+        """A pending request with a `tat_hours` TAT, created `age` ago."""
+        start = timezone.now() + timedelta(days=5)
+        req = RoomBookingRequest.objects.create(
+            room=self.room, faculty_name='Faculty', faculty_email='faculty@sfscollege.in',
+            start_datetime=start, end_datetime=start + timedelta(hours=1),
+            tat_deadline=timezone.now() + timedelta(hours=tat_hours) - age,
+        )
+        if age:
+            RoomBookingRequest.objects.filter(pk=req.pk).update(created_on=req.created_on - age)
+            sync_deadlines(BOOKING_REQUEST, [req.pk])
+            req.refresh_from_db()
+        return req
+
+    def _due_at(self, req):
+        return ScheduledDeadline.objects.get(kind=BOOKING_REQUEST, object_id=req.pk).due_at
+
+    def test_due_at_the_next_reminder(self):
+        regular = self._booking_request(48)
+        self.assertEqual(self._due_at(regular), regular.tat_deadline - timedelta(hours=24))
+
+        # Fast-track requests start inside their last day, so the inbox row is there from the start
+        fast = self._booking_request(24)
+        self.assertEqual(self._due_at(fast), fast.tat_deadline - timedelta(hours=12))
+        self.assertTrue(NotificationEvent.objects.filter(kind='booking_expiring', object_id=fast.pk).exists())
+        self.assertFalse(NotificationEvent.objects.filter(kind='booking_expiring', object_id=regular.pk).exists())
+
+    def test_fire_sends_the_due_reminder_and_moves_to_the_next(self):
+        due = self._booking_request(48, age=timedelta(hours=30))
+        # Inside its reminder window too, but not scheduled yet
+        waiting = self._booking_request(48, age=timedelta(hours=30))
+        ScheduledDeadline.objects.filter(object_id=waiting.pk).update(due_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(fire_due(), {BOOKING_REQUEST: 1})
+        due.refresh_from_db()
+        waiting.refresh_from_db()
+        self.assertTrue(due.reminder_24h_sent)
+        self.assertFalse(waiting.reminder_24h_sent)
+        self.assertEqual(self._due_at(due), due.tat_deadline - timedelta(hours=12))
+        self.assertTrue(NotificationEvent.objects.filter(kind='booking_expiring', object_id=due.pk).exists())
+
+    def test_missed_reminder_window_is_skipped(self):
+        req = self._booking_request(48, age=timedelta(hours=40))
+        self.assertEqual(self._due_at(req), req.tat_deadline - timedelta(hours=12))
+
+    def test_fire_expires_the_overdue_request(self):
+        req = self._booking_request(48, age=timedelta(hours=49))
+        self.assertEqual(self._due_at(req), req.tat_deadline)
+
+        fire_due()
+        req.refresh_from_db()
+        self.assertEqual(req.status, 'expired')
+        self.assertFalse(ScheduledDeadline.objects.filter(kind=BOOKING_REQUEST, object_id=req.pk).exists())
+        self.assertFalse(NotificationEvent.objects.filter(object_id=req.pk, kind__in=['booking', 'booking_expiring']).exists())
+
+
+    def test_reminder_sweep_only_covers_confirmed_bookings(self):
+        from core.tasks import booking_reminder_sweep
+
+        req = self._booking_request(48, age=timedelta(hours=30))
+        tomorrow = timezone.now() + timedelta(days=1)
+        booking = RoomBooking.objects.create(
+            room=self.room, faculty_name='Faculty', faculty_email='faculty@sfscollege.in',
+            start_datetime=tomorrow.replace(hour=10, minute=0), end_datetime=tomorrow.replace(hour=11, minute=0),
+        )
+        with self.captureOnCommitCallbacks():
+            booking_reminder_sweep()
+        booking.refresh_from_db()
+        req.refresh_from_db()
+        self.assertTrue(booking.reminder_sent)
+        self.assertFalse(req.reminder_24h_sent)
+        self.assertTrue(OutboundEmail.objects.filter(subject__contains='Tomorrow').exists())
+
+
+class NotificationCountsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organisation.objects.create(name='Org')
+        self.room = Room.objects.create(organisation=self.org, label='A1', room_name='Hall A')
+
+    def _booking_request(self, tat):
+        start = timezone.now() + timedelta(days=3)
+        return RoomBookingRequest.objects.create(
+            room=self.room, faculty_name='Faculty', faculty_email='faculty@sfscollege.in',
+            start_datetime=start, end_datetime=start + timedelta(hours=1),
+            tat_deadline=timezone.now() + tat,
+        )
+
+    def test_global_counts_do_not_depend_on_the_organisation_row(self):
+        self._booking_request(timedelta(hours=30))
+        counts = notification_counts.notification_counts(self.org.pk + 1000, is_central=True)
+        self.assertEqual(counts['booking_requests'], 1)
+        self.assertEqual(counts['escalated_issues'], 0)
+        self.assertEqual(cache.get(notification_counts.GLOBAL_KEY)['booking_requests'], 1)
+
+    def test_entry_is_dropped_only_after_commit(self):
+        notification_counts.notification_counts(self.org.pk, is_central=True)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self._booking_request(timedelta(hours=30))
+            notification_counts.invalidate_notification_counts()
+            # Still cached until the write commits
+            self.assertIsNotNone(cache.get(notification_counts.GLOBAL_KEY))
+        drops = [cb for cb in callbacks if getattr(cb, 'counts_key', None) == notification_counts.GLOBAL_KEY]
+        self.assertEqual(len(drops), 1)
+
+        with mock.patch('inventory.live_events.publish_counts_invalidated') as push:
+            for callback in callbacks:
+                callback()
+        push.assert_called_with(None)
+        self.assertIsNone(cache.get(notification_counts.GLOBAL_KEY))
+        counts = notification_counts.notification_counts(self.org.pk, is_central=True)
+        self.assertEqual(counts['booking_requests'], 1)
+
+    def test_global_entry_expires_at_the_next_tat_deadline(self):
+        self._booking_request(timedelta(seconds=90))
+        self._booking_request(timedelta(hours=2))
+        with mock.patch.object(notification_counts.cache, 'set') as cache_set:
+            notification_counts.notification_counts(self.org.pk, is_central=False)
+        ttls = {call.args[0]: call.args[2] for call in cache_set.call_args_list}
+        self.assertTrue(85 <= ttls[notification_counts.GLOBAL_KEY] <= 91)
+        self.assertEqual(ttls[notification_counts._org_key(self.org.pk)], notification_counts.COUNTS_TTL)
+
+
+class KeysetCursorTests(SimpleTestCase):
+
+    def test_cursor_round_trip(self):
+        created_on = timezone.now().replace(microsecond=123456)
+        self.assertEqual(keyset.decode_cursor(keyset.encode_cursor(created_on, 42)), (created_on, 42))
+
+    def test_malformed_cursor(self):
+        for cursor in ('', 'abc', '1.5', 'x_1', '1.5_y', None, '1e400_1'):
+            self.assertIsNone(keyset.decode_cursor(cursor), cursor)
+
+
+class NotificationInboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.org = Organisation.objects.create(name='Org')
+        other_org = Organisation.objects.create(name='Other')
+        self.central = self._admin('central@sfscollege.in', self.org, is_central_admin=True)
+        self.sub = self._admin('sub@sfscollege.in', self.org, is_sub_admin=True)
+        self.other = self._admin('other@sfscollege.in', other_org, is_central_admin=True)
+        self.room = Room.objects.create(organisation=self.org, label='A1', room_name='Hall A')
+
+    def _admin(self, email, org, **roles):
+        user = get_user_model().objects.create_user(email=email)
+        return UserProfile.objects.create(user=user, org=org, first_name=email, last_name='', **roles)
+
+    def _recipients(self, kind, object_id):
+        return set(NotificationEvent.objects.filter(kind=kind, object_id=object_id).values_list('recipient', flat=True))
+
+    def _booking_request(self):
+        start = timezone.now() + timedelta(days=3)
+        return RoomBookingRequest.objects.create(
+            room=self.room, faculty_name='Faculty', faculty_email='faculty@sfscollege.in',
+            start_datetime=start, end_datetime=start + timedelta(hours=1),
+            tat_deadline=timezone.now() + timedelta(hours=30),
+        )
+
+    def test_audiences(self):
+        ids = notification_inbox._recipient_ids
+        everyone = {self.central.pk, self.sub.pk, self.other.pk}
+        self.assertEqual(set(ids(notification_inbox.ALL_ADMINS)), everyone)
+        self.assertEqual(set(ids(notification_inbox.ORG_ADMINS, self.org.pk)), {self.central.pk, self.sub.pk})
+        self.assertEqual(ids(notification_inbox.ORG_CENTRAL, self.org.pk), [self.central.pk])
+        self.assertEqual(ids(notification_inbox.ORG_SUB_ADMINS, self.org.pk), [self.sub.pk])
+        # Organisation audiences of an item without an organisation reach nobody
+        self.assertEqual(ids(notification_inbox.ORG_ADMINS, None), [])
+
+    def test_pending_request_reaches_every_admin_and_leaves_when_decided(self):
+        req = self._booking_request()
+        self.assertEqual(self._recipients('booking', req.pk), {self.central.pk, self.sub.pk, self.other.pk})
+        event = NotificationEvent.objects.filter(kind='booking', object_id=req.pk).first()
+        self.assertIn('Faculty', event.body)
+
+        # Saving again does not duplicate the rows
+        req.save()
+        self.assertEqual(NotificationEvent.objects.filter(kind='booking', object_id=req.pk).count(), 3)
+
+        notification_inbox.fan_out_expiring([req])
+        req.status = 'approved'
+        req.save()
+        self.assertFalse(NotificationEvent.objects.filter(kind__in=notification_inbox.BOOKING_KINDS, object_id=req.pk).exists())
+
+    def test_escalation_reaches_only_its_organisation(self):
+        issue = Issue.objects.create(organisation=self.org, room=self.room, subject='Projector', description='Broken')
+        self.assertEqual(self._recipients('esc', issue.pk), set())
+        issue.status = 'escalated'
+        issue.save()
+        self.assertEqual(self._recipients('esc', issue.pk), {self.central.pk, self.sub.pk})
+
+        Issue.objects.filter(pk=issue.pk).update(status='open')
+        notification_inbox.close_items(['esc'], [issue.pk])
+        self.assertEqual(self._recipients('esc', issue.pk), set())
+
+    def test_backfill_is_idempotent(self):
+        req = self._booking_request()
+        NotificationEvent.objects.all().delete()
+        self.assertEqual(notification_inbox.backfill(), 3)
+        self.assertEqual(notification_inbox.backfill(), 0)
+        self.assertEqual(self._recipients('booking', req.pk), {self.central.pk, self.sub.pk, self.other.pk})
+
+    def test_inbox_pages_follow_the_keyset(self):
+        now = timezone.now()
+        # Equal timestamps are ordered by id, so no event is skipped or repeated
+        stamps = [now, now, now - timedelta(minutes=1), now - timedelta(minutes=2), now - timedelta(minutes=2)]
+        for n, stamp in enumerate(stamps):
+            NotificationEvent.objects.create(recipient=self.central, kind='stock', object_id=n, title=f'#{n}', created_on=stamp)
+        NotificationEvent.objects.create(recipient=self.central, kind='stock', object_id=99, title='gone', state='dismissed')
+        NotificationEvent.objects.create(recipient=self.sub, kind='stock', object_id=98, title='not mine')
+
+        seen, cursor = [], None
+        while True:
+            events, cursor = notification_inbox.inbox_page(self.central, cursor, page_size=2)
+            seen += [event.title for event in events]
+            if cursor is None:
+                break
+        self.assertEqual(seen, ['#1', '#0', '#2', '#4', '#3'])
+
+        first_page, _ = notification_inbox.inbox_page(self.central, 'not-a-cursor', page_size=2)
+        self.assertEqual([event.title for event in first_page], ['#1', '#0'])
+
+
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        reset_transports()
+        self.addCleanup(reset_transports)
+
+    def _queue(self, n=1):
+        for i in range(n):
+            outbox.queue_mail(subject=f'Mail {i}', message='Body', recipient_list=[f'user{i}@sfscollege.in'])
+        return list(OutboundEmail.objects.order_by('pk'))
+
+    def _drain(self, results):
+        send = results if callable(results) else mock.Mock(return_value=results)
+        with mock.patch.object(outbox, 'send_mailjet_messages', send):
+            return outbox.drain()
+
+    def test_queued_mail_is_drained_only_after_commit(self):
+        with mock.patch.object(outbox, '_schedule_drain') as schedule:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                self.assertTrue(outbox.queue_mail(subject='Hi', message='Body', recipient_list=['a@sfscollege.in', '']))
+                schedule.assert_not_called()
+        self.assertEqual(len(callbacks), 1)
+        schedule.assert_called_once_with()
+        row = OutboundEmail.objects.get()
+        self.assertEqual((row.status, json.loads(row.recipients)), ('pending', ['a@sfscollege.in']))
+
+    def test_rolled_back_mail_is_never_stored(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    outbox.queue_mail(subject='Hi', message='Body', recipient_list=['a@sfscollege.in'])
+                    raise RuntimeError('approval failed')
+            except RuntimeError:
+                pass
+        self.assertFalse(OutboundEmail.objects.exists())
+        self.assertEqual(callbacks, [])
+
+    def test_each_message_keeps_its_own_outcome(self):
+        self._queue(3)
+        response = mock.Mock(status_code=400, text='')
+        response.json.return_value = {'Messages': [
+            {'Status': 'success', 'To': [{'MessageID': 111}]},
+            {'Status': 'error', 'Errors': [{'StatusCode': 429, 'ErrorMessage': 'Throttled'}]},
+            {'Status': 'error', 'Errors': [{'StatusCode': 400, 'ErrorMessage': 'Invalid recipient'}]},
+        ]}
+        transport = transport_for(PROVIDER_MAILJET)
+        with override_settings(EMAIL_HOST_USER='key', EMAIL_HOST_PASSWORD='secret'), \
+                mock.patch.object(type(transport), 'session', mock.Mock(post=mock.Mock(return_value=response))), \
+                self.assertLogs('inventory.outbox', 'ERROR'):
+            sent = outbox.drain()
+        self.assertEqual(sent, 1)
+        first, second, third = OutboundEmail.objects.order_by('pk')
+        self.assertEqual((first.status, first.provider_message_id, first.attempts), ('sent', '111', 1))
+        self.assertEqual((second.status, second.last_error), ('pending', 'Throttled'))
+        self.assertGreater(second.next_attempt_at, timezone.now())
+        self.assertEqual((third.status, third.last_error), ('dead', 'Invalid recipient'))
+
+        # The retried row goes out once its backoff has passed; nothing else is resent
+        OutboundEmail.objects.filter(pk=second.pk).update(next_attempt_at=timezone.now())
+        send = mock.Mock(return_value=[{'ok': True, 'message_id': '222', 'error': ''}])
+        self.assertEqual(self._drain(send), 1)
+        self.assertEqual(len(send.call_args.args[0]), 1)
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.attempts), ('sent', 2))
+
+    def test_failed_call_retries_every_message_with_backoff(self):
+        self._queue(2)
+        self._drain(mock.Mock(side_effect=MailTransportError('Mailjet error 503')))
+        rows = list(OutboundEmail.objects.order_by('pk'))
+        self.assertEqual({row.status for row in rows}, {'pending'})
+        self.assertTrue(all(row.next_attempt_at > timezone.now() for row in rows))
+        self.assertEqual(outbox._retry_delay(1), outbox.OUTBOX_RETRY_BASE)
+        self.assertEqual(outbox._retry_delay(3), 4 * outbox.OUTBOX_RETRY_BASE)
+        self.assertEqual(outbox._retry_delay(50), outbox.OUTBOX_RETRY_MAX)
+
+    def test_row_is_dead_lettered_after_max_attempts(self):
+        [row] = self._queue()
+        OutboundEmail.objects.filter(pk=row.pk).update(attempts=outbox.OUTBOX_MAX_ATTEMPTS - 1)
+        with self.assertLogs('inventory.outbox', 'ERROR'):
+            self._drain(mock.Mock(side_effect=MailTransportError('Mailjet error 503')))
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('dead', outbox.OUTBOX_MAX_ATTEMPTS))
+
+        # Dead letters stay put until retried by hand
+        self.assertEqual(self._drain([]), 0)
+        self.assertEqual(outbox.retry_dead_letters(), 1)
+        row.refresh_from_db()
+        self.assertEqual((row.status, row.attempts), ('pending', 0))
+
+    def test_stale_claim_is_reclaimed(self):
+        [row] = self._queue()
+        OutboundEmail.objects.filter(pk=row.pk).update(
+            status='sending', claimed_at=timezone.now() - outbox.OUTBOX_CLAIM_TIMEOUT - timedelta(seconds=1),
+        )
+        self.assertEqual(self._drain([{'ok': True, 'message_id': '1', 'error': ''}]), 1)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = [1000.0]
+        patch = mock.patch.object(mail_transport.time, 'monotonic', lambda: self.clock[0])
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.breaker = mail_transport.CircuitBreaker('test', failure_threshold=3, reset_seconds=30)
+
+    def _trip(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, mail_transport.BREAKER_CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, mail_transport.BREAKER_OPEN)
+        self.assertTrue(self.breaker.is_open())
+        self.assertFalse(self.breaker.allow())
+
+    def test_lets_one_probe_through_after_the_reset_time(self):
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self._trip()
+        self.clock[0] += 30
+        self.assertFalse(self.breaker.is_open())
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, mail_transport.BREAKER_HALF_OPEN)
+        # Only one probe at a time
+        self.assertFalse(self.breaker.allow())
+
+        with self.assertLogs('inventory.mail_transport', 'INFO'):
+            self.breaker.record_success()
+        self.assertEqual((self.breaker.state, self.breaker.failures), (mail_transport.BREAKER_CLOSED, 0))
+        self.assertTrue(self.breaker.allow())
+
+    def test_failed_probe_reopens_at_once(self):
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self._trip()
+        self.clock[0] += 30
+        self.breaker.allow()
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, mail_transport.BREAKER_OPEN)
+        self.assertFalse(self.breaker.allow())
+        self.clock[0] += 30
+        self.assertTrue(self.breaker.allow())
+
+
+@override_settings(MAIL_BREAKER_FAILURES=2, MAIL_BREAKER_RESET_SECONDS=30, MAIL_MAX_CONCURRENCY=1)
+class MailTransportTests(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = [1000.0]
+        patches = [
+            mock.patch.object(mail_transport.time, 'monotonic', lambda: self.clock[0]),
+            mock.patch.object(mail_transport, 'SLOT_WAIT_SECONDS', 0.01),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.transport = mail_transport.MailTransport(PROVIDER_MAILJET)
+
+    def _post(self, status_code):
+        response = mock.Mock(status_code=status_code)
+        with mock.patch.object(type(self.transport), 'session', mock.Mock(post=mock.Mock(return_value=response))):
+            return self.transport.post('https://api.example.com/send')
+
+    def test_server_errors_and_throttling_count_as_failures(self):
+        self._post(503)
+        self.assertEqual(self.transport.breaker.failures, 1)
+        self._post(200)
+        self.assertEqual(self.transport.breaker.failures, 0)
+        # A per-message 400 is Mailjet answering; the provider itself is fine
+        self._post(400)
+        self.assertEqual(self.transport.breaker.failures, 0)
+
+        self._post(429)
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self._post(500)
+        self.assertEqual(self.transport.breaker.state, mail_transport.BREAKER_OPEN)
+        with self.assertRaises(mail_transport.TransportUnavailable):
+            self._post(200)
+
+    def test_raised_errors_count_as_failures(self):
+        with self.assertRaises(ConnectionError):
+            with self.transport.call():
+                raise ConnectionError('reset by peer')
+        self.assertEqual(self.transport.breaker.failures, 1)
+
+    def test_slot_timeout_does_not_claim_the_probe(self):
+        with self.assertLogs('inventory.mail_transport', 'WARNING'):
+            self._post(500)
+            self._post(500)
+        self.clock[0] += 30
+
+        # Every slot is busy: the caller gives up before asking the breaker
+        self.transport.slots.acquire()
+        with self.assertRaises(mail_transport.TransportUnavailable):
+            with self.transport.call():
+                pass
+        self.assertEqual(self.transport.breaker.state, mail_transport.BREAKER_OPEN)
+        self.transport.slots.release()
+
+        # So the probe is still available, and closes the breaker
+        with self.assertLogs('inventory.mail_transport', 'INFO'):
+            self._post(200)
+        self.assertEqual(self.transport.breaker.state, mail_transport.BREAKER_CLOSED)
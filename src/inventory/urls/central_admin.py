@@ -56,6 +56,7 @@ urlpatterns = [
     ),
     path('aura/', aura.AuraDashboardView.as_view(), name='aura_dashboard'),
     path('aura/api/analytics/', aura.aura_analytics_data, name='aura_api_analytics'),
+    path('aura/api/utilization-heatmap/', aura.aura_utilization_heatmap, name='aura_api_utilization_heatmap'),
     path('aura/api/data-manager/', aura.aura_data_manager, name='aura_api_data'),
     path('aura/api/delete/', aura.aura_delete_record, name='aura_api_delete'),
     path('aura/api/generate-pdf/', aura.aura_generate_report_pdf, name='aura_api_pdf'),
@@ -81,6 +82,9 @@ urlpatterns = [
     path('aura/credentials/<int:pk>/update/', aura.credential_update, name='credential_update'),
     path('booking-requests/approve/<int:pk>/', central_admin.ApproveRoomBookingRequestView.as_view(), name='approve_booking_request'),
     path('booking-requests/reject/<int:pk>/', central_admin.RejectRoomBookingRequestView.as_view(), name='reject_booking_request'),
+    path('booking-requests/bulk-review/', central_admin.BulkReviewRoomBookingRequestsView.as_view(), name='bulk_review_booking_requests'),
+    path('booking-series/approve/<int:pk>/', central_admin.ApproveRoomBookingSeriesView.as_view(), name='approve_booking_series'),
+    path('booking-series/reject/<int:pk>/', central_admin.RejectRoomBookingSeriesView.as_view(), name='reject_booking_series'),
     path('approvals/cancel-request/<int:pk>/approve/',  central_admin.ApproveCancellationRequestView.as_view(), name='approve_cancellation_request'),
     path('approvals/cancel-request/<int:pk>/reject/',   central_admin.RejectCancellationRequestView.as_view(),  name='reject_cancellation_request'),
     path('aura/booking-status/', aura.get_booking_status, name='booking_status'),
@@ -89,6 +93,7 @@ urlpatterns = [
     path('reject/stock/<int:pk>/',  central_admin.RejectStockRequestView.as_view(),  name='reject_stock_request'),
     path('notifications/', central_admin.AdminNotificationsView.as_view(), name='admin_notifications'),
     path('notification-counts/', central_admin.admin_notification_counts, name='admin_notification_counts'),
+    path('events/', central_admin.admin_event_stream, name='admin_event_stream'),
     path('booking-doc/<int:booking_id>/download/', aura.download_booking_doc, name='download_booking_doc'),
     path('booking-doc/<int:booking_id>/inline/',   aura.serve_booking_doc_inline, name='serve_booking_doc_inline'),
     path('api/room-inventory/', aura.get_room_inventory, name='get_room_inventory'),
@@ -102,6 +102,7 @@ urlpatterns = [
         name="issue_time_extension_request"),
     path('<slug:room_slug>/items/stock-request/', room_incharge.SubmitStockRequestView.as_view(), name='submit_stock_request'),
     path('rooms/<slug:room_slug>/notifications/', room_incharge.RoomInchargeNotificationsView.as_view(), name='notifications'),
+    path('rooms/<slug:room_slug>/events/', room_incharge.room_event_stream, name='event_stream'),
     path('<slug:room_slug>/issues/<int:pk>/close/', room_incharge.CloseIssueView.as_view(), name='close_issue'),
     path('rooms/<slug:room_slug>/asset-tags/', room_incharge.get_room_asset_tags, name='get_room_asset_tags'),
     path('rooms/<slug:room_slug>/issue/<int:pk>/remark/', room_incharge.SendIssueRemarkView.as_view(), name='issue_remark'),
@@ -1,5 +1,7 @@
 from django.urls import path
-from inventory.views.student import IssueReportView, TicketStatusView, StudentPortalLoginView
+from inventory.views.student import (
+    IssueReportView, TicketStatusView, StudentPortalLoginView, TicketHistoryAPIView, TicketStatusAPIView,
+)
 from django.views.generic import TemplateView
 
 app_name = 'student'
@@ -8,5 +10,7 @@ urlpatterns = [
     path('report_issue/', IssueReportView.as_view(), name='report_issue'),
     path('issue_report_success/', TemplateView.as_view(template_name='student/issue_report_success.html'), name='issue_report_success'),
     path('track_ticket/', TicketStatusView.as_view(), name='track_ticket'),
-    path('portal/', StudentPortalLoginView.as_view(), name='portal_login')
+    path('portal/', StudentPortalLoginView.as_view(), name='portal_login'),
+    path('api/tickets/', TicketHistoryAPIView.as_view(), name='ticket_history_api'),
+    path('api/tickets/<str:ticket_id>/', TicketStatusAPIView.as_view(), name='ticket_status_api'),
 ]
@@ -0,0 +1,233 @@
+"""
+Room utilization fact table (RoomUtilization).
+
+Each row holds the booked and pending minutes of one room in one local hour.
+The facts are derived from the RoomSlot index rather than from bookings
+directly: slot_index reports the (room, day) pairs it touches through
+mark_slots_changed(), those days are recomputed after the transaction
+commits (on a worker when one is available), and a nightly beat job
+rebuilds a rolling window to heal anything missed.
+
+Dashboards then answer "utilization by room / category / hour over a date
+range" with one aggregate over the (date, room) index — see heatmap().
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+HOURS_PER_DAY = 24
+HOUR = timedelta(hours=1)
+
+# Nightly rebuild window, relative to today
+REBUILD_DAYS_BACK = 7
+REBUILD_DAYS_AHEAD = 120
+
+_BULK_BATCH = 1000
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _days_spanned(start, end):
+    """Local dates covered by [start, end)."""
+    first = timezone.localtime(start).date()
+    last = timezone.localtime(end - timedelta(microseconds=1)).date()
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def mark_slots_changed(slots):
+    """
+    Schedule a refresh of every (room, day) touched by `slots`, an iterable of
+    (room_id, start, end). Runs once the surrounding transaction commits, so
+    a rolled-back write never queues work.
+    """
+    keys = {
+        (room_id, day.isoformat())
+        for room_id, start, end in slots
+        if start and end and end > start
+        for day in _days_spanned(start, end)
+    }
+    if not keys:
+        return
+
+    def _queue():
+        from inventory.tasks import enqueue, refresh_room_utilization
+        enqueue(refresh_room_utilization, sorted(keys))
+
+    transaction.on_commit(_queue)
+
+
+def _hour_minutes(intervals, day_start):
+    """Minutes of each local hour of the day covered by the union of `intervals`."""
+    from inventory.slot_index import _merge
+
+    minutes = [0] * HOURS_PER_DAY
+    day_end = day_start + HOURS_PER_DAY * HOUR
+    for start, end in _merge(sorted(intervals)):
+        start, end = max(start, day_start), min(end, day_end)
+        if start >= end:
+            continue
+        first_hour = int((start - day_start) // HOUR)
+        last_hour = min(HOURS_PER_DAY - 1, int((end - day_start - timedelta(microseconds=1)) // HOUR))
+        for hour in range(first_hour, last_hour + 1):
+            hour_start = day_start + hour * HOUR
+            overlap = min(end, hour_start + HOUR) - max(start, hour_start)
+            minutes[hour] += round(overlap.total_seconds() / 60)
+    return [min(60, value) for value in minutes]
+
+
+def _build_rows(room_days, slots):
+    """
+    RoomUtilization rows for each (room_id, day) in `room_days` from the
+    (room_id, source, start, end) tuples in `slots`.
+    """
+    from inventory.models import RoomUtilization
+    from inventory.slot_index import SOURCE_BOOKING
+
+    by_room = defaultdict(list)
+    for slot in slots:
+        by_room[slot[0]].append(slot)
+
+    rows = []
+    for room_id, day in room_days:
+        day_start = _day_start(day)
+        day_end = day_start + HOURS_PER_DAY * HOUR
+        booked, pending = [], []
+        for _, source, start, end in by_room.get(room_id, ()):
+            if start < day_end and end > day_start:
+                (booked if source == SOURCE_BOOKING else pending).append((start, end))
+        booked_minutes = _hour_minutes(booked, day_start)
+        pending_minutes = _hour_minutes(pending, day_start)
+        rows.extend(
+            RoomUtilization(
+                room_id=room_id, date=day, hour=hour,
+                booked_minutes=booked_minutes[hour], pending_minutes=pending_minutes[hour],
+            )
+            for hour in range(HOURS_PER_DAY)
+            if booked_minutes[hour] or pending_minutes[hour]
+        )
+    return rows
+
+
+def _slots_between(room_ids, first_day, last_day):
+    from inventory.slot_index import find_conflicting_slots
+    from inventory.models import RoomSlot
+
+    window = [(_day_start(first_day), _day_start(last_day + timedelta(days=1)))]
+    if room_ids is None:
+        qs = RoomSlot.objects.filter(start_datetime__lt=window[0][1], end_datetime__gt=window[0][0])
+    else:
+        qs = find_conflicting_slots(room_ids, window)
+    return list(qs.values_list('room_id', 'source', 'start_datetime', 'end_datetime'))
+
+
+def refresh_room_days(keys):
+    """Recompute the facts for [(room_id, 'YYYY-MM-DD'), ...]."""
+    from datetime import date
+    from inventory.models import RoomUtilization
+
+    room_days = sorted({(room_id, date.fromisoformat(day)) for room_id, day in keys})
+    if not room_days:
+        return 0
+
+    days_by_room = defaultdict(set)
+    for room_id, day in room_days:
+        days_by_room[room_id].add(day)
+    first_day = min(day for _, day in room_days)
+    last_day = max(day for _, day in room_days)
+
+    rows = _build_rows(room_days, _slots_between(list(days_by_room), first_day, last_day))
+
+    stale = Q()
+    for room_id, days in days_by_room.items():
+        stale |= Q(room_id=room_id, date__in=days)
+    with transaction.atomic():
+        RoomUtilization.objects.filter(stale).delete()
+        RoomUtilization.objects.bulk_create(rows, batch_size=_BULK_BATCH)
+    return len(rows)
+
+
+def rebuild_range(first_day, last_day):
+    """Rebuild every room's facts for first_day..last_day (inclusive) from RoomSlot."""
+    from inventory.models import RoomUtilization
+
+    slots = _slots_between(None, first_day, last_day)
+    room_days = {
+        (room_id, day)
+        for room_id, _, start, end in slots
+        for day in _days_spanned(start, end)
+        if first_day <= day <= last_day
+    }
+    rows = _build_rows(sorted(room_days), slots)
+    with transaction.atomic():
+        RoomUtilization.objects.filter(date__gte=first_day, date__lte=last_day).delete()
+        RoomUtilization.objects.bulk_create(rows, batch_size=_BULK_BATCH)
+    logger.info(f"[rebuild_range] {first_day}..{last_day}: {len(rows)} hourly rows")
+    return len(rows)
+
+
+# ─────────────────────────────────────────────────────────────────────
+# HEATMAP
+# ─────────────────────────────────────────────────────────────────────
+
+HEATMAP_GROUPS = {
+    'room':     'room_id',
+    'category': 'room__room_category',
+    'total':    None,
+}
+
+
+def heatmap(first_day, last_day, rooms, group_by='room'):
+    """
+    Hour-of-day utilization for `rooms` (a Room queryset) over a date range.
+
+    Returns one entry per group with 24-element booked/pending minute totals
+    and the booked share of available room-hours. Computed with a single
+    GROUP BY over RoomUtilization.
+    """
+    from inventory.models import RoomUtilization
+
+    group_field = HEATMAP_GROUPS[group_by]
+    days = (last_day - first_day).days + 1
+
+    room_rows = list(rooms.values('id', 'label', 'room_name', 'room_category'))
+    groups = {}
+    for room in room_rows:
+        if group_by == 'room':
+            key, label = room['id'], f"{room['label']} - {room['room_name']}"
+        elif group_by == 'category':
+            key, label = room['room_category'], room['room_category'].title()
+        else:
+            key, label = 'all', 'All rooms'
+        group = groups.setdefault(key, {
+            'key': key, 'label': label, 'rooms': 0,
+            'booked_minutes': [0] * HOURS_PER_DAY, 'pending_minutes': [0] * HOURS_PER_DAY,
+        })
+        group['rooms'] += 1
+
+    facts = RoomUtilization.objects.filter(
+        date__gte=first_day, date__lte=last_day, room__in=rooms,
+    )
+    values = ('hour',) if group_field is None else (group_field, 'hour')
+    totals = facts.values(*values).annotate(booked=Sum('booked_minutes'), pending=Sum('pending_minutes'))
+    for row in totals:
+        group = groups.get(row[group_field] if group_field else 'all')
+        if group is None:
+            continue
+        group['booked_minutes'][row['hour']] = row['booked']
+        group['pending_minutes'][row['hour']] = row['pending']
+
+    for group in groups.values():
+        capacity = group['rooms'] * days * 60
+        group['utilization'] = [
+            round(minutes / capacity, 4) if capacity else 0 for minutes in group['booked_minutes']
+        ]
+    return list(groups.values())
@@ -1,4 +1,4 @@
-import json, csv, io, socket
+import json, csv, io
 import logging
 from django.views.generic import TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
@@ -20,8 +20,9 @@ from decimal import Decimal, InvalidOperation
 from django.views.generic import FormView
 from django.views import View
 from django.contrib import messages
-from django.core.mail import send_mail
+from inventory.outbox import queue_mail
 from inventory.booking_utils import extract_requirement_blocks_from_field, format_room_list, requirement_blocks_to_plain_text, sort_rooms_iterable
+from inventory import recipient_directory
 from inventory.forms.room_incharge import ExcelUploadForm
 from django.db import models
 from inventory.models import SystemComponent as SC
@@ -284,11 +285,11 @@ def aura_analytics_data(request):
     total_rooms = Room.objects.all().count()
     booked_today = 0
     
-    # Defensive query for Room Utilization
+    # Room Utilization: rooms with any booked minutes today, from the hourly facts
     try:
-        booked_today = RoomBooking.objects.filter(
-            # room__organisation=org,
-            start_datetime__date=timezone.now().date()
+        from inventory.models import RoomUtilization
+        booked_today = RoomUtilization.objects.filter(
+            date=timezone.localdate(), booked_minutes__gt=0,
         ).values('room').distinct().count()
     except Exception:
         pass 
@@ -301,6 +302,58 @@ def aura_analytics_data(request):
         'room_util': [booked_today, max(0, total_rooms - booked_today)]
     })
 
+HEATMAP_MAX_DAYS = 366
+
+
+def aura_utilization_heatmap(request):
+    """
+    Hour-of-day room utilization over a date range, from RoomUtilization.
+
+    GET params:
+      start     first day, YYYY-MM-DD (default: 6 days before `end`)
+      end       last day, YYYY-MM-DD (default: today)
+      group_by  room | category | total (default: room)
+      category  restrict to one room category (optional)
+      rooms     comma-separated room ids (optional)
+
+    Each group carries 24-element `booked_minutes` / `pending_minutes` totals
+    and `utilization`, the booked share of the group's room-hours per hour.
+    """
+    from datetime import date, timedelta
+    from inventory.utilization import heatmap, HEATMAP_GROUPS
+
+    profile = getattr(request.user, 'profile', None)
+    if not profile or not (profile.is_central_admin or profile.is_sub_admin):
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=6)
+        room_ids = [int(pk) for pk in request.GET.get('rooms', '').split(',') if pk.strip()]
+    except ValueError:
+        return JsonResponse({'error': 'Invalid start, end or rooms'}, status=400)
+
+    group_by = request.GET.get('group_by', 'room')
+    if group_by not in HEATMAP_GROUPS:
+        return JsonResponse({'error': f'group_by must be one of {list(HEATMAP_GROUPS)}'}, status=400)
+    if end < start or (end - start).days >= HEATMAP_MAX_DAYS:
+        return JsonResponse({'error': f'Date range must be 1–{HEATMAP_MAX_DAYS} days'}, status=400)
+
+    rooms = Room.objects.exclude(room_category__in=['washrooms', 'officerooms', 'staffrooms'])
+    if request.GET.get('category'):
+        rooms = rooms.filter(room_category=request.GET['category'])
+    if room_ids:
+        rooms = rooms.filter(pk__in=room_ids)
+
+    return JsonResponse({
+        'start':    start.isoformat(),
+        'end':      end.isoformat(),
+        'group_by': group_by,
+        'hours':    list(range(24)),
+        'groups':   heatmap(start, end, rooms, group_by),
+    })
+
+
 def aura_data_manager(request):
     """
     Fetches AURA report data for all modules with module and date filtering.
@@ -527,14 +580,10 @@ def aura_delete_record(request):
         obj.cancelled_on = timezone.now()
         obj.save(update_fields=['status', 'cancelled_by', 'cancelled_on'])
 
-        admin_emails = list(
-            UserProfile.objects.filter(
-                Q(is_central_admin=True) | Q(is_sub_admin=True)
-            ).values_list('user__email', flat=True)
-        )[:5]
+        admin_emails = recipient_directory.admin_emails()[:5]
         all_recipients = list({obj.faculty_email} | set(admin_emails))
         try:
-            send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Room Booking Cancelled — {room_name}",
                 message=(
                     f"Dear {obj.faculty_name},\n\n"
@@ -993,11 +1042,7 @@ def aura_bulk_delete(request):
             now = timezone.now()
             profile = request.user.profile
             cancelled_by_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
-            admin_emails = list(
-                UserProfile.objects.filter(
-                    Q(is_central_admin=True) | Q(is_sub_admin=True)
-                ).values_list('user__email', flat=True)
-            )[:5]
+            admin_emails = recipient_directory.admin_emails()[:5]
             bookings_qs = RoomBooking.objects.filter(id__in=record_ids).exclude(status='cancelled')
             count = bookings_qs.count()
             for booking in bookings_qs:
@@ -1008,7 +1053,7 @@ def aura_bulk_delete(request):
                 room_name = format_room_list(booking)
                 all_recipients = list({booking.faculty_email} | set(admin_emails))
                 try:
-                    send_mail(
+                    queue_mail(
                         subject=f"[Blixtro] Room Booking Cancelled — {room_name}",
                         message=(
                             f"Dear {booking.faculty_name},\n\n"
@@ -1299,16 +1344,12 @@ def cancel_confirmed_booking(request, booking_id):
     )
 
     # Collect recipients: faculty + up to 5 admin emails
-    admin_emails = list(
-        UserProfile.objects.filter(
-            Q(is_central_admin=True) | Q(is_sub_admin=True)
-        ).values_list('user__email', flat=True)
-    )[:5]
+    admin_emails = recipient_directory.admin_emails()[:5]
 
     all_recipients = list({booking.faculty_email} | set(admin_emails))
 
     try:
-        send_mail(
+        queue_mail(
             subject=f"[Blixtro] Room Booking Cancelled — {room_name}",
             message=email_body,
             from_email=None,
@@ -1349,11 +1390,7 @@ def bulk_delete_confirmed_bookings(request):
         now = timezone.now()
         cancelled_by_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
 
-        admin_emails = list(
-            UserProfile.objects.filter(
-                Q(is_central_admin=True) | Q(is_sub_admin=True)
-            ).values_list('user__email', flat=True)
-        )[:5]
+        admin_emails = recipient_directory.admin_emails()[:5]
 
         bookings = RoomBooking.objects.filter(id__in=ids).exclude(status='cancelled')
         count = bookings.count()
@@ -1367,7 +1404,7 @@ def bulk_delete_confirmed_bookings(request):
             room_name = format_room_list(booking)
             all_recipients = list({booking.faculty_email} | set(admin_emails))
             try:
-                send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Room Booking Cancelled — {room_name}",
                     message=(
                         f"Dear {booking.faculty_name},\n\n"
@@ -3593,7 +3630,6 @@ def forward_booking_requirements(request, booking_id):
         {"status": "success"}   on success
         {"error":  "..."}       on failure
     """
-    from django.core.mail import EmailMultiAlternatives
     from django.conf import settings as _s
     import re as _re
 
@@ -3901,80 +3937,19 @@ def forward_booking_requirements(request, booking_id):
     plain_body = '\n'.join(plain_lines)
 
     # ── Send email ────────────────────────────────────────────────────────────
-    import smtplib
-    import time
-    
-    def send_email_with_retry(max_retries=3, timeout=15):
-        """Send email with retry logic and proper timeout handling"""
-        from_email = getattr(_s, 'DEFAULT_FROM_EMAIL', 'noreply@sfscollege.in')
-        
-        # Check if we're in development mode
-        if getattr(_s, 'EMAIL_BACKEND', '') == 'django.core.mail.backends.console.EmailBackend':
-            logger.info(f'[forward_booking_requirements] EMAIL WOULD BE SENT TO: {email}')
-            logger.info(f'[forward_booking_requirements] SUBJECT: {subject}')
-            logger.info(f'[forward_booking_requirements] BODY: {plain_body[:200]}...')
-            return {'success': True, 'message': f'Requirements forwarded to {email} (Development Mode - Email logged to console).'}
-        
-        # Production: try sending with retries
-        for attempt in range(max_retries):
-            try:
-                # Get connection with timeout
-                from django.core.mail import get_connection
-                connection = get_connection(
-                    timeout=timeout,
-                    fail_silently=False
-                )
-                
-                msg = EmailMultiAlternatives(
-                    subject=subject,
-                    body=plain_body,
-                    from_email=from_email,
-                    to=[email],
-                    connection=connection,
-                )
-                msg.attach_alternative(html_body, 'text/html')
-                
-                # Send with explicit timeout
-                msg.send()
-                connection.close()
-                
-                return {'success': True, 'message': f'Requirements forwarded to {email}.'}
-                
-            except (smtplib.SMTPException, socket.timeout, TimeoutError, OSError) as e:
-                logger.error(f'[forward_booking_requirements] Email attempt {attempt + 1}/{max_retries} failed: {e}')
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1, 2, 4 seconds
-                    logger.info(f'[forward_booking_requirements] Retrying in {wait_time}s...')
-                    time.sleep(wait_time)
-                else:
-                    # All retries exhausted - log but don't fail the request
-                    # The requirements are still forwarded to the internal system
-                    logger.error(f'[forward_booking_requirements] All email attempts failed. Email will be queued for later delivery.')
-                    # Queue for async retry via Celery if available
-                    try:
-                        from inventory.tasks import send_email_async
-                        send_email_async.delay(subject, plain_body, html_body, from_email, [email])
-                        return {'success': True, 'message': f'Requirements recorded for {email}. Email will be sent shortly.'}
-                    except Exception as celery_err:
-                        logger.info(f'[forward_booking_requirements] Celery not available: {celery_err}')
-                        return {'success': True, 'message': f'Requirements recorded for {email}. Email delivery queued.'}
-            except Exception as e:
-                logger.error(f'[forward_booking_requirements] Unexpected email error: {e}')
-                # Don't fail the whole request for email issues
-                return {'success': True, 'message': f'Requirements recorded for {email}. Email notification pending.'}
-        
-        return {'success': True, 'message': f'Requirements recorded for {email}.'}
-    
-    try:
-        result = send_email_with_retry()
-        return JsonResponse({'status': 'success', 'message': result['message']})
-    except Exception as e:
-        import traceback
-        logger.error(f'[forward_booking_requirements] Email send failed: {e}\n{traceback.format_exc()}')
-        # Don't return 500 - the booking requirements are still saved
-        return JsonResponse({'status': 'success', 'message': f'Requirements recorded for {email}. Email will be retried.'})
+    from_email = getattr(_s, 'DEFAULT_FROM_EMAIL', 'noreply@sfscollege.in')
+
+    # Development mode: log instead of sending
+    if getattr(_s, 'EMAIL_BACKEND', '') == 'django.core.mail.backends.console.EmailBackend':
+        logger.info(f'[forward_booking_requirements] EMAIL WOULD BE SENT TO: {email}')
+        logger.info(f'[forward_booking_requirements] SUBJECT: {subject}')
+        logger.info(f'[forward_booking_requirements] BODY: {plain_body[:200]}...')
+        return JsonResponse({'status': 'success', 'message': f'Requirements forwarded to {email} (Development Mode - Email logged to console).'})
 
-    return JsonResponse({'status': 'success', 'message': f'Requirements forwarded to {email}.'})
+    # SMTP delivery (and its outbox fallback) runs on the mail worker
+    from inventory.tasks import enqueue, send_email_async
+    enqueue(send_email_async, subject, plain_body, html_body, from_email, [email])
+    return JsonResponse({'status': 'success', 'message': f'Requirements forwarded to {email}. Email will be sent shortly.'})
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -4042,7 +4017,8 @@ def edit_booking(request, booking_id):
     Sends edit-notification emails to faculty + all admins + BOOKING_NOTIFICATION_EMAILS.
     """
     from inventory.views.central_admin import BOOKING_NOTIFICATION_EMAILS
-    from inventory.email import safe_send_mail, build_email_shell
+    from inventory.email import EmailSections, build_email_shell
+    from inventory.admin_digest import queue_admin_mail
     from inventory.booking_utils import format_booking_details, format_room_list as _frl
 
     profile = _booking_control_auth(request)
@@ -4188,7 +4164,7 @@ def edit_booking(request, booking_id):
 
     change_rows = [{'label': c['field'], 'value': f"{c['from']}  →  {c['to']}"} for c in changes]
 
-    sections = [
+    sections = EmailSections([
         {
             'title': 'Booking Details (Updated)',
             'rows': [
@@ -4213,7 +4189,7 @@ def edit_booking(request, booking_id):
                 {'label': 'Remark', 'value': booking.approved_note or '—'},
             ],
         },
-    ]
+    ])
 
     plain_changes = '\n'.join(f"  {c['field']}: {c['from']} → {c['to']}" for c in changes)
     plain_body = (
@@ -4229,7 +4205,7 @@ def edit_booking(request, booking_id):
 
     # Email faculty
     try:
-        safe_send_mail(
+        queue_mail(
             subject=f"[Blixtro] Your Room Booking Has Been Updated — {room_name}",
             message=plain_body,
             recipient_list=[booking.faculty_email],
@@ -4245,15 +4221,12 @@ def edit_booking(request, booking_id):
         logger.error(f"[edit_booking] Faculty email failed: {_e}")
 
     # Email all other admins
-    all_admin_emails = list(
-        UserProfile.objects.filter(
-            Q(is_central_admin=True) | Q(is_sub_admin=True)
-        ).values_list('user__email', flat=True)
-    )
+    all_admin_emails = recipient_directory.admin_emails()
     notify_admins = [e for e in all_admin_emails if e.lower() != request.user.email.lower()]
     if notify_admins:
         try:
-            safe_send_mail(
+            queue_admin_mail(
+                'activity',
                 subject=f"[Blixtro] Booking Edited — {room_name} | {sl.strftime('%d %b %Y')}",
                 message=f"{admin_name} has edited a booking for {booking.faculty_name}.\n\n{plain_changes}",
                 recipient_list=notify_admins,
@@ -4271,7 +4244,7 @@ def edit_booking(request, booking_id):
     # Email BOOKING_NOTIFICATION_EMAILS
     if BOOKING_NOTIFICATION_EMAILS:
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Booking Updated — {room_name} | {sl.strftime('%d %b %Y')}",
                 message=f"A booking has been updated by {admin_name}.\n\n{plain_changes}",
                 recipient_list=BOOKING_NOTIFICATION_EMAILS,
@@ -4311,7 +4284,8 @@ def swap_booking_rooms(request, booking_id):
       - Emails faculty + all admins + BOOKING_NOTIFICATION_EMAILS.
     """
     from inventory.views.central_admin import BOOKING_NOTIFICATION_EMAILS
-    from inventory.email import safe_send_mail, build_email_shell
+    from inventory.email import EmailSections, build_email_shell
+    from inventory.admin_digest import queue_admin_mail
     from inventory.booking_utils import format_room_list as _frl
     from django.db import transaction as _tx
 
@@ -4404,7 +4378,7 @@ def swap_booking_rooms(request, booking_id):
 
         # Email Booking A faculty
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Your Booking Room Has Been Swapped — {new_a_rooms}",
                 message=(
                     f"Dear {booking_a.faculty_name},\n\n"
@@ -4428,7 +4402,7 @@ def swap_booking_rooms(request, booking_id):
 
         # Email Booking B faculty
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Your Booking Room Has Been Swapped — {new_b_rooms}",
                 message=(
                     f"Dear {booking_b.faculty_name},\n\n"
@@ -4451,13 +4425,9 @@ def swap_booking_rooms(request, booking_id):
             logger.error(f"[swap_booking_rooms] Faculty B email failed: {_e}")
 
         # Email all other admins
-        all_admin_emails = list(
-            UserProfile.objects.filter(
-                Q(is_central_admin=True) | Q(is_sub_admin=True)
-            ).values_list('user__email', flat=True)
-        )
+        all_admin_emails = recipient_directory.admin_emails()
         notify_admins = [e for e in all_admin_emails if e.lower() != request.user.email.lower()]
-        admin_sections = [
+        admin_sections = EmailSections([
             {
                 'title': 'Mutual Room Swap',
                 'rows': [
@@ -4478,10 +4448,11 @@ def swap_booking_rooms(request, booking_id):
                     {'label': 'Remark', 'value': admin_remark or '—'},
                 ],
             },
-        ]
+        ])
         if notify_admins:
             try:
-                safe_send_mail(
+                queue_admin_mail(
+                    'activity',
                     subject=f"[Blixtro] Room Swap — {booking_a.faculty_name} ↔ {booking_b.faculty_name} | {sl_a.strftime('%d %b %Y')}",
                     message=f"{admin_name} swapped rooms: {booking_a.faculty_name} ({old_a_rooms}→{new_a_rooms}) ↔ {booking_b.faculty_name} ({old_b_rooms}→{new_b_rooms}). Remark: {admin_remark or '—'}",
                     recipient_list=notify_admins,
@@ -4498,7 +4469,7 @@ def swap_booking_rooms(request, booking_id):
 
         if BOOKING_NOTIFICATION_EMAILS:
             try:
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Room Swap Notification | {sl_a.strftime('%d %b %Y')}",
                     message=f"Mutual room swap by {admin_name}: {booking_a.faculty_name} ({old_a_rooms}→{new_a_rooms}) ↔ {booking_b.faculty_name} ({old_b_rooms}→{new_b_rooms})",
                     recipient_list=BOOKING_NOTIFICATION_EMAILS,
@@ -4558,7 +4529,7 @@ def swap_booking_rooms(request, booking_id):
     sl = timezone.localtime(booking_a.start_datetime)
     el = timezone.localtime(booking_a.end_datetime)
 
-    sections = [
+    sections = EmailSections([
         {
             'title': 'Booking Details',
             'rows': [
@@ -4583,7 +4554,7 @@ def swap_booking_rooms(request, booking_id):
                 {'label': 'Remark', 'value': admin_remark or '—'},
             ],
         },
-    ]
+    ])
 
     plain_body = (
         f"Dear {booking_a.faculty_name},\n\n"
@@ -4595,7 +4566,7 @@ def swap_booking_rooms(request, booking_id):
     )
 
     try:
-        safe_send_mail(
+        queue_mail(
             subject=f"[Blixtro] Your Booking Room Has Been Changed — {new_room_name}",
             message=plain_body,
             recipient_list=[booking_a.faculty_email],
@@ -4610,15 +4581,12 @@ def swap_booking_rooms(request, booking_id):
     except Exception as _e:
         logger.error(f"[swap_booking_rooms] Faculty email failed: {_e}")
 
-    all_admin_emails = list(
-        UserProfile.objects.filter(
-            Q(is_central_admin=True) | Q(is_sub_admin=True)
-        ).values_list('user__email', flat=True)
-    )
+    all_admin_emails = recipient_directory.admin_emails()
     notify_admins = [e for e in all_admin_emails if e.lower() != request.user.email.lower()]
     if notify_admins:
         try:
-            safe_send_mail(
+            queue_admin_mail(
+                'activity',
                 subject=f"[Blixtro] Room Change — {old_room_name} → {new_room_name} | {sl.strftime('%d %b %Y')}",
                 message=f"{admin_name} moved {booking_a.faculty_name}'s booking: {old_room_name} → {new_room_name}. Remark: {admin_remark or '—'}",
                 recipient_list=notify_admins,
@@ -4635,7 +4603,7 @@ def swap_booking_rooms(request, booking_id):
 
     if BOOKING_NOTIFICATION_EMAILS:
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Room Change Notification — {new_room_name} | {sl.strftime('%d %b %Y')}",
                 message=f"Room changed by {admin_name}: {old_room_name} → {new_room_name} for {booking_a.faculty_name}",
                 recipient_list=BOOKING_NOTIFICATION_EMAILS,
@@ -5,7 +5,7 @@ from django.views.generic import TemplateView, ListView, CreateView, UpdateView,
 from django.template.loader import render_to_string
 from core.models import User, UserProfile
 from django.db.models import Q
-from inventory.models import Room, Vendor, Purchase, Issue, IssueRemark, Department, Item, StockRequest, IssueTimeExtensionRequest, RoomBooking, RoomBookingRequest, RoomCancellationRequest
+from inventory.models import Room, Vendor, Purchase, Issue, IssueRemark, Department, Item, StockRequest, IssueTimeExtensionRequest, RoomBooking, RoomBookingRequest, RoomBookingSeries, RoomCancellationRequest
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
@@ -13,10 +13,13 @@ from django.contrib.auth.base_user import BaseUserManager
 from django.db import transaction, connection
 from inventory.forms.central_admin import PeopleCreateForm, RoomCreateForm, DepartmentForm, VendorForm, AddIssueRemarkForm, AdminIssueCloseForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.mail import send_mail
 from django.contrib import messages
 from django.conf import settings
-from inventory.email import safe_send_mail, build_email_shell
+from inventory.email import EmailSections, build_email_shell
+from inventory.outbox import queue_mail
+from inventory.mail_attachments import storage_attachment
+from inventory.admin_digest import queue_admin_mail
+from inventory import recipient_directory
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 from datetime import timedelta
@@ -27,10 +30,12 @@ from inventory.booking_utils import (
     extract_requirement_blocks_from_field,
     format_booking_details,
     format_room_list,
+    get_booking_rooms,
     get_requirements_payload,
     requirement_blocks_to_plain_text,
 )
 from django.utils.html import escape
+from django.core.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
@@ -237,13 +242,13 @@ class PeopleCreateView(LoginRequiredMixin, CreateView):
         )
 
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=subject,
                 message=message,
                 recipient_list=[user.email],
             )
         except Exception as e:
-            logger.error(f"[central_admin] safe_send_mail unexpected error: {e}")
+            logger.error(f"[central_admin] queue_mail unexpected error: {e}")
 
         return redirect(self.success_url)
 
@@ -432,6 +437,13 @@ class RoomListView(LoginRequiredMixin, ListView):
         context['categories'] = Room.ROOM_CATEGORIES
         context['view_mode']  = self.request.GET.get('view', 'list')
 
+        category = self.request.GET.get('category')
+        if category in dict(Room.ROOM_CATEGORIES):
+            from inventory.calendar_feed import category_feed_token
+            context['category_calendar_feed_url'] = self.request.build_absolute_uri(
+                reverse('core:category_calendar_feed', args=[category_feed_token(category)])
+            )
+
         now       = timezone.now()
         all_rooms = self.get_queryset()
 
@@ -533,6 +545,15 @@ class RoomUpdateView(LoginRequiredMixin, UpdateView):
     slug_field = 'slug'
     slug_url_kwarg = 'room_slug'
 
+    def get_context_data(self, **kwargs):
+        from inventory.calendar_feed import room_feed_token
+
+        context = super().get_context_data(**kwargs)
+        context['calendar_feed_url'] = self.request.build_absolute_uri(
+            reverse('core:room_calendar_feed', args=[room_feed_token(self.object)])
+        )
+        return context
+
     def form_valid(self, form):
         profile = getattr(self.request.user, 'profile', None)
         room = form.save(commit=False)
@@ -887,7 +908,7 @@ class IssueListView(LoginRequiredMixin, ListView):
             else:
                 qs = qs.none()
 
-        return qs.select_related('room', 'assigned_to').order_by('-created_on')
+        return qs.select_related('room', 'assigned_to').prefetch_related('duplicate_reports').order_by('-created_on')
 
 
 class DepartmentListView(LoginRequiredMixin, ListView):
@@ -1141,7 +1162,7 @@ class ApproveStockRequestView(LoginRequiredMixin, View):
                 if approved_count < stock_req.requested_count:
                     partial_note = "\nNote: The approved count differs from the requested count (partial approval).\n"
 
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Stock Request Approved — {item.item_name}",
                     message=(
                         f"Dear {incharge_name},\n\n"
@@ -1157,7 +1178,7 @@ class ApproveStockRequestView(LoginRequiredMixin, View):
                     recipient_list=[room.incharge.user.email]
                 )
             except Exception as e:
-                logger.error(f"[ApproveStockRequest] safe_send_mail error: {e}")
+                logger.error(f"[ApproveStockRequest] queue_mail error: {e}")
 
         messages.success(
             request,
@@ -1194,7 +1215,7 @@ class RejectStockRequestView(LoginRequiredMixin, View):
         if room and room.incharge and room.incharge.user.email:
             incharge_name = f"{room.incharge.first_name} {room.incharge.last_name}".strip() or room.incharge.user.username
             try:
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Stock Request Rejected — {item.item_name}",
                     message=(
                         f"Dear {incharge_name},\n\n"
@@ -1208,7 +1229,7 @@ class RejectStockRequestView(LoginRequiredMixin, View):
                     recipient_list=[room.incharge.user.email]
                 )
             except Exception as e:
-                logger.error(f"[RejectStockRequest] safe_send_mail error: {e}")
+                logger.error(f"[RejectStockRequest] queue_mail error: {e}")
 
         messages.info(request, "Stock request rejected.")
         next_type = request.POST.get("next_type", "item_edit")
@@ -1304,7 +1325,7 @@ def admin_add_issue_remark(request, pk):
 
     if all_recipients:
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Admin Remark on Issue — {issue.ticket_id}",
                 message=(
                     f"Dear {'Student' if reporter_email else 'Incharge'},\n\n"
@@ -1393,7 +1414,7 @@ def admin_close_issue(request, pk):
 
     if all_recipients:
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Issue Closed — {issue.ticket_id}",
                 message=(
                     f"Dear {'Student / Incharge'},\n\n"
@@ -1483,12 +1504,20 @@ class ApprovalRequestListView(LoginRequiredMixin, ListView):
             .filter(
                 status='pending',
                 tat_deadline__gt=timezone.now(),
+                series__isnull=True,
             )
             .select_related('room', 'department')
             .prefetch_related('rooms')
             .order_by('-created_on')
         )
         context['booking_requests'] = booking_qs
+        context['booking_series'] = (
+            RoomBookingSeries.objects
+            .filter(status='pending', tat_deadline__gt=timezone.now())
+            .select_related('room', 'department')
+            .prefetch_related('rooms', 'occurrences')
+            .order_by('-created_on')
+        )
  
         context['cancel_requests'] = (
             RoomCancellationRequest.objects
@@ -1514,7 +1543,7 @@ class ApprovalRequestListView(LoginRequiredMixin, ListView):
  
         context['item_edit_count']   = context['stock_requests'].count()
         context['issue_tat_count']   = context['tat_requests'].count()
-        context['booking_req_count'] = booking_qs.count()
+        context['booking_req_count'] = booking_qs.count() + context['booking_series'].count()
         context['cancel_req_count']  = context['cancel_requests'].count()
 
         # History for stock requests and TAT extensions
@@ -1567,6 +1596,121 @@ class RejectIssueTimeExtensionView(LoginRequiredMixin, View):
         return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
 
 
+def send_booking_approved_emails(req, approved_by_name, approval_remark, acting_email):
+    """
+    Approval emails for one booking request: faculty confirmation, the
+    BOOKING_NOTIFICATION_EMAILS list, and an FYI to every other admin.
+    """
+    from django.utils import timezone as _tz
+    sl = _tz.localtime(req.start_datetime)
+    details_plain = format_booking_details(req, req.faculty_name, req.start_datetime, req.end_datetime, req.purpose, req.department)
+    requirements_section = _get_requirements_text_for_email(req)
+    sections = EmailSections(_booking_email_sections(req) + [
+        {
+            "title": "Approval Trail",
+            "rows": [
+                {"label": "Approved By", "value": approved_by_name},
+                {"label": "Admin Remark", "value": approval_remark or 'No remark added'},
+            ],
+        }
+    ])
+
+    # ── Requirements file as an attachment; the outbox drainer fetches it ──
+    _req_attachment = None
+    if req.requirements_doc and req.requirements_doc.name:
+        _req_attachment = storage_attachment(req.requirements_doc)
+
+    # Email 1: Faculty — booking confirmed
+    try:
+        queue_mail(
+            subject=f"[Blixtro] Your Room Booking is Confirmed — {format_room_list(req)}",
+            message=(
+                f"Dear {req.faculty_name},\n\n"
+                f"Your room booking has been officially approved.\n"
+                f"{details_plain}\n\n"
+                f"Approved by: {approved_by_name}\n"
+                f"Admin remark: {approval_remark or 'No remark added.'}\n\n"
+                f"{requirements_section}\n"
+                "Your booking is confirmed. Please contact the admin team for any assistance.\n\n"
+                "Best regards,\nBlixtro — SFS College Inventory & Booking System"
+            ),
+            recipient_list=[req.faculty_email],
+            html_message=build_email_shell(
+                title="Booking Approved",
+                intro_html=(
+                    f"Dear <strong>{req.faculty_name}</strong>, your booking has been fully approved and is now confirmed."
+                ),
+                sections=sections,
+                outro_html="Please keep this email for reference. The same booking details and requirements have been shared with the configured faculty recipients.",
+            ),
+            attachments=[_req_attachment] if _req_attachment else None,
+        )
+    except Exception as _e:
+        logger.error(f"[ApproveBooking] Faculty email failed: {_e}")
+
+    # Email 2: Notification list — full details + requirements (replaces Forward button)
+    try:
+        queue_mail(
+            subject=(
+                f"[Blixtro] Room Booking Notification — "
+                f"{format_room_list(req)} | {sl.strftime('%d %b %Y')}"
+            ),
+            message=(
+                f"A room booking has been officially approved by {approved_by_name}.\n\n"
+                f"{'='*60}\nBOOKING DETAILS\n{'='*60}"
+                f"{details_plain}\n{'='*60}"
+                f"\nApproved By: {approved_by_name}"
+                f"\nAdmin Remark: {approval_remark or 'No remark added.'}\n"
+                f"{requirements_section}"
+                "Please make the necessary arrangements as per the details above.\n\n"
+                "This is an automated notification from Blixtro — SFS College."
+            ),
+            recipient_list=BOOKING_NOTIFICATION_EMAILS,
+            html_message=build_email_shell(
+                title="Approved Booking Notification",
+                intro_html=(
+                    "A room booking has been fully approved. Please review the complete booking details and requirements below and make the necessary arrangements."
+                ),
+                sections=sections,
+                outro_html="This notification was automatically issued to the configured faculty recipients after final central approval.",
+            ),
+            attachments=[_req_attachment] if _req_attachment else None,
+        )
+    except Exception as _e:
+        logger.error(f"[ApproveBooking] Notification list email failed: {_e}")
+
+    # Email 3: All OTHER admins — notify that this admin approved the booking
+    _all_admin_emails = recipient_directory.admin_emails()
+    _notify_admins = [e for e in _all_admin_emails if e.lower() != acting_email.lower()]
+    if _notify_admins:
+        try:
+            queue_admin_mail(
+                'activity',
+                subject=f"[Blixtro] Booking Approved by {approved_by_name} — {format_room_list(req)} | {sl.strftime('%d %b %Y')}",
+                message=(
+                    f"{approved_by_name} has approved a room booking request.\n\n"
+                    f"Faculty : {req.faculty_name} ({req.faculty_email})\n"
+                    f"Room    : {format_room_list(req)}\n"
+                    f"Date    : {sl.strftime('%d %b %Y, %I:%M %p')} – {timezone.localtime(req.end_datetime).strftime('%I:%M %p')}\n"
+                    f"Remark  : {approval_remark or 'No remark added.'}\n\n"
+                    "This is an informational notification.\n\nBlixtro — SFS College"
+                ),
+                recipient_list=_notify_admins,
+                html_message=build_email_shell(
+                    title="Booking Approved — Admin Notification",
+                    intro_html=(
+                        f"<strong>{approved_by_name}</strong> has approved a room booking request. "
+                        "This is an informational notification — no action required."
+                    ),
+                    sections=sections,
+                    outro_html="No action required — this is an informational notification.",
+                    accent="#6366f1",
+                ),
+            )
+        except Exception as _e:
+            logger.error(f"[ApproveBooking] Other admins email failed: {_e}")
+
+
 class ApproveRoomBookingRequestView(LoginRequiredMixin, View):
     """
     Admin approval (both central and sub-admin can approve).
@@ -1587,12 +1731,18 @@ class ApproveRoomBookingRequestView(LoginRequiredMixin, View):
             return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
 
         req = get_object_or_404(RoomBookingRequest, pk=pk, status='pending')
+        if req.series_id:
+            messages.error(request, "This date belongs to a recurring series — approve the series as a whole.")
+            next_type = request.POST.get("next_type", "booking_req")
+            return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
         approval_remark = (request.POST.get('note', '') or '').strip()
         approved_by_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
         selected_rooms = list(req.rooms.all()) or ([req.room] if req.room else [])
 
-        # Double-check conflicts for all selected rooms before approving
-        if selected_rooms:
+        # Double-check conflicts for all selected rooms before approving.
+        # With the Postgres slot exclusion constraint the insert below is the check.
+        from inventory.slot_index import db_enforces_booking_exclusion
+        if selected_rooms and not db_enforces_booking_exclusion():
             overlapping_bookings = _RB.objects.filter(
                 Q(room__in=selected_rooms) | Q(rooms__in=selected_rooms),
                 start_datetime__lt=req.end_datetime,
@@ -1605,21 +1755,23 @@ class ApproveRoomBookingRequestView(LoginRequiredMixin, View):
                 return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
  
         try:
-            booking = _RB.objects.create(
-                room              = req.room,
-                department        = req.department,
-                faculty_name      = req.faculty_name,
-                faculty_email     = req.faculty_email,
-                start_datetime    = req.start_datetime,
-                end_datetime      = req.end_datetime,
-                purpose           = req.purpose,
-                requirements_doc  = req.requirements_doc,
-                requirements_text = req.requirements_text,
-                approved_by_name    = approved_by_name,
-                approved_note       = approval_remark,
-            )
-            if selected_rooms:
-                booking.rooms.set(selected_rooms)
+            # Booking row and its room slots commit together or not at all
+            with transaction.atomic():
+                booking = _RB.objects.create(
+                    room              = req.room,
+                    department        = req.department,
+                    faculty_name      = req.faculty_name,
+                    faculty_email     = req.faculty_email,
+                    start_datetime    = req.start_datetime,
+                    end_datetime      = req.end_datetime,
+                    purpose           = req.purpose,
+                    requirements_doc  = req.requirements_doc,
+                    requirements_text = req.requirements_text,
+                    approved_by_name    = approved_by_name,
+                    approved_note       = approval_remark,
+                )
+                if selected_rooms:
+                    booking.rooms.set(selected_rooms)
         except Exception as exc:
             messages.error(request, f"Booking conflict or validation error: {exc}")
             next_type = request.POST.get("next_type", "booking_req")
@@ -1641,127 +1793,7 @@ class ApproveRoomBookingRequestView(LoginRequiredMixin, View):
             except Exception:
                 pass
  
-        from django.utils import timezone as _tz
-        sl = _tz.localtime(req.start_datetime)
-        details_plain = format_booking_details(req, req.faculty_name, req.start_datetime, req.end_datetime, req.purpose, req.department)
-        requirements_section = _get_requirements_text_for_email(req)
-        sections = _booking_email_sections(req) + [
-            {
-                "title": "Approval Trail",
-                "rows": [
-                    {"label": "Approved By", "value": approved_by_name},
-                    {"label": "Admin Remark", "value": approval_remark or 'No remark added'},
-                ],
-            }
-        ]
- 
-        # ── Read requirements file for email attachment (if present) ────────────
-        _req_attachment = None
-        if req.requirements_doc and req.requirements_doc.name:
-            import mimetypes as _mt
-            _fname = req.requirements_doc.name.split('/')[-1]
-            _mime, _ = _mt.guess_type(_fname)
-            _mime = _mime or 'application/octet-stream'
-            try:
-                with req.requirements_doc.storage.open(req.requirements_doc.name, 'rb') as _f:
-                    _req_attachment = (_fname, _f.read(), _mime)
-            except Exception as _ae:
-                logger.info(f"[ApproveBooking] Could not read requirements file for attachment: {_ae}")
-
-        # Email 1: Faculty — booking confirmed
-        try:
-            safe_send_mail(
-                subject=f"[Blixtro] Your Room Booking is Confirmed — {format_room_list(req)}",
-                message=(
-                    f"Dear {req.faculty_name},\n\n"
-                    f"Your room booking has been officially approved.\n"
-                    f"{details_plain}\n\n"
-                    f"Approved by: {approved_by_name}\n"
-                    f"Admin remark: {approval_remark or 'No remark added.'}\n\n"
-                    f"{requirements_section}\n"
-                    "Your booking is confirmed. Please contact the admin team for any assistance.\n\n"
-                    "Best regards,\nBlixtro — SFS College Inventory & Booking System"
-                ),
-                recipient_list=[req.faculty_email],
-                html_message=build_email_shell(
-                    title="Booking Approved",
-                    intro_html=(
-                        f"Dear <strong>{req.faculty_name}</strong>, your booking has been fully approved and is now confirmed."
-                    ),
-                    sections=sections,
-                    outro_html="Please keep this email for reference. The same booking details and requirements have been shared with the configured faculty recipients.",
-                ),
-                attachments=[_req_attachment] if _req_attachment else None,
-            )
-        except Exception as _e:
-            logger.error(f"[ApproveBooking] Faculty email failed: {_e}")
- 
-        # Email 2: Notification list — full details + requirements (replaces Forward button)
-        try:
-            safe_send_mail(
-                subject=(
-                    f"[Blixtro] Room Booking Notification — "
-                    f"{format_room_list(req)} | {sl.strftime('%d %b %Y')}"
-                ),
-                message=(
-                    f"A room booking has been officially approved by {approved_by_name}.\n\n"
-                    f"{'='*60}\nBOOKING DETAILS\n{'='*60}"
-                    f"{details_plain}\n{'='*60}"
-                    f"\nApproved By: {approved_by_name}"
-                    f"\nAdmin Remark: {approval_remark or 'No remark added.'}\n"
-                    f"{requirements_section}"
-                    "Please make the necessary arrangements as per the details above.\n\n"
-                    "This is an automated notification from Blixtro — SFS College."
-                ),
-                recipient_list=BOOKING_NOTIFICATION_EMAILS,
-                html_message=build_email_shell(
-                    title="Approved Booking Notification",
-                    intro_html=(
-                        "A room booking has been fully approved. Please review the complete booking details and requirements below and make the necessary arrangements."
-                    ),
-                    sections=sections,
-                    outro_html="This notification was automatically issued to the configured faculty recipients after final central approval.",
-                ),
-                attachments=[_req_attachment] if _req_attachment else None,
-            )
-        except Exception as _e:
-            logger.error(f"[ApproveBooking] Notification list email failed: {_e}")
-
-        # Email 3: All OTHER admins — notify that this admin approved the booking
-        from core.models import UserProfile as _UP
-        from django.db.models import Q as _Q
-        _all_admin_emails = list(
-            _UP.objects.filter(
-                _Q(is_central_admin=True) | _Q(is_sub_admin=True)
-            ).values_list('user__email', flat=True)
-        )
-        _notify_admins = [e for e in _all_admin_emails if e.lower() != request.user.email.lower()]
-        if _notify_admins:
-            try:
-                safe_send_mail(
-                    subject=f"[Blixtro] Booking Approved by {approved_by_name} — {format_room_list(req)} | {sl.strftime('%d %b %Y')}",
-                    message=(
-                        f"{approved_by_name} has approved a room booking request.\n\n"
-                        f"Faculty : {req.faculty_name} ({req.faculty_email})\n"
-                        f"Room    : {format_room_list(req)}\n"
-                        f"Date    : {sl.strftime('%d %b %Y, %I:%M %p')} – {timezone.localtime(req.end_datetime).strftime('%I:%M %p')}\n"
-                        f"Remark  : {approval_remark or 'No remark added.'}\n\n"
-                        "This is an informational notification.\n\nBlixtro — SFS College"
-                    ),
-                    recipient_list=_notify_admins,
-                    html_message=build_email_shell(
-                        title="Booking Approved — Admin Notification",
-                        intro_html=(
-                            f"<strong>{approved_by_name}</strong> has approved a room booking request. "
-                            "This is an informational notification — no action required."
-                        ),
-                        sections=sections,
-                        outro_html="No action required — this is an informational notification.",
-                        accent="#6366f1",
-                    ),
-                )
-            except Exception as _e:
-                logger.error(f"[ApproveBooking] Other admins email failed: {_e}")
+        send_booking_approved_emails(req, approved_by_name, approval_remark, request.user.email)
 
         messages.success(request, f"Booking for {format_room_list(req)} approved and all parties notified.")
         next_type = request.POST.get("next_type", "booking_req")
@@ -1769,6 +1801,43 @@ class ApproveRoomBookingRequestView(LoginRequiredMixin, View):
 
 
 
+def send_booking_rejected_email(req, reviewer_name, reason):
+    """Rejection email to the faculty member who raised the booking request."""
+    try:
+        queue_mail(
+            subject="[Blixtro] Room Booking Request Rejected",
+            message=(
+                f"Dear {req.faculty_name},\n\n"
+                f"Your booking request for {format_room_list(req)} has been rejected.\n"
+                f"From: {req.start_datetime.strftime('%d %b %Y %H:%M')}\n"
+                f"To:   {req.end_datetime.strftime('%d %b %Y %H:%M')}\n\n"
+                f"Rejected by: {reviewer_name}\n"
+                f"Reason: {reason}\n\n"
+                "Regards,\nBlixtro — SFS College Inventory & Booking System"
+            ),
+            recipient_list=[req.faculty_email],
+            html_message=build_email_shell(
+                title="Booking Rejected",
+                intro_html=(
+                    f"Dear <strong>{req.faculty_name}</strong>, your booking request has been rejected."
+                ),
+                sections=_booking_email_sections(req) + [
+                    {
+                        "title": "Decision",
+                        "rows": [
+                            {"label": "Rejected By", "value": reviewer_name},
+                            {"label": "Reason", "value": reason},
+                        ],
+                    }
+                ],
+                accent="#dc2626",
+                outro_html="You may submit a fresh request if you still need the room(s) for a different slot or arrangement.",
+            ),
+        )
+    except Exception as _e:
+        logger.error(f"[RejectBooking] Email failed: {_e}")
+
+
 class RejectRoomBookingRequestView(LoginRequiredMixin, View):
     """Both sub-admin and central admin can reject pending bookings."""
     def post(self, request, pk, *args, **kwargs):
@@ -1779,6 +1848,10 @@ class RejectRoomBookingRequestView(LoginRequiredMixin, View):
             next_type = request.POST.get("next_type", "booking_req")
             return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
         req = get_object_or_404(RoomBookingRequest, pk=pk, status='pending')
+        if req.series_id:
+            messages.error(request, "This date belongs to a recurring series — reject the series as a whole.")
+            next_type = request.POST.get("next_type", "booking_req")
+            return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
         reason = (request.POST.get('note', '') or request.POST.get('review_note', '')).strip()
 
         if not reason:
@@ -1793,45 +1866,205 @@ class RejectRoomBookingRequestView(LoginRequiredMixin, View):
 
         reviewer_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
  
-        try:
-            safe_send_mail(
-                subject="[Blixtro] Room Booking Request Rejected",
-                message=(
-                    f"Dear {req.faculty_name},\n\n"
-                    f"Your booking request for {format_room_list(req)} has been rejected.\n"
-                    f"From: {req.start_datetime.strftime('%d %b %Y %H:%M')}\n"
-                    f"To:   {req.end_datetime.strftime('%d %b %Y %H:%M')}\n\n"
-                    f"Rejected by: {reviewer_name}\n"
-                    f"Reason: {reason}\n\n"
-                    "Regards,\nBlixtro — SFS College Inventory & Booking System"
-                ),
-                recipient_list=[req.faculty_email],
-                html_message=build_email_shell(
-                    title="Booking Rejected",
-                    intro_html=(
-                        f"Dear <strong>{req.faculty_name}</strong>, your booking request has been rejected."
-                    ),
-                    sections=_booking_email_sections(req) + [
-                        {
-                            "title": "Decision",
-                            "rows": [
-                                {"label": "Rejected By", "value": reviewer_name},
-                                {"label": "Reason", "value": reason},
-                            ],
-                        }
-                    ],
-                    accent="#dc2626",
-                    outro_html="You may submit a fresh request if you still need the room(s) for a different slot or arrangement.",
-                ),
-            )
-        except Exception as _e:
-            logger.error(f"[RejectBooking] Email failed: {_e}")
+        send_booking_rejected_email(req, reviewer_name, reason)
  
         messages.warning(request, f"Booking request for {format_room_list(req)} rejected.")
         next_type = request.POST.get("next_type", "booking_req")
         return redirect(f"{reverse('central_admin:approval_requests')}?type={next_type}")
 
 
+class BulkReviewRoomBookingRequestsView(LoginRequiredMixin, View):
+    """
+    Approve or reject many pending booking requests in one POST.
+
+    POST: request_ids (repeated), action ('approve' | 'reject'), note.
+    Approval checks every request against confirmed bookings and against
+    the other requests in the batch in a single pass (earliest submission
+    wins), creates all bookings in one transaction, and leaves document
+    extraction and emails to the worker.
+    """
+
+    def post(self, request, *args, **kwargs):
+        from inventory.notification_counts import invalidate_notification_counts
+        from inventory.deadline_scheduler import BOOKING_REQUEST, sync_deadlines
+        from inventory.notification_inbox import BOOKING_KINDS, close_items
+        from inventory.slot_index import partition_batch_conflicts, bulk_sync_slots, release_request_slots
+        from inventory.tasks import enqueue, extract_booking_doc_text, send_booking_decision_emails
+        from config.utils import generate_unique_slugs
+        from django.utils.text import slugify
+
+        profile = request.user.profile
+        next_type = request.POST.get("next_type", "booking_req")
+        redirect_url = f"{reverse('central_admin:approval_requests')}?type={next_type}"
+
+        if not (profile.is_central_admin or profile.is_sub_admin):
+            messages.error(request, "Only admins can review bookings.")
+            return redirect(redirect_url)
+
+        action = request.POST.get('action')
+        note = (request.POST.get('note', '') or '').strip()
+        ids = [int(pk) for pk in request.POST.getlist('request_ids') if pk.isdigit()]
+        if action not in ('approve', 'reject') or not ids:
+            messages.error(request, "Select at least one booking request and an action.")
+            return redirect(redirect_url)
+        if action == 'reject' and not note:
+            messages.error(request, "A rejection remark/reason is required.")
+            return redirect(redirect_url)
+
+        actor_name = f"{profile.first_name} {profile.last_name}".strip() or str(profile)
+        now = timezone.now()
+
+        with transaction.atomic():
+            # Lock only the request rows: PostgreSQL refuses FOR UPDATE on the
+            # nullable side of the department outer join
+            reqs = list(
+                RoomBookingRequest.objects.select_for_update(of=('self',))
+                .filter(pk__in=ids, status='pending', series__isnull=True)
+                .select_related('room', 'department')
+                .order_by('created_on')
+            )
+            rooms_by_req = {req.pk: get_booking_rooms(req) for req in reqs}
+
+            if action == 'reject':
+                done_ids = [req.pk for req in reqs]
+                RoomBookingRequest.objects.filter(pk__in=done_ids).update(
+                    status='rejected', reviewed_by=profile, review_note=note, updated_on=now,
+                )
+                release_request_slots(done_ids)
+                invalidate_notification_counts()
+                close_items(BOOKING_KINDS, done_ids)
+                sync_deadlines(BOOKING_REQUEST, done_ids)
+                skipped = []
+            else:
+                done_ids, skipped = partition_batch_conflicts([
+                    (req.pk, [room.pk for room in rooms_by_req[req.pk]], req.start_datetime, req.end_datetime)
+                    for req in reqs
+                ])
+                accepted = set(done_ids)
+                approved = [req for req in reqs if req.pk in accepted]
+
+                slugs = generate_unique_slugs(RoomBooking, [slugify(req.faculty_name) for req in approved])
+                bookings = RoomBooking.objects.bulk_create([
+                    RoomBooking(
+                        room              = req.room,
+                        department        = req.department,
+                        faculty_name      = req.faculty_name,
+                        faculty_email     = req.faculty_email,
+                        start_datetime    = req.start_datetime,
+                        end_datetime      = req.end_datetime,
+                        purpose           = req.purpose,
+                        requirements_doc  = req.requirements_doc.name or None,
+                        requirements_text = req.requirements_text,
+                        approved_by_name  = actor_name,
+                        approved_note     = note,
+                        slug              = slug,
+                    )
+                    for req, slug in zip(approved, slugs)
+                ])
+                booking_rooms = {
+                    booking.pk: rooms_by_req[req.pk] for booking, req in zip(bookings, approved)
+                }
+                Through = RoomBooking.rooms.through
+                Through.objects.bulk_create([
+                    Through(roombooking_id=booking_pk, room_id=room.pk)
+                    for booking_pk, rooms in booking_rooms.items() for room in rooms
+                ])
+                try:
+                    bulk_sync_slots(bookings, booking_rooms)
+                except ValidationError as exc:
+                    # Postgres exclusion constraint caught a concurrent approval
+                    transaction.set_rollback(True)
+                    messages.error(request, f"Bulk approval aborted: {' '.join(exc.messages)}")
+                    return redirect(redirect_url)
+
+                review_note = f"Final approval by {actor_name}" + (f" — Remark: {note}" if note else "")
+                RoomBookingRequest.objects.filter(pk__in=done_ids).update(
+                    status='approved', reviewed_by=profile, approved_by=profile,
+                    approved_note=note, review_note=review_note, updated_on=now,
+                )
+                release_request_slots(done_ids)
+                invalidate_notification_counts()
+                close_items(BOOKING_KINDS, done_ids)
+                sync_deadlines(BOOKING_REQUEST, done_ids)
+
+                doc_booking_ids = [booking.pk for booking in bookings if booking.requirements_doc]
+                transaction.on_commit(lambda: [enqueue(extract_booking_doc_text, pk) for pk in doc_booking_ids])
+
+            decision = 'approved' if action == 'approve' else 'rejected'
+            acting_email = request.user.email
+            transaction.on_commit(lambda: [
+                enqueue(send_booking_decision_emails, pk, decision, actor_name, note, acting_email)
+                for pk in done_ids
+            ])
+
+        if done_ids:
+            messages.success(request, f"{len(done_ids)} booking request(s) {decision}. Notifications are being sent.")
+        if skipped:
+            messages.warning(
+                request,
+                f"{len(skipped)} request(s) were left pending because they clash with a confirmed "
+                "booking or an earlier request in this batch.",
+            )
+        missing = len(ids) - len(reqs)
+        if missing:
+            messages.info(request, f"{missing} request(s) were already reviewed or belong to a recurring series.")
+        return redirect(redirect_url)
+
+
+class ApproveRoomBookingSeriesView(LoginRequiredMixin, View):
+    """
+    Approve every date of a recurring series in one transaction.
+    Any clash with a confirmed booking aborts the whole series.
+    """
+    def post(self, request, pk, *args, **kwargs):
+        from inventory.booking_series import approve_series
+        profile = request.user.profile
+        next_type = request.POST.get("next_type", "booking_req")
+        redirect_url = f"{reverse('central_admin:approval_requests')}?type={next_type}"
+
+        if not (profile.is_central_admin or profile.is_sub_admin):
+            messages.error(request, "Only admins can approve bookings.")
+            return redirect(redirect_url)
+
+        note = (request.POST.get('note', '') or '').strip()
+        try:
+            series, bookings = approve_series(pk, profile, note)
+        except RoomBookingSeries.DoesNotExist:
+            raise Http404("No pending booking series found.")
+        except ValidationError as exc:
+            messages.error(request, " ".join(exc.messages))
+            return redirect(redirect_url)
+
+        messages.success(request, f"Recurring booking for {format_room_list(series)} approved ({len(bookings)} dates).")
+        return redirect(redirect_url)
+
+
+class RejectRoomBookingSeriesView(LoginRequiredMixin, View):
+    """Reject every date of a recurring series at once."""
+    def post(self, request, pk, *args, **kwargs):
+        from inventory.booking_series import reject_series
+        profile = request.user.profile
+        next_type = request.POST.get("next_type", "booking_req")
+        redirect_url = f"{reverse('central_admin:approval_requests')}?type={next_type}"
+
+        if not (profile.is_central_admin or profile.is_sub_admin):
+            messages.error(request, "Only admins can reject bookings.")
+            return redirect(redirect_url)
+
+        reason = (request.POST.get('note', '') or '').strip()
+        if not reason:
+            messages.error(request, "A rejection remark/reason is required.")
+            return redirect(redirect_url)
+
+        try:
+            series = reject_series(pk, profile, reason)
+        except RoomBookingSeries.DoesNotExist:
+            raise Http404("No pending booking series found.")
+
+        messages.warning(request, f"Recurring booking for {format_room_list(series)} rejected.")
+        return redirect(redirect_url)
+
+
 class ApproveCancellationRequestView(LoginRequiredMixin, View):
     def post(self, request, pk, *args, **kwargs):
         profile  = request.user.profile
@@ -1847,7 +2080,7 @@ class ApproveCancellationRequestView(LoginRequiredMixin, View):
         booking.delete()
 
         try:
-            send_mail(
+            queue_mail(
                 subject="Room Booking Cancellation Approved",
                 message=(
                     f"Dear Faculty,\n\n"
@@ -1876,7 +2109,7 @@ class RejectCancellationRequestView(LoginRequiredMixin, View):
         cancel.save()
 
         try:
-            send_mail(
+            queue_mail(
                 subject="Room Booking Cancellation Rejected",
                 message=(
                     f"Dear Faculty,\n\n"
@@ -2015,58 +2248,52 @@ class RoomInchargeNotificationsView(LoginRequiredMixin, TemplateView):
 # ═══════════════════════════════════════════════════════════════
 
 def admin_notification_counts(request):
-    """Bell badge counts — booking count is stage-aware."""
+    """Bell badge counts, served from the cached counters in inventory.notification_counts."""
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Unauthorized'}, status=403)
     profile = getattr(request.user, 'profile', None)
     if not profile or not (profile.is_central_admin or profile.is_sub_admin):
         return JsonResponse({'error': 'Unauthorized'}, status=403)
  
+    from inventory.notification_counts import notification_counts
+
     is_central = profile.is_central_admin and not profile.is_sub_admin
-    org        = profile.org
- 
     try:
-        if is_central:
-            booking_count = RoomBookingRequest.objects.filter(
-                status='pending',
-                tat_deadline__gt=timezone.now(),
-            ).count()
-        else:
-            booking_count = RoomBookingRequest.objects.filter(
-                status='pending',
-                tat_deadline__gt=timezone.now(),
-            ).count()
- 
-        counts = {
-            'booking_requests': booking_count,
-            'cancel_requests':  RoomCancellationRequest.objects.filter(status='pending').count(),
-            'stock_requests':   StockRequest.objects.filter(status='pending').count(),
-            'tat_requests':     IssueTimeExtensionRequest.objects.filter(status='pending').count(),
-            'escalated_issues': Issue.objects.filter(status='escalated', organisation=org).count(),
-        }
+        counts = notification_counts(profile.org_id, is_central)
     except Exception as e:
         return JsonResponse({'error': f'Database error: {str(e)}'}, status=500)
- 
-    if is_central:
-        counts['purchase_requests'] = Purchase.objects.filter(
-            status='requested', room__organisation=org
-        ).count()
-        try:
-            from inventory.models import RoomActionLog
-            counts['room_actions'] = RoomActionLog.objects.filter(
-                organisation=org, is_read=False
-            ).count()
-        except Exception:
-            pass
-    else:
-        counts['purchase_approvals'] = Purchase.objects.filter(
-            status='approved', room__organisation=org
-        ).count()
- 
-    counts['total'] = sum(counts.values())
     return JsonResponse(counts)
 
 
+def _admin_stream_context(user):
+    """(channels, counts snapshot, counts loader) for an admin's event stream, or None if not an admin."""
+    from functools import partial
+    from inventory.live_events import ADMIN_CHANNEL, org_channel
+    from inventory.notification_counts import notification_counts
+
+    if not user.is_authenticated:
+        return None
+    profile = getattr(user, 'profile', None)
+    if not profile or not (profile.is_central_admin or profile.is_sub_admin):
+        return None
+    is_central = profile.is_central_admin and not profile.is_sub_admin
+    channels = [ADMIN_CHANNEL] + ([org_channel(profile.org_id)] if profile.org_id else [])
+    refresh = partial(notification_counts, profile.org_id, is_central)
+    return channels, refresh(), refresh
+
+
+async def admin_event_stream(request):
+    """SSE push of badge counts and new items; admin_notification_counts stays the polling fallback."""
+    from asgiref.sync import sync_to_async
+    from inventory.live_events import stream_response
+
+    context = await sync_to_async(_admin_stream_context)(request.user)
+    if context is None:
+        return JsonResponse({'error': 'Unauthorized'}, status=403)
+    channels, snapshot, refresh = context
+    return stream_response(request, channels, snapshot, refresh)
+
+
 # ═══════════════════════════════════════════════════════════════
 # ADMIN NOTIFICATIONS PAGE
 # ═══════════════════════════════════════════════════════════════
@@ -2074,169 +2301,73 @@ def admin_notification_counts(request):
 class AdminNotificationsView(LoginRequiredMixin, View):
     """
     Standalone admin notification feed — works for both central admin and sub-admin.
-    Now supports persistent dismiss via POST to mark notifications as read server-side.
+    Served from the persistent NotificationEvent inbox (see
+    inventory.notification_inbox); dismissals are stored per recipient.
     """
     template_name = "central_admin/admin_notifications.html"
 
     def get(self, request, *args, **kwargs):
+        from inventory.notification_inbox import KIND_DISPLAY, inbox_page, mark_read
+
         profile = getattr(request.user, 'profile', None)
         if not profile or not (profile.is_central_admin or profile.is_sub_admin):
             return redirect('central_admin:dashboard')
 
         is_central = profile.is_central_admin and not profile.is_sub_admin
-        org        = profile.org
-
-        # Read dismissed IDs from session
-        dismissed = request.session.get('dismissed_notifications', {})
-
-        def not_dismissed(prefix, obj_id):
-            return str(obj_id) not in dismissed.get(prefix, [])
-
-        from django.utils import timezone as _tz
-        _now = _tz.now()
-
-        booking_requests = [
-            r for r in RoomBookingRequest.objects
-            .filter(status='pending', tat_deadline__gt=_now)
-            .select_related('room')
-            .order_by('-created_on')[:40]
-            if not_dismissed('booking', r.id)
-        ]
-
-        expiring_soon_bookings = [
-            r for r in RoomBookingRequest.objects
-            .filter(
-                status='pending',
-                tat_deadline__isnull=False,
-                tat_deadline__lte=_now + timezone.timedelta(hours=24),
-                tat_deadline__gt=_now,
-            )
-            .select_related('room')
-            .order_by('tat_deadline')[:20]
-            if not_dismissed('booking_expiring', r.id)
-        ]
-
-        cancel_requests = [
-            r for r in RoomCancellationRequest.objects
-            .filter(status='pending')
-            .select_related('booking', 'booking__room')
-            .order_by('-created_on')[:40]
-            if not_dismissed('cancel', r.id)
-        ]
-
-        stock_requests = [
-            r for r in StockRequest.objects
-            .filter(status='pending')
-            .select_related('item', 'room', 'requested_by')
-            .order_by('-created_on')[:40]
-            if not_dismissed('stock', r.id)
-        ]
-
-        tat_requests = [
-            r for r in IssueTimeExtensionRequest.objects
-            .filter(status='pending')
-            .select_related('issue', 'requested_by')
-            .order_by('-created_on')[:40]
-            if not_dismissed('tat', r.id)
-        ]
-
-        escalated_issues = [
-            r for r in Issue.objects
-            .filter(status='escalated', organisation=org)
-            .select_related('room', 'assigned_to')
-            .order_by('-updated_on')[:40]
-            if not_dismissed('esc', r.id)
-        ]
-
-        purchase_requests  = None
-        purchase_approvals = None
-
-        if is_central:
-            purchase_requests = [
-                r for r in Purchase.objects
-                .filter(status='requested', room__organisation=org)
-                .select_related('room', 'item', 'vendor')
-                .order_by('-created_on')[:40]
-                if not_dismissed('pur', r.id)
-            ]
-            # Room action log notifications for central admin
-            room_action_logs = []
-            try:
-                from inventory.models import RoomActionLog
-                room_action_logs = list(
-                    RoomActionLog.objects
-                    .filter(organisation=org, is_read=False)
-                    .order_by('-created_on')[:40]
-                )
-            except Exception:
-                pass
-        else:
-            purchase_approvals = [
-                r for r in Purchase.objects
-                .filter(status='approved', room__organisation=org)
-                .select_related('room', 'item', 'vendor')
-                .order_by('-created_on')[:40]
-                if not_dismissed('papp', r.id)
-            ]
-            room_action_logs = []
+        events, next_cursor = inbox_page(profile, request.GET.get('before'))
+        for event in events:
+            event.display = KIND_DISPLAY.get(event.kind, {})
+        # Shown once → read; the "New" marker is rendered from the state loaded above
+        mark_read(profile, [event.pk for event in events if event.state == 'unread'])
 
         context = {
-            'is_central':             is_central,
-            'booking_requests':       booking_requests,
-            'expiring_soon_bookings': expiring_soon_bookings,
-            'cancel_requests':        cancel_requests,
-            'stock_requests':         stock_requests,
-            'tat_requests':           tat_requests,
-            'escalated_issues':       escalated_issues,
-            'purchase_requests':      purchase_requests,
-            'purchase_approvals':     purchase_approvals,
-            'room_action_logs':       room_action_logs,
+            'is_central':    is_central,
+            'events':        events,
+            'next_cursor':   next_cursor,
+            'is_first_page': not request.GET.get('before'),
+            'email_mode':    profile.admin_email_mode,
+            'digest_window': settings.ADMIN_DIGEST_WINDOW_MINUTES,
         }
         return render(request, self.template_name, context)
 
     def post(self, request, *args, **kwargs):
         """
-        AJAX endpoint to persist notification dismissals in session.
-        Body: { "action": "dismiss", "prefix": "booking", "id": 42 }
+        AJAX endpoint to dismiss notifications.
+        Body: { "action": "dismiss", "id": 42 }
               { "action": "clear_all" }
+              { "action": "email_mode", "mode": "digest" }
         """
         import json
+        from inventory.notification_inbox import dismiss
+
+        profile = getattr(request.user, 'profile', None)
+        if not profile or not (profile.is_central_admin or profile.is_sub_admin):
+            return JsonResponse({'error': 'Unauthorized'}, status=403)
+
         try:
             data = json.loads(request.body)
         except Exception:
             return JsonResponse({'error': 'Invalid JSON'}, status=400)
 
-        dismissed = request.session.get('dismissed_notifications', {})
-
         if data.get('action') == 'dismiss':
-            prefix = data.get('prefix', '')
-            obj_id = str(data.get('id', ''))
-            if prefix and obj_id:
-                if prefix not in dismissed:
-                    dismissed[prefix] = []
-                if obj_id not in dismissed[prefix]:
-                    dismissed[prefix].append(obj_id)
-                request.session['dismissed_notifications'] = dismissed
-                request.session.modified = True
+            try:
+                event_id = int(data.get('id'))
+            except (TypeError, ValueError):
+                return JsonResponse({'error': 'Invalid id'}, status=400)
+            dismiss(profile, [event_id])
             return JsonResponse({'ok': True})
 
         elif data.get('action') == 'clear_all':
-            # Mark all current notifications as dismissed
-            request.session['dismissed_notifications'] = {}
-            request.session.modified = True
+            cleared = dismiss(profile)
+            return JsonResponse({'ok': True, 'cleared': cleared})
 
-            # Also mark room action logs as read for central admin
-            profile = getattr(request.user, 'profile', None)
-            if profile and profile.is_central_admin and not profile.is_sub_admin:
-                try:
-                    from inventory.models import RoomActionLog
-                    RoomActionLog.objects.filter(
-                        organisation=profile.org, is_read=False
-                    ).update(is_read=True)
-                except Exception:
-                    pass
-
-            return JsonResponse({'ok': True})
+        elif data.get('action') == 'email_mode':
+            mode = data.get('mode')
+            if mode not in dict(UserProfile.EMAIL_MODE_CHOICES):
+                return JsonResponse({'error': 'Invalid mode'}, status=400)
+            profile.admin_email_mode = mode
+            profile.save(update_fields=['admin_email_mode'])
+            return JsonResponse({'ok': True, 'mode': mode})
 
         return JsonResponse({'error': 'Unknown action'}, status=400)
 
@@ -2404,7 +2535,7 @@ def send_person_reset_email_api(request, people_slug):
             "Best regards,\nSFS IMS Team"
         )
         
-        safe_send_mail(
+        queue_mail(
             subject=subject,
             message=message,
             recipient_list=[user.email],
@@ -2455,7 +2586,7 @@ def transfer_user_data(old_email, new_email, profile):
         # === ADMIN SPECIFIC TRANSFERS ===
         if is_central_admin or is_sub_admin:
             # Transfer room bookings made by this user
-            RoomBooking.objects.filter(faculty_email=old_email).update(faculty_email=new_email)
+            RoomBooking.objects.filter(faculty_email=old_email).update(faculty_email=new_email, updated_on=timezone.now())
             
             # Transfer room booking requests
             RoomBookingRequest.objects.filter(faculty_email=old_email).update(faculty_email=new_email)
@@ -2475,7 +2606,7 @@ def transfer_user_data(old_email, new_email, profile):
         # Always transfer personal bookings and requests regardless of role
         # (Skip if already transferred above for admin roles to avoid duplicate queries)
         if not (is_central_admin or is_sub_admin):
-            RoomBooking.objects.filter(faculty_email=old_email).update(faculty_email=new_email)
+            RoomBooking.objects.filter(faculty_email=old_email).update(faculty_email=new_email, updated_on=timezone.now())
             RoomBookingRequest.objects.filter(faculty_email=old_email).update(faculty_email=new_email)
             RoomCancellationRequest.objects.filter(faculty_email=old_email).update(faculty_email=new_email)
         
@@ -2528,7 +2659,7 @@ def send_password_reset_email(user):
         )
         
         # Send email using the same method as PeopleCreateView
-        safe_send_mail(
+        queue_mail(
             subject=subject,
             message=message,
             recipient_list=[user.email],
@@ -2788,7 +2919,8 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
 
         from core.forms import AdminRoomBookingForm
         from inventory.booking_utils import format_room_list
-        from inventory.email import safe_send_mail, build_email_shell
+        from inventory.email import build_email_shell
+        from inventory.outbox import queue_mail
         import uuid as _uuid
         import os as _os
 
@@ -2878,9 +3010,17 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
             approved_note     = f"Directly booked by {admin_name} (Admin)",
             alternative_slots = alt_slots_json,
         )
-        booking.save()
-        if selected_rooms:
-            booking.rooms.set(selected_rooms)
+        try:
+            with transaction.atomic():
+                booking.save()
+                if selected_rooms:
+                    booking.rooms.set(selected_rooms)
+        except ValidationError as exc:
+            messages.error(request, " ".join(exc.messages))
+            return render(request, self.template_name, {
+                'form': form,
+                'refreshment_options': self._get_refreshment_options(),
+            })
 
         room_name     = format_room_list(booking)
         faculty_name  = booking.faculty_name
@@ -2926,7 +3066,7 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
             {"label": "Purpose",     "value": booking.purpose or '—'},
         ])
 
-        booking_sections = [
+        booking_sections = EmailSections([
             {
                 "title": "Booking Details",
                 "rows": rows,
@@ -2938,24 +3078,16 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
                     {"label": "Admin Email", "value": admin_email},
                 ],
             },
-        ]
+        ])
 
-        # ── Read requirements file for attachment ─────────────────────────
+        # ── Requirements file as an attachment; the outbox drainer fetches it
         _req_attachment = None
         if booking.requirements_doc and booking.requirements_doc.name:
-            import mimetypes as _mt
-            _fname = booking.requirements_doc.name.split('/')[-1]
-            _mime, _ = _mt.guess_type(_fname)
-            _mime = _mime or 'application/octet-stream'
-            try:
-                with booking.requirements_doc.storage.open(booking.requirements_doc.name, 'rb') as _f:
-                    _req_attachment = (_fname, _f.read(), _mime)
-            except Exception as _ae:
-                logger.info(f"[SubAdminBookVenue] Could not read requirements file: {_ae}")
+            _req_attachment = storage_attachment(booking.requirements_doc)
 
         # ── Email 1: Faculty — booking confirmed ──────────────────────────
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Your Room Booking is Confirmed — {room_name}",
                 message=(
                     f"Dear {faculty_name},\n\n"
@@ -2980,16 +3112,13 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
             logger.error(f"[SubAdminBookVenue] Faculty email failed: {_e}")
 
         # ── Email 2: All other sub-admins and central admins ──────────────
-        all_admin_emails = list(
-            UserProfile.objects.filter(
-                Q(is_central_admin=True) | Q(is_sub_admin=True)
-            ).values_list('user__email', flat=True)
-        )
+        all_admin_emails = recipient_directory.admin_emails()
         # Exclude the booking admin themselves
         notify_admins = [e for e in all_admin_emails if e.lower() != admin_email.lower()]
         if notify_admins:
             try:
-                safe_send_mail(
+                queue_admin_mail(
+                    'activity',
                     subject=f"[Blixtro] Admin Booking — {room_name} | {sl.strftime('%d %b %Y')}",
                     message=(
                         f"{admin_name} has directly booked a room for {faculty_name}.\n\n"
@@ -3015,7 +3144,7 @@ class SubAdminBookVenueView(LoginRequiredMixin, View):
         # ── Email 3: BOOKING_NOTIFICATION_EMAILS (the 5 configured recipients) ──
         if BOOKING_NOTIFICATION_EMAILS:
             try:
-                safe_send_mail(
+                queue_mail(
                     subject=(
                         f"[Blixtro] Room Booking Notification — "
                         f"{room_name} | {sl.strftime('%d %b %Y')}"
@@ -2,7 +2,8 @@ from django.conf import settings
 from django.http import JsonResponse, HttpResponseForbidden
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from inventory.models import Issue
+from inventory.deadline_scheduler import ISSUE, due_ids
+from inventory.tasks import escalate_expired_issues
 
 @csrf_exempt
 def run_escalation(request):
@@ -12,20 +13,20 @@ def run_escalation(request):
         return HttpResponseForbidden("Invalid cron token")
 
     now = timezone.now()
-    expired = Issue.objects.filter(
-        resolved=False,
-        tat_deadline__lt=now
-    )
-
-    escalated_count = 0
-    for issue in expired:
-        result = issue.escalate(notify=True)
-        if result.get("escalated"):
-            escalated_count += 1
+    # Only issues whose scheduled deadline has passed; no rescan of the table
+    due = due_ids(ISSUE, now)
+    result = escalate_expired_issues(issue_ids=due)
+    if result is None:
+        return JsonResponse({
+            "status": "busy",
+            "checked": 0,
+            "escalated": 0,
+            "timestamp": now
+        })
 
     return JsonResponse({
         "status": "ok",
-        "checked": expired.count(),
-        "escalated": escalated_count,
+        "checked": len(due),
+        "escalated": result["escalated"],
         "timestamp": now
     })
@@ -1232,7 +1232,7 @@ class IssueListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         room = self.get_room()
-        return Issue.objects.filter(room=room).order_by('-created_on')
+        return Issue.objects.filter(room=room).prefetch_related('duplicate_reports').order_by('-created_on')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1294,7 +1294,11 @@ class CentralIssuesListView(LoginRequiredMixin, ListView):
                 | Q(ticket_id__icontains=q)
             )
 
-        return qs.select_related('room', 'room__incharge', 'assigned_to').order_by('-created_on')
+        return (
+            qs.select_related('room', 'room__incharge', 'assigned_to')
+            .prefetch_related('duplicate_reports')
+            .order_by('-created_on')
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -1852,6 +1856,24 @@ class IssueTimeExtensionRequestView(LoginRequiredMixin, View):
         messages.success(request, "Time extension request submitted successfully.")
         return redirect("room_incharge:issue_list", room_slug=issue.room.slug)
 
+
+def _incharge_room_id(user, room_slug):
+    if not user.is_authenticated or not hasattr(user, 'profile'):
+        return None
+    return Room.objects.filter(slug=room_slug, incharge=user.profile).values_list('pk', flat=True).first()
+
+
+async def room_event_stream(request, room_slug):
+    """SSE push of stock request, issue and purchase changes for one room."""
+    from asgiref.sync import sync_to_async
+    from inventory.live_events import room_channel, stream_response
+
+    room_id = await sync_to_async(_incharge_room_id)(request.user, room_slug)
+    if room_id is None:
+        return HttpResponseForbidden()
+    return stream_response(request, [room_channel(room_id)])
+
+
 class RoomInchargeNotificationsView(LoginRequiredMixin, View):
     template_name = "room_incharge/notifications.html"
 
@@ -2022,9 +2044,10 @@ class SendIssueRemarkView(LoginRequiredMixin, View):
         # Email the reporter
         if issue.reporter_email:
             try:
-                from inventory.email import safe_send_mail, build_email_shell
+                from inventory.email import build_email_shell
+                from inventory.outbox import queue_mail
                 incharge_name = f"{profile.first_name} {profile.last_name}".strip() or 'Room Incharge'
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] Update on Your Issue — {issue.ticket_id}",
                     message=(
                         f"Dear {issue.created_by or 'Student'},\n\n"
@@ -6,10 +6,15 @@ from inventory.forms.student import IssueReportForm
 from inventory.models import Organisation, Issue, Room
 from config.api.student_data import fetch_student_data
 from django.conf import settings
-from inventory.email import safe_send_mail
+from inventory.outbox import queue_mail
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib import messages
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.urls import reverse
+from inventory.duplicate_issues import attach_report, attach_target, similar_open_issues
+from inventory.student_tickets import history_page, history_rows, history_validator, summary, ticket_status
 
 logger = logging.getLogger(__name__)
 
@@ -27,18 +32,8 @@ class StudentPortalLoginView(View):
         return render(request, self.template_name)
 
 
-class IssueReportView(View):
-    """
-    Student Issue Reporting + Tracking.
-    """
-    template_name = 'student/issue_report.html'
-    form_class = IssueReportForm
-    login_url = 'student:portal_login'
-
-    def dispatch(self, request, *args, **kwargs):
-        if not request.user.is_authenticated:
-            return redirect(self.login_url)
-        return super().dispatch(request, *args, **kwargs)
+class StudentEmailMixin:
+    """Resolves the signed-in student's verified email."""
 
     def _get_email(self) -> str:
         """
@@ -76,6 +71,20 @@ class IssueReportView(View):
 
         return ""
 
+
+class IssueReportView(StudentEmailMixin, View):
+    """
+    Student Issue Reporting + Tracking.
+    """
+    template_name = 'student/issue_report.html'
+    form_class = IssueReportForm
+    login_url = 'student:portal_login'
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return redirect(self.login_url)
+        return super().dispatch(request, *args, **kwargs)
+
     def _get_student_data(self, email: str):
         if not email:
             return None
@@ -89,6 +98,44 @@ class IssueReportView(View):
         except Exception:
             return None
 
+    def _reporter_name(self, email: str) -> str:
+        """Student name from the optional external student API, else the email."""
+        student_data = self._get_student_data(email)
+        if student_data and student_data.get("success"):
+            for s in student_data.get("data", []):
+                if (s.get("email") or "").lower() == email:
+                    return s["name"]
+        return email
+
+    def _attach(self, request, issue, email, description):
+        """File the report under an existing open ticket: no new Issue, incharge email or TAT."""
+        _, created = attach_report(issue, email, self._reporter_name(email), description)
+
+        try:
+            queue_mail(
+                subject=f"[Blixtro] Report Added to Ticket {issue.ticket_id}",
+                message=(
+                    f"This problem has already been reported, so your report was added to the existing ticket.\n\n"
+                    f"Ticket ID : {issue.ticket_id}\n"
+                    f"Subject   : {issue.subject}\n"
+                    f"Room      : {issue.room.room_name}\n"
+                    f"Status    : {issue.get_status_display()}\n"
+                    f"TAT       : {issue.tat_deadline}\n"
+                ),
+                from_email=None,
+                recipient_list=[email],
+                fail_silently=True,
+            )
+        except Exception:
+            pass
+
+        messages.success(
+            request,
+            f"Your report was added to ticket {issue.ticket_id}." if created
+            else f"You have already reported ticket {issue.ticket_id}; your details were updated."
+        )
+        return redirect(f"{reverse('student:report_issue')}?ticket_id={issue.ticket_id}")
+
     def get(self, request, *args, **kwargs):
         email = self._get_email()
         form  = self.form_class()
@@ -101,6 +148,7 @@ class IssueReportView(View):
 
         ticket       = None
         tickets      = None
+        next_cursor  = None
         search_email = request.GET.get("email", "").strip()
 
         if request.GET.get("ticket_id"):
@@ -110,14 +158,13 @@ class IssueReportView(View):
                 pass
 
         if search_email:
-            tickets = Issue.objects.filter(
-                reporter_email__iexact=search_email
-            ).order_by("-created_on")
+            tickets, next_cursor = history_page(search_email, request.GET.get("cursor"))
 
         return render(request, self.template_name, {
             "form":              form,
             "ticket":            ticket,
             "tickets":           tickets,
+            "next_cursor":       next_cursor,
             "categories":        Room.ROOM_CATEGORIES,
             "selected_category": selected_category,
             "user":              request.user,
@@ -147,16 +194,29 @@ class IssueReportView(View):
         description = form.cleaned_data["description"]
         room        = form.cleaned_data["room"]
 
-        # Optional external student API lookup
-        student_data = self._get_student_data(email)
-        student = None
-        if student_data and student_data.get("success"):
-            for s in student_data.get("data", []):
-                if (s.get("email") or "").lower() == email:
-                    student = s
-                    break
-
-        created_by   = student["name"] if student else email
+        # Same problem already reported in this room: attach instead of opening a new ticket
+        attach_to = request.POST.get("attach_to")
+        stale     = False
+        if attach_to:
+            target = attach_target(room, attach_to)
+            if target:
+                return self._attach(request, target, email, description)
+            stale = True
+            messages.warning(
+                request,
+                f"Ticket {attach_to} is no longer open for this room. Please review your report and submit it again."
+            )
+        if stale or not request.POST.get("confirm_new"):
+            duplicates = similar_open_issues(room, subject, description)
+            if duplicates or stale:
+                return render(request, self.template_name, {
+                    "form":          form,
+                    "duplicates":    duplicates,
+                    "categories":    Room.ROOM_CATEGORIES,
+                    "student_email": email,
+                })
+
+        created_by   = self._reporter_name(email)
         organisation = room.organisation  # always use the room's own org, not first() in DB
 
         issue = Issue(
@@ -184,7 +244,7 @@ class IssueReportView(View):
             and issue.assigned_to.user.email
         ):
             try:
-                safe_send_mail(
+                queue_mail(
                     subject=f"[Blixtro] New Ticket {issue.ticket_id}: {issue.subject}",
                     message=(
                         f"You have been assigned a new ticket.\n\n"
@@ -200,7 +260,7 @@ class IssueReportView(View):
 
         # Confirm to student
         try:
-            safe_send_mail(
+            queue_mail(
                 subject=f"[Blixtro] Ticket Received: {issue.ticket_id}",
                 message=(
                     f"Your ticket has been created.\n\n"
@@ -222,8 +282,9 @@ class TicketStatusView(View):
     template_name = 'student/ticket_status.html'
 
     def get(self, request, *args, **kwargs):
-        ticket  = None
-        tickets = None
+        ticket      = None
+        tickets     = None
+        next_cursor = None
 
         ticket_id    = request.GET.get("ticket_id")
         search_email = request.GET.get("email", "").strip()
@@ -235,11 +296,61 @@ class TicketStatusView(View):
                 pass
 
         if search_email:
-            tickets = Issue.objects.filter(
-                reporter_email__iexact=search_email
-            ).order_by("-created_on")
+            tickets, next_cursor = history_page(search_email, request.GET.get("cursor"))
 
         return render(request, self.template_name, {
-            "ticket":  ticket,
-            "tickets": tickets,
-        })
\ No newline at end of file
+            "ticket":      ticket,
+            "tickets":     tickets,
+            "next_cursor": next_cursor,
+        })
+
+
+# ─────────────────────────────────────────────────────────────────────
+# JSON API (Capacitor app)
+# ─────────────────────────────────────────────────────────────────────
+
+def _conditional_json(request, etag, build):
+    """JsonResponse from build(), or 304 when the client already holds `etag`."""
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(build())
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+class TicketHistoryAPIView(StudentEmailMixin, View):
+    """
+    GET: the signed-in student's tickets, newest first.
+    ?cursor= continues from the `next_cursor` of the previous page.
+    """
+    http_method_names = ['get']
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get(self, request, *args, **kwargs):
+        email = self._get_email()
+        if not email:
+            return JsonResponse({'error': 'Your session email could not be verified'}, status=403)
+
+        cursor = request.GET.get('cursor') or None
+
+        def build():
+            tickets, next_cursor = history_rows(email, cursor)
+            return {'tickets': tickets, 'next_cursor': next_cursor}
+
+        return _conditional_json(request, history_validator(email, cursor), build)
+
+
+class TicketStatusAPIView(View):
+    """GET: compact status of one ticket, with an ETag for cheap polling."""
+    http_method_names = ['get']
+
+    def get(self, request, ticket_id, *args, **kwargs):
+        row, etag = ticket_status(ticket_id)
+        if row is None:
+            return JsonResponse({'error': 'Ticket not found'}, status=404)
+        return _conditional_json(request, etag, lambda: {'ticket': summary(row)})
\ No newline at end of file
@@ -0,0 +1,82 @@
+/**
+ * Live notification stream for Blixtro IMS
+ * Subscribes to a Server-Sent Events endpoint and falls back to polling when
+ * the stream is unavailable (no EventSource, WSGI-only deployment, network
+ * errors). While the stream is healthy the poll timer is stopped.
+ *
+ *   LiveEvents.connect({
+ *     url:          '/central_admin/events/',
+ *     onCounts:     function(counts) {...},   // merged badge counts
+ *     onItem:       function(item) {...},     // new / changed item
+ *     poll:         function() {...},         // degraded mode
+ *     pollInterval: 60000,
+ *   });
+ */
+
+(function() {
+    'use strict';
+
+    const LiveEvents = {
+        connect(options) {
+            const opts = Object.assign({ pollInterval: 60000 }, options);
+            let counts = null;
+            let pollTimer = null;
+            let failures = 0;
+
+            function startPolling() {
+                if (pollTimer || !opts.poll) return;
+                opts.poll();
+                pollTimer = setInterval(opts.poll, opts.pollInterval);
+            }
+
+            function stopPolling() {
+                if (pollTimer) clearInterval(pollTimer);
+                pollTimer = null;
+            }
+
+            function mergeCounts(update) {
+                if (!counts) {
+                    counts = Object.assign({}, update);
+                } else {
+                    // Pushes carry either the global or the org slice; keep keys this page already shows
+                    Object.keys(update).forEach(function(key) {
+                        if (key in counts) counts[key] = update[key];
+                    });
+                }
+                counts.total = Object.keys(counts)
+                    .filter(function(key) { return key !== 'total'; })
+                    .reduce(function(sum, key) { return sum + (counts[key] || 0); }, 0);
+                if (opts.onCounts) opts.onCounts(counts);
+            }
+
+            if (!window.EventSource || !opts.url) {
+                startPolling();
+                return null;
+            }
+
+            const source = new EventSource(opts.url, { withCredentials: true });
+            source.addEventListener('open', function() {
+                failures = 0;
+                stopPolling();
+            });
+            source.addEventListener('counts', function(e) {
+                mergeCounts(JSON.parse(e.data));
+            });
+            source.addEventListener('item', function(e) {
+                if (opts.onItem) opts.onItem(JSON.parse(e.data));
+            });
+            source.addEventListener('error', function() {
+                failures += 1;
+                // CLOSED means the server opted out (204) or refused; give up on streaming
+                if (source.readyState === EventSource.CLOSED || failures >= 3) {
+                    source.close();
+                }
+                startPolling();
+            });
+
+            return source;
+        },
+    };
+
+    window.LiveEvents = LiveEvents;
+})();